@@ -0,0 +1,98 @@
+"""
+Benchmark: time-to-first-token for AIService, buffered vs streamed.
+
+Serves an OpenAI-compatible SSE completion from a local stub that emits
+``--tokens`` tokens ``--token-ms`` apart (after ``--prefill-ms`` of
+"prompt processing"), then measures:
+
+  buffered — ``generate_readme`` (``stream: false``); the first token is only
+             visible once the whole completion has arrived, which is what the
+             old WebSocket path forwarded in fake 80-char slices
+  streamed — ``stream_generate``; first token as soon as the model emits it
+
+    python benchmarks/bench_ai_streaming.py --tokens 400 --token-ms 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+import services.ai_service as ai  # noqa: E402
+from stub_server import StubRequest, StubResponse, StubServer, percentile  # noqa: E402
+
+
+def _make_handler(n_tokens: int, token_delay: float, prefill: float):
+    async def handler(request: StubRequest) -> StubResponse:
+        payload = json.loads(request.body)
+        await asyncio.sleep(prefill)
+        if not payload.get("stream"):
+            await asyncio.sleep(n_tokens * token_delay)
+            text = "tok " * n_tokens
+            return StubResponse.json({"choices": [{"message": {"content": text}}]})
+
+        async def events():
+            for _ in range(n_tokens):
+                event = {"choices": [{"delta": {"content": "tok "}}]}
+                yield f"data: {json.dumps(event)}\n\n".encode()
+                await asyncio.sleep(token_delay)
+            yield b"data: [DONE]\n\n"
+
+        return StubResponse(body=events(), headers={"Content-Type": "text/event-stream"})
+
+    return handler
+
+
+async def _run(args) -> None:
+    server = StubServer(_make_handler(args.tokens, args.token_ms / 1000, args.prefill_ms / 1000))
+    base_url = await server.start()
+    svc = ai.AIService()
+    svc.invoke_url = f"{base_url}/v1/chat/completions"
+
+    buffered_ttft: list[float] = []
+    streamed_ttft: list[float] = []
+    streamed_total: list[float] = []
+
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        await svc.generate_readme("prompt")
+        buffered_ttft.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        first: float | None = None
+        async for _token in svc.stream_generate("prompt"):
+            if first is None:
+                first = (time.perf_counter() - start) * 1000
+        streamed_ttft.append(first or 0.0)
+        streamed_total.append((time.perf_counter() - start) * 1000)
+
+    await ai.close_ai_client()
+    await server.stop()
+
+    print(f"buffered: TTFT p50={percentile(buffered_ttft, 50):.0f}ms  p95={percentile(buffered_ttft, 95):.0f}ms")
+    print(
+        f"streamed: TTFT p50={percentile(streamed_ttft, 50):.0f}ms  p95={percentile(streamed_ttft, 95):.0f}ms  "
+        f"(full completion p50={percentile(streamed_total, 50):.0f}ms)"
+    )
+    print(f"connections opened for {2 * args.runs} generations: {server.connections}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--token-ms", type=float, default=10.0)
+    parser.add_argument("--prefill-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark: WebSocket latency while a large repo is chunked — on the event
+loop vs on the chunk pool.
+
+Serves a WebSocket echo endpoint with uvicorn, and while
+``IngestionService._chunk_blocks`` chunks a synthetic ``--files``-file repo
+(Python, JS, Java, Markdown and plain-text files of about ``--kb`` KB) a
+client pings it every 10 ms.  Latency is measured from when each ping was
+due, and pings that couldn't even be sent while the loop was blocked count
+with the delay they would have seen.
+
+  inline — every file chunked on the event loop, as before
+  pool   — ``ChunkPool`` with ``--workers`` processes, batches of
+           ``settings.chunk_batch_chars``
+
+Reports chunking wall time and ping p50 / p95 / max; both modes must
+produce the same chunks.
+
+    python benchmarks/bench_chunk_pool.py --files 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect  # noqa: E402
+from stub_server import percentile  # noqa: E402
+
+_SOURCES = {
+    ".py": "def handler_{i}(event):\n    total = sum(event.values())\n    return {{'id': {i}, 'total': total}}\n\n",
+    ".js": "export function handler{i}(req, res) {{\n  res.json({{ id: {i} }});\n}}\n\n",
+    ".java": "@Service\npublic class Handler{i} {{\n    public int id() {{ return {i}; }}\n}}\n",
+    ".md": "## Section {i}\n\nSome prose about the project. It has sentences! Does it? Yes.\n\n",
+    ".txt": "line {i} of a log file without much structure in it at all\n",
+}
+
+
+def _repo(files: int, kb: int) -> list[tuple[str, str]]:
+    rng = random.Random(0)
+    exts = list(_SOURCES)
+    repo = []
+    for i in range(files):
+        ext = exts[i % len(exts)]
+        unit = _SOURCES[ext].format(i=i)
+        size = rng.randint(kb * 512, kb * 1536)
+        repo.append((f"pkg{i % 61}/mod{i}{ext}", unit * max(1, size // len(unit))))
+    return repo
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/ws")
+    async def echo(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            while True:
+                await websocket.send_text(await websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+
+    return app
+
+
+async def _run(mode: str, repo: list[tuple[str, str]], workers: int) -> dict:
+    import uvicorn
+    import websockets
+
+    from config import settings
+    from services.chunk_pool import get_chunk_pool, shutdown_chunk_pool
+    from services.ingestion_service import IngestionService
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(_app(), log_level="warning"))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    inline_max = 10**12 if mode == "inline" else 0
+    with patch.object(settings, "chunk_inline_max_chars", inline_max), \
+         patch.object(settings, "chunk_workers", workers):
+        if mode == "pool":
+            get_chunk_pool()   # workers spawn on first use; not part of the measurement
+        svc = IngestionService.__new__(IngestionService)
+        latencies: list[float] = []
+        done = asyncio.Event()
+
+        async with websockets.connect(f"ws://127.0.0.1:{port}/ws") as ws:
+            async def pinger() -> None:
+                due = time.perf_counter()
+                while True:
+                    await ws.send("ping")
+                    await ws.recv()
+                    now = time.perf_counter()
+                    # A stalled loop delays every ping due meanwhile, not just this one
+                    while due <= now:
+                        latencies.append((now - due) * 1000)
+                        due += 0.01
+                    if done.is_set():
+                        return
+                    await asyncio.sleep(due - now)
+
+            ping = asyncio.create_task(pinger())
+            await asyncio.sleep(0.2)   # baseline pings before chunking starts
+            t0 = time.perf_counter()
+            chunks = await svc._chunk_blocks(repo, {}, lambda msg: None)
+            elapsed = time.perf_counter() - t0
+            done.set()
+            await ping
+        shutdown_chunk_pool()
+
+    server.should_exit = True
+    await serving
+    return {
+        "chunks": chunks,
+        "seconds": elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "max": max(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5_000)
+    parser.add_argument("--kb", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=0, help="0 = cores, at most 4")
+    args = parser.parse_args()
+
+    repo = _repo(args.files, args.kb)
+    print(f"{len(repo)} files, {sum(len(t) for _, t in repo) / 1e6:.1f} MB, {os.cpu_count()} cores")
+    results = {}
+    for mode in ("inline", "pool"):
+        r = results[mode] = asyncio.run(_run(mode, repo, args.workers))
+        print(
+            f"{mode:>6}: {len(r['chunks'])} chunks in {r['seconds'] * 1000:7.0f}ms  "
+            f"ping p50={r['p50']:6.1f}ms  p95={r['p95']:7.1f}ms  max={r['max']:7.1f}ms"
+        )
+    assert results["inline"]["chunks"] == results["pool"]["chunks"], "chunks differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Benchmark: a repo's chunks as a list of pydantic ``Chunk`` models vs a
+``ChunkStore``.
+
+Builds ``--chunks`` synthetic chunks the way a large repo's ingestion
+produces them (about 20 per file over nested directories; mostly
+functions, some class heads, docs, config and loose code, with symbols
+and line spans), and reports:
+
+  memory    — traced allocations of the list of models and of the store,
+              per 100k chunks, text included and text excluded
+  select    — ``_select_chunks_for_embedding``: the previous version
+              (``sorted`` by rank over the models) vs the store's
+  features  — ``_identify_features`` up to the AI call: the previous
+              version, whose ``c not in priority`` compares each function
+              chunk with every config/class model, vs the store's
+
+Both versions must pick the same chunks and build the same prompt.  The
+previous ``_identify_features`` is quadratic, so it only runs at the
+``--feature-sizes``; the store's also runs at ``--chunks``.
+
+    python benchmarks/bench_chunk_store.py --chunks 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+from models import Chunk  # noqa: E402
+from services.chunk_store import ChunkStore  # noqa: E402
+from services.ingestion_service import (  # noqa: E402
+    IngestionService,
+    _extract_structural_hints,
+    _select_chunks_for_embedding,
+)
+
+_TYPES = ["function"] * 70 + ["class"] * 8 + ["other"] * 12 + ["doc"] * 8 + ["config"] * 2
+_LANGUAGES = {"function": "python", "class": "python", "other": "python", "doc": "markdown", "config": "toml"}
+_WORDS = "self request response config value items total result cache handler user order".split()
+
+
+def _chunks(n: int) -> list[Chunk]:
+    rng = random.Random(0)
+    chunks = []
+    for i in range(n):
+        ctype = rng.choice(_TYPES)
+        path = f"src/pkg{i // 400 % 37}/sub{i // 100 % 11}/mod{i // 20}.py"
+        body = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 110)))
+        symbol = f"{rng.choice(_WORDS)}_{i % 50}" if ctype in ("function", "class") else ""
+        chunks.append(Chunk(
+            text=f"def {symbol or 'f'}():\n    {body}", file_path=path, chunk_type=ctype,
+            language=_LANGUAGES[ctype], symbol=symbol, scope=f"Service{i // 20}" if symbol else "",
+            start_line=i % 400 + 1, end_line=i % 400 + 12,
+        ))
+    return chunks
+
+
+# ── The previous versions, verbatim ───────────────────────────────────────────
+
+def _legacy_select(chunks: list[Chunk], max_chunks: int = 300) -> list[Chunk]:
+    import os
+    # Priority: config > class (annotated) > function > other
+    priority = {"config": 0, "class": 1, "function": 2, "doc": 3, "other": 4}
+    scored = sorted(chunks, key=lambda c: priority.get(c.chunk_type, 4))
+
+    # Ensure directory diversity
+    seen_dirs: dict[str, int] = {}
+    selected: list[Chunk] = []
+    for c in scored:
+        d = os.path.dirname(c.file_path)
+        count = seen_dirs.get(d, 0)
+        if count < 10 or len(selected) < max_chunks // 2:
+            selected.append(c)
+            seen_dirs[d] = count + 1
+        if len(selected) >= max_chunks:
+            break
+    return selected
+
+
+def _legacy_feature_context(chunks: list[Chunk]) -> tuple[list[str], str, str]:
+    """``_identify_features`` before the store, up to the prompt's variable parts."""
+    import os
+
+    # 1. Structural signals from file paths
+    file_paths = [c.file_path for c in chunks]
+    structural_hints = _extract_structural_hints(file_paths)
+
+    # 2. Build a concise file name inventory grouped by directory
+    dir_files: dict[str, list[str]] = {}
+    for p in file_paths:
+        d = os.path.dirname(p)
+        base = os.path.basename(p)
+        dir_files.setdefault(d, []).append(base)
+
+    inventory_lines: list[str] = []
+    for d in sorted(dir_files):
+        short_dir = "/".join(d.replace("\\", "/").split("/")[-2:]) or d
+        names = ", ".join(sorted(dir_files[d])[:15])
+        if len(dir_files[d]) > 15:
+            names += f", ... (+{len(dir_files[d]) - 15} more)"
+        inventory_lines.append(f"{short_dir}/ → {names}")
+    inventory = "\n".join(inventory_lines)[:4000]
+
+    # 3. Prioritize high-signal chunks with directory diversity
+    priority = [c for c in chunks if c.chunk_type in ("config", "class")]
+    priority += [c for c in chunks if c.chunk_type == "function" and c not in priority]
+
+    seen_dirs: set[str] = set()
+    sample: list[Chunk] = []
+    for c in priority:
+        d = os.path.dirname(c.file_path)
+        is_new_dir = d not in seen_dirs
+        if is_new_dir:
+            seen_dirs.add(d)
+        if is_new_dir or len(sample) < 30:
+            sample.append(c)
+        if len(sample) >= 40:
+            break
+
+    context = "\n\n".join(
+        f"[{c.file_path} | {c.chunk_type}]\n{c.text[:600]}" for c in sample
+    )
+    return structural_hints, inventory, context
+
+
+# ── Measurements ──────────────────────────────────────────────────────────────
+
+class _PromptAI:
+    """Stands in for the AI service: keeps the prompt, answers instantly."""
+
+    def __init__(self):
+        self.prompt = ""
+
+    async def generate_readme(self, prompt: str) -> str:
+        self.prompt = prompt
+        return "Feature one\nFeature two"
+
+
+def _store_prompt(store: ChunkStore) -> str:
+    ai = _PromptAI()
+    svc = IngestionService(ai_service=ai, rag_service=None)
+    asyncio.run(svc._identify_features(store, "o", "r"))
+    return ai.prompt
+
+
+def _best(fn, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _traced(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--feature-sizes", default="1000,2000,5000",
+                        help="sizes the quadratic previous _identify_features runs at")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Models share their strings with ``fields``, so tracing them measures the
+    # models alone; their text is added as the strings' own size
+    fields = [c.model_dump() for c in _chunks(args.chunks)]
+    text_bytes = sum(len(f["text"].encode()) for f in fields)
+    str_bytes = sum(sys.getsizeof(f["text"]) for f in fields)
+    models, models_bytes = _traced(lambda: [Chunk(**f) for f in fields])
+    store, store_bytes = _traced(lambda: ChunkStore.from_chunks(models))
+    per = 100_000 / args.chunks / 1e6
+    print(f"{args.chunks} chunks, {text_bytes / 1e6:.1f} MB of text, {len(set(store.file_paths()))} files")
+    print(f"memory per 100k chunks:  models {(models_bytes + str_bytes) * per:6.1f} MB "
+          f"({models_bytes * per:5.1f} MB without text)   "
+          f"store {store_bytes * per:6.1f} MB ({(store_bytes - text_bytes) * per:5.1f} MB without text)")
+
+    assert _select_chunks_for_embedding(store) == _legacy_select(models)
+    old = _best(lambda: _legacy_select(models), args.repeat)
+    new = _best(lambda: _select_chunks_for_embedding(store), args.repeat)
+    print(f"select ({args.chunks} chunks):     models {old * 1000:8.1f} ms   store {new * 1000:8.1f} ms   "
+          f"{old / new:6.1f}x")
+
+    for n in [int(s) for s in args.feature_sizes.split(",") if s] + [args.chunks]:
+        subset = store[:n]
+        prompt = _store_prompt(subset)
+        new = _best(lambda: _store_prompt(subset), args.repeat)
+        if n == args.chunks and str(n) not in args.feature_sizes.split(","):
+            print(f"features ({n} chunks): {'':>26} store {new * 1000:8.1f} ms")
+            continue
+        hints, inventory, context = _legacy_feature_context(models[:n])
+        assert inventory in prompt and context in prompt and all(h in prompt for h in hints), "prompts differ"
+        old = _best(lambda: _legacy_feature_context(models[:n]), max(1, args.repeat // 2))
+        print(f"features ({n} chunks):  models {old * 1000:8.1f} ms   store {new * 1000:8.1f} ms   "
+              f"{old / new:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: inference on the default executor vs the dedicated compute pool.
+
+Each of ``--sessions`` concurrent sessions runs ``--jobs`` inference jobs
+back to back: a torch forward pass shaped like a bge-small encoder layer
+stack over a batch of texts (a stand-in for embedding or reranking).
+A probe meanwhile issues a no-op ``asyncio.to_thread`` call every 20 ms,
+which is how gitingest and other blocking calls get scheduled.
+
+  default — ``asyncio.to_thread`` with torch's default thread count, as
+            RAGService did before
+  pool    — ``ComputePool`` with ``--workers`` workers and
+            cores / workers torch threads each
+
+Reports jobs/s, p95 job latency and p95 probe latency (how long unrelated
+blocking work waited for an executor thread) at 1, 4 and 16 sessions.
+
+    python benchmarks/bench_compute_pool.py --jobs 10 --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+from stub_server import percentile  # noqa: E402
+
+
+def _model():
+    import torch
+
+    torch.manual_seed(0)
+    layers = [torch.nn.Sequential(torch.nn.Linear(384, 1536), torch.nn.GELU(), torch.nn.Linear(1536, 384))
+              for _ in range(6)]
+    model = torch.nn.Sequential(*layers).eval()
+    batch = torch.randn(16, 64, 384)
+
+    def infer() -> float:
+        with torch.inference_mode():
+            return float(model(batch).sum())
+
+    return infer
+
+
+async def _run(mode: str, sessions: int, jobs: int, workers: int) -> dict:
+    from services.compute_pool import ComputePool
+
+    infer = _model()
+    if mode == "pool":
+        pool = ComputePool(workers=workers, torch_threads=0, max_queue=10**6)
+        submit = lambda: pool.run(infer)  # noqa: E731
+    else:
+        submit = lambda: asyncio.to_thread(infer)  # noqa: E731
+    infer()   # warm-up
+
+    latencies: list[float] = []
+    probes: list[float] = []
+    done = asyncio.Event()
+
+    async def session() -> None:
+        for _ in range(jobs):
+            t0 = time.perf_counter()
+            await submit()
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    async def probe() -> None:
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.to_thread(lambda: None)
+            probes.append((time.perf_counter() - t0) * 1000)
+            await asyncio.sleep(0.02)
+
+    prober = asyncio.create_task(probe())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(session() for _ in range(sessions)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await prober
+    return {
+        "jobs_per_s": sessions * jobs / elapsed,
+        "p95_ms": percentile(latencies, 95),
+        "probe_p95_ms": percentile(probes, 95),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--mode", choices=("default", "pool"), help=argparse.SUPPRESS)
+    parser.add_argument("--sessions", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(_run(args.mode, args.sessions, args.jobs, args.workers))))
+        return
+
+    print(f"{os.cpu_count()} cores, {args.jobs} jobs per session, pool workers={args.workers}")
+    for sessions in (1, 4, 16):
+        for mode in ("default", "pool"):
+            # Fresh process per run: torch's thread pools can't be resized once used
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--sessions", str(sessions),
+                 "--jobs", str(args.jobs), "--workers", str(args.workers)],
+                capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(
+                f"{sessions:3d} sessions {mode:>7}: {r['jobs_per_s']:6.1f} jobs/s  "
+                f"p95={r['p95_ms']:7.1f}ms  probe p95={r['probe_p95_ms']:7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: embedding a session's chunks with and without the embedding cache.
+
+Fills an on-disk ``EmbeddingCache`` with ``--entries`` 384-dim vectors (the
+bge-small shape), then times what a new session for an already-ingested
+repo costs:
+
+  open   — reopening the cache from disk, as after a restart
+  lookup — fetching the vectors of ``--chunks`` chunk texts
+  model  — embedding the same texts with bge-small (skipped when the model
+           can't be loaded, e.g. offline without a local copy)
+
+    python benchmarks/bench_embedding_cache.py --entries 200000 --chunks 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+import numpy as np  # noqa: E402
+
+from services.embedding_cache import EmbeddingCache, embedding_key  # noqa: E402
+from services.rag_service import _EMBEDDING_MODEL  # noqa: E402
+
+_DIM = 384
+
+
+def _texts(n: int) -> list[str]:
+    return [f"def handler_{i}(request):\n    return render(request, 'page_{i}.html')\n" * 4 for i in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--chunks", type=int, default=150)
+    args = parser.parse_args()
+
+    texts = _texts(args.entries)
+    keys = [embedding_key(_EMBEDDING_MODEL, t) for t in texts]
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache(directory)
+        for start in range(0, args.entries, 10_000):
+            batch = keys[start:start + 10_000]
+            cache.put_many(batch, rng.standard_normal((len(batch), _DIM), dtype=np.float32))
+        on_disk = sum(f.stat().st_size for f in Path(directory).iterdir())
+
+        t0 = time.perf_counter()
+        reopened = EmbeddingCache(directory)
+        open_ms = (time.perf_counter() - t0) * 1000
+
+        session = texts[-args.chunks:]
+        t0 = time.perf_counter()
+        found = reopened.get_many([embedding_key(_EMBEDDING_MODEL, t) for t in session])
+        lookup_ms = (time.perf_counter() - t0) * 1000
+        assert len(found) == args.chunks
+
+    print(f"cache:  {args.entries} vectors, {on_disk / 1e6:.1f} MB on disk")
+    print(f"open:   {open_ms:8.1f} ms (restart)")
+    print(f"lookup: {lookup_ms:8.2f} ms for {args.chunks} chunks")
+
+    try:
+        from chromadb.utils import embedding_functions
+
+        ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=_EMBEDDING_MODEL)
+        ef(session[:2])   # warm-up: model load and first-call overhead
+    except Exception as exc:
+        print(f"model:  skipped ({type(exc).__name__}: {exc})")
+        return
+    t0 = time.perf_counter()
+    ef(session)
+    model_ms = (time.perf_counter() - t0) * 1000
+    print(f"model:  {model_ms:8.1f} ms for {args.chunks} chunks ({model_ms / lookup_ms:.0f}× the lookup)")
+
+
+if __name__ == "__main__":
+    main()
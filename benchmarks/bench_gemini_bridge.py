@@ -0,0 +1,120 @@
+"""
+Benchmark: Gemini thread → asyncio bridge, polling vs call_soon_threadsafe.
+
+Runs ``--streams`` concurrent fake Gemini streams (each a blocking iterator
+on a worker thread that waits ``--ttft-ms`` before the first chunk, then
+emits ``--chunks`` chunks ``--chunk-ms`` apart) and reports, for the old
+``queue.Queue`` + ``sleep(0.05)`` polling consumer and the new
+``stream_in_thread`` bridge:
+
+  - per-chunk latency (producer emit → consumer receive), p50/p95
+  - consumer wakeups (times a stream's coroutine was resumed) and process
+    CPU time
+
+    python benchmarks/bench_gemini_bridge.py --streams 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from queue import Empty, Queue
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+
+from services.gemini_service import stream_in_thread  # noqa: E402
+from stub_server import percentile  # noqa: E402
+
+
+class _Chunk:
+    __slots__ = ("text",)
+
+    def __init__(self, emitted_at: float):
+        self.text = emitted_at   # smuggle the emit timestamp through .text
+
+
+def _fake_stream(n_chunks: int, interval: float, ttft: float):
+    def open_stream():
+        time.sleep(ttft)
+        for _ in range(n_chunks):
+            time.sleep(interval)
+            yield _Chunk(time.perf_counter())
+    return open_stream
+
+
+async def _legacy_consumer(open_stream, executor, latencies: list[float], wakeups: list[int]) -> None:
+    """The previous implementation: thread pushes to queue.Queue, loop polls."""
+    q: Queue = Queue()
+
+    def produce():
+        try:
+            for chunk in open_stream():
+                q.put(chunk.text)
+        finally:
+            q.put(None)
+
+    asyncio.get_running_loop().run_in_executor(executor, produce)
+    while True:
+        wakeups[0] += 1
+        try:
+            item = q.get_nowait()
+        except Empty:
+            await asyncio.sleep(0.05)
+            continue
+        if item is None:
+            break
+        latencies.append((time.perf_counter() - item) * 1000)
+
+
+async def _bridge_consumer(open_stream, executor, latencies: list[float], wakeups: list[int]) -> None:
+    wakeups[0] += 1   # the final resume that observes end-of-stream
+    async for emitted_at in stream_in_thread(open_stream, executor):
+        wakeups[0] += 1
+        latencies.append((time.perf_counter() - emitted_at) * 1000)
+
+
+async def _run(consumer, n_streams: int, n_chunks: int, interval: float, ttft: float) -> dict:
+    executor = ThreadPoolExecutor(max_workers=n_streams)
+    latencies: list[float] = []
+    wakeups = [0]
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(
+        consumer(_fake_stream(n_chunks, interval, ttft), executor, latencies, wakeups) for _ in range(n_streams)
+    ))
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    executor.shutdown()
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "wakeups": wakeups[0],
+        "cpu": cpu,
+        "wall": wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=20)
+    parser.add_argument("--chunk-ms", type=float, default=100.0)
+    parser.add_argument("--ttft-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    for name, consumer in (("polling", _legacy_consumer), ("bridge", _bridge_consumer)):
+        r = asyncio.run(_run(consumer, args.streams, args.chunks, args.chunk_ms / 1000, args.ttft_ms / 1000))
+        print(
+            f"{name:>8}: chunk latency p50={r['p50']:.2f}ms p95={r['p95']:.2f}ms  "
+            f"wakeups={r['wakeups']}  cpu={r['cpu']:.2f}s  wall={r['wall']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: shared pooled GitHub client vs a fresh client per call.
+
+Replays the GitHub call path of one ``/generate-readme`` request
+(default branch → latest commit SHA → recursive tree) against a local stub
+server and reports connections opened (≈ TCP/TLS handshakes) and p50/p95
+latency per request.
+
+The stub adds ``--handshake-ms`` of delay to every new connection to model
+the RTTs a TLS handshake to api.github.com costs; plain HTTP is used locally,
+so HTTP/2 is not negotiated here and the win shown is keep-alive reuse alone.
+
+    python benchmarks/bench_github_pool.py --requests 200 --handshake-ms 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("GITHUB_HTTP2", "false")
+
+import httpx  # noqa: E402
+
+import services.github_service as gh  # noqa: E402
+import services.repo_cache as rc  # noqa: E402
+from stub_server import StubRequest, StubResponse, StubServer, percentile  # noqa: E402
+
+_shared_client = gh.get_github_client
+
+
+async def _handler(request: StubRequest) -> StubResponse:
+    await asyncio.sleep(0.002)  # server think time
+    if "/commits" in request.path:
+        return StubResponse.json([{"sha": "a" * 40}])
+    if "/git/trees/" in request.path:
+        return StubResponse.json({"tree": [{"path": "main.py", "type": "blob"}]})
+    return StubResponse.json({"default_branch": "main"})
+
+
+async def _run(mode: str, n_requests: int, concurrency: int, handshake_ms: float) -> dict:
+    server = StubServer(_handler, handshake_delay=handshake_ms / 1000)
+    base_url = await server.start()
+    gh.GITHUB_API = rc.GITHUB_API = base_url
+    fresh_clients: list[httpx.AsyncClient] = []
+
+    if mode == "fresh":
+        # Reproduce the old behaviour: a brand-new client for every call.
+        def _fresh() -> httpx.AsyncClient:
+            client = httpx.AsyncClient(headers=gh.github_headers(), timeout=30)
+            fresh_clients.append(client)
+            return client
+        gh.get_github_client = _fresh
+    else:
+        gh.get_github_client = _shared_client
+
+    service = gh.GitHubService()
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one_request() -> None:
+        async with sem:
+            start = time.perf_counter()
+            branch = await service.get_default_branch("o", "r")
+            await rc.get_latest_commit_sha("o", "r")
+            await service.get_repo_structure("o", "r", branch)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(n_requests)))
+    elapsed = time.perf_counter() - started
+
+    for client in fresh_clients:
+        await client.aclose()
+    await gh.close_github_client()
+    await server.stop()
+
+    return {
+        "mode": mode,
+        "requests": n_requests,
+        "connections": server.connections,
+        "handshakes_per_request": server.connections / n_requests,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "throughput_rps": n_requests / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    for mode in ("fresh", "shared"):
+        r = asyncio.run(_run(mode, args.requests, args.concurrency, args.handshake_ms))
+        print(
+            f"{r['mode']:>7}: {r['connections']:5d} connections "
+            f"({r['handshakes_per_request']:.2f}/request)  "
+            f"p50={r['p50_ms']:.1f}ms  p95={r['p95_ms']:.1f}ms  "
+            f"{r['throughput_rps']:.0f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
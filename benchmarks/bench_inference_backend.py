@@ -0,0 +1,100 @@
+"""
+Benchmark: embedding and reranking throughput per inference backend.
+
+For each backend — torch, onnx, onnx with int8 dynamic quantization
+(``--quantization``) — embeds ``--chunks`` code chunks in batches of 50,
+as ingestion does, and scores ``--pairs`` (query, chunk) pairs with the
+cross-encoder.  Reports chunks/s and pairs/s.  Each backend runs in its own
+process so model caches and thread pools don't leak between them.  The
+first onnx run exports the models into ``--onnx-dir``, so run twice
+for steady-state numbers.
+
+    python benchmarks/bench_inference_backend.py --chunks 600 --quantization avx512_vnni
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+
+def _chunks(n: int) -> list[str]:
+    return [
+        f"def handler_{i}(request):\n    payload = request.json()\n"
+        f"    return {{'id': {i}, 'items': [x * {i} for x in payload['items']]}}\n" * 4
+        for i in range(n)
+    ]
+
+
+def _measure(name: str, quantization: str, chunks: int, pairs: int) -> dict:
+    from services.inference_backend import InferenceBackend, load_cross_encoder, load_embedding_function
+    from services.rag_service import _EMBEDDING_MODEL, _RERANKER_MODEL
+
+    backend = InferenceBackend(name, quantization)
+    texts = _chunks(chunks)
+    ef = load_embedding_function(_EMBEDDING_MODEL, backend)
+    ef(texts[:8])   # warm-up
+    t0 = time.perf_counter()
+    for start in range(0, len(texts), 50):
+        ef(texts[start:start + 50])
+    embed_s = time.perf_counter() - t0
+
+    ce = load_cross_encoder(_RERANKER_MODEL, backend)
+    batch = [["how are requests handled", texts[i % len(texts)]] for i in range(pairs)]
+    ce.predict(batch[:8])
+    t0 = time.perf_counter()
+    ce.predict(batch)
+    rerank_s = time.perf_counter() - t0
+    return {"chunks_per_s": chunks / embed_s, "pairs_per_s": pairs / rerank_s}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=600)
+    parser.add_argument("--pairs", type=int, default=480)
+    parser.add_argument("--quantization", default="avx512_vnni")
+    parser.add_argument("--onnx-dir", default="./onnx_models")
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--quant", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        try:
+            result = _measure(args.backend, args.quant, args.chunks, args.pairs)
+        except Exception as exc:
+            result = {"error": f"{type(exc).__name__}: {str(exc).splitlines()[0][:120]}"}
+        print(json.dumps(result))
+        return
+
+    env = {**os.environ, "ONNX_MODEL_DIR": args.onnx_dir}
+    print(f"{os.cpu_count()} cores, {args.chunks} chunks, {args.pairs} rerank pairs")
+    baseline = None
+    for name, quant in (("torch", ""), ("onnx", ""), ("onnx", args.quantization)):
+        out = subprocess.run(
+            [sys.executable, __file__, "--backend", name, "--quant", quant,
+             "--chunks", str(args.chunks), "--pairs", str(args.pairs)],
+            capture_output=True, text=True, env=env,
+        )
+        label = f"{name}-{quant}" if quant else name
+        lines = out.stdout.strip().splitlines()
+        r = json.loads(lines[-1]) if lines else {"error": out.stderr.strip().splitlines()[-1][:120]}
+        if "error" in r:
+            print(f"{label:>17}: unavailable — {r['error']}")
+            continue
+        baseline = baseline or r
+        print(
+            f"{label:>17}: {r['chunks_per_s']:7.1f} chunks/s ({r['chunks_per_s'] / baseline['chunks_per_s']:.2f}×)  "
+            f"{r['pairs_per_s']:7.1f} pairs/s ({r['pairs_per_s'] / baseline['pairs_per_s']:.2f}×)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: retrieval inference per call vs through the micro-batchers.
+
+``--concurrency`` retrievals (one query, k=8, so 24 rerank pairs each)
+against ``--sessions`` indexed sessions are started at once, ``--rounds``
+times:
+
+  per-call — every retrieval makes its own embedding and cross-encoder
+             call, as before (batchers with ``max_batch=1``)
+  batched  — retrievals share batches collected over ``--window-ms``
+
+With ``--real-models`` bge-small and ms-marco-MiniLM are used when they can
+be loaded.  Otherwise the stand-ins from ``bench_retrieve_many`` model CPU
+cost as a fixed per-call overhead plus a per-item cost.  Reports
+retrievals/s, p50/p95 latency and the batch-size histograms.
+
+    python benchmarks/bench_micro_batching.py --concurrency 50 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+import chromadb  # noqa: E402
+
+import services.rag_service as rag_module  # noqa: E402
+from bench_retrieve_many import StandInEF, StandInReranker  # noqa: E402
+from models import Chunk  # noqa: E402
+from services.embedding_cache import EmbeddingCache  # noqa: E402
+from services.micro_batcher import MicroBatcher  # noqa: E402
+from stub_server import percentile  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--chunks", type=int, default=150)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--embed-call-ms", type=float, default=8.0)
+    parser.add_argument("--embed-item-ms", type=float, default=2.0)
+    parser.add_argument("--rerank-call-ms", type=float, default=15.0)
+    parser.add_argument("--rerank-pair-ms", type=float, default=1.5)
+    parser.add_argument("--real-models", action="store_true")
+    args = parser.parse_args()
+
+    rag_module._client = chromadb.EphemeralClient()
+    rag = rag_module.RAGService.__new__(rag_module.RAGService)
+    models = "stand-in"
+    if args.real_models:
+        try:
+            rag = rag_module.RAGService()
+            rag_module._get_reranker()
+            models = "real"
+        except Exception as exc:
+            print(f"real models unavailable ({type(exc).__name__}) — using stand-ins")
+    if models == "stand-in":
+        rag._ef = StandInEF(args.embed_call_ms, args.embed_item_ms)
+        rag_module._reranker = StandInReranker(args.rerank_call_ms, args.rerank_pair_ms)
+
+    rag_module.get_embedding_cache = lambda: EmbeddingCache()
+    for s in range(args.sessions):
+        chunks = [
+            Chunk(text=f"def handler_{s}_{i}(request):\n    return {i}\n" * 6, file_path=f"app/m{i}.py",
+                  chunk_type="function", language="python")
+            for i in range(args.chunks)
+        ]
+        asyncio.run(rag.upsert_chunks(f"s{s}", chunks))
+
+    def run(mode: str) -> tuple[list[float], float, dict, dict]:
+        per_call = mode == "per-call"
+        rag._queries = MicroBatcher(f"{mode}-embed", rag._embed, max_batch=1 if per_call else 64,
+                                    window_ms=args.window_ms)
+        rag_module._rerank_batcher = MicroBatcher(f"{mode}-rerank", rag_module._predict,
+                                                  max_batch=1 if per_call else 256, window_ms=args.window_ms)
+        latencies: list[float] = []
+
+        async def one(i: int, r: int) -> None:
+            t0 = time.perf_counter()
+            await rag.retrieve(f"s{i % args.sessions}", f"how does handler {i} of round {r} work", k=8)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        async def rounds() -> float:
+            t0 = time.perf_counter()
+            for r in range(args.rounds):
+                cache = EmbeddingCache()   # every query is new
+                rag_module.get_embedding_cache = lambda: cache
+                await asyncio.gather(*(one(i, r) for i in range(args.concurrency)))
+            return time.perf_counter() - t0
+
+        elapsed = asyncio.run(rounds())
+        return latencies, elapsed, rag._queries.stats(), rag_module._rerank_batcher.stats()
+
+    print(f"models: {models}, {args.concurrency} concurrent retrievals × {args.rounds} rounds, "
+          f"window {args.window_ms} ms")
+    results = {}
+    for mode in ("per-call", "batched"):
+        latencies, elapsed, embed, rerank = run(mode)
+        results[mode] = len(latencies) / elapsed
+        print(
+            f"{mode:>9}: {results[mode]:6.1f} retrievals/s  "
+            f"p50={percentile(latencies, 50):7.1f}ms  p95={percentile(latencies, 95):7.1f}ms"
+        )
+        print(f"           embed  batches={embed['batches']:4d}  histogram={embed['histogram']}")
+        print(f"           rerank batches={rerank['batches']:4d}  histogram={rerank['histogram']}")
+    print(f"  speedup: {results['batched'] / results['per-call']:.1f}× throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: building prompts from a cached snapshot — re-parsing per request
+vs the memoised ``ParsedRepo``.
+
+Builds a synthetic ``--mb`` MB gitingest dump (with FastAPI, Spring and
+Express routes sprinkled through it), stores it as a ``RepoSnapshot`` and
+times ``--requests`` prompt builds for that one revision, the way README,
+LinkedIn, article and resume requests follow each other:
+
+  legacy — every request renders the repo back into gitingest text,
+           ``re.split``s it for ``source_files`` and again for the README,
+           runs metadata analysis and one ``findall`` per endpoint pattern
+           (25 of them) over the prompt
+  parsed — ``_readme_view``: the first request parses the snapshot once
+           (one pass, one combined endpoint pattern); later ones reuse it
+
+Then times the endpoint scan on its own over the whole dump: the 25
+per-pattern passes vs ``extract_endpoints``' single combined pattern.
+
+    python benchmarks/bench_parsed_repo.py --mb 50 --requests 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+from bench_streaming_parse import _dump, _legacy_prompt, _legacy_view  # noqa: E402
+
+from services.ingestion_store import split_file_blocks  # noqa: E402
+from services.parsed_repo import extract_endpoints  # noqa: E402
+from services.readme_service import ReadmeService  # noqa: E402
+from services.repo_cache import RepoSnapshot  # noqa: E402
+
+_ROUTES = (
+    '@app.get("/items")\n@router.post("/items")\n'
+    '@GetMapping("/users")\n@RequestMapping(value = "/legacy", method = RequestMethod.PUT)\n'
+    "app.delete('/items/:id', handler)\n"
+)
+
+# The per-method patterns _extract_api_endpoints ran one by one
+_LEGACY_PATTERNS = [
+    *((rf'@app\.{m.lower()}\(["\']([^"\']+)["\']', m) for m in ("POST", "GET", "PUT", "DELETE", "PATCH")),
+    (r'@app\.websocket\(["\']([^"\']+)["\']', "WebSocket"),
+    *((rf'@router\.{m.lower()}\(["\']([^"\']+)["\']', m) for m in ("POST", "GET", "PUT", "DELETE")),
+    *((rf'@{m.title()}Mapping\(["\']?([^"\')\s]+)', m) for m in ("POST", "GET", "PUT", "DELETE", "PATCH")),
+    (r'@RequestMapping\(\s*value\s*=\s*["\']([^"\']+)["\'].*method\s*=\s*RequestMethod\.(\w+)', None),
+    *((rf'(?:app|router)\.{m.lower()}\(["\']([^"\']+)["\']', m) for m in ("POST", "GET", "PUT", "DELETE")),
+]
+
+
+def _legacy_endpoints(file_contents: str) -> list[str]:
+    endpoints = []
+    for pattern, method in _LEGACY_PATTERNS:
+        if method is None:
+            endpoints += [f"{m.group(2)} {m.group(1)}" for m in re.finditer(pattern, file_contents)]
+        else:
+            endpoints += [f"{method} {m}" for m in re.findall(pattern, file_contents)]
+    return sorted(set(endpoints))
+
+
+def _snapshot(mb: int, files: int) -> RepoSnapshot:
+    blocks = split_file_blocks(_dump(mb, files))
+    # Routes at the top of every 10th file, so some land inside the prompt
+    blocks = [(p, _ROUTES + t if i % 10 == 2 else t) for i, (p, t) in enumerate(blocks)]
+    return RepoSnapshot(owner="o", repo="r", commit_sha="s", summary="summary", tree="tree", _files=dict(blocks))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=50)
+    parser.add_argument("--files", type=int, default=5_000)
+    parser.add_argument("--requests", type=int, default=4)
+    args = parser.parse_args()
+
+    svc = ReadmeService.__new__(ReadmeService)
+
+    def legacy(snapshot):
+        view = _legacy_view(svc, snapshot)
+        view["metadata"] = svc._analyze_project_metadata(view["source_files"], [])
+        file_contents = _legacy_prompt(snapshot.summary, snapshot.tree, view["gitingest_content"])
+        return _legacy_endpoints(file_contents), view["existing_readme"], len(view["source_files"])
+
+    def parsed(snapshot):
+        ctx = svc._readme_view(snapshot)
+        return ctx["api_endpoints"], ctx["existing_readme"], len(ctx["source_files"])
+
+    print(f"{args.mb} MB dump, {args.files} files, {args.requests} requests per revision")
+    results = {}
+    for label, build in (("legacy", legacy), ("parsed", parsed)):
+        snapshot = _snapshot(args.mb, args.files)
+        samples = []
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            results[label] = build(snapshot)
+            samples.append((time.perf_counter() - t0) * 1000)
+        print(
+            f"{label:>7}: first {samples[0]:8.1f}ms  repeat {sum(samples[1:]) / max(1, len(samples) - 1):8.1f}ms  "
+            f"total {sum(samples):8.1f}ms  [{len(results[label][0])} endpoints]"
+        )
+    # Endpoints come from what each path puts in the prompt, which now differs
+    assert results["legacy"][1:] == results["parsed"][1:], "views differ"
+
+    # The endpoint scan alone, over the whole dump rather than the prompt
+    text = "".join(snapshot.files.values())
+    for label, scan in (("25 passes", _legacy_endpoints), ("combined", extract_endpoints)):
+        t0 = time.perf_counter()
+        found = scan(text)
+        print(f"endpoint scan, {label:>9}: {(time.perf_counter() - t0) * 1000:8.1f}ms  [{len(found)} endpoints]")
+
+
+if __name__ == "__main__":
+    main()
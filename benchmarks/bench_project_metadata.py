@@ -0,0 +1,327 @@
+"""
+Benchmark: project metadata detection — the previous
+``_analyze_project_metadata`` vs the table-driven one.
+
+Builds a synthetic ``--files``-file repo (Python, JS, Java, Go sources of
+``--kb`` KB each plus their manifests, a few with framework markers, the
+way ``source_files`` holds them: truncated to 2 000 / 8 000 chars) and times:
+
+  legacy  — the previous ``_analyze_project_metadata``: every file
+            lowercased and appended to one string with ``+=``, one ``in``
+            scan per keyword per marker table, project-type checks over
+            the concatenation
+  tables  — ``_analyze_project_metadata`` now: the same scans, driven by
+            ``_FRAMEWORK_MARKERS`` and ``_DB_MARKERS``; only files some
+            table applies to are lowercased up front, and the project-type
+            checks read the files (lowercased then) only when the type
+            still depends on them
+
+Both must produce the same ``ProjectMetadata``, with and without a Spring
+Boot application class in the repo (the legacy project-type checks
+short-circuit on it), and without any manifests (no framework decides the
+type, so every project-type check reads every file).  Also times both on
+untruncated files (``--kb`` each).
+
+    python benchmarks/bench_project_metadata.py --files 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+from models import ProjectMetadata  # noqa: E402
+from services.readme_service import ReadmeService  # noqa: E402
+
+_SOURCES = {
+    ".py": "import os\nfrom typing import Any\n\ndef handler_{i}(event: Any) -> dict:\n    return {{'id': {i}}}\n",
+    ".js": "const lib = require('lib');\nexport function handler{i}(req, res) {{\n  res.json({{ id: {i} }});\n}}\n",
+    ".java": "package com.example;\n\npublic class Handler{i} {{\n    public int id() {{ return {i}; }}\n}}\n",
+    ".go": "package handlers\n\nfunc Handler{i}() int {{\n\treturn {i}\n}}\n",
+}
+_MANIFESTS = {
+    "requirements.txt": "fastapi==0.110\nuvicorn\nsqlalchemy\npsycopg2  # postgresql\n",
+    "package.json": '{{"dependencies": {{"react": "18", "express": "4", "redis": "4"}}}}',
+    "pom.xml": "<dependency><artifactId>spring-boot-starter-web</artifactId></dependency>" * 3,
+    "go.mod": "module example.com/app\n\nrequire github.com/gin-gonic/gin v1.9.1\n",
+    "Application.java": "import org.springframework.boot.SpringApplication;\n@SpringBootApplication\n"
+                        "@RestController\npublic class Application {{ public static void main(String[] a) {{}} }}\n",
+}
+
+
+def _repo(files: int, kb: int) -> dict[str, str]:
+    rng = random.Random(0)
+    repo = {}
+    exts = list(_SOURCES)
+    for i in range(files):
+        ext = exts[i % len(exts)]
+        unit = _SOURCES[ext].format(i=i)
+        repo[f"pkg{i % 97}/mod{i}{ext}"] = unit * max(1, kb * 1024 // len(unit))
+    for n, (name, text) in enumerate(_MANIFESTS.items()):
+        repo[f"svc{n}/{name}"] = text.format() if "{{" in text else text
+    items = list(repo.items())
+    rng.shuffle(items)
+    return dict(items)
+
+
+def _legacy_analyze(source_files: Dict, repo_structure: List) -> ProjectMetadata:
+    """``_analyze_project_metadata`` before the marker scanner, verbatim."""
+
+    # --- Language detection ---
+    lang_counts: Dict[str, int] = {}
+    ext_map = {
+        ".py": "Python", ".js": "JavaScript", ".jsx": "JavaScript",
+        ".ts": "TypeScript", ".tsx": "TypeScript", ".java": "Java",
+        ".go": "Go", ".rs": "Rust", ".cpp": "C++", ".cc": "C++",
+        ".cxx": "C++", ".kt": "Kotlin", ".swift": "Swift",
+        ".dart": "Dart", ".rb": "Ruby", ".cs": "C#",
+    }
+    for file_path in source_files:
+        ext = os.path.splitext(file_path)[1].lower()
+        if lang := ext_map.get(ext):
+            lang_counts[lang] = lang_counts.get(lang, 0) + 1
+
+    primary_language = max(lang_counts, key=lang_counts.get) if lang_counts else "Unknown"
+
+    # --- Framework / tech-stack detection ---
+    tech_stack: List[str] = []
+    frameworks: List[str] = []
+
+    python_markers = {
+        "fastapi": "FastAPI", "django": "Django",
+        "flask": "Flask", "streamlit": "Streamlit",
+    }
+    js_markers = {
+        "react": "React", "vue": "Vue.js", "angular": "Angular",
+        "express": "Express.js", "next": "Next.js", "svelte": "Svelte",
+        "nuxt": "Nuxt.js", "nest": "NestJS",
+    }
+    java_markers = {
+        "spring-boot": "Spring Boot", "spring boot": "Spring Boot",
+        "spring-web": "Spring Boot", "spring-data": "Spring Data",
+        "spring-security": "Spring Security", "quarkus": "Quarkus",
+        "micronaut": "Micronaut", "jakarta.servlet": "Jakarta EE",
+    }
+    go_markers = {
+        "gin-gonic": "Gin", "gorilla/mux": "Gorilla Mux",
+        "fiber": "Fiber", "echo": "Echo",
+    }
+    rust_markers = {
+        "actix-web": "Actix Web", "rocket": "Rocket",
+        "axum": "Axum", "warp": "Warp",
+    }
+    csharp_markers = {
+        "microsoft.aspnetcore": "ASP.NET Core", "aspnetcore": "ASP.NET Core",
+        "entityframeworkcore": "Entity Framework",
+    }
+    db_markers = {
+        "mysql": "MySQL", "postgresql": "PostgreSQL", "postgres": "PostgreSQL",
+        "mongodb": "MongoDB", "redis": "Redis", "sqlite": "SQLite",
+        "dynamodb": "DynamoDB",
+    }
+
+    all_content_lower = ""
+
+    for file_path, content in source_files.items():
+        file_name = os.path.basename(file_path).lower()
+        content_lower = content.lower()
+        all_content_lower += content_lower + "\n"
+
+        # Python deps
+        if file_name in ("requirements.txt", "pyproject.toml", "setup.py", "pipfile"):
+            for keyword, label in python_markers.items():
+                if keyword in content_lower and label not in frameworks:
+                    tech_stack.append(label)
+                    frameworks.append(label)
+
+        # JS/TS deps
+        elif file_name == "package.json":
+            for keyword, label in js_markers.items():
+                if keyword in content_lower and label not in frameworks:
+                    tech_stack.append(label)
+                    frameworks.append(label)
+
+        # Java deps (pom.xml, build.gradle)
+        elif file_name in ("pom.xml", "build.gradle", "build.gradle.kts"):
+            for keyword, label in java_markers.items():
+                if keyword in content_lower and label not in frameworks:
+                    tech_stack.append(label)
+                    frameworks.append(label)
+
+        # Java source files — detect frameworks from annotations
+        elif file_path.endswith(".java"):
+            java_annotation_markers = {
+                "@springbootapplication": "Spring Boot",
+                "import org.springframework": "Spring Boot",
+                "@restcontroller": "Spring Boot",
+                "@enablewebsocket": "Spring WebSocket",
+                "spring-security": "Spring Security",
+                "springsecurity": "Spring Security",
+                "@enablecaching": "Spring Cache",
+            }
+            for keyword, label in java_annotation_markers.items():
+                if keyword in content_lower and label not in frameworks:
+                    tech_stack.append(label)
+                    frameworks.append(label)
+
+        # Go deps
+        elif file_name in ("go.mod", "go.sum"):
+            for keyword, label in go_markers.items():
+                if keyword in content_lower and label not in frameworks:
+                    tech_stack.append(label)
+                    frameworks.append(label)
+
+        # Rust deps
+        elif file_name == "cargo.toml":
+            for keyword, label in rust_markers.items():
+                if keyword in content_lower and label not in frameworks:
+                    tech_stack.append(label)
+                    frameworks.append(label)
+
+        # C# deps
+        elif file_name.endswith(".csproj") or file_name.endswith(".sln"):
+            for keyword, label in csharp_markers.items():
+                if keyword in content_lower and label not in frameworks:
+                    tech_stack.append(label)
+                    frameworks.append(label)
+
+        # DB detection from config/env files
+        if file_name in ("application.yaml", "application.yml", "application.properties",
+                         ".env", ".env.example", "docker-compose.yml", "docker-compose.yaml",
+                         "requirements.txt", "pom.xml", "build.gradle", "package.json"):
+            for keyword, label in db_markers.items():
+                if keyword in content_lower and label not in tech_stack:
+                    tech_stack.append(label)
+
+    # Docker detection
+    if any(os.path.basename(f).lower() in ("dockerfile", "docker-compose.yml", "docker-compose.yaml")
+           for f in source_files):
+        if "Docker" not in tech_stack:
+            tech_stack.append("Docker")
+
+    if primary_language not in tech_stack:
+        tech_stack.insert(0, primary_language)
+
+    # --- Project type detection (comprehensive) ---
+    project_type = "library"
+
+    # Python entry points
+    py_entry_points = {"main.py", "app.py", "server.py", "manage.py", "wsgi.py", "asgi.py"}
+    has_py_entry = any(os.path.basename(f) in py_entry_points for f in source_files)
+
+    # Java/Spring Boot detection — check all content for annotations
+    has_java_app = (
+        "springbootapplication" in all_content_lower
+        or "@springbootapplication" in all_content_lower
+        or "import org.springframework.boot" in all_content_lower
+    )
+    has_java_main = any(
+        "public static void main" in source_files.get(f, "")
+        for f in source_files if f.endswith(".java")
+    )
+
+    # Go entry points
+    has_go_main = any(
+        os.path.basename(f) == "main.go" for f in source_files
+    )
+
+    # Rust entry points
+    has_rust_main = any(
+        f.endswith("main.rs") for f in source_files
+    )
+
+    # Web framework indicators
+    web_frameworks = {"FastAPI", "Flask", "Django", "Spring Boot", "Express.js",
+                      "NestJS", "Gin", "Fiber", "Echo", "Actix Web", "Rocket",
+                      "Axum", "ASP.NET Core", "Quarkus", "Micronaut"}
+    has_web_framework = bool(web_frameworks & set(frameworks))
+
+    # Frontend frameworks
+    frontend_frameworks = {"React", "Vue.js", "Angular", "Next.js", "Svelte", "Nuxt.js"}
+    has_frontend = bool(frontend_frameworks & set(frameworks))
+
+    # REST controller annotations (Java)
+    has_rest_controllers = (
+        "@restcontroller" in all_content_lower
+        or "@requestmapping" in all_content_lower
+        or "@getmapping" in all_content_lower
+        or "@postmapping" in all_content_lower
+    )
+
+    # Determine project type
+    if has_web_framework or has_rest_controllers:
+        if has_frontend:
+            project_type = "full_stack_app"
+        else:
+            project_type = "api_server"
+    elif has_frontend:
+        project_type = "web_app"
+    elif has_java_app or has_java_main:
+        # If we detected Spring Boot annotations but it wasn't in frameworks yet
+        if has_java_app and "Spring Boot" not in frameworks:
+            frameworks.append("Spring Boot")
+            tech_stack.append("Spring Boot")
+        project_type = "api_server" if (has_rest_controllers or has_java_app) else "application"
+    elif has_py_entry:
+        project_type = "cli_tool"
+    elif has_go_main or has_rust_main:
+        project_type = "application"
+    elif any(os.path.basename(f) in ("index.html", "app.js") for f in source_files):
+        project_type = "web_app"
+
+    return ProjectMetadata(
+        primary_language=primary_language,
+        project_type=project_type,
+        tech_stack=tech_stack[:8],
+        frameworks=frameworks[:5],
+    )
+
+
+def _compare(source_files: dict[str, str], rounds: int) -> None:
+    svc = ReadmeService.__new__(ReadmeService)
+    results = {}
+    for label, analyze in (("legacy", _legacy_analyze), ("tables", svc._analyze_project_metadata)):
+        best = float("inf")
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            results[label] = analyze(source_files, [])
+            best = min(best, time.perf_counter() - t0)
+        print(f"{label:>10}: {best * 1000:8.1f}ms  {results[label]}")
+    assert results["legacy"] == results["tables"], "metadata differs"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--kb", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    svc = ReadmeService.__new__(ReadmeService)
+    raw = _repo(args.files, args.kb)
+    source_files = {p: svc._truncate_source_file(os.path.basename(p).lower(), t) for p, t in raw.items()}
+    print(f"{len(source_files)} files, {sum(map(len, source_files.values())) / 1e6:.1f} MB as source_files")
+
+    print("with a Spring Boot application class:")
+    _compare(source_files, args.rounds)
+    # The legacy project-type checks stop at the first Spring annotation they
+    # meet; without one they read the whole concatenation for every keyword
+    print("without one:")
+    _compare({p: t for p, t in source_files.items() if not p.endswith("Application.java")}, args.rounds)
+
+    print("without manifests:")
+    _compare({p: t for p, t in source_files.items() if not p.startswith("svc")}, args.rounds)
+    print(f"untruncated files ({sum(map(len, raw.values())) / 1e6:.1f} MB):")
+    _compare(raw, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
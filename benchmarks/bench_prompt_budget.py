@@ -0,0 +1,88 @@
+"""
+Benchmark: token-budgeted prompt packing on large repos.
+
+For each ``--mb`` size, builds a synthetic gitingest dump (``--files``
+files per 10 MB, plus a README and a manifest), stores it as a
+``RepoSnapshot`` and times:
+
+  parse — ``_parse_snapshot``: rank every file and pack the model's budget
+          (once per revision; memoised on the snapshot)
+  fit   — ``_fit_prompt`` for a README prompt: lay out the fixed sections,
+          take the packed files that fit, verify the total (every request)
+
+and prints the README prompt's tokens per section.  For comparison, the
+tokens of the prompt the previous fixed 60 000-char slice produced.
+
+Tokens are counted with tiktoken when its encoding can be loaded, with
+the chars/3 estimate otherwise (printed first).
+
+    python benchmarks/bench_prompt_budget.py --mb 10 50 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+from bench_streaming_parse import _dump, _legacy_prompt  # noqa: E402
+
+from config import settings  # noqa: E402
+from services.ingestion_store import render_file_blocks, split_file_blocks  # noqa: E402
+from services.prompt_budget import _encoding, count_tokens, prompt_budget  # noqa: E402
+from services.readme_service import ReadmeService  # noqa: E402
+from services.repo_cache import RepoSnapshot  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--files", type=int, default=1_000, help="files per 10 MB")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    counter = f"tiktoken {settings.prompt_encoding}" if _encoding() is not None else "chars/3 estimate"
+    print(f"counting: {counter}; budget {prompt_budget(settings.ai_model)} tokens for {settings.ai_model}")
+
+    svc = ReadmeService.__new__(ReadmeService)
+    for mb in args.mb:
+        files = max(1, args.files * mb // 10)
+        blocks = split_file_blocks(_dump(mb, files))
+        snapshot = RepoSnapshot(owner="o", repo="r", commit_sha="s", summary="summary",
+                                tree="\n".join(path for path, _ in blocks), _files=dict(blocks))
+        del blocks
+
+        t0 = time.perf_counter()
+        ctx = {"repo_info": {"repo": "r", "url": "https://github.com/o/r"}, **svc._readme_view(snapshot)}
+        parse_ms = (time.perf_counter() - t0) * 1000
+
+        def build(file_contents: str, existing_readme: str) -> str:
+            return svc._build_prompt("r", "https://github.com/o/r", file_contents, existing_readme,
+                                     ctx["metadata"], api_endpoints=ctx["api_endpoints"])
+
+        samples = []
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            prompt, report = svc._fit_prompt(ctx, build)
+            samples.append((time.perf_counter() - t0) * 1000)
+        assert count_tokens(prompt) <= report["budget"]
+
+        legacy = build(_legacy_prompt(snapshot.summary, snapshot.tree,
+                                      render_file_blocks(list(snapshot.files.items()))), ctx["existing_readme"])
+        print(
+            f"{mb:4d} MB, {files:5d} files: parse {parse_ms:7.1f}ms  fit p50 {sorted(samples)[len(samples) // 2]:6.2f}ms  "
+            f"[{report['files_included']} files, {report['files_condensed']} condensed]"
+        )
+        print("      sections: " + ", ".join(
+            f"{k}={report[k]}" for k in ("instructions", "summary", "tree", "existing_readme", "files", "total", "budget")
+        ))
+        print(f"      60 000-char slice prompt: {count_tokens(legacy)} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: article prompt building — three sequential retrieves vs retrieve_many.
+
+Indexes ``--chunks`` chunks for one session, then times
+``ArticleBuilder.build_prompt``'s retrieval of its three facets:
+
+  sequential — the previous path: three ``retrieve`` calls, each with its own
+               ``count()``, query embedding via ``query_texts``, HNSW search
+               and cross-encoder ``predict``, in two thread hops apiece
+  batched    — ``build_prompt`` as it is now: one ``retrieve_many`` call
+  warm       — the same, with the facet query vectors already in the
+               embedding cache (every article after the first)
+
+With ``--real-models`` bge-small and ms-marco-MiniLM are used when they can
+be loaded.  Otherwise stand-ins model their CPU cost as a fixed per-call
+overhead plus a per-item cost (``--embed-*-ms``, ``--rerank-*-ms``), which
+is where batching saves time: the per-call part is paid once instead of
+three times.  The batched path starts every round with an empty
+embedding cache, so its query embedding is always paid; ``warm`` does not.
+
+    python benchmarks/bench_retrieve_many.py --rounds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+import chromadb  # noqa: E402
+import numpy as np  # noqa: E402
+from chromadb import EmbeddingFunction  # noqa: E402
+
+import services.rag_service as rag_module  # noqa: E402
+from models import Chunk  # noqa: E402
+from services.article_builder import ArticleBuilder  # noqa: E402
+from services.article_session import ArticleSession  # noqa: E402
+from services.embedding_cache import EmbeddingCache  # noqa: E402
+from stub_server import percentile  # noqa: E402
+
+_DIM = 384
+
+
+class StandInEF(EmbeddingFunction):
+    def __init__(self, call_ms: float, item_ms: float):
+        self.call_s, self.item_s = call_ms / 1000, item_ms / 1000
+
+    def __call__(self, input):
+        time.sleep(self.call_s + self.item_s * len(input))
+        rng = np.random.default_rng(abs(hash(tuple(input))) % 2**32)
+        return list(rng.standard_normal((len(input), _DIM), dtype=np.float32))
+
+    @staticmethod
+    def name():
+        return "bench-stand-in"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return StandInEF(0, 0)
+
+
+class StandInReranker:
+    def __init__(self, call_ms: float, pair_ms: float):
+        self.call_s, self.pair_s = call_ms / 1000, pair_ms / 1000
+
+    def predict(self, pairs):
+        time.sleep(self.call_s + self.pair_s * len(pairs))
+        return [len(doc) % 97 for _, doc in pairs]
+
+
+async def _sequential(rag: rag_module.RAGService, session_id: str) -> list[list[str]]:
+    """The retrieval ``build_prompt`` did before retrieve_many, call for call."""
+    facets = [
+        ("project overview, main purpose, what does it do, problem solved", 8, None),
+        ("implementation details, architecture, core logic, algorithms, data flow", 8, ["function", "class"]),
+        ("setup, configuration, dependencies, tech stack, environment", 5, ["config"]),
+    ]
+    out = []
+    for query, k, chunk_types in facets:
+        col = rag._collection(session_id)
+        count = col.count()
+        where = {"chunk_type": {"$in": chunk_types}} if chunk_types else None
+        results = await asyncio.to_thread(
+            col.query, query_texts=[query], n_results=min(k * 3, count), where=where,
+        )
+        candidates = results["documents"][0]
+        if len(candidates) > k:
+            reranker = rag_module._get_reranker()
+            scores = await asyncio.to_thread(reranker.predict, [[query, d] for d in candidates])
+            candidates = [d for _, d in sorted(zip(scores, candidates), reverse=True)[:k]]
+        out.append(candidates)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=150)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--embed-call-ms", type=float, default=8.0)
+    parser.add_argument("--embed-item-ms", type=float, default=2.0)
+    parser.add_argument("--rerank-call-ms", type=float, default=15.0)
+    parser.add_argument("--rerank-pair-ms", type=float, default=1.5)
+    parser.add_argument("--real-models", action="store_true")
+    args = parser.parse_args()
+
+    rag_module._client = chromadb.EphemeralClient()
+    rag = rag_module.RAGService.__new__(rag_module.RAGService)
+    models = "stand-in"
+    if args.real_models:
+        try:
+            rag = rag_module.RAGService()
+            rag_module._get_reranker()
+            models = "real"
+        except Exception as exc:
+            print(f"real models unavailable ({type(exc).__name__}) — using stand-ins")
+    if models == "stand-in":
+        rag._ef = StandInEF(args.embed_call_ms, args.embed_item_ms)
+        rag_module._reranker = StandInReranker(args.rerank_call_ms, args.rerank_pair_ms)
+
+    types = ["function", "class", "config", "doc", "other"]
+    chunks = [
+        Chunk(text=f"def handler_{i}(request):\n    return {i}\n" * 6, file_path=f"app/m{i}.py",
+              chunk_type=types[i % len(types)], language="python")
+        for i in range(args.chunks)
+    ]
+    rag_module.get_embedding_cache = lambda: EmbeddingCache()
+    asyncio.run(rag.upsert_chunks("bench", chunks))
+
+    session = ArticleSession(session_id="bench", owner="bench", repo="repo")
+    builder = ArticleBuilder(rag_service=rag)
+
+    async def timed(fn, warm: bool = False) -> list[float]:
+        samples = []
+        cache = EmbeddingCache()
+        for _ in range(args.rounds):
+            if not warm:
+                cache = EmbeddingCache()
+            rag_module.get_embedding_cache = lambda: cache
+            t0 = time.perf_counter()
+            await fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return samples
+
+    seq = asyncio.run(timed(lambda: _sequential(rag, "bench")))
+    batched = asyncio.run(timed(lambda: builder.build_prompt(session)))
+    warm = asyncio.run(timed(lambda: builder.build_prompt(session), warm=True))
+
+    print(f"models: {models}, {args.chunks} chunks, {args.rounds} rounds")
+    for label, samples in (("sequential", seq), ("batched", batched), ("warm", warm)):
+        print(f"{label:>10}: p50={percentile(samples, 50):7.1f}ms  p95={percentile(samples, 95):7.1f}ms")
+    print(
+        f"   speedup: {percentile(seq, 50) / percentile(batched, 50):.1f}× batched, "
+        f"{percentile(seq, 50) / percentile(warm, 50):.1f}× warm (p50)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark: 100 article sessions on one repo — per-session vs shared collections.
+
+Each mode runs in its own subprocess against a fresh persistent ``chroma_db``
+in a temp dir and embeds ``--chunks`` chunks of one repo revision for
+``--sessions`` sessions:
+
+  per-session — the old layout: every session upserts into ``session_{id}``
+  shared      — ``build_revision`` once, then every session ``attach``es
+
+Reports the collections created, ``chroma_db`` size on disk, RSS growth and
+wall time.  A deterministic hash embedding (384-dim, the bge-small shape)
+stands in for the model so the numbers isolate the vector store; the
+embedding cache is kept in memory and starts empty in both modes.
+
+    python benchmarks/bench_shared_collections.py --sessions 100 --chunks 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+_DIM = 384
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _dir_mb(path: str) -> float:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file()) / 1e6
+
+
+def _run(mode: str, sessions: int, n_chunks: int) -> dict:
+    import numpy as np
+    from chromadb import EmbeddingFunction
+
+    import services.rag_service as rag_module
+    from models import Chunk
+    from services.embedding_cache import EmbeddingCache
+
+    class HashEF(EmbeddingFunction):
+        def __init__(self):
+            self.embedded = 0
+
+        def __call__(self, input):
+            self.embedded += len(input)
+            return [
+                np.frombuffer(hashlib.shake_256(t.encode()).digest(_DIM * 4), dtype=np.uint32)
+                .astype(np.float32) / 2**32
+                for t in input
+            ]
+
+        @staticmethod
+        def name():
+            return "bench-hash"
+
+        def get_config(self):
+            return {}
+
+        @staticmethod
+        def build_from_config(config):
+            return HashEF()
+
+    directory = tempfile.mkdtemp(prefix="chroma-bench-")
+    rag_module.settings.chroma_persist_dir = directory
+    cache = EmbeddingCache()
+    rag_module.get_embedding_cache = lambda: cache
+    svc = rag_module.RAGService.__new__(rag_module.RAGService)
+    svc._ef = HashEF()
+    chunks = [
+        Chunk(text=f"def handler_{i}(request):\n    return {i}\n" * 8, file_path=f"app/m{i}.py",
+              chunk_type="function", language="python")
+        for i in range(n_chunks)
+    ]
+    svc._collection("warmup")   # client start-up is not what we're measuring
+    rag_module._get_client().delete_collection("session_warmup")
+
+    async def scenario():
+        for i in range(sessions):
+            if mode == "shared":
+                await svc.build_revision("bench", "repo", "a" * 40, chunks)
+                svc.attach(f"s{i}", "bench", "repo", "a" * 40)
+            else:
+                await svc.upsert_chunks(f"s{i}", chunks)
+
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    asyncio.run(scenario())
+    elapsed = time.perf_counter() - t0
+    try:
+        return {
+            "mode": mode,
+            "collections": len(rag_module._get_client().list_collections()),
+            "disk_mb": _dir_mb(directory),
+            "rss_growth_mb": _rss_mb() - rss_before,
+            "seconds": elapsed,
+            "texts_embedded": svc._ef.embedded,
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--chunks", type=int, default=150)
+    parser.add_argument("--mode", choices=("per-session", "shared"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run(args.mode, args.sessions, args.chunks)))
+        return
+
+    for mode in ("per-session", "shared"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--sessions", str(args.sessions), "--chunks", str(args.chunks)],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{r['mode']:>11}: {r['collections']:4d} collections  "
+            f"chroma_db={r['disk_mb']:7.1f} MB  RSS +{r['rss_growth_mb']:6.1f} MB  "
+            f"{r['seconds']:6.2f}s  {r['texts_embedded']} texts embedded"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: start-up time and first-request latency, with and without warm-up.
+
+Each mode runs in a fresh process (module imports are the point):
+
+  cold — WARM_UP_MODELS=false: models, Chroma and torch load on first use
+  warm — WARM_UP_MODELS=true: the lifespan loads and runs both models first
+
+Reports the time to ``import main``, until the lifespan has finished (the
+worker starts accepting requests), the first ``/health`` response and the
+first model-backed request: index one chunk and retrieve it, as an
+article session's first steps do.
+
+With ``--real-models`` bge-small and ms-marco-MiniLM are used when they can
+be loaded.  Otherwise the ``bench_retrieve_many`` stand-ins replace the
+model weights, but sentence_transformers, torch and chromadb are still
+imported and started as they would be, so only the weight loading itself
+is missing from the cold numbers.
+
+    python benchmarks/bench_startup.py --runs 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_START = time.perf_counter()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+
+def _child(real_models: bool) -> dict:
+    t0 = time.perf_counter()
+    import main
+    import_s = time.perf_counter() - t0
+
+    from fastapi.testclient import TestClient
+
+    import services.rag_service as rag_module
+    from models import Chunk
+
+    if not real_models:
+        from bench_retrieve_many import StandInEF, StandInReranker
+
+        @functools.lru_cache()
+        def stand_in_service():
+            import sentence_transformers  # noqa: F401 — what the real loader imports
+
+            rag = rag_module.RAGService.__new__(rag_module.RAGService)
+            rag._ef = StandInEF(8, 2)
+            rag_module._reranker = StandInReranker(15, 1.5)
+            return rag
+
+        main._get_rag_service = stand_in_service
+
+    t0 = time.perf_counter()
+    with TestClient(main.app) as client:
+        ready_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        client.get("/health")
+        health_ms = (time.perf_counter() - t0) * 1000
+
+        async def first_request():
+            rag = main._get_rag_service()
+            chunk = Chunk(text="def handler(request):\n    return 1", file_path="app.py",
+                          chunk_type="function", language="python")
+            await rag.upsert_chunks("bench", [chunk])
+            return await rag.retrieve("bench", "how are requests handled", k=1)
+
+        t0 = time.perf_counter()
+        asyncio.run(first_request())
+        first_ms = (time.perf_counter() - t0) * 1000
+
+    return {
+        "models": "real" if real_models else "stand-in",
+        "import_s": import_s,
+        "process_to_ready_s": time.perf_counter() - _START - first_ms / 1000 - health_ms / 1000,
+        "lifespan_s": ready_s,
+        "health_ms": health_ms,
+        "first_request_ms": first_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--real-models", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args.real_models)))
+        return
+
+    real_models = args.real_models
+    for mode in ("cold", "warm"):
+        runs = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = {
+                    **os.environ,
+                    "WARM_UP_MODELS": "true" if mode == "warm" else "false",
+                    "CHROMA_PERSIST_DIR": os.path.join(tmp, "chroma"),
+                    "EMBEDDING_CACHE_DIR": "",
+                }
+                cmd = [sys.executable, __file__, "--child"]
+                out = subprocess.run(cmd + (["--real-models"] if real_models else []),
+                                     capture_output=True, text=True, env=env)
+                if out.returncode and real_models:
+                    print("real models unavailable — using stand-ins")
+                    real_models = False
+                    out = subprocess.run(cmd, capture_output=True, text=True, env=env)
+                out.check_returncode()
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        best = {key: min(r[key] for r in runs) for key in runs[0] if key != "models"}
+        print(
+            f"{mode} ({runs[0]['models']} models, best of {args.runs}): "
+            f"import main {best['import_s']:.2f}s  lifespan {best['lifespan_s']:.2f}s  "
+            f"process→ready {best['process_to_ready_s']:.2f}s  "
+            f"first /health {best['health_ms']:.1f}ms  first index+retrieve {best['first_request_ms']:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
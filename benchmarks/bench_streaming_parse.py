@@ -0,0 +1,185 @@
+"""
+Benchmark: peak RSS of parsing a large gitingest dump and building the
+README view, before and after the single-pass file-block iterator.
+
+Builds a synthetic ``--mb`` MB gitingest dump (``--files`` files, README at
+the root, a few manifests) and runs, each mode in a fresh process:
+
+  legacy — the previous path: ``split_file_blocks`` over a list of every
+           header match, then ``_readme_view`` rendering the whole repo back
+           into one string, ``re.split``-ing it into ``source_files`` and
+           ``re.split``-ing it again to find the README
+  stream — ``iter_file_blocks`` and the single-pass ``_readme_view``
+
+Peak RSS is reported above the RSS with the dump already in memory (that is
+what gitingest hands over), per stage: ``parse`` (dump → per-file texts,
+dump dropped) and ``view`` (README context from the snapshot).
+
+    python benchmarks/bench_streaming_parse.py --mb 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+_RULE = "=" * 48
+
+
+def _dump(mb: int, files: int) -> str:
+    per_file = mb * 1024 * 1024 // files
+    line = "    result = compute(value, options)  # synthetic source line\n"
+    body = line * max(1, per_file // len(line))
+    blocks = [f"{_RULE}\nFILE: README.md\n{_RULE}\n# Synthetic monorepo\n\nBenchmark fixture.\n\n"]
+    blocks.append(f"{_RULE}\nFILE: package.json\n{_RULE}\n{{\"dependencies\": {{\"react\": \"18\"}}}}\n\n")
+    for i in range(files):
+        blocks.append(f"{_RULE}\nFILE: packages/pkg{i % 50}/src/module_{i}.py\n{_RULE}\ndef f_{i}():\n{body}\n\n")
+    return "".join(blocks)
+
+
+def _rss_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak() -> None:
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+# ── The previous implementation, for comparison ──────────────────────────────
+
+_FILE_HEADER = re.compile(r"={40,}\n(?:File|FILE): (.+?)\n={40,}", re.MULTILINE)
+
+
+def _legacy_split(content: str) -> list[tuple[str, str]]:
+    parts = []
+    matches = list(_FILE_HEADER.finditer(content))
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        text = content[m.end():end].strip()
+        if text:
+            parts.append((m.group(1).strip(), text))
+    return parts
+
+
+def _legacy_prompt(summary: str, tree: str, gitingest_content: str) -> str:
+    """``_prepare_file_contents`` as it was: a 60 000-char slice of the files."""
+    truncated = gitingest_content[:60_000]
+    if len(gitingest_content) > 60_000:
+        truncated += "\n\n... [TRUNCATED] ..."
+    return f"--- REPOSITORY SUMMARY ---\n{summary}\n\n--- DIRECTORY TREE ---\n{tree}\n\n--- FILE CONTENTS ---\n{truncated}"
+
+
+def _legacy_view(svc, snapshot) -> dict:
+    from services.ingestion_store import render_file_blocks
+
+    files = [
+        (path, text) for path, text in snapshot.files.items()
+        if svc._README_EXCLUDED_DIRS.isdisjoint(path.split("/")[:-1])
+    ]
+    gitingest_content = render_file_blocks(files)
+    source_files = {}
+    for block in re.split(r"={48}\n[Ff][Ii][Ll][Ee]: ", gitingest_content):
+        parts = block.split("\n" + "=" * 48 + "\n", 1)
+        if len(parts) == 2:
+            path, body = parts[0].strip(), parts[1].strip()
+            source_files[path] = svc._truncate_source_file(os.path.basename(path).lower(), body)
+    readme = ""
+    for block in re.split(r"={48}\n[Ff][Ii][Ll][Ee]: ", gitingest_content):
+        parts = block.split("\n" + "=" * 48 + "\n", 1)
+        if len(parts) == 2 and os.path.basename(parts[0].strip()).lower() in ("readme.md", "readme.txt", "readme"):
+            readme = parts[1].strip()[:2000]
+            break
+    prompt = _legacy_prompt(snapshot.summary, snapshot.tree, gitingest_content)
+    return {"source_files": source_files, "existing_readme": readme, "prompt_chars": len(prompt),
+            "gitingest_content": gitingest_content}
+
+
+def _child(mode: str, mb: int, files: int) -> dict:
+    from services.ingestion_store import split_file_blocks
+    from services.readme_service import ReadmeService
+    from services.repo_cache import RepoSnapshot
+
+    svc = ReadmeService.__new__(ReadmeService)
+    svc._analyze_project_metadata = lambda source_files, structure: None   # not what's measured
+
+    content = _dump(mb, files)
+    base = _rss_kb("VmRSS")
+    _reset_peak()
+
+    t0 = time.perf_counter()
+    blocks = (_legacy_split if mode == "legacy" else split_file_blocks)(content)
+    del content
+    parse_s = time.perf_counter() - t0
+    parse_peak = _rss_kb("VmHWM") - base
+
+    snapshot = RepoSnapshot(owner="o", repo="r", commit_sha="s", summary="summary", tree="tree",
+                            _files=dict(blocks))
+    del blocks
+    after_parse = _rss_kb("VmRSS")
+    _reset_peak()
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        view = _legacy_view(svc, snapshot)
+    else:
+        ctx = svc._readme_view(snapshot)
+        prompt = svc._prepare_file_contents(snapshot.summary, snapshot.tree, ctx["parsed"].content)
+        view = {"source_files": ctx["source_files"], "existing_readme": ctx["existing_readme"],
+                "prompt_chars": len(prompt)}
+    view_s = time.perf_counter() - t0
+    view_peak = _rss_kb("VmHWM") - after_parse
+
+    return {
+        "parse_peak_mb": parse_peak / 1024,
+        "view_peak_mb": view_peak / 1024,
+        "parse_s": parse_s,
+        "view_s": view_s,
+        "files": len(view["source_files"]),
+        "readme": bool(view["existing_readme"]),
+        "prompt_chars": view["prompt_chars"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=200)
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--mode", choices=("legacy", "stream"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_child(args.mode, args.mb, args.files)))
+        return
+
+    print(f"{args.mb} MB dump, {args.files} files")
+    results = {}
+    for mode in ("legacy", "stream"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--mb", str(args.mb), "--files", str(args.files)],
+            capture_output=True, text=True, check=True,
+        )
+        r = results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{mode:>7}: parse peak +{r['parse_peak_mb']:6.0f} MB ({r['parse_s']:.2f}s)  "
+            f"view peak +{r['view_peak_mb']:6.0f} MB ({r['view_s']:.2f}s)  "
+            f"[{r['files']} files, readme={r['readme']}, prompt {r['prompt_chars']} chars]"
+        )
+    legacy, stream = results["legacy"], results["stream"]
+    assert (legacy["files"], legacy["readme"]) == (stream["files"], stream["readme"]), "views differ"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Benchmark: chunking Python and JS/TS source — def/class regex splitting vs
+the structural chunker (``services/code_structure.py``).
+
+Builds a synthetic repo (``--files`` Python and TypeScript modules of
+classes whose methods share names — ``get``, ``save``, ``validate`` … —
+plus exported arrow functions and route callbacks), or reads the .py / .js
+/ .ts files under ``--corpus``, and times, interleaved, best of
+``--repeat``:
+
+  regex   — the previous ``_split_python`` / ``_split_js``: one chunk per
+            top-level def/class line, classes cut into fixed-size parts
+  struct  — ``_split_python`` / ``_split_js`` now: the same split, named and
+            with line spans; a class too big for one chunk is parsed
+            and split into its head and methods
+  parsed  — every file through ``python_definitions`` / ``js_definitions``:
+            one chunk per function, method and class head
+
+each as a whole (``Chunk`` models included) and as the boundary scan alone
+(``finditer`` of the split pattern vs ``_top_level`` vs the full parse).
+
+Retrieval proxy: for every method whose name more than one class defines,
+a query of its class and method name ("order repository save") is run
+against each chunk set with BM25.  A hit is a chunk of that method — by
+its name for structural chunks, by holding its ``def`` / signature line
+for regex ones.  Reported as hit@1 and hit@5 for the regex chunks, the
+structural chunks' plain text, and their ``chunk_document`` (text under
+the dotted name), which is what gets embedded.
+
+    python benchmarks/bench_structural_chunker.py --files 400
+    python benchmarks/bench_structural_chunker.py --corpus /usr/lib/python3.11
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import math
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("NVIDIA_API_KEY", "bench")
+
+from services.code_structure import StructureError, js_definitions, python_definitions  # noqa: E402
+from services.ingestion_service import (  # noqa: E402
+    _JS_TOP_LEVEL,
+    _PY_TOP_LEVEL,
+    _split_by_pattern,
+    _split_definitions,
+    _split_js,
+    _split_python,
+    _top_level,
+)
+from services.rag_service import chunk_document  # noqa: E402
+
+_PY_SPLIT = re.compile(r"^(def |class |async def )", re.MULTILINE)
+_JS_SPLIT = re.compile(r"^(export |async )?(function |class |const \w+ = |const \w+ = async )", re.MULTILINE)
+
+_ENTITIES = ["Order", "User", "Invoice", "Product", "Cart", "Session", "Payment", "Report"]
+_ROLES = ["Repository", "Service", "Controller", "Validator"]
+_QUALIFIERS = ["Cached", "Remote", "Local", "Batch", "Legacy", "Async", "Audited", "Sharded", "Draft", "Public",
+               "Internal", "Archived", "Pending", "Signed", "Scheduled", "Export", "Import", "Tenant", "Admin",
+               "Mobile", "Partner", "Trial", "Bulk", "Guest"]
+_METHODS = ["get", "save", "delete", "list", "validate", "update", "create", "refresh", "load", "render"]
+
+
+# ── Corpora ───────────────────────────────────────────────────────────────────
+
+def _py_method(rng: random.Random, name: str, entity: str) -> str:
+    lines = [f"    def {name}(self, {entity.lower()}_id, **options):", '        """Handle one request."""']
+    for n in range(rng.randint(2, 40)):
+        lines.append(f"        step_{n} = self._backend.call('{name}', {entity.lower()}_id, attempt={n})")
+    lines.append("        return step_0")
+    return "\n".join(lines) + "\n"
+
+
+def _ts_method(rng: random.Random, name: str, entity: str) -> str:
+    lines = [f"  async {name}({entity.lower()}Id: string, options?: Options): Promise<{entity}> {{"]
+    for n in range(rng.randint(2, 40)):
+        lines.append(f"    const step{n} = await this.backend.call('{name}', {{ id: {entity.lower()}Id, n: {n} }});")
+    lines += ["    return step0;", "  }"]
+    return "\n".join(lines) + "\n"
+
+
+def _synthetic(files: int) -> list[tuple[str, str]]:
+    rng = random.Random(0)
+    repo = []
+    for i in range(files):
+        entity = _ENTITIES[i % len(_ENTITIES)]
+        qualifier = _QUALIFIERS[i // len(_ENTITIES) % len(_QUALIFIERS)]
+        py, ts = ["import logging\n", "log = logging.getLogger(__name__)\n"], ["import { Options } from './types';\n"]
+        for role in rng.sample(_ROLES, 2):
+            cls = f"{qualifier}{entity}{role}"
+            methods = rng.sample(_METHODS, rng.randint(3, 6))
+            py.append(f"\n\nclass {cls}:\n    \"\"\"{role} for {entity} records.\"\"\"\n\n    retries = 3\n\n"
+                      + "\n".join(_py_method(rng, m, entity) for m in methods))
+            ts.append(f"\nexport class {cls} {{\n  private retries = 3;\n\n"
+                      + "\n".join(_ts_method(rng, m, entity) for m in methods) + "}\n")
+        py.append(f"\n\ndef build_{entity.lower()}_{i}(config):\n    return {qualifier}{entity}Service(config)\n")
+        ts.append(f"\nexport const build{entity}{i} = (config: Options) => {{\n  return config;\n}};\n")
+        ts.append(f"\napp.get('/{entity.lower()}s/{i}', async (req, res) => {{\n  res.json(await load(req));\n}});\n")
+        repo.append((f"pkg{i % 17}/{entity.lower()}_{i}.py", "".join(py)))
+        repo.append((f"web/src/{entity.lower()}{i}.ts", "".join(ts)))
+    return repo
+
+
+def _corpus(root: str) -> list[tuple[str, str]]:
+    repo = []
+    for path in sorted(Path(root).rglob("*")):
+        if path.suffix in (".py", ".js", ".ts") and path.is_file() and "node_modules" not in path.relative_to(root).parts:
+            repo.append((str(path.relative_to(root)), path.read_text(encoding="utf-8", errors="replace")))
+    return repo
+
+
+# ── Paths under test ──────────────────────────────────────────────────────────
+
+def _language(path: str) -> str:
+    return {".py": "python", ".js": "javascript", ".ts": "typescript"}[os.path.splitext(path)[1]]
+
+
+def _regex_chunks(path: str, text: str) -> list:
+    """The previous ``_split_python`` / ``_split_js``, verbatim."""
+    language = _language(path)
+    return _split_by_pattern(path, text, _PY_SPLIT if language == "python" else _JS_SPLIT, language)
+
+
+def _struct_chunks(path: str, text: str) -> list:
+    language = _language(path)
+    return _split_python(path, text) if language == "python" else _split_js(path, text, language)
+
+
+def _regex_scan(path: str, text: str) -> list:
+    return list((_PY_SPLIT if path.endswith(".py") else _JS_SPLIT).finditer(text))
+
+
+def _struct_scan(path: str, text: str) -> list:
+    if path.endswith(".py"):
+        return _top_level(text, _PY_TOP_LEVEL, python_definitions)
+    return _top_level(text, _JS_TOP_LEVEL, js_definitions)
+
+
+def _parsed_chunks(path: str, text: str) -> list:
+    definitions = _parsed_scan(path, text)
+    if not definitions:
+        return _regex_chunks(path, text)
+    return _split_definitions(path, text, _language(path), definitions)
+
+
+def _parsed_scan(path: str, text: str) -> list:
+    try:
+        return python_definitions(text) if path.endswith(".py") else js_definitions(text)
+    except StructureError:
+        return []
+
+
+def _best(fns: dict, repo: list[tuple[str, str]], repeat: int) -> dict[str, float]:
+    best = {label: math.inf for label in fns}
+    for _ in range(repeat):
+        for label, fn in fns.items():
+            gc.collect()
+            t0 = time.perf_counter()
+            for path, text in repo:
+                fn(path, text)
+            best[label] = min(best[label], time.perf_counter() - t0)
+    return best
+
+
+# ── Retrieval proxy ───────────────────────────────────────────────────────────
+
+def _tokens(text: str) -> list[str]:
+    words = re.findall(r"[A-Za-z][a-z]*|[A-Z]+(?![a-z])|\d+", text)
+    return [w.lower() for w in words]
+
+
+class _BM25:
+    def __init__(self, docs: list[str], k1: float = 1.2, b: float = 0.75):
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        lengths = []
+        for i, doc in enumerate(docs):
+            counts = Counter(_tokens(doc))
+            lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings[token].append((i, tf))
+        avg = sum(lengths) / max(1, len(lengths))
+        self.norm = [k1 * (1 - b + b * n / avg) for n in lengths]
+        self.k1, self.n = k1, len(docs)
+
+    def top(self, query: str, k: int) -> list[int]:
+        scores: dict[int, float] = defaultdict(float)
+        for token in set(_tokens(query)):
+            hits = self.postings.get(token, ())
+            idf = math.log(1 + (self.n - len(hits) + 0.5) / (len(hits) + 0.5))
+            for i, tf in hits:
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self.norm[i])
+        return sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+
+
+class _Target(NamedTuple):
+    path: str
+    scope: str
+    name: str
+    header: str      # the method's def / signature line
+
+    @property
+    def query(self) -> str:
+        return f"{self.scope.split('.')[-1]} {self.name}"
+
+    def hit(self, chunk) -> bool:
+        """``chunk`` is (part of) this method: by name when it has one, else by holding the header line."""
+        if chunk.file_path != self.path:
+            return False
+        if chunk.symbol:
+            return (chunk.scope, chunk.symbol) == (self.scope, self.name)
+        return self.header in chunk.text
+
+
+def _targets(repo: list[tuple[str, str]]) -> list[_Target]:
+    """The methods whose name is defined in more than one class."""
+    methods = []
+    for path, text in repo:
+        for d in _parsed_scan(path, text):
+            if d.kind != "function" or not d.scope:
+                continue
+            header = next((line.strip() for line in text[d.start:d.end].splitlines()
+                           if re.search(rf"\b{re.escape(d.name)}\b", line)), None)
+            if header:
+                methods.append(_Target(path, d.scope, d.name, header))
+    owners = Counter(t.name for t in methods)
+    return [t for t in methods if owners[t.name] > 1]
+
+
+def _hit_rates(chunks: list, docs: list[str], targets: list[_Target]) -> tuple[float, float]:
+    index = _BM25(docs)
+    at1 = at5 = 0
+    for target in targets:
+        hits = [target.hit(chunks[i]) for i in index.top(target.query, 5)]
+        at1 += bool(hits) and hits[0]
+        at5 += any(hits)
+    return at1 / max(1, len(targets)), at5 / max(1, len(targets))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=400, help="synthetic modules per language")
+    parser.add_argument("--corpus", help="a directory of .py / .js / .ts files to use instead")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--queries", type=int, default=2_000, help="retrieval queries, sampled")
+    args = parser.parse_args()
+
+    repo = _corpus(args.corpus) if args.corpus else _synthetic(args.files)
+    mb = sum(len(t) for _, t in repo) / 1e6
+    fallbacks = 0
+    for path, text in repo:
+        try:
+            python_definitions(text) if path.endswith(".py") else js_definitions(text)
+        except StructureError:
+            fallbacks += 1
+    print(f"{len(repo)} files, {mb:.1f} MB ({fallbacks} the parsers reject)")
+
+    for lang, exts in (("python", (".py",)), ("js/ts", (".js", ".ts"))):
+        files = [(p, t) for p, t in repo if p.endswith(exts)]
+        if not files:
+            continue
+        scan = _best({"regex": _regex_scan, "struct": _struct_scan, "parsed": _parsed_scan}, files, args.repeat)
+        full = _best({"regex": _regex_chunks, "struct": _struct_chunks, "parsed": _parsed_chunks}, files, args.repeat)
+        counts = {label: sum(len(fn(p, t)) for p, t in files)
+                  for label, fn in (("regex", _regex_chunks), ("struct", _struct_chunks), ("parsed", _parsed_chunks))}
+        size = sum(len(t) for _, t in files) / 1e6
+        print(f"\n{lang}: {len(files)} files, {size:.1f} MB")
+        for label in ("regex", "struct", "parsed"):
+            print(f"  {label:>6}: scan {scan[label] * 1000:7.1f}ms  chunks {full[label] * 1000:7.1f}ms "
+                  f"({size / full[label]:5.1f} MB/s, {counts[label]} chunks)")
+        for label in ("struct", "parsed"):
+            print(f"  {label}/regex: scan {scan[label] / scan['regex']:.2f}x  chunks {full[label] / full['regex']:.2f}x")
+
+    targets = _targets(repo)
+    random.Random(0).shuffle(targets)
+    targets = targets[:args.queries]
+    regex = [c for path, text in repo for c in _regex_chunks(path, text)]
+    struct = [c for path, text in repo for c in _struct_chunks(path, text)]
+    parsed = [c for path, text in repo for c in _parsed_chunks(path, text)]
+    print(f"\nretrieval proxy: {len(targets)} class + method queries, BM25 top-5")
+    for label, chunks, docs in (
+        ("regex text", regex, [c.text for c in regex]),
+        ("struct text", struct, [c.text for c in struct]),
+        ("struct document", struct, [chunk_document(c) for c in struct]),
+        ("parsed document", parsed, [chunk_document(c) for c in parsed]),
+    ):
+        at1, at5 = _hit_rates(chunks, docs, targets)
+        print(f"  {label:>15}: hit@1 {at1:6.1%}  hit@5 {at5:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+StubServer
+==========
+Minimal asyncio HTTP/1.1 server used by the benchmarks to stand in for
+api.github.com / the NVIDIA endpoint without touching the network.
+
+  - keep-alive aware, so connection reuse is observable
+  - counts accepted connections (a proxy for TCP/TLS handshakes)
+  - optional ``handshake_delay`` on every new connection to model the RTTs a
+    real TLS handshake costs
+  - handlers may return a bytes body or an async iterator of bytes, which is
+    sent with chunked transfer encoding (used for SSE streams)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable
+
+
+@dataclass
+class StubRequest:
+    method: str
+    path: str
+    headers: dict[str, str]
+    body: bytes
+
+
+@dataclass
+class StubResponse:
+    status: int = 200
+    body: bytes | AsyncIterator[bytes] = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def json(cls, payload, status: int = 200, headers: dict[str, str] | None = None) -> "StubResponse":
+        return cls(
+            status=status,
+            body=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json", **(headers or {})},
+        )
+
+
+Handler = Callable[[StubRequest], Awaitable[StubResponse]]
+
+_REASONS = {200: "OK", 304: "Not Modified", 404: "Not Found", 500: "Internal Server Error"}
+
+
+class StubServer:
+    """Tiny keep-alive HTTP server with connection accounting."""
+
+    def __init__(self, handler: Handler, handshake_delay: float = 0.0):
+        self._handler = handler
+        self._handshake_delay = handshake_delay
+        self._server: asyncio.AbstractServer | None = None
+        self.connections = 0
+        self.requests = 0
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        if self._handshake_delay:
+            await asyncio.sleep(self._handshake_delay)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                self.requests += 1
+                response = await self._handler(request)
+                await self._write_response(writer, response)
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> StubRequest | None:
+        line = await reader.readline()
+        if not line:
+            return None
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+        headers: dict[str, str] = {}
+        while True:
+            raw = await reader.readline()
+            if raw in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = raw.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+        body = await reader.readexactly(length) if length else b""
+        return StubRequest(method=method, path=path, headers=headers, body=body)
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, response: StubResponse) -> None:
+        reason = _REASONS.get(response.status, "OK")
+        head = [f"HTTP/1.1 {response.status} {reason}"]
+        head += [f"{k}: {v}" for k, v in response.headers.items()]
+
+        if isinstance(response.body, (bytes, bytearray)):
+            head.append(f"Content-Length: {len(response.body)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+            await writer.drain()
+            return
+
+        head.append("Transfer-Encoding: chunked")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        async for part in response.body:
+            writer.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile — good enough for benchmark summaries."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
@@ -12,15 +12,81 @@ class Settings(BaseSettings):
 
     # GitHub API
     github_token: str = ""
+    github_api_url: str = "https://api.github.com"
+
+    # GitHub HTTP client pool (one shared client for the app lifetime)
+    github_http2: bool = True
+    github_max_connections: int = 20
+    github_max_keepalive_connections: int = 10
+    github_keepalive_expiry: float = 30.0
+    github_timeout: float = 30.0
+    github_etag_cache_size: int = 2048
+    github_etag_cache_max_mb: int = 32   # bytes of cached response bodies revalidated by ETag
 
     # AI Models
     nvidia_api_key: str = ""
     ai_model: str = "qwen/qwen2.5-coder-32b-instruct"
+    nvidia_api_url: str = "https://integrate.api.nvidia.com/v1/chat/completions"
+    ai_max_connections: int = 20
+    ai_timeout: float = 120.0
     gemini_api_key: str = ""
     gemini_model: str = "gemini-2.5-flash"
+    gemini_max_streams: int = 64
+
+    # Prompt sizing (see services/prompt_budget.py)
+    prompt_encoding: str = "cl100k_base"   # tiktoken encoding prompts are counted in
+    prompt_max_tokens: int = 24_576        # cap per prompt, below the model's context window minus its reply
+    prompt_token_margin: float = 0.15      # share of the window held back: models tokenise differently than prompt_encoding
 
     # Vector store
     chroma_persist_dir: str = "./chroma_db"
+    embedding_cache_dir: str = "./embedding_cache"   # content-hash → vector; empty = in-memory only
+    embedding_cache_max_mb: int = 512   # vectors kept before the cache starts over; 0 = unbounded
+
+    # Ingestion cache (SQLite); empty string keeps it in memory only
+    repo_cache_dir: str = "./repo_cache"
+    repo_cache_max_mb: int = 256        # in-memory budget for chunk lists
+    gitingest_cache_max_mb: int = 256   # in-memory budget for repo snapshots (raw files)
+    repo_cache_ttl: float = 604800.0    # seconds; 0 disables expiry
+
+    # Incremental refresh (GitHub compare API) when a repo gets new commits
+    incremental_max_files: int = 300            # above this, do a full re-fetch
+    incremental_feature_threshold: float = 0.2  # changed-file share that re-runs feature ID
+
+    # Runtime for the embedding model and reranker: "torch" or "onnx" (needs sentence-transformers[onnx])
+    inference_backend: str = "torch"
+    inference_quantization: str = ""    # onnx only: int8 target avx512_vnni / avx512 / avx2 / arm64; empty = fp32
+    onnx_model_dir: str = "./onnx_models"   # exported (and quantized) ONNX graphs
+    warm_up_models: bool = False        # load both models (and run them once) before serving requests
+
+    # Inference pool for embedding / reranking
+    compute_workers: int = 2            # concurrent inference jobs
+    compute_torch_threads: int = 0      # torch intra-op threads per job; 0 = cores / workers
+    compute_max_queue: int = 32         # queued jobs before new work gets 503 + Retry-After
+    batch_window_ms: float = 5.0        # how long retrieval inference waits for other sessions to batch with
+    embed_batch_size: int = 64          # query texts per embedding batch before flushing early
+    query_embedding_cache_size: int = 1024   # recent query vectors kept in memory (never on disk)
+    rerank_batch_size: int = 256        # (query, doc) pairs per cross-encoder batch before flushing early
+
+    # Chunking of large repos in worker processes, off the event loop (see services/chunk_pool.py)
+    chunk_workers: int = 0                  # worker processes; 0 = cores, at most 4
+    chunk_batch_chars: int = 1_000_000      # file text sent to a worker per batch
+    chunk_inline_max_chars: int = 200_000   # up to this much text to chunk stays in-process
+
+    # /health/ready thresholds — beyond these the worker reports itself not ready
+    ready_min_github_quota: int = 50    # GitHub requests left in the current rate-limit window
+    ready_max_compute_queue: int = 16   # inference jobs waiting for the compute pool
+    ready_max_llm_calls: int = 32       # upstream LLM requests in flight
+    ready_check_timeout: float = 2.0    # seconds for the Chroma heartbeat
+
+    # Session reaper (idle article/content sessions and their vectors)
+    session_idle_ttl: float = 3600.0        # seconds without activity before an unfinished session expires
+    session_finished_ttl: float = 900.0     # same, once the session has produced its result
+    session_reap_interval: float = 60.0
+    vector_compact_interval: float = 3600.0 # chroma_db cleanup (orphaned collections, VACUUM)
+
+    # /admin/* endpoints: callers send this in X-Admin-Token; empty disables them
+    admin_token: str = ""
 
     # Local storage
     output_dir: str = "./generated_readmes"
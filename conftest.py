@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _chroma_persist_dir(tmp_path, monkeypatch):
+    """Keep what tests persist (session leases, collections) out of the working tree."""
+    from config import settings
+
+    monkeypatch.setattr(settings, "chroma_persist_dir", str(tmp_path / "chroma_db"))
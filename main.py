@@ -1,15 +1,18 @@
 import asyncio
 import logging
 import logging.config
+import secrets
 import sys
+import time
 import uuid
+from contextlib import aclosing, asynccontextmanager
 from functools import lru_cache
 from pathlib import Path
 
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
@@ -30,15 +33,24 @@ from models import (
     SessionStartRequest,
     WSMessageIn,
 )
-from services.ai_service import AIService
+from services.ai_service import AIService, close_ai_client
 from services.article_builder import ArticleBuilder
 from services.article_session import ArticleSession
+from services.chunk_pool import shutdown_chunk_pool
+from services.compute_pool import ComputeBusy, get_compute_pool, pool_stats
+from services.micro_batcher import batcher_stats
 from services.content_session import ContentSession
+from services.embedding_cache import get_embedding_cache
 from services.file_service import FileService
 from services.gemini_service import GeminiService
+from services import health as health_checks
+from services.github_service import close_github_client, conditional_cache, get_github_client
+from services import ingestion_store
 from services.ingestion_service import IngestionService
-from services.rag_service import RAGService
-from services.readme_service import ReadmeService
+from services.rag_service import RAGService, collection_stats as rag_collection_stats
+from services.readme_service import GenerationCancelled, ReadmeService
+from services.repo_cache import repo_cache, snapshot_cache
+from services.session_reaper import SessionReaper
 from services.websocket_manager import manager as ws_manager
 
 # ---------------------------------------------------------------------------
@@ -56,10 +68,47 @@ log = logging.getLogger(__name__)
 # App & Dependencies
 # ---------------------------------------------------------------------------
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """App lifetime hook — owns the shared upstream HTTP clients, the session reaper and the chunk pool."""
+    get_github_client()
+    # In the background: /health/live answers meanwhile, /health/ready waits for it
+    warm_up = asyncio.create_task(_warm_up_models()) if settings.warm_up_models else None
+    session_reaper.start()
+    yield
+    if warm_up is not None:
+        warm_up.cancel()
+    await session_reaper.stop()
+    shutdown_chunk_pool()
+    await close_github_client()
+    await close_ai_client()
+
+
+async def _warm_up_models() -> None:
+    """Load the embedding model and reranker up front, so the first user doesn't wait.
+
+    Retries with backoff on failure (e.g. the model download failed);
+    requests can still load the models on first use meanwhile.
+    """
+    delay = 5.0
+    while True:
+        started = time.perf_counter()
+        try:
+            await get_compute_pool().run(lambda: _get_rag_service().warm_up())
+        except Exception as exc:
+            log.warning("Model warm-up failed — retrying in %.0fs: %s", delay, exc)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 300.0)
+            continue
+        log.info("🔥 Models warmed up in %.1fs", time.perf_counter() - started)
+        return
+
+
 app = FastAPI(
     title="README Generator API",
     description=f"Generate comprehensive README files for GitHub repositories using AI ({settings.ai_model})",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # CORS — allow frontend clients to call the API
@@ -71,6 +120,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(ComputeBusy)
+async def compute_busy_handler(request, exc: ComputeBusy):
+    """Inference pool saturated — tell the client when to come back."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 @lru_cache()
 def get_readme_service() -> ReadmeService:
     """Dependency: singleton ReadmeService."""
@@ -106,6 +164,12 @@ async def root():
             "resume": "/generate-resume-points",
             "models": "/models",
             "health": "/health",
+            "github_stats": "/stats/github",
+            "cache_stats": "/stats/cache",
+            "health_live": "/health/live",
+            "health_ready": "/health/ready",
+            "session_stats": "/stats/sessions",
+            "compute_stats": "/stats/compute",
             "files": "/files",
             "banner_preview": "/banner-preview/{owner}/{repo}",
             "banner_options": "/banner-options",
@@ -117,6 +181,72 @@ async def health():
     """Health check endpoint."""
     return {"status": "ok", "version": "2.0.0", "ai_model": settings.ai_model}
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness: the process is up and its event loop answers."""
+    return health_checks.liveness()
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: models warm, Chroma reachable, GitHub quota left, queues below their limits.
+
+    503 when any check fails, so the load balancer sheds traffic from this worker.
+    """
+    result = await health_checks.readiness()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if result["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if result["ready"] else "not_ready", **result},
+    )
+
+@app.get("/stats/github")
+async def github_stats():
+    """Conditional-request counters: how much GitHub quota 304s are saving."""
+    return {"success": True, "github": conditional_cache.stats()}
+
+@app.get("/stats/compute")
+async def compute_stats():
+    """Inference pool (workers, queue depth, waits, 503 rejections) and micro-batch histograms."""
+    return {"success": True, "compute": pool_stats(), "batching": batcher_stats()}
+
+@app.get("/stats/cache")
+async def cache_stats():
+    """Repo/snapshot cache counters, per-entry footprint, and full vs incremental fetches."""
+    return {
+        "success": True,
+        "cache": {
+            "repo": repo_cache.stats(),
+            "snapshot": snapshot_cache.stats(),
+            "fetches": ingestion_store.stats(),
+            "embeddings": get_embedding_cache().stats(),
+            "collections": rag_collection_stats(),
+        },
+    }
+
+def require_admin(x_admin_token: str = Header(default="")) -> None:
+    """Gate for /admin/*: disabled unless ``settings.admin_token`` is set, then it must match."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin endpoints are disabled.")
+    if not secrets.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token.")
+
+
+@app.delete("/admin/cache/{owner}/{repo}", dependencies=[Depends(require_admin)])
+async def invalidate_repo_cache(owner: str, repo: str):
+    """Drop one repo from the ingestion caches (memory and disk)."""
+    removed = await asyncio.to_thread(repo_cache.invalidate, owner, repo)
+    removed = await asyncio.to_thread(snapshot_cache.invalidate, owner, repo) or removed
+    if not removed:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"'{owner}/{repo}' is not cached.")
+    return {"success": True, "message": f"Cache for '{owner}/{repo}' invalidated."}
+
+@app.delete("/admin/cache", dependencies=[Depends(require_admin)])
+async def clear_repo_caches():
+    """Drop every entry from the ingestion and embedding caches (memory and disk)."""
+    await asyncio.to_thread(repo_cache.clear)
+    await asyncio.to_thread(snapshot_cache.clear)
+    await asyncio.to_thread(get_embedding_cache().clear)
+    return {"success": True, "message": "Ingestion and embedding caches cleared."}
+
 @app.get("/models")
 async def get_models(readme_svc: ReadmeService = Depends(get_readme_service)):
     """List supported AI models."""
@@ -451,8 +581,10 @@ async def article_start(request: ArticleStartRequest, background_tasks: Backgrou
 
     Returns a ``session_id`` immediately.  Connect to
     ``WS /ws/article/{session_id}`` to receive progress and continue the
-    conversation.
+    conversation.  Answers ``503`` with ``Retry-After`` while the inference
+    pool is saturated.
     """
+    get_compute_pool().admit()
     session_id = str(uuid.uuid4())
     session = ArticleSession(
         session_id=session_id,
@@ -510,6 +642,10 @@ async def _run_ingestion(session_id: str, owner: str, repo: str) -> None:
         log.error("❌ Ingestion failed for session %s: %s", session_id, exc)
         session.mark_error()
         await ws_manager.send_error(session_id, f"Ingestion failed: {exc}")
+    finally:
+        # Reaped while ingesting: the reap hook ran before the vectors were attached
+        if session_id not in _sessions:
+            await _release_article_session(session_id)
 
 
 @app.websocket("/ws/article/{session_id}")
@@ -594,6 +730,7 @@ async def article_websocket(websocket: WebSocket, session_id: str):
         await ws_manager.send_error(session_id, str(exc))
     finally:
         ws_manager.disconnect(session_id)
+        session.touch()   # the idle clock starts when the client leaves
 
 
 async def _stream_article(
@@ -602,6 +739,11 @@ async def _stream_article(
     builder: ArticleBuilder,
 ) -> None:
     """Build the prompt and stream Gemini's response to the client."""
+    try:
+        get_compute_pool().admit()
+    except ComputeBusy as exc:
+        await ws_manager.send_error(session.session_id, f"Server busy — try again in {exc.retry_after}s.")
+        return
     session.mark_generating()
     prompt = await builder.build_prompt(session)
     await _stream_article_from_prompt(session, gemini_svc, prompt)
@@ -615,9 +757,15 @@ async def _stream_article_from_prompt(
     """Stream article tokens to the client and track the full draft."""
     full_text = ""
     try:
-        async for chunk in gemini_svc.stream_generate(prompt):
-            full_text += chunk
-            await ws_manager.send_article_chunk(session.session_id, chunk)
+        stream = gemini_svc.stream_generate(prompt)
+        async with aclosing(stream):
+            async for chunk in stream:
+                full_text += chunk
+                if not await ws_manager.send_article_chunk(session.session_id, chunk):
+                    # Client is gone — closing the stream cancels the upstream generation
+                    log.info("Client left session %s — cancelling generation", session.session_id)
+                    session.mark_error()
+                    return
         word_count = len(full_text.split())
         session.mark_done(full_text)
         await ws_manager.send_article_done(session.session_id, word_count)
@@ -746,19 +894,29 @@ async def content_websocket(websocket: WebSocket, session_id: str):
         await ws_manager.send_error(session_id, str(exc))
     finally:
         ws_manager.disconnect(session_id)
+        session.touch()
 
 
 async def _generate_content(session: ContentSession, readme_svc: ReadmeService) -> None:
-    """Generate content using the existing service, stream result to client."""
+    """Generate content using the existing service, streaming tokens to the client as they arrive.
+
+    The streamed tokens are the model's raw output; once generation finishes
+    the client is sent the stored result — cleaned, or the fallback README if
+    the model failed partway — to replace them.
+    """
     session.mark_generating()
     params = session.get_generation_params()
 
+    async def forward_chunk(chunk: str) -> bool:
+        return await ws_manager.send_article_chunk(session.session_id, chunk)
+
     try:
         if session.content_type == "readme":
             result = await readme_svc.generate_readme(
                 owner=session.owner,
                 repo=session.repo,
                 banner_config=BannerConfig(**params.pop("banner_config")),
+                on_chunk=forward_chunk,
                 **params,
             )
             content = result.get("readme_content", "")
@@ -768,24 +926,48 @@ async def _generate_content(session: ContentSession, readme_svc: ReadmeService)
                 owner=session.owner,
                 repo=session.repo,
                 content_type=ct,
+                on_chunk=forward_chunk,
                 **params,
             )
             content = result.get("content", "")
 
-        # Stream in chunks to match the article UX
-        chunk_size = 80
-        for i in range(0, len(content), chunk_size):
-            await ws_manager.send_article_chunk(session.session_id, content[i:i + chunk_size])
-
         session.mark_done(content)
+        await ws_manager.send_article_replace(session.session_id, content)
         await ws_manager.send_article_done(session.session_id, len(content.split()))
 
+    except GenerationCancelled:
+        log.info("Client left session %s — cancelled generation", session.session_id)
+        session.mark_error()
     except Exception as exc:
         log.error("Content generation failed for session %s: %s", session.session_id, exc)
         session.mark_error()
         await ws_manager.send_error(session.session_id, f"Generation failed: {exc}")
 
 
+# ---------------------------------------------------------------------------
+# Session reaper — expires idle sessions, releases their vectors
+# ---------------------------------------------------------------------------
+
+async def _release_article_session(session_id: str) -> None:
+    ws_manager.forget(session_id)
+    await _get_rag_service().clear_session(session_id)
+
+
+async def _release_content_session(session_id: str) -> None:
+    ws_manager.forget(session_id)   # content sessions never embed
+
+
+session_reaper = SessionReaper(is_connected=ws_manager.is_connected)
+session_reaper.register("article", _sessions, on_reap=_release_article_session)
+session_reaper.register("content", _content_sessions, on_reap=_release_content_session)
+
+
+@app.get("/stats/sessions")
+async def session_stats():
+    """Live sessions, sessions reaped, and vector-store bytes reclaimed."""
+    return {"success": True, "sessions": session_reaper.stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
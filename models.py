@@ -152,6 +152,10 @@ class Chunk(BaseModel):
     file_path: str
     chunk_type: str        # "config" | "function" | "class" | "doc" | "other"
     language: str
+    symbol: str = ""       # function / method / class name, for code chunks
+    scope: str = ""        # enclosing class(es), dotted; "" at top level
+    start_line: int = 0    # 1-based line span in the file; 0 if unknown
+    end_line: int = 0
 
 
 class ArticleStartRequest(BaseModel):
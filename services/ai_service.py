@@ -1,10 +1,45 @@
+import asyncio
+import json
 import logging
+from typing import AsyncIterator
+
 import httpx
 
 from config import settings
+from services.health import llm_call
 
 log = logging.getLogger(__name__)
 
+# Module-level singleton — pooled client reused across generations so each
+# call skips the TCP/TLS handshake to the NVIDIA endpoint.
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_ai_client() -> httpx.AsyncClient:
+    """Return the shared NVIDIA API client, (re)creating it for the running loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            timeout=settings.ai_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.ai_max_connections,
+                max_keepalive_connections=settings.ai_max_connections,
+            ),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_ai_client() -> None:
+    """Close the shared NVIDIA API client (called on app shutdown)."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
 
 class AIService:
     """NVIDIA API provider for the configured AI model."""
@@ -12,38 +47,88 @@ class AIService:
     def __init__(self):
         if not settings.nvidia_api_key:
             raise ValueError("NVIDIA_API_KEY is not set in environment / .env")
-        
+
         self.model_version = settings.ai_model
         self.api_key = settings.nvidia_api_key
-        self.invoke_url = "https://integrate.api.nvidia.com/v1/chat/completions"
+        self.invoke_url = settings.nvidia_api_url
 
-    async def generate_readme(self, prompt: str) -> str:
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Accept": "application/json"
-        }
-
-        payload = {
+    def _payload(self, prompt: str, stream: bool) -> dict:
+        return {
             "model": self.model_version,
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": 8192,
             "temperature": 0.4,
             "top_p": 0.9,
-            "stream": False,
+            "stream": stream,
+        }
+
+    async def generate_readme(self, prompt: str) -> str:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "application/json"
         }
 
         log.info("Sending request to %s via NVIDIA API...", self.model_version)
-        
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(self.invoke_url, headers=headers, json=payload)
-            if response.status_code != 200:
-                log.error("❌ NVIDIA API error %d: %s", response.status_code, response.text)
-            response.raise_for_status()
-            data = response.json()
-            response_text = data["choices"][0]["message"]["content"]
-            
-            log.info("Generation complete \u2014 %d chars total", len(response_text))
-            return response_text
+
+        client = get_ai_client()
+        with llm_call():
+            response = await client.post(self.invoke_url, headers=headers, json=self._payload(prompt, stream=False))
+        if response.status_code != 200:
+            log.error("❌ NVIDIA API error %d: %s", response.status_code, response.text)
+        response.raise_for_status()
+        data = response.json()
+        response_text = data["choices"][0]["message"]["content"]
+
+        log.info("Generation complete — %d chars total", len(response_text))
+        return response_text
+
+    async def stream_generate(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Async generator that yields content tokens as the model produces them.
+
+        Parses the OpenAI-compatible SSE stream (``data: {...}`` lines ending
+        with ``data: [DONE]``) returned when ``"stream": true``.
+        """
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "text/event-stream",
+        }
+
+        log.info("Streaming request to %s via NVIDIA API...", self.model_version)
+
+        total = 0
+        client = get_ai_client()
+        with llm_call():
+            async with client.stream(
+                "POST", self.invoke_url, headers=headers, json=self._payload(prompt, stream=True),
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    log.error("❌ NVIDIA API error %d: %s", response.status_code, body.decode(errors="ignore"))
+                response.raise_for_status()
+
+                done = False
+                async for line in response.aiter_lines():
+                    # Keep reading past [DONE] so the body is fully consumed and
+                    # the connection goes back to the pool instead of being dropped.
+                    if done or not line.startswith("data:"):
+                        continue  # blank keep-alives, comments, event: lines
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        done = True
+                        continue
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        log.warning("Skipping malformed SSE event: %r", data[:200])
+                        continue
+                    choices = event.get("choices") or []
+                    token = (choices[0].get("delta") or {}).get("content") if choices else None
+                    if token:
+                        total += len(token)
+                        yield token
+
+        log.info("Stream complete — %d chars total", total)
 
     def get_supported_models(self) -> list[str]:
         return [self.model_version]
@@ -15,7 +15,7 @@ from __future__ import annotations
 import logging
 
 from services.article_session import ArticleSession
-from services.rag_service import RAGService
+from services.rag_service import Facet, RAGService
 
 log = logging.getLogger(__name__)
 
@@ -35,25 +35,27 @@ class ArticleBuilder:
         """
         target_words = session.target_length_words()
 
-        # Pull rich context for different article angles
-        # With reranking, we can safely fetch more candidates — the cross-encoder
-        # will surface the most relevant ones.
-        overview_chunks = await self._rag.retrieve(
+        # Pull rich context for different article angles, in one batched
+        # retrieval.  With reranking, we can safely fetch more candidates —
+        # the cross-encoder will surface the most relevant ones.
+        overview_chunks, impl_chunks, config_chunks = await self._rag.retrieve_many(
             session.session_id,
-            query="project overview, main purpose, what does it do, problem solved",
-            k=8,
-        )
-        impl_chunks = await self._rag.retrieve(
-            session.session_id,
-            query="implementation details, architecture, core logic, algorithms, data flow",
-            k=8,
-            chunk_types=["function", "class"],
-        )
-        config_chunks = await self._rag.retrieve(
-            session.session_id,
-            query="setup, configuration, dependencies, tech stack, environment",
-            k=5,
-            chunk_types=["config"],
+            [
+                Facet(
+                    query="project overview, main purpose, what does it do, problem solved",
+                    k=8,
+                ),
+                Facet(
+                    query="implementation details, architecture, core logic, algorithms, data flow",
+                    k=8,
+                    chunk_types=["function", "class"],
+                ),
+                Facet(
+                    query="setup, configuration, dependencies, tech stack, environment",
+                    k=5,
+                    chunk_types=["config"],
+                ),
+            ],
         )
 
         rag_context = _format_chunks("Project Overview", overview_chunks) + \
@@ -15,6 +15,7 @@ States:
 from __future__ import annotations
 
 import logging
+import time
 from dataclasses import dataclass, field
 
 from models import ArticleSessionState
@@ -77,14 +78,20 @@ class ArticleSession:
     features: list[str] = field(default_factory=list)
     answers: dict[str, str] = field(default_factory=dict)
     draft: str = ""
+    last_active: float = field(default_factory=time.time)   # read by the session reaper
 
     _question_queue: list[dict] = field(default_factory=list)
     _asked: list[str] = field(default_factory=list)
 
     # ── Feature / question setup ──────────────────────────────────────────────
 
+    def touch(self) -> None:
+        """Record activity; idle sessions are expired by ``SessionReaper``."""
+        self.last_active = time.time()
+
     def set_features(self, features: list[str]) -> None:
         """Called by IngestionService after feature identification."""
+        self.touch()
         self.features = features
         self._build_question_queue()
         self.state = ArticleSessionState.QUESTIONING
@@ -125,6 +132,7 @@ class ArticleSession:
 
     def record_answer(self, answer: str) -> None:
         """Store the user's answer to the last-asked question."""
+        self.touch()
         if self._asked:
             last_q = self._asked[-1]
             self.answers[last_q] = answer
@@ -142,13 +150,16 @@ class ArticleSession:
     # ── Helpers ───────────────────────────────────────────────────────────────
 
     def mark_generating(self) -> None:
+        self.touch()
         self.state = ArticleSessionState.GENERATING
 
     def mark_done(self, draft: str) -> None:
+        self.touch()
         self.draft = draft
         self.state = ArticleSessionState.TUNING   # allow follow-up tuning
 
     def mark_error(self) -> None:
+        self.touch()
         self.state = ArticleSessionState.ERROR
 
     def target_length_words(self) -> int:
@@ -0,0 +1,129 @@
+"""
+ChunkPool
+=========
+Process pool that splits file blocks into chunks off the event loop.
+
+Chunking is pure-Python regex splitting and ``rfind`` scans; run on the
+event loop, a large repo held it for seconds, stalling every other
+session's WebSocket traffic.  Threads wouldn't help, since chunking holds
+the GIL, so ``IngestionService`` sends the files of large repos here in
+batches of about ``settings.chunk_batch_chars`` characters.  Workers return
+each file's ``ChunkStore``, which pickles as a handful of arrays and one
+text buffer rather than an object per chunk.
+
+Workers are started with ``spawn`` — forking a process that runs torch
+and the server's threads isn't safe — on first use, at a lower CPU
+priority so that on a host with few cores the server process still gets
+scheduled promptly.  A pool whose worker died is replaced and the batch
+it was chunking is retried on the new one; if that worker dies too, the
+batch is chunked on a thread so the event loop is still left alone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator
+
+from config import settings
+from services.chunk_store import ChunkStore
+
+log = logging.getLogger(__name__)
+
+_MAX_DEFAULT_WORKERS = 4
+_WORKER_NICENESS = 10
+
+FileBlock = tuple[str, str]                 # (path, text)
+
+
+def _init_worker() -> None:
+    # Chunking is background work: on a busy host the server process should win the CPU
+    try:
+        os.nice(_WORKER_NICENESS)
+    except (AttributeError, OSError):   # not on this platform
+        pass
+
+
+def _chunk_batch(batch: list[FileBlock]) -> list[ChunkStore]:
+    """Worker side: each file's chunks."""
+    from services.ingestion_service import _chunk_file
+
+    return [_chunk_file(path, text) for path, text in batch]
+
+
+def batch_files(files: list[FileBlock], max_chars: int) -> Iterator[list[FileBlock]]:
+    """``files`` in order, grouped into batches of about ``max_chars`` characters."""
+    batch: list[FileBlock] = []
+    size = 0
+    for path, text in files:
+        if batch and size + len(text) > max_chars:
+            yield batch
+            batch, size = [], 0
+        batch.append((path, text))
+        size += len(text)
+    if batch:
+        yield batch
+
+
+class ChunkPool:
+    """Worker processes that chunk batches of file blocks."""
+
+    def __init__(self, workers: int):
+        self.workers = workers or min(_MAX_DEFAULT_WORKERS, os.cpu_count() or 1)
+        self._executor = self._new_executor()
+        log.info("🧩 Chunk pool: %d worker processes", self.workers)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    async def chunk(self, batch: list[FileBlock]) -> list[tuple[str, ChunkStore]]:
+        """``(path, chunks)`` for each file of ``batch``, chunked in a worker."""
+        try:
+            stores = await self._submit(batch)
+        except BrokenProcessPool:
+            log.warning("⚠️ A chunk worker died — restarting the pool and retrying the batch")
+            try:
+                stores = await self._submit(batch)
+            except BrokenProcessPool:
+                log.warning("⚠️ A chunk worker died again — chunking this batch on a thread")
+                stores = await asyncio.to_thread(_chunk_batch, batch)
+        return [(path, chunks) for (path, _), chunks in zip(batch, stores)]
+
+    async def _submit(self, batch: list[FileBlock]) -> list[ChunkStore]:
+        """``_chunk_batch(batch)`` in a worker; a broken pool is replaced before re-raising."""
+        executor = self._executor
+        try:
+            return await asyncio.wrap_future(executor.submit(_chunk_batch, batch))
+        except BrokenProcessPool:
+            if self._executor is executor:   # another batch may have replaced it already
+                self._executor = self._new_executor()
+            raise
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Module-level singleton
+_pool: ChunkPool | None = None
+
+
+def get_chunk_pool() -> ChunkPool:
+    global _pool
+    if _pool is None:
+        _pool = ChunkPool(workers=settings.chunk_workers)
+    return _pool
+
+
+def shutdown_chunk_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
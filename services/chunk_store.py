@@ -0,0 +1,322 @@
+"""
+ChunkStore
+==========
+Columnar storage for a repo's chunks.
+
+A large repo has tens of thousands of chunks, and ``RepoCache`` keeps
+every cached revision's alive.  As pydantic ``Chunk`` models each costs
+about 1 KB before its text; a ``ChunkStore`` holds them as columns:
+
+  text                  — one UTF-8 ``bytearray``, with offsets into it
+  file_path             — interned: an index into the store's path table
+  chunk_type, language  — small-int codes into per-store tables
+  symbol, scope         — interned names
+  start_line, end_line  — ``array('I')``
+
+Indexing or iterating yields ``ChunkView``s: slotted handles that read
+their row on attribute access.  They have ``Chunk``'s fields, so code
+that only reads chunks takes either (``ChunkLike``).  ``Chunk`` stays the
+model at the boundaries — ``from_chunks`` / ``to_models`` convert.
+
+Texts are kept as UTF-8 rather than as one ``str``: a single non-ASCII
+character would widen a whole ``str`` buffer to 2 or 4 bytes per char.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Iterable, Iterator, Union
+
+from models import Chunk
+
+
+class _Interned:
+    """Strings ↔ small ints, in first-seen order."""
+
+    __slots__ = ("values", "_ids")
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: list[str] = list(values)
+        self._ids = {v: i for i, v in enumerate(self.values)}
+
+    def id(self, value: str) -> int:
+        i = self._ids.get(value)
+        if i is None:
+            i = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def copy(self) -> _Interned:
+        return _Interned(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        return (sys.getsizeof(self.values) + sys.getsizeof(self._ids)
+                + sum(sys.getsizeof(v) for v in self.values))
+
+
+class ChunkView:
+    """One row of a ``ChunkStore``, read on attribute access."""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store: ChunkStore, row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def text(self) -> str:
+        s, i = self._store, self._row
+        return s._text[s._offsets[i]:s._offsets[i + 1]].decode()
+
+    @property
+    def file_path(self) -> str:
+        return self._store._paths.values[self._store._file[self._row]]
+
+    @property
+    def chunk_type(self) -> str:
+        return self._store._types.values[self._store._type[self._row]]
+
+    @chunk_type.setter
+    def chunk_type(self, value: str) -> None:     # the Java splitter re-tags annotated chunks
+        self._store._type[self._row] = self._store._types.id(value)
+
+    @property
+    def language(self) -> str:
+        return self._store._languages.values[self._store._language[self._row]]
+
+    @property
+    def symbol(self) -> str:
+        return self._store._names.values[self._store._symbol[self._row]]
+
+    @property
+    def scope(self) -> str:
+        return self._store._names.values[self._store._scope[self._row]]
+
+    @property
+    def start_line(self) -> int:
+        return self._store._start_line[self._row]
+
+    @property
+    def end_line(self) -> int:
+        return self._store._end_line[self._row]
+
+    def to_model(self) -> Chunk:
+        return Chunk(**_fields(self))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (ChunkView, Chunk)):
+            return _fields(self) == _fields(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ChunkView({self.file_path!r}, {self.chunk_type!r}, {self.symbol!r}, row={self._row})"
+
+
+ChunkLike = Union[Chunk, ChunkView]
+
+_FIELDS = ("text", "file_path", "chunk_type", "language", "symbol", "scope", "start_line", "end_line")
+
+
+def _fields(chunk: ChunkLike) -> dict:
+    return {name: getattr(chunk, name) for name in _FIELDS}
+
+
+class ChunkStore(Sequence):
+    """A list of chunks, stored column-wise."""
+
+    __slots__ = (
+        "_text", "_offsets", "_paths", "_file", "_types", "_type", "_languages", "_language",
+        "_names", "_symbol", "_scope", "_start_line", "_end_line",
+    )
+
+    def __init__(self):
+        self._text = bytearray()
+        self._offsets = array("Q", [0])         # row i is _text[_offsets[i]:_offsets[i + 1]]
+        self._paths = _Interned()
+        self._file = array("I")
+        self._types = _Interned()
+        self._type = array("B")
+        self._languages = _Interned()
+        self._language = array("B")
+        self._names = _Interned([""])
+        self._symbol = array("I")
+        self._scope = array("I")
+        self._start_line = array("I")
+        self._end_line = array("I")
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[ChunkLike]) -> ChunkStore:
+        store = cls()
+        store.extend(chunks)
+        return store
+
+    @classmethod
+    def concat(cls, stores: Iterable[ChunkStore]) -> ChunkStore:
+        store = cls()
+        for other in stores:
+            store.extend(other)
+        return store
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def append(
+        self,
+        text: str,
+        file_path: str,
+        chunk_type: str,
+        language: str,
+        symbol: str = "",
+        scope: str = "",
+        start_line: int = 0,
+        end_line: int = 0,
+    ) -> None:
+        self._text += text.encode()
+        self._offsets.append(len(self._text))
+        self._file.append(self._paths.id(file_path))
+        self._type.append(self._types.id(chunk_type))
+        self._language.append(self._languages.id(language))
+        self._symbol.append(self._names.id(symbol))
+        self._scope.append(self._names.id(scope))
+        self._start_line.append(start_line)
+        self._end_line.append(end_line)
+
+    def extend(self, chunks: Iterable[ChunkLike]) -> None:
+        if not isinstance(chunks, ChunkStore):
+            for c in chunks:
+                self.append(c.text, c.file_path, c.chunk_type, c.language,
+                            c.symbol, c.scope, c.start_line, c.end_line)
+            return
+        # Another store: copy its columns, mapping its codes onto this store's tables
+        base = len(self._text)
+        self._text += chunks._text
+        self._offsets.extend([base + o for o in chunks._offsets[1:]])
+        for table, column, other_table, other_column in (
+            (self._paths, self._file, chunks._paths, chunks._file),
+            (self._types, self._type, chunks._types, chunks._type),
+            (self._languages, self._language, chunks._languages, chunks._language),
+            (self._names, self._symbol, chunks._names, chunks._symbol),
+            (self._names, self._scope, chunks._names, chunks._scope),
+        ):
+            codes = [table.id(v) for v in other_table.values]
+            column.extend([codes[c] for c in other_column])
+        self._start_line.extend(chunks._start_line)
+        self._end_line.extend(chunks._end_line)
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._file)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.select(range(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("chunk index out of range")
+        return ChunkView(self, index)
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        return map(ChunkView, [self] * len(self), range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (ChunkStore, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"ChunkStore({len(self)} chunks, {len(self._paths.values)} files, {self.nbytes} bytes)"
+
+    def file_paths(self) -> list[str]:
+        """Every row's file path."""
+        paths = self._paths.values
+        return [paths[i] for i in self._file]
+
+    def chunk_types(self) -> list[str]:
+        """Every row's chunk type."""
+        types = self._types.values
+        return [types[i] for i in self._type]
+
+    def known_types(self) -> list[str]:
+        """The chunk types this store has codes for; some may have no rows left."""
+        return list(self._types.values)
+
+    def rows_of_type(self, chunk_type: str) -> Iterator[int]:
+        """The rows tagged ``chunk_type``, in order, found lazily in the type column."""
+        if chunk_type not in self._types._ids:
+            return
+        codes, code = self._type.tobytes(), self._types.id(chunk_type)
+        i = codes.find(code)
+        while i != -1:
+            yield i
+            i = codes.find(code, i + 1)
+
+    def select(self, rows: Iterable[int]) -> ChunkStore:
+        """A new store of ``rows``, in that order."""
+        rows = list(rows)
+        store = ChunkStore()
+        offsets = self._offsets
+        store._text = bytearray(b"".join([self._text[offsets[i]:offsets[i + 1]] for i in rows]))
+        end = 0
+        for i in rows:
+            end += offsets[i + 1] - offsets[i]
+            store._offsets.append(end)
+        store._paths, store._types = self._paths.copy(), self._types.copy()
+        store._languages, store._names = self._languages.copy(), self._names.copy()
+        for name in ("_file", "_type", "_language", "_symbol", "_scope", "_start_line", "_end_line"):
+            column = getattr(self, name)
+            setattr(store, name, array(column.typecode, [column[i] for i in rows]))
+        return store
+
+    def to_models(self) -> list[Chunk]:
+        return [view.to_model() for view in self]
+
+    @property
+    def nbytes(self) -> int:
+        """Resident size: the text buffer, the columns and the interned tables."""
+        columns = (self._offsets, self._file, self._type, self._language,
+                   self._symbol, self._scope, self._start_line, self._end_line)
+        tables = (self._paths, self._types, self._languages, self._names)
+        return (sys.getsizeof(self) + sys.getsizeof(self._text)
+                + sum(sys.getsizeof(c) for c in columns) + sum(t.nbytes for t in tables))
+
+    # ── Serialization ─────────────────────────────────────────────────────────
+
+    def to_bytes(self) -> bytes:
+        """The tables as a JSON line, then each column's raw bytes (native byte order)."""
+        columns = [self._offsets, self._file, self._type, self._language,
+                   self._symbol, self._scope, self._start_line, self._end_line]
+        header = {
+            "rows": len(self),
+            "paths": self._paths.values,
+            "types": self._types.values,
+            "languages": self._languages.values,
+            "names": self._names.values,
+            "columns": [(c.typecode, c.itemsize) for c in columns],
+        }
+        return b"".join([json.dumps(header, separators=(",", ":")).encode(), b"\n",
+                         *(c.tobytes() for c in columns), self._text])
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> ChunkStore:
+        line_end = blob.index(b"\n")
+        header = json.loads(blob[:line_end])
+        store = cls()
+        store._paths, store._types = _Interned(header["paths"]), _Interned(header["types"])
+        store._languages, store._names = _Interned(header["languages"]), _Interned(header["names"])
+        pos, rows = line_end + 1, header["rows"]
+        names = ("_offsets", "_file", "_type", "_language", "_symbol", "_scope", "_start_line", "_end_line")
+        for name, (typecode, itemsize) in zip(names, header["columns"]):
+            column = array(typecode)
+            if column.itemsize != itemsize:
+                raise ValueError(f"chunk column {name} was written with {itemsize}-byte items")
+            size = (rows + (name == "_offsets")) * itemsize
+            column.frombytes(blob[pos:pos + size])
+            setattr(store, name, column)
+            pos += size
+        store._text = bytearray(blob[pos:])
+        return store
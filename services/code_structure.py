@@ -0,0 +1,410 @@
+"""
+Code structure
+==============
+Where the functions, methods and classes of a source file are, for the
+chunker: ``python_definitions`` and ``js_definitions`` return the file as
+``Definition`` spans — top-level functions and classes, and the methods of
+classes (and of exported object literals in JS) with the dotted name of
+what encloses them.  Functions nested inside functions stay part of their
+parent.  A class's own span is its head: the class line, docstring and
+attributes up to its first method.
+
+  Python — ``ast.parse``: the definitions in the module and class
+           bodies, from their first decorator to their ``end_lineno``.
+           Parsing costs 10-15x a regex split on real code
+           (``benchmarks/bench_structural_chunker.py``), so the chunker
+           splits at top-level def/class lines and parses only a class
+           too big for one chunk.  Source ``ast`` rejects
+           (a syntax error, Python 2) goes to a lightweight scanner:
+           definition lines at any depth, each block ending at the first
+           later line indented no deeper (lines inside triple-quoted
+           strings and closing brackets of a multi-line signature don't
+           count)
+  JS/TS  — a lightweight scanner: braces matched outside strings,
+           template literals and comments; the text before an opening
+           brace at top level or in a class says what it opens (function,
+           arrow function, class, method, callback such as
+           ``app.get('/x', (req, res) => {``)
+
+Input the scanners can't make sense of — unbalanced braces, unterminated
+triple-quoted strings — raises ``StructureError``, and the caller splits
+that class at fixed offsets.
+"""
+
+from __future__ import annotations
+
+import ast
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import NamedTuple
+
+
+class StructureError(ValueError):
+    """The file's structure couldn't be recovered."""
+
+
+class Definition(NamedTuple):
+    kind: str        # "function" or "class"
+    name: str
+    scope: str       # enclosing classes / objects, dotted; "" at top level
+    start: int       # offsets into the file text
+    end: int
+
+
+def _leading_comments(text: str, start: int, marker: str) -> int:
+    """``start`` moved back over comment lines directly above it."""
+    while start > 0:
+        line_start = text.rfind("\n", 0, start - 1) + 1
+        if not text[line_start:start].lstrip().startswith(marker):
+            break
+        start = line_start
+    return start
+
+
+# ── Python ────────────────────────────────────────────────────────────────────
+
+_NEWLINE = re.compile("\n")
+
+
+@lru_cache(maxsize=64)
+def _py_headers(indent: str) -> re.Pattern:
+    """A definition or decorator line indented exactly ``indent`` (no groups or lookahead: they triple the scan)."""
+    return re.compile(rf"\n{indent}(?:@|async[ \t]|def[ \t]|class[ \t])")
+
+
+_PY_HEADER = re.compile(r"(?:async[ \t]+)?(def|class)[ \t]+(\w+)")
+
+
+_PY_BODY_INDENT = re.compile(r"\n([ \t]+)(?=[^\s#])")
+
+
+@lru_cache(maxsize=64)
+def _py_dedent(width: int) -> re.Pattern:
+    """A line indented at most ``width`` that isn't blank, a comment or a closing bracket."""
+    return re.compile(rf"\n[ \t]{{0,{width}}}(?=[^\s#)\]}}])")
+
+
+def _py_triple_strings(text: str) -> list[tuple[int, int]]:
+    """Spans of the triple-quoted strings, in order."""
+    spans = []
+    double, single = text.find('"""'), text.find("'''")
+    while double != -1 or single != -1:
+        if single == -1 or (double != -1 and double < single):
+            start, quote = double, '"""'
+        else:
+            start, quote = single, "'''"
+        end = text.find(quote, start + 3) + 3
+        if end == 2:
+            raise StructureError("unterminated triple-quoted string")
+        spans.append((start, end))
+        if double != -1 and double < end:
+            double = text.find('"""', end)
+        if single != -1 and single < end:
+            single = text.find("'''", end)
+    return spans
+
+
+def python_definitions(text: str) -> list[Definition]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):   # ValueError: a null byte, before Python 3.12
+        return _scan_python(text)
+    line_ends = [m.start() for m in _NEWLINE.finditer(text)]   # offset of line N's "\n" at N - 1
+
+    def offset_end(line: int) -> int:
+        return line_ends[line - 1] if line <= len(line_ends) else len(text)
+
+    found: list[list] = []
+
+    def visit(body: list[ast.stmt], scope: str) -> None:
+        for node in body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            first = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            start = offset_end(first - 1) + 1 if first > 1 else 0
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            found.append([kind, node.name, scope, start, offset_end(node.end_lineno)])
+            if kind == "class":
+                visit(node.body, f"{scope}.{node.name}" if scope else node.name)
+
+    visit(tree.body, "")
+    return _finish(text, found, "#")
+
+
+def _scan_python(text: str) -> list[Definition]:
+    """``python_definitions`` for source ``ast`` can't parse, by indentation."""
+    src = "\n" + text               # every line, the first too, starts after a "\n"
+    triples = _py_triple_strings(src)
+    triple_starts = [s for s, _ in triples]
+
+    def string_end(pos: int) -> int:
+        """End of the triple-quoted string ``pos`` is inside, or -1."""
+        i = bisect_right(triple_starts, pos) - 1
+        return triples[i][1] if i >= 0 and pos < triples[i][1] else -1
+
+    def block_end(header_end: int, width: int) -> int:
+        dedent = _py_dedent(width)
+        pos = src.find("\n", header_end)
+        while pos != -1 and (m := dedent.search(src, pos)) is not None:
+            inside = string_end(m.start() + 1)
+            if inside == -1:
+                return m.start()
+            pos = inside
+        return len(src)
+
+    found: list[list] = []
+
+    def scan(indent: str, pos: int, endpos: int, scope: str) -> None:
+        """The definitions at ``indent`` between ``pos`` and ``endpos``, and the methods of classes among them."""
+        decorated = -1
+        open_method: list | None = None   # a method runs until the next member, or the class end
+        for m in _py_headers(indent).finditer(src, pos, endpos):
+            line = m.start() + 1
+            if triples and string_end(line) != -1:
+                continue
+            at = line + len(indent)
+            if src[at] == "@":
+                if decorated == -1:
+                    decorated = line
+                continue
+            m = _PY_HEADER.match(src, at)
+            if m is None:     # `def` / `class` without a name: a syntax error, or a soft keyword
+                continue
+            start = line if decorated == -1 else decorated
+            decorated = -1
+            if open_method is not None:
+                open_method[4] = start - 1
+                open_method = None
+            name = m.group(2)
+            if m.group(1) == "def":
+                found.append(["function", name, scope, start - 1, endpos - 1])
+                if indent:
+                    open_method = found[-1]
+                else:
+                    found[-1][4] = block_end(m.end(), 0) - 1
+                continue
+            end = min(block_end(m.end(), len(indent)), endpos)
+            found.append(["class", name, scope, start - 1, end - 1])
+            body = _PY_BODY_INDENT.search(src, m.end(), end)
+            if body is not None and len(body.group(1)) > len(indent):
+                scan(body.group(1), m.end(), end, f"{scope}.{name}" if scope else name)
+
+    scan("", 0, len(src), "")
+    return _finish(text, found, "#")
+
+
+# ── JavaScript / TypeScript ───────────────────────────────────────────────────
+
+# Braces and semicolons, and the comments, strings, template and regex literals to skip.  Every
+# alternative starts with a literal, so ``re`` can jump between candidate characters.
+_JS_TOKEN = re.compile(
+    r"""\{|\}|;|//[^\n]*|/\*[\s\S]*?\*/"""
+    r"""|"[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'"""
+    r"""|`[^`\\$]*(?:(?:\\[\s\S]|\$(?!\{)|\$\{(?:[^{}`'"]|`(?:\\.|[^`\\])*`|'[^'\n]*'|"[^"\n]*"|\{[^{}]*\})*\})[^`\\$]*)*`"""
+    # a regex literal: a slash where an operand starts, not where it could divide
+    r"""|/(?:(?<=[(,=:\[!&|?{};]/)|(?<=[(,=:\[!&|?{};] /))(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/"""
+)
+
+# A parameter list: parentheses balanced three deep, each character consumed one way only, so a
+# statement full of calls fails to match in linear time (``\([\s\S]*\)`` backtracked quadratically)
+_JS_PARAMS = r"(?:<[^>]*>)?\s*\((?:[^()]|\((?:[^()]|\([^()]*\))*\))*\)\s*(?::[^{}=]*)?"
+_JS_ARROW = rf"(?:async\s+)?(?:function\b\s*\*?\s*[\w$]*\s*{_JS_PARAMS}|(?:{_JS_PARAMS}|[\w$]+)\s*=>\s*)"
+_JS_MODIFIERS = r"(?:(?:static|async|get|set|public|private|protected|readonly|override|abstract|declare)\s+)*"
+_JS_DECORATORS = r"(?:@[\w$.]+(?:\([^()]*\))?\s*)*"
+
+# What a "{" opens, matched from the start of the declaration to the brace
+_JS_TOP = (
+    ("class", re.compile(
+        rf"{_JS_DECORATORS}(?:export\s+)?(?:default\s+)?(?:declare\s+)?(?:abstract\s+)?"
+        r"(?:class|interface|enum|namespace)\s+([\w$.]+)[^{};]*\Z")),
+    ("class", re.compile(
+        r"(?:export\s+)?(?:declare\s+)?type\s+([\w$]+)[^=;]*=\s*\Z")),
+    ("function", re.compile(
+        rf"(?:export\s+)?(?:default\s+)?(?:async\s+)?function\b\s*\*?\s*([\w$]*)\s*{_JS_PARAMS}\Z")),
+    ("function", re.compile(
+        rf"(?:export\s+)?(?:(?:const|let|var)\s+)?([\w$.]+)\s*(?::[^=]+)?=\s*{_JS_ARROW}\Z")),
+    ("object", re.compile(
+        r"(?:(?:export\s+)?(?:const|let|var)\s+([\w$]+)\s*(?::[^=]+)?=|module\.exports\s*=|export\s+default)\s*\Z")),
+    ("callback", re.compile(
+        rf"""([\w$]*(?:\s*\.[\w$]+)*)\s*\(\s*(?:(["'`])([^"'`\n]*)\2\s*,)?[^;]*?{_JS_ARROW}\Z""")),
+)
+# In a class or object literal body: a method, or a property holding a function
+_JS_MEMBER = (
+    re.compile(rf"{_JS_DECORATORS}{_JS_MODIFIERS}\*?\s*(#?[\w$]+)\s*{_JS_PARAMS}\Z"),
+    re.compile(rf"{_JS_DECORATORS}{_JS_MODIFIERS}(#?[\w$]+)\s*[:=]\s*{_JS_ARROW}\Z"),
+)
+_JS_KEYWORDS = frozenset({"if", "for", "while", "switch", "catch", "with", "function", "return", "do", "else"})
+
+
+class _Open(NamedTuple):
+    kind: str        # "class", "object", "function", "inline" or "" for any other block
+    scope: str       # dotted name members of this block are scoped to
+    index: int       # into the found definitions; -1 if it isn't one
+
+
+_BLOCK = _Open("", "", -1)
+_INLINE = _Open("inline", "", -1)    # braces inside an expression or type: `f({ a })`, `): { a: T } =>`
+
+
+def _js_statement(head: str) -> int:
+    """Where the statement ending ``head`` starts: its first line, decorators included.
+
+    That's the last line at the head's shallowest indentation that isn't a
+    comment and doesn't continue a bracket (``)``, ``]``, ``}``, ``>``).  Without semicolons
+    ``head`` can hold several statements, and trying the declaration
+    patterns at every offset would be quadratic.
+    """
+    stripped = head.lstrip()
+    if "\n" not in stripped:        # one line, as most method heads are
+        return len(head) - len(stripped)
+    lines = []
+    offset = 0
+    for line in head.split("\n"):
+        content = line.lstrip(" \t")
+        if content.strip() and content[0] not in ")]}>" and not content.startswith(("//", "/*", "*")):
+            lines.append((offset, len(line) - len(content), content[0] == "@"))
+        offset += len(line) + 1
+    if not lines:
+        return len(head) - len(head.lstrip())
+    width = min(indent for _, indent, _ in lines)
+    i = max(i for i, (_, indent, _) in enumerate(lines) if indent == width)
+    while i > 0 and lines[i - 1][2] and lines[i - 1][1] == width:     # decorators above it
+        i -= 1
+    return lines[i][0] + lines[i][1]
+
+
+def _js_opener(head: str, parent: _Open | None) -> tuple[str, str, int] | None:
+    """``(kind, name, offset of the declaration in head)`` for the block ``head`` opens."""
+    at = _js_statement(head)
+    if parent is None:
+        for kind, pattern in _JS_TOP:
+            m = pattern.match(head, at)
+            if m is None:
+                continue
+            if kind == "callback":
+                callee = re.sub(r"\s+", "", m.group(1))
+                name = f"{callee}({m.group(2)}{m.group(3)}{m.group(2)})" if m.group(2) else callee
+                return "function", name, at
+            return kind, m.group(1) or ("exports" if kind == "object" else "default"), at
+        return None
+    for pattern in _JS_MEMBER:
+        m = pattern.match(head, at)
+        if m is not None and m.group(1) not in _JS_KEYWORDS:
+            return "function", m.group(1), at
+    return None
+
+
+def _js_inline(head: str) -> bool:
+    """Whether a "{" after ``head`` is part of an expression rather than a statement of its own."""
+    tail = head.rstrip()
+    return tail.endswith(("(", ",", ":", "|", "&", "<", "[", "?")) or tail.count("(") > tail.count(")")
+
+
+@lru_cache(maxsize=64)
+def _js_dedent(width: int) -> re.Pattern:
+    """A non-blank line indented at most ``width``."""
+    return re.compile(rf"\n[ \t]{{0,{width}}}(?=\S)")
+
+
+def _js_body_end(text: str, brace: int) -> int:
+    """Offset of the ``}`` closing the block opened at ``brace``, by indentation; -1 if unsure.
+
+    Formatted code closes a multi-line block on the first line indented no
+    deeper than the one that opened it, so a body needn't be tokenized to
+    be skipped.  Anything else there — a template literal's text, an
+    outdented comment — and the caller tokenizes the body after all.
+    """
+    line_end = text.find("\n", brace)
+    rest = text[brace + 1:line_end]
+    if line_end == -1 or (rest.strip() and not rest.lstrip().startswith("//")):
+        return -1
+    line_start = text.rfind("\n", 0, brace) + 1
+    line = text[line_start:brace]
+    width = len(line) - len(line.lstrip(" \t"))
+    m = _js_dedent(width).search(text, line_end)
+    if m is None or text[m.end()] != "}" or m.end() - m.start() - 1 != width:
+        return -1
+    return m.end()
+
+
+def js_definitions(text: str) -> list[Definition]:
+    found: list[list] = []
+    stack: list[_Open] = []
+    boundary = 0                     # where the current statement started
+    pos = 0
+    while (m := _JS_TOKEN.search(text, pos)) is not None:
+        at, pos = m.start(), m.end()
+        char = text[at]
+        if char == "{":
+            parent = stack[-1] if stack else None
+            opened = _BLOCK
+            if parent is None or parent.kind in ("class", "object"):
+                head = text[boundary:at]
+                decl = _js_opener(head, parent)
+                if decl is None and _js_inline(head):
+                    opened = _INLINE
+                elif decl is not None:
+                    kind, name, offset = decl
+                    scope = parent.scope if parent else ""
+                    start = boundary + offset
+                    before = text[boundary:start].rstrip()
+                    if before.endswith("*/"):      # a JSDoc block right above it
+                        start = boundary + before.rfind("/*")
+                    if kind == "object":
+                        opened = _Open("object", f"{scope}.{name}" if scope else name, -1)
+                    else:
+                        found.append([kind, name, scope, start, -1])
+                        opened = _Open(kind, f"{scope}.{name}" if scope else name, len(found) - 1)
+            stack.append(opened)
+            if opened.kind in ("class", "object"):
+                boundary = pos
+                continue
+            # Nothing inside a function or other block is chunked on its own: skip to its end
+            close = _js_body_end(text, at)
+            if close == -1:
+                if opened is not _INLINE:
+                    boundary = pos
+                continue
+            at, pos, char = close, close + 1, "}"
+        if char == "}":
+            if not stack:
+                raise StructureError("unbalanced braces")
+            closed = stack.pop()
+            if closed is _INLINE:
+                continue                   # the statement goes on after it
+            if closed.index != -1:
+                end = pos
+                line_end = text.find("\n", end)
+                line_end = len(text) if line_end == -1 else line_end
+                if not text[end:line_end].strip(" \t\r);,"):   # `});` closing a callback
+                    end = line_end
+                found[closed.index][4] = end
+        elif char != ";":
+            continue                       # a comment or string
+        boundary = pos
+    if stack:
+        raise StructureError("unbalanced braces")
+    return _finish(text, found, "//")
+
+
+# ── Shared ────────────────────────────────────────────────────────────────────
+
+def _finish(text: str, found: list[list], comment: str) -> list[Definition]:
+    """Spans in file order with the comments above them, each cut where the next begins.
+
+    That cuts a class down to its head, and leaves a method's trailing
+    comments to the method they introduce.
+    """
+    found.sort(key=lambda d: d[3])
+    for d in found:
+        d[3] = _leading_comments(text, d[3], comment)
+    definitions: list[Definition] = []
+    for i, (kind, name, scope, start, end) in enumerate(found):
+        if i + 1 < len(found) and found[i + 1][3] < end:
+            end = found[i + 1][3]
+        if definitions and start < definitions[-1].end:
+            start = definitions[-1].end
+        if start < end:
+            definitions.append(Definition(kind, name, scope, start, end))
+    return definitions
@@ -0,0 +1,200 @@
+"""
+ComputePool
+===========
+Dedicated, bounded thread pool for model inference (embedding, reranking).
+
+``asyncio.to_thread`` shares the default executor with gitingest and
+everything else, so a burst of embedding work used to queue ahead of
+unrelated blocking calls, and every concurrent inference call ran torch with
+one intra-op thread per core — N calls, N×cores threads fighting for the
+same cores.  Inference now runs on ``settings.compute_workers`` threads,
+and torch gets ``settings.compute_torch_threads`` intra-op threads (default:
+cores / workers), so the pool as a whole uses each core once.
+
+Work queues behind the pool rather than oversubscribing.  Entry points
+that start new inference-heavy work call ``admit()`` first, which raises
+``ComputeBusy`` once ``settings.compute_max_queue`` jobs are waiting;
+``main.py`` turns that into ``503`` with ``Retry-After``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from config import settings
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_EWMA = 0.2   # weight of the newest sample in the running averages
+
+
+class ComputeBusy(Exception):
+    """The inference queue is too deep to accept new work right now."""
+
+    def __init__(self, queued: int, retry_after: int):
+        super().__init__(f"inference queue full ({queued} waiting) — retry in {retry_after}s")
+        self.queued = queued
+        self.retry_after = retry_after
+
+
+class ComputePool:
+    """Thread pool with queue-depth accounting and admission control."""
+
+    def __init__(self, workers: int, torch_threads: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.max_queue = max_queue
+        # torch is imported and pinned by each worker as it starts, not by
+        # whoever builds the pool (often the event loop)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="compute",
+            initializer=_configure_torch, initargs=(self.torch_threads,),
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_queued = 0
+        self._avg_wait = 0.0
+        self._avg_run = 0.0
+        self._max_wait = 0.0
+        log.info(
+            "🧮 Compute pool: %d workers × %d torch threads, admission limit %d queued",
+            self.workers, self.torch_threads, self.max_queue,
+        )
+
+    # ── Submission ────────────────────────────────────────────────────────────
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the pool.  Never rejects — see ``admit``."""
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        def job() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                wait = started - submitted
+                self._avg_wait += _EWMA * (wait - self._avg_wait)
+                self._max_wait = max(self._max_wait, wait)
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._avg_run += _EWMA * (time.perf_counter() - started - self._avg_run)
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        future = self._executor.submit(job)
+        future.add_done_callback(self._on_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _on_cancelled(self, future) -> None:
+        # Cancelled while still queued: the job never ran to decrement the count
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def admit(self) -> None:
+        """Raise ``ComputeBusy`` if new inference work should be turned away."""
+        queued = self._queued
+        if queued < self.max_queue:
+            return
+        with self._lock:
+            self._rejected += 1
+        raise ComputeBusy(queued, self.retry_after())
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = (self._queued + self._running) * max(self._avg_run, 0.05) / self.workers
+        return max(1, math.ceil(backlog))
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "torch_threads": self.torch_threads,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queued_seen": self._max_queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._avg_wait * 1000, 1),
+                "max_wait_ms": round(self._max_wait * 1000, 1),
+                "avg_run_ms": round(self._avg_run * 1000, 1),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _configure_torch(threads: int) -> None:
+    """Pin torch's intra-op pool so concurrent workers don't oversubscribe cores.
+
+    Runs on each worker thread before its first job; the import alone can
+    take seconds.
+    """
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:   # only settable before torch runs its first parallel op
+        pass
+
+
+# Module-level singleton
+_pool: ComputePool | None = None
+
+
+def queue_depth() -> int:
+    """Jobs waiting for a worker; 0 before the pool exists (without creating it)."""
+    return _pool.queued if _pool is not None else 0
+
+
+def pool_stats() -> dict[str, Any]:
+    """``ComputePool.stats`` — or ``{"started": False}`` before the pool exists (without creating it)."""
+    if _pool is None:
+        return {"started": False}
+    return {"started": True, **_pool.stats()}
+
+
+def get_compute_pool() -> ComputePool:
+    global _pool
+    if _pool is None:
+        _pool = ComputePool(
+            workers=settings.compute_workers,
+            torch_threads=settings.compute_torch_threads,
+            max_queue=settings.compute_max_queue,
+        )
+    return _pool
@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import copy
 import logging
+import time
 from dataclasses import dataclass, field
 
 from models import ArticleSessionState, ContentType
@@ -231,11 +232,17 @@ class ContentSession:
     features: list[str] = field(default_factory=list)
     answers: dict[str, str] = field(default_factory=dict)
     result: str = ""
+    last_active: float = field(default_factory=time.time)   # read by the session reaper
 
     _question_queue: list[dict] = field(default_factory=list)
     _asked: list[str] = field(default_factory=list)
 
+    def touch(self) -> None:
+        """Record activity; idle sessions are expired by ``SessionReaper``."""
+        self.last_active = time.time()
+
     def set_features(self, features: list[str]) -> None:
+        self.touch()
         self.features = features
         self._build_question_queue()
         self.state = ArticleSessionState.QUESTIONING
@@ -275,6 +282,7 @@ class ContentSession:
         }
 
     def record_answer(self, answer: str) -> None:
+        self.touch()
         if self._asked:
             key = self._asked[-1]
             self.answers[key] = answer
@@ -377,11 +385,14 @@ class ContentSession:
 
 
     def mark_generating(self) -> None:
+        self.touch()
         self.state = ArticleSessionState.GENERATING
 
     def mark_done(self, result: str) -> None:
+        self.touch()
         self.result = result
         self.state = ArticleSessionState.DONE
 
     def mark_error(self) -> None:
+        self.touch()
         self.state = ArticleSessionState.ERROR
@@ -0,0 +1,312 @@
+"""
+EmbeddingCache
+==============
+Content-hash → vector cache shared by every session, repo and restart.
+
+Chunk texts recur constantly: the same repo ingested into a new session,
+forks, vendored files, unchanged files across revisions.  Embedding them
+with bge-small is the most expensive CPU step of ingestion, so each vector
+is stored once under ``blake2b(model \\0 text)`` and looked up before the
+model is ever called.
+
+On disk (``settings.embedding_cache_dir``):
+
+  vectors.f32  — float32 matrix, one row per entry, memory-mapped; grown by
+                 doubling so appends don't rewrite it
+  keys.bin     — 16-byte digests, row ``i`` of the matrix belongs to key ``i``
+  meta.json    — vector dimension and generation
+
+Rows are append-only.  A row only counts once its key is written, and keys
+are appended after the vector, so a crash mid-append leaves at worst an
+unused row.  Appends take an ``flock`` and pick up rows written by other
+worker processes first, so several uvicorn workers can share one cache.
+
+An append that would take the matrix past ``settings.embedding_cache_max_mb``
+starts the cache over: both files are truncated and the generation in
+meta.json is bumped, which tells other processes to drop their index.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Sequence
+
+import numpy as np
+
+from config import settings
+
+try:
+    import fcntl
+except ImportError:   # Windows: single-process locking only
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+_KEY_BYTES = 16
+_MIN_CAPACITY = 1024
+
+
+def embedding_key(model: str, text: str) -> bytes:
+    """Cache key for ``text`` embedded by ``model``."""
+    return hashlib.blake2b(f"{model}\0{text}".encode(), digest_size=_KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    """Append-only memory-mapped vector store indexed by content hash.
+
+    ``directory=None`` keeps everything in memory (tests, no disk);
+    ``max_bytes=0`` lets the matrix grow without bound.
+    """
+
+    def __init__(self, directory: str | None = None, max_bytes: int = 0):
+        self._dir = directory
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: dict[bytes, int] = {}
+        self._dim: int | None = None
+        self._generation = 0
+        self._count = 0
+        self._vectors: np.ndarray | None = None
+        self.hits = 0
+        self.misses = 0
+        self.rotations = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._keys_path = os.path.join(directory, "keys.bin")
+            self._vectors_path = os.path.join(directory, "vectors.f32")
+            self._meta_path = os.path.join(directory, "meta.json")
+            try:
+                with self._locked():
+                    self._sync()
+            except (OSError, ValueError) as exc:
+                log.warning("Embedding cache at %s unreadable (%s) — starting empty", directory, exc)
+                self._reset_files()
+            log.info("🧮 Embedding cache: %d vectors at %s", self._count, directory)
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def get_many(self, keys: Sequence[bytes]) -> dict[bytes, np.ndarray]:
+        """Return the cached vectors among ``keys`` (copies, safe to keep)."""
+        with self._lock:
+            if self._dir and self._changed_elsewhere():
+                with self._locked():
+                    self._sync()
+            found: dict[bytes, np.ndarray] = {}
+            for key in keys:
+                row = self._index.get(key)
+                if row is not None:
+                    found[key] = np.array(self._vectors[row])
+            unique = len(set(keys))
+            self.hits += len(found)
+            self.misses += unique - len(found)
+            return found
+
+    # ── Insert ────────────────────────────────────────────────────────────────
+
+    def put_many(self, keys: Sequence[bytes], vectors: Sequence[Any]) -> None:
+        """Store ``vectors[i]`` under ``keys[i]``; keys already present are skipped."""
+        if not keys:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._locked():
+            if self._dir:
+                self._sync()
+            if self._dim is None:
+                self._dim = matrix.shape[1]
+                self._write_meta()
+            elif matrix.shape[1] != self._dim:
+                raise ValueError(f"vector dim {matrix.shape[1]} != cache dim {self._dim}")
+
+            new: dict[bytes, int] = {}
+            for i, key in enumerate(keys):
+                if key not in self._index and key not in new:
+                    new[key] = i
+            if not new:
+                return
+            limit = self._max_rows()
+            if limit and self._count + len(new) > limit:
+                log.info("🧮 Embedding cache full (%d vectors) — starting over", self._count)
+                self._reset_files(dim=self._dim)
+                self.rotations += 1
+                new = dict(list(new.items())[:limit])
+
+            start = self._count
+            self._reserve(start + len(new))
+            self._vectors[start:start + len(new)] = matrix[list(new.values())]
+            if self._dir:
+                self._vectors.flush()
+                with open(self._keys_path, "ab") as f:
+                    f.write(b"".join(new))
+            for offset, key in enumerate(new):
+                self._index[key] = start + offset
+            self._count = start + len(new)
+
+    # ── Maintenance ───────────────────────────────────────────────────────────
+
+    def clear(self) -> None:
+        with self._lock, self._locked():
+            self._reset_files()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._count,
+            "dim": self._dim,
+            "bytes": self._count * (self._dim or 0) * 4,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "max_bytes": self._max_bytes,
+            "rotations": self.rotations,
+            "persistent": bool(self._dir),
+        }
+
+    # ── Internals (caller holds self._lock) ───────────────────────────────────
+
+    def _locked(self):
+        """Cross-process lock on the key file (no-op in memory / on Windows)."""
+        return _FileLock(self._keys_path if self._dir else None)
+
+    def _changed_elsewhere(self) -> bool:
+        try:
+            if os.path.getsize(self._keys_path) != self._count * _KEY_BYTES:
+                return True
+            return self._read_meta().get("generation", 0) != self._generation
+        except (OSError, ValueError):
+            return False
+
+    def _read_meta(self) -> dict[str, Any]:
+        try:
+            with open(self._meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_meta(self) -> None:
+        if not self._dir:
+            return
+        meta = {"generation": self._generation}
+        if self._dim is not None:
+            meta["dim"] = self._dim
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w") as f:   # replaced whole: other processes read it on every lookup
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path)
+
+    def _sync(self) -> None:
+        """Load rows appended since we last looked (at startup: all of them)."""
+        meta = self._read_meta()
+        if meta.get("generation", 0) != self._generation:
+            # Cleared or started over by another process
+            self._index.clear()
+            self._count, self._dim, self._vectors = 0, None, None
+            self._generation = meta.get("generation", 0)
+        if self._dim is None and "dim" in meta:
+            self._dim = int(meta["dim"])
+        if not os.path.exists(self._keys_path):
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._count * _KEY_BYTES)
+            tail = f.read()
+        total = self._count + len(tail) // _KEY_BYTES
+        if total == self._count:
+            return
+        if self._dim is None:
+            raise ValueError("keys without meta.json")
+        self._map(max(total, self._capacity()))
+        for i in range(total - self._count):
+            self._index[tail[i * _KEY_BYTES:(i + 1) * _KEY_BYTES]] = self._count + i
+        self._count = total
+
+    def _capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _max_rows(self) -> int:
+        if not self._max_bytes or self._dim is None:
+            return 0
+        return max(1, self._max_bytes // (self._dim * 4))
+
+    def _reserve(self, rows: int) -> None:
+        if rows <= self._capacity():
+            return
+        capacity = max(_MIN_CAPACITY, self._capacity())
+        while capacity < rows:
+            capacity *= 2
+        if self._max_rows():   # don't double past the size cap
+            capacity = max(rows, min(capacity, self._max_rows()))
+        if self._dir:
+            self._map(capacity)
+        else:
+            grown = np.zeros((capacity, self._dim), dtype=np.float32)
+            if self._vectors is not None:
+                grown[:self._count] = self._vectors[:self._count]
+            self._vectors = grown
+
+    def _map(self, rows: int) -> None:
+        """(Re)map vectors.f32 with room for ``rows``, growing the file if needed."""
+        size = rows * self._dim * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+            else:
+                rows = f.tell() // (self._dim * 4)
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self._dim))
+
+    def _reset_files(self, dim: int | None = None) -> None:
+        """Empty the cache under a new generation, keeping ``dim`` if given."""
+        on_disk = 0
+        if self._dir:
+            try:
+                on_disk = self._read_meta().get("generation", 0)
+            except (OSError, ValueError):
+                pass
+        self._index.clear()
+        self._count = 0
+        self._dim = dim
+        self._vectors = None
+        self._generation = max(self._generation, on_disk) + 1
+        if self._dir:
+            if os.path.exists(self._vectors_path):
+                os.remove(self._vectors_path)
+            # Truncate rather than delete: other processes hold the lock on it
+            open(self._keys_path, "wb").close()
+            self._write_meta()
+
+
+class _FileLock:
+    def __init__(self, path: str | None):
+        self._path = path
+        self._fd: int | None = None
+
+    def __enter__(self):
+        if self._path and fcntl is not None:
+            self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+# Module-level singleton
+_cache: EmbeddingCache | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache(settings.embedding_cache_dir or None, settings.embedding_cache_max_mb * 1024 * 1024)
+    return _cache
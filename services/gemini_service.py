@@ -13,12 +13,14 @@ Gemini usage so concerns stay clean.
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import AsyncIterator
-
-import google.generativeai as genai
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable
 
 from config import settings
+from services.health import llm_call
 
 log = logging.getLogger(__name__)
 
@@ -29,6 +31,11 @@ class GeminiService:
     def __init__(self):
         if not settings.gemini_api_key:
             raise ValueError("GEMINI_API_KEY is not set in environment / .env")
+        # Imported here: the SDK takes over a second to import and most
+        # endpoints never touch Gemini
+        import google.generativeai as genai
+
+        self._config = genai.GenerationConfig(temperature=0.7, top_p=0.95, max_output_tokens=4096)
         genai.configure(api_key=settings.gemini_api_key)
         self._model = genai.GenerativeModel(settings.gemini_model)
         log.info("GeminiService initialised with model %s", settings.gemini_model)
@@ -37,19 +44,12 @@ class GeminiService:
 
     async def generate(self, prompt: str) -> str:
         """Generate a full response synchronously (wrapped in asyncio executor)."""
-        import asyncio
         loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: self._model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,
-                    top_p=0.95,
-                    max_output_tokens=4096,
-                ),
-            ),
-        )
+        with llm_call():
+            response = await loop.run_in_executor(
+                None,
+                lambda: self._model.generate_content(prompt, generation_config=self._config),
+            )
         return response.text
 
     # ── Streaming ─────────────────────────────────────────────────────────────
@@ -58,46 +58,112 @@ class GeminiService:
         """
         Async generator that yields text chunks as Gemini streams them.
 
+        The blocking SDK stream runs on a dedicated worker thread that hands
+        each chunk to the event loop with ``call_soon_threadsafe``; the
+        consumer simply awaits an ``asyncio.Queue``, so there is no polling.
+        Producer errors are re-raised here, and closing the generator early
+        (e.g. the WebSocket went away) stops the upstream generation.
+
         Usage:
             async for chunk in gemini.stream_generate(prompt):
                 await ws.send_json({"type": "article_chunk", "data": chunk})
         """
-        import asyncio
-        from queue import Queue, Empty
-
-        chunk_queue: Queue[str | None] = Queue()
-
-        def _stream_sync():
-            """Run the blocking stream in a thread; push chunks to the queue."""
-            try:
-                response = self._model.generate_content(
-                    prompt,
-                    stream=True,
-                    generation_config=genai.GenerationConfig(
-                        temperature=0.7,
-                        top_p=0.95,
-                        max_output_tokens=4096,
-                    ),
-                )
-                for chunk in response:
-                    if chunk.text:
-                        chunk_queue.put(chunk.text)
-            except Exception as exc:
+        def _open_stream():
+            return self._model.generate_content(prompt, stream=True, generation_config=self._config)
+
+        with llm_call():
+            async for text in stream_in_thread(_open_stream, _get_stream_executor()):
+                yield text
+
+
+# ── Thread → asyncio bridge ───────────────────────────────────────────────────
+
+_stream_executor: ThreadPoolExecutor | None = None
+
+
+def _get_stream_executor() -> ThreadPoolExecutor:
+    """Dedicated pool for blocking SDK streams.
+
+    Each live stream pins one thread for its whole duration, so these must
+    not compete with the default executor used by ``asyncio.to_thread``.
+    """
+    global _stream_executor
+    if _stream_executor is None:
+        _stream_executor = ThreadPoolExecutor(
+            max_workers=settings.gemini_max_streams,
+            thread_name_prefix="gemini-stream",
+        )
+    return _stream_executor
+
+
+class _StreamFailed:
+    """Queue item carrying an exception raised by the producer thread."""
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_DONE = object()
+
+
+async def stream_in_thread(
+    open_stream: Callable[[], Iterable],
+    executor: ThreadPoolExecutor | None = None,
+) -> AsyncIterator[str]:
+    """Iterate a blocking chunk stream on a worker thread and yield its ``.text``.
+
+    ``open_stream`` is called on the worker thread and must return an
+    iterable of chunks exposing ``.text``.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+    upstream: list = []
+
+    def _put(item) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            cancelled.set()   # event loop closed — nobody is listening any more
+
+    def _produce() -> None:
+        try:
+            response = open_stream()
+            upstream.append(response)
+            for chunk in response:
+                if cancelled.is_set():
+                    break
+                if chunk.text:
+                    _put(chunk.text)
+        except Exception as exc:
+            if not cancelled.is_set():
                 log.error("Gemini stream error: %s", exc)
-            finally:
-                chunk_queue.put(None)   # sentinel
+                _put(_StreamFailed(exc))
+        finally:
+            _put(_DONE)
 
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(None, _stream_sync)
+    loop.run_in_executor(executor, _produce)
 
-        # Drain the queue asynchronously
+    try:
         while True:
-            try:
-                item = chunk_queue.get_nowait()
-            except Empty:
-                await asyncio.sleep(0.05)   # yield control briefly
-                continue
-
-            if item is None:
+            item = await queue.get()
+            if item is _DONE:
                 break
+            if isinstance(item, _StreamFailed):
+                raise item.exc
             yield item
+    finally:
+        cancelled.set()
+        if upstream:
+            _cancel_upstream(upstream[0])
+
+
+def _cancel_upstream(response) -> None:
+    """Best-effort cancel of the SDK's underlying streaming RPC."""
+    cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+    if callable(cancel):
+        try:
+            cancel()
+        except Exception as exc:
+            log.debug("Could not cancel upstream Gemini stream: %s", exc)
@@ -1,8 +1,11 @@
 import asyncio
 import base64
+import importlib.util
 import logging
 import os
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
 import httpx
 
@@ -14,7 +17,7 @@ log = logging.getLogger(__name__)
 # Constants
 # ---------------------------------------------------------------------------
 
-GITHUB_API = "https://api.github.com"
+GITHUB_API = settings.github_api_url.rstrip("/")
 
 # Critical config/manifest files — fetched without truncation
 CRITICAL_FILES: set[str] = {
@@ -72,19 +75,203 @@ TRUNCATE_LIMIT = 3_000
 
 
 # ---------------------------------------------------------------------------
-# Service
+# Shared HTTP client
 # ---------------------------------------------------------------------------
 
-class GitHubService:
-    """Async GitHub REST API client using httpx."""
+# Module-level singleton — one pooled client for every GitHub call path so
+# requests reuse keep-alive connections (and HTTP/2 streams) instead of paying
+# a fresh TCP + TLS handshake per call.
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def github_headers() -> Dict[str, str]:
+    """Default headers for GitHub REST API requests."""
+    headers: Dict[str, str] = {
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+    if settings.github_token:
+        headers["Authorization"] = f"token {settings.github_token}"
+    return headers
+
+
+def get_github_client() -> httpx.AsyncClient:
+    """Return the shared GitHub client, creating it on first use.
+
+    Normally created by the FastAPI lifespan hook; lazily created here too so
+    scripts and tests that never run the lifespan still work.  A client is
+    bound to the event loop it was created on, so a new one is built if the
+    running loop has changed.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        http2 = settings.github_http2 and importlib.util.find_spec("h2") is not None
+        if settings.github_http2 and not http2:
+            log.warning("GITHUB_HTTP2 is enabled but the 'h2' package is missing — using HTTP/1.1")
+        _client = httpx.AsyncClient(
+            headers=github_headers(),
+            timeout=settings.github_timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.github_max_connections,
+                max_keepalive_connections=settings.github_max_keepalive_connections,
+                keepalive_expiry=settings.github_keepalive_expiry,
+            ),
+            # Every GitHub response reports the remaining quota; /health/ready reads it
+            event_hooks={"response": [_track_rate_limit]},
+        )
+        _client_loop = loop
+        log.info(
+            "GitHub client initialised (http2=%s, max_connections=%d)",
+            http2, settings.github_max_connections,
+        )
+    return _client
+
+
+async def _track_rate_limit(resp: httpx.Response) -> None:
+    conditional_cache._record_rate_limit(resp)
+
+
+async def close_github_client() -> None:
+    """Close the shared GitHub client (called on app shutdown)."""
+    global _client, _client_loop
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+# ---------------------------------------------------------------------------
+# Conditional requests (ETag / Last-Modified)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Validated:
+    """Last 200 response for a URL plus the validators GitHub sent with it."""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content: bytes
+    headers: Dict[str, str]
+
+
+class ConditionalRequestCache:
+    """Remembers validators per URL and revalidates with If-None-Match.
+
+    GitHub does not count ``304 Not Modified`` responses against the rate
+    limit, so freshness checks on unchanged repos become free.  An LRU
+    bounded by entry count and by the bytes of the bodies it keeps (a
+    recursive git tree can be several MB); a body larger than the whole
+    byte budget is not kept at all.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int = 32 * 1024 * 1024):
+        self._entries: "OrderedDict[str, _Validated]" = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.rate_limit_remaining: Optional[int] = None
+        self.rate_limit_reset: Optional[int] = None
 
-    def __init__(self):
-        self._headers: Dict[str, str] = {
-            "Accept": "application/vnd.github+json",
-            "X-GitHub-Api-Version": "2022-11-28",
+    @staticmethod
+    def _key(url: str, params: Optional[Dict[str, Any]]) -> str:
+        if not params:
+            return url
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{url}?{query}"
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """GET ``url`` conditionally.
+
+        A 304 is turned back into a 200 carrying the cached body, so callers
+        handle both cases the same way.
+        """
+        key = self._key(url, params)
+        cached = self._entries.get(key)
+        headers: Dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        kwargs: Dict[str, Any] = {"params": params, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        resp = await get_github_client().get(url, **kwargs)
+
+        self.requests += 1
+        self._record_rate_limit(resp)
+
+        if resp.status_code == 304 and cached is not None:
+            self.not_modified += 1
+            self._entries.move_to_end(key)
+            return httpx.Response(200, content=cached.content, headers=cached.headers, request=resp.request)
+
+        if resp.status_code == 200:
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            if (etag or last_modified) and len(resp.content) <= self._max_bytes:
+                self._store(key, _Validated(
+                    etag=etag,
+                    last_modified=last_modified,
+                    content=resp.content,
+                    headers={"Content-Type": resp.headers.get("Content-Type", "application/json")},
+                ))
+        return resp
+
+    def _store(self, key: str, entry: _Validated) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old.content)
+        self._entries[key] = entry
+        self._bytes += len(entry.content)
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.content)
+
+    def _record_rate_limit(self, resp: httpx.Response) -> None:
+        remaining = resp.headers.get("X-RateLimit-Remaining")
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if remaining is not None and remaining.isdigit():
+            self.rate_limit_remaining = int(remaining)
+        if reset is not None and reset.isdigit():
+            self.rate_limit_reset = int(reset)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "conditional_requests": self.requests,
+            "not_modified": self.not_modified,
+            "hit_ratio": round(self.not_modified / self.requests, 4) if self.requests else 0.0,
+            "quota_saved": self.not_modified,
+            "tracked_urls": len(self._entries),
+            "resident_bytes": self._bytes,
+            "rate_limit_remaining": self.rate_limit_remaining,
+            "rate_limit_reset": self.rate_limit_reset,
         }
-        if settings.github_token:
-            self._headers["Authorization"] = f"token {settings.github_token}"
+
+
+# Module-level singleton
+conditional_cache = ConditionalRequestCache(
+    max_entries=settings.github_etag_cache_size,
+    max_bytes=settings.github_etag_cache_max_mb * 1024 * 1024,
+)
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+class GitHubService:
+    """Async GitHub REST API client using the shared pooled httpx client."""
 
     # ------------------------------------------------------------------
     # Public helpers
@@ -100,11 +287,10 @@ class GitHubService:
 
     async def get_default_branch(self, owner: str, repo: str) -> str:
         try:
-            async with httpx.AsyncClient(headers=self._headers, timeout=30) as client:
-                resp = await client.get(f"{GITHUB_API}/repos/{owner}/{repo}")
-                self._raise_for_rate_limit(resp)
-                resp.raise_for_status()
-                return resp.json().get("default_branch", "main")
+            resp = await conditional_cache.get(f"{GITHUB_API}/repos/{owner}/{repo}")
+            self._raise_for_rate_limit(resp)
+            resp.raise_for_status()
+            return resp.json().get("default_branch", "main")
         except httpx.HTTPStatusError as exc:
             log.error("HTTP error fetching default branch: %s", exc)
         except Exception as exc:
@@ -113,13 +299,13 @@ class GitHubService:
 
     async def get_repo_structure(self, owner: str, repo: str, branch: str) -> List[Dict]:
         try:
-            async with httpx.AsyncClient(headers=self._headers, timeout=30) as client:
-                resp = await client.get(
-                    f"{GITHUB_API}/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
-                )
-                self._raise_for_rate_limit(resp)
-                resp.raise_for_status()
-                return resp.json().get("tree", [])
+            resp = await conditional_cache.get(
+                f"{GITHUB_API}/repos/{owner}/{repo}/git/trees/{branch}",
+                params={"recursive": 1},
+            )
+            self._raise_for_rate_limit(resp)
+            resp.raise_for_status()
+            return resp.json().get("tree", [])
         except httpx.HTTPStatusError as exc:
             log.error("HTTP error fetching repo structure: %s", exc)
         except Exception as exc:
@@ -171,12 +357,12 @@ class GitHubService:
             len(files_to_fetch), len(priority), len(high_value), len(secondary)
         )
 
-        async with httpx.AsyncClient(headers=self._headers, timeout=30) as client:
-            tasks = [
-                self._fetch_single_file(client, owner, repo, fp, branch)
-                for fp in files_to_fetch
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        client = get_github_client()
+        tasks = [
+            self._fetch_single_file(client, owner, repo, fp, branch)
+            for fp in files_to_fetch
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
         source_files: Dict[str, str] = {}
         for file_path, result in zip(files_to_fetch, results):
@@ -0,0 +1,110 @@
+"""
+Health
+======
+Liveness and readiness for the load balancer.
+
+``/health/live`` only says the process is up and its event loop answers.
+``/health/ready`` says whether this worker should get new traffic right
+now; it fails (503) when any of these checks does:
+
+  models  — with ``settings.warm_up_models``, the startup warm-up has run
+            both models (otherwise they load on first use and this passes)
+  chroma  — the vector store answers a heartbeat (once it has been opened)
+  github  — the last seen ``X-RateLimit-Remaining`` is at least
+            ``settings.ready_min_github_quota``, or the window has reset
+  compute — fewer than ``settings.ready_max_compute_queue`` inference jobs
+            are waiting for the compute pool
+  llm     — fewer than ``settings.ready_max_llm_calls`` LLM calls are in
+            flight (counted by ``llm_call``)
+
+Every check is cheap and never loads a model or opens a client itself.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from config import settings
+
+log = logging.getLogger(__name__)
+
+_started = time.time()
+_llm_in_flight = 0
+
+
+@contextmanager
+def llm_call() -> Iterator[None]:
+    """Count an upstream LLM request as in flight for its whole duration."""
+    global _llm_in_flight
+    _llm_in_flight += 1
+    try:
+        yield
+    finally:
+        _llm_in_flight -= 1
+
+
+def llm_calls_in_flight() -> int:
+    return _llm_in_flight
+
+
+def liveness() -> dict[str, Any]:
+    return {"status": "alive", "uptime_seconds": round(time.time() - _started, 1)}
+
+
+async def readiness() -> dict[str, Any]:
+    """Run every readiness check; ``ready`` is true only if all pass."""
+    checks = {
+        "models": _check_models(),
+        "chroma": await _check_chroma(),
+        "github": _check_github(),
+        "compute": _check_compute(),
+        "llm": _check_llm(),
+    }
+    return {"ready": all(c["ok"] for c in checks.values()), "checks": checks}
+
+
+# ── Checks ────────────────────────────────────────────────────────────────────
+
+def _check_models() -> dict[str, Any]:
+    from services.rag_service import models_warm
+
+    warm = models_warm()
+    return {"ok": warm or not settings.warm_up_models, "warm": warm, "warm_up": settings.warm_up_models}
+
+
+async def _check_chroma() -> dict[str, Any]:
+    from services.rag_service import store_heartbeat
+
+    try:
+        beat = await asyncio.wait_for(asyncio.to_thread(store_heartbeat), timeout=settings.ready_check_timeout)
+    except Exception as exc:   # timeout, closed client, corrupt store …
+        return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    return {"ok": True, "opened": beat is not None}
+
+
+def _check_github() -> dict[str, Any]:
+    from services.github_service import conditional_cache
+
+    remaining = conditional_cache.rate_limit_remaining
+    reset = conditional_cache.rate_limit_reset
+    window_over = reset is not None and reset <= time.time()
+    ok = remaining is None or window_over or remaining >= settings.ready_min_github_quota
+    return {"ok": ok, "remaining": remaining, "reset": reset, "minimum": settings.ready_min_github_quota}
+
+
+def _check_compute() -> dict[str, Any]:
+    from services.compute_pool import queue_depth
+
+    queued = queue_depth()
+    return {"ok": queued < settings.ready_max_compute_queue, "queued": queued,
+            "limit": settings.ready_max_compute_queue}
+
+
+def _check_llm() -> dict[str, Any]:
+    in_flight = llm_calls_in_flight()
+    return {"ok": in_flight < settings.ready_max_llm_calls, "in_flight": in_flight,
+            "limit": settings.ready_max_llm_calls}
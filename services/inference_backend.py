@@ -0,0 +1,131 @@
+"""
+Inference backend
+=================
+Which runtime executes the embedding model and the cross-encoder reranker.
+
+  torch — sentence-transformers on full-precision PyTorch (default)
+  onnx  — ONNX Runtime.  The model is exported once into
+          ``settings.onnx_model_dir`` and loaded from there afterwards.
+          With ``settings.inference_quantization`` set to a CPU target
+          (``avx512_vnni``, ``avx512``, ``avx2``, ``arm64``) the exported
+          graph is also int8 dynamically quantized.
+
+The ONNX backend needs optimum: ``pip install "sentence-transformers[onnx]"``.
+
+Vectors from different backends are close but not identical, so anything
+keyed on "the embedding model" — the embedding cache, revision
+collections — uses ``InferenceBackend.model_id`` rather than the bare
+model name.  The torch backend keeps the bare name, so existing caches and
+collections stay valid.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import settings
+
+log = logging.getLogger(__name__)
+
+_BACKENDS = ("torch", "onnx")
+_QUANTIZATIONS = ("avx512_vnni", "avx512", "avx2", "arm64")
+
+
+@dataclass(frozen=True)
+class InferenceBackend:
+    name: str = "torch"
+    quantization: str = ""
+
+    def __post_init__(self):
+        if self.name not in _BACKENDS:
+            raise ValueError(f"inference_backend must be one of {_BACKENDS}, not {self.name!r}")
+        if self.quantization and (self.name != "onnx" or self.quantization not in _QUANTIZATIONS):
+            raise ValueError(
+                f"inference_quantization needs the onnx backend and one of {_QUANTIZATIONS}, "
+                f"not {self.quantization!r}"
+            )
+
+    @classmethod
+    def from_settings(cls) -> "InferenceBackend":
+        return cls(settings.inference_backend, settings.inference_quantization)
+
+    @property
+    def _suffix(self) -> str:
+        # The name export_dynamic_quantized_onnx_model gives the quantized graph
+        dtype = "quint8" if self.quantization == "avx2" else "qint8"
+        return f"{dtype}_{self.quantization}"
+
+    @property
+    def tag(self) -> str:
+        """Short label: ``torch``, ``onnx`` or e.g. ``onnx-qint8_avx512_vnni``."""
+        return f"{self.name}-{self._suffix}" if self.quantization else self.name
+
+    @property
+    def file_name(self) -> str:
+        """ONNX graph inside the exported model directory."""
+        return f"onnx/model_{self._suffix}.onnx" if self.quantization else "onnx/model.onnx"
+
+    def model_id(self, model_name: str) -> str:
+        """``model_name`` qualified by backend, for keying vectors it produced."""
+        return model_name if self.name == "torch" else f"{model_name}@{self.tag}"
+
+
+# ── Loaders ───────────────────────────────────────────────────────────────────
+
+def load_embedding_function(model_name: str, backend: InferenceBackend | None = None):
+    """Chroma embedding function for ``model_name`` on ``backend`` (default: settings)."""
+    from chromadb.utils import embedding_functions
+
+    backend = backend or InferenceBackend.from_settings()
+    if backend.name == "torch":
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+
+    from sentence_transformers import SentenceTransformer
+
+    path = _export(SentenceTransformer, model_name, backend)
+    log.info("Loading embedding model %s on %s", model_name, backend.tag)
+    return embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=path, backend="onnx", model_kwargs={"file_name": backend.file_name},
+    )
+
+
+def load_cross_encoder(model_name: str, backend: InferenceBackend | None = None):
+    """``CrossEncoder`` for ``model_name`` on ``backend`` (default: settings)."""
+    from sentence_transformers import CrossEncoder
+
+    backend = backend or InferenceBackend.from_settings()
+    if backend.name == "torch":
+        return CrossEncoder(model_name)
+
+    path = _export(CrossEncoder, model_name, backend)
+    log.info("Loading reranker model %s on %s", model_name, backend.tag)
+    return CrossEncoder(path, backend="onnx", model_kwargs={"file_name": backend.file_name})
+
+
+def _export(model_cls, model_name: str, backend: InferenceBackend) -> str:
+    """Directory holding ``model_name`` exported for ``backend``, exporting on first use."""
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError as exc:
+        raise RuntimeError(
+            'The onnx inference backend needs optimum: pip install "sentence-transformers[onnx]"'
+        ) from exc
+
+    target = Path(settings.onnx_model_dir) / model_name.replace("/", "--")
+    if (target / backend.file_name).exists():
+        return str(target)
+
+    log.info("📦 Exporting %s to ONNX (%s) in %s", model_name, backend.tag, target)
+    if (target / "onnx/model.onnx").exists():
+        model = model_cls(str(target), backend="onnx")
+    else:
+        # Uses the repo's own onnx/model.onnx when it has one, converts otherwise
+        model = model_cls(model_name, backend="onnx")
+        model.save_pretrained(str(target))
+    if backend.quantization:
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        export_dynamic_quantized_onnx_model(model, backend.quantization, str(target))
+    return str(target)
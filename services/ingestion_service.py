@@ -1,13 +1,13 @@
 """
 IngestionService
 ================
-Fetches a GitHub repo via gitingest, splits it into semantic chunks,
+Takes a repo snapshot from the ingestion store, splits it into semantic chunks,
 embeds them into ChromaDB, and uses Qwen to identify core features.
 
 Chunk types:
   config   — package.json, requirements.txt, pyproject.toml, etc.
-  function — individual function definitions
-  class    — class blocks
+  function — individual function and method definitions
+  class    — class heads (up to the first method)
   doc      — README, docstrings, markdown files
   other    — everything else (imports, constants, loose code)
 """
@@ -15,18 +15,28 @@ Chunk types:
 from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
 import re
-from typing import AsyncIterator, List
+from collections import Counter
+from itertools import chain
+from typing import TYPE_CHECKING, AsyncIterator, Callable, List
 
-from gitingest import ingest
-
-from models import Chunk
+from config import settings
 from services.ai_service import AIService
+from services.chunk_store import ChunkStore, ChunkView
+from services.code_structure import Definition, StructureError, js_definitions, python_definitions
 from services.rag_service import RAGService
+from services.single_flight import Publish, SingleFlight
+
+if TYPE_CHECKING:
+    from services.repo_cache import CachedRepo
 
 log = logging.getLogger(__name__)
 
+# Shared across IngestionService instances — one ingestion per repo revision
+_ingest_flights = SingleFlight("ingestion")
+
 # ── extension → language label ──────────────────────────────────────────────
 _LANG_MAP: dict[str, str] = {
     ".py": "python", ".js": "javascript", ".ts": "typescript",
@@ -75,101 +85,193 @@ class IngestionService:
         then a final JSON-serialisable summary dict.
 
         Uses a SHA-based cache: if the repo hasn't changed since last ingestion,
-        reuses cached chunks/features and only re-embeds into the new session's
-        ChromaDB collection if needed.
+        reuses cached chunks/features, and the session reads from the
+        revision's shared ChromaDB collection without embedding anything.
         """
         from services.repo_cache import repo_cache, get_latest_commit_sha
 
         yield f"Starting ingestion for {owner}/{repo}…"
 
         # ── Check cache ────────────────────────────────────────────────────
-        cached = repo_cache.get(owner, repo)
         latest_sha = await get_latest_commit_sha(owner, repo)
+        cached = await asyncio.to_thread(repo_cache.get, owner, repo, latest_sha) if latest_sha else None
 
-        if cached and latest_sha and cached.commit_sha == latest_sha:
+        if cached:
             yield "Repository unchanged since last analysis — using cache ⚡"
 
-            all_chunks = cached.chunks
+            all_chunks = await asyncio.to_thread(getattr, cached, "chunks")   # unpacked off the loop
             features = cached.features
 
-            # Re-embed into this session's collection if needed
             if not skip_embedding:
-                if cached.embedded_session_id:
-                    # Copy embeddings from the cached session's collection
-                    yield "Copying embeddings from cache…"
-                    await self._clone_embeddings(
-                        cached.embedded_session_id, session_id, all_chunks,
-                    )
-                else:
-                    embed_chunks = _select_chunks_for_embedding(all_chunks, max_chunks=150)
-                    yield f"Embedding {len(embed_chunks)} chunks…"
-                    await self._rag.upsert_chunks(session_id, embed_chunks)
-
-                yield "Embeddings ready ✓"
+                async for msg in self._embed_for_session(owner, repo, latest_sha, session_id, all_chunks):
+                    yield msg
             else:
                 yield "Skipping embedding (not needed for this content type)"
 
             yield f"__features_identified__:{','.join(features)}"
             return
 
-        # ── Full ingestion (no cache or repo changed) ──────────────────────
-        url = f"https://github.com/{owner}/{repo}"
+        # ── Full or incremental ingestion (no cache or repo changed) ───────
+        # Concurrent sessions for the same revision share one ingestion job;
+        # each still receives the job's full progress stream.
+        previous = await asyncio.to_thread(repo_cache.latest, owner, repo) if latest_sha else None
+        key = f"{owner}/{repo}@{latest_sha or 'unknown'}".lower()
+        flight, joined = _ingest_flights.join(
+            key, lambda publish: self._ingest_fresh(owner, repo, latest_sha, publish, previous),
+        )
+        if joined:
+            yield "Another session is already analysing this repository — joining it ⚡"
 
-        log.info("gitingest: fetching %s", url)
-        try:
-            summary, tree, content = await asyncio.to_thread(ingest, url)
-        except Exception as exc:
-            raise RuntimeError(f"gitingest failed: {exc}") from exc
+        async for msg in flight.subscribe():
+            yield msg
+        all_chunks, features = await flight.result()
 
-        yield "Repository fetched ✓"
+        # Embed into ChromaDB — vectors of unchanged chunks are copied from
+        # the previous revision's collection, only new chunks are embedded
+        if skip_embedding:
+            yield "Skipping embedding (not needed for this content type)"
+        else:
+            async for msg in self._embed_for_session(
+                owner, repo, latest_sha, session_id, all_chunks,
+                previous_sha=previous.commit_sha if previous else None,
+            ):
+                yield msg
 
-        # Split into file blocks
-        blocks = _split_into_file_blocks(content)
-        yield f"Found {len(blocks)} files to analyse"
+        yield f"__features_identified__:{','.join(features)}"
 
-        # Chunk each file
-        all_chunks: list[Chunk] = []
-        for i, (file_path, file_text) in enumerate(blocks):
-            chunks = _chunk_file(file_path, file_text)
-            all_chunks.extend(chunks)
-            if (i + 1) % 10 == 0 or i == len(blocks) - 1:
-                yield f"Chunked {i + 1}/{len(blocks)} files ({len(all_chunks)} chunks so far)"
+    async def _ingest_fresh(
+        self,
+        owner: str,
+        repo: str,
+        latest_sha: str | None,
+        publish: Publish,
+        previous: CachedRepo | None = None,
+    ) -> tuple[ChunkStore, list[str]]:
+        """Snapshot → chunk → identify features → cache.  Runs once per revision.
+
+        With ``previous`` (an older revision's cached ingestion), only files
+        whose content changed are re-chunked, and features are re-identified
+        only when the changed share of files reaches
+        ``settings.incremental_feature_threshold``.
+        """
+        from services.ingestion_store import get_snapshot
+        from services.repo_cache import blob_hash, repo_cache
 
-        yield f"Chunking complete → {len(all_chunks)} total chunks"
+        try:
+            snapshot = await get_snapshot(owner, repo, latest_sha)
+        except Exception as exc:
+            raise RuntimeError(f"gitingest failed: {exc}") from exc
 
-        # Embed into ChromaDB
-        embedded_session_id: str | None = None
-        if skip_embedding:
-            yield "Skipping embedding (not needed for this content type)"
+        report = snapshot.views.get("fetch")
+        if report and report["mode"] == "incremental":
+            publish(
+                f"Repository fetched ✓ (incremental: {report['files_changed']} changed, "
+                f"{report['files_removed']} removed, {report['bytes_fetched'] / 1024:.1f} KB)"
+            )
         else:
-            embed_chunks = _select_chunks_for_embedding(all_chunks, max_chunks=150)
-            yield f"Embedding {len(embed_chunks)} representative chunks…"
-            await self._rag.upsert_chunks(session_id, embed_chunks)
-            embedded_session_id = session_id
-            yield "Chunks embedded into vector store ✓"
-
-        # Identify features via Qwen
-        yield "Identifying core features…"
-        features = await self._identify_features(all_chunks, owner, repo)
+            publish("Repository fetched ✓")
+
+        # The chunk view works on every file in the snapshot
+        blocks = list(snapshot.files.items())
+        hashes = {path: blob_hash(text) for path, text in blocks}
+
+        reusable: dict[str, ChunkStore] = {}
+        changed = len(blocks)
+        if previous and previous.file_hashes:
+            unchanged = {p for p, h in hashes.items() if previous.file_hashes.get(p) == h}
+            previous_chunks = await asyncio.to_thread(getattr, previous, "chunks")
+            rows: dict[str, list[int]] = {}
+            for i, path in enumerate(previous_chunks.file_paths()):
+                if path in unchanged:
+                    rows.setdefault(path, []).append(i)
+            reusable = {path: previous_chunks.select(r) for path, r in rows.items()}
+            # added + modified + removed
+            changed = len(blocks) - len(unchanged) + len(previous.file_hashes.keys() - hashes.keys())
+            publish(
+                f"Found {len(blocks)} files — {changed} changed since "
+                f"{previous.commit_sha[:8]}, re-chunking only those"
+            )
+        else:
+            publish(f"Found {len(blocks)} files to analyse")
+
+        all_chunks = await self._chunk_blocks(blocks, reusable, publish)
+        publish(f"Chunking complete → {len(all_chunks)} total chunks")
+
+        # Identify features via Qwen — skipped when only a few files changed
+        if (
+            previous and previous.features
+            and changed / max(len(hashes), 1) < settings.incremental_feature_threshold
+        ):
+            publish(f"Only {changed} files changed — keeping identified features ⚡")
+            features = previous.features
+        else:
+            publish("Identifying core features…")
+            features = await self._identify_features(all_chunks, owner, repo)
 
         # ── Store in cache ─────────────────────────────────────────────────
         if latest_sha:
-            repo_cache.put(
+            await asyncio.to_thread(
+                repo_cache.put,
                 owner, repo,
                 commit_sha=latest_sha,
                 chunks=all_chunks,
                 features=features,
-                embedded_session_id=embedded_session_id,
+                file_hashes=hashes,
             )
 
-        yield f"__features_identified__:{','.join(features)}"
+        return all_chunks, features
+
+    # ── Chunking ──────────────────────────────────────────────────────────────
 
+    async def _chunk_blocks(
+        self,
+        blocks: list[tuple[str, str]],
+        reusable: dict[str, ChunkStore],
+        publish: Publish,
+    ) -> ChunkStore:
+        """Every file's chunks, in ``blocks`` order; files in ``reusable`` keep theirs.
+
+        Up to ``settings.chunk_inline_max_chars`` of text to chunk is done
+        in-process; more goes to the chunk pool in batches, so the event
+        loop stays free while a large repo is split.
+        """
+        from services.chunk_pool import batch_files, get_chunk_pool
+
+        by_path = {path: reusable[path] for path, _ in blocks if reusable.get(path)}
+        pending = [(path, text) for path, text in blocks if path not in by_path]
+        done, total = len(by_path), sum(map(len, by_path.values()))
+
+        if sum(len(text) for _, text in pending) <= settings.chunk_inline_max_chars:
+            for file_path, file_text in pending:
+                by_path[file_path] = _chunk_file(file_path, file_text)
+                done += 1
+                total += len(by_path[file_path])
+                if done % 10 == 0 or done == len(blocks):
+                    publish(f"Chunked {done}/{len(blocks)} files ({total} chunks so far)")
+        else:
+            pool = get_chunk_pool()
+            tasks = [
+                asyncio.ensure_future(pool.chunk(batch))
+                for batch in batch_files(pending, settings.chunk_batch_chars)
+            ]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    for file_path, chunks in await finished:
+                        by_path[file_path] = chunks
+                        done += 1
+                        total += len(chunks)
+                    publish(f"Chunked {done}/{len(blocks)} files ({total} chunks so far)")
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return ChunkStore.concat(by_path[path] for path, _ in blocks)
 
     # ── Feature identification ────────────────────────────────────────────────
 
     async def _identify_features(
         self,
-        chunks: list[Chunk],
+        chunks: ChunkStore,
         owner: str,
         repo: str,
     ) -> list[str]:
@@ -177,15 +279,17 @@ class IngestionService:
         import os
 
         # 1. Structural signals from file paths
-        file_paths = [c.file_path for c in chunks]
-        structural_hints = _extract_structural_hints(file_paths)
+        file_paths = chunks.file_paths()
+        per_file = Counter(file_paths)
+        structural_hints = _extract_structural_hints(list(per_file))
 
-        # 2. Build a concise file name inventory grouped by directory
+        # 2. Build a concise file name inventory grouped by directory (a name per chunk)
         dir_files: dict[str, list[str]] = {}
-        for p in file_paths:
-            d = os.path.dirname(p)
-            base = os.path.basename(p)
-            dir_files.setdefault(d, []).append(base)
+        dirs: dict[str, str] = {}
+        for p, count in per_file.items():
+            d, base = os.path.split(p)
+            dirs[p] = d
+            dir_files.setdefault(d, []).extend([base] * count)
 
         # Compact inventory: "controller/ → AuthController.java, AttendanceController.java, ..."
         inventory_lines: list[str] = []
@@ -198,18 +302,19 @@ class IngestionService:
         inventory = "\n".join(inventory_lines)[:4000]
 
         # 3. Prioritize high-signal chunks with directory diversity
-        priority = [c for c in chunks if c.chunk_type in ("config", "class")]
-        priority += [c for c in chunks if c.chunk_type == "function" and c not in priority]
+        types = chunks.chunk_types()
+        priority = [i for i, t in enumerate(types) if t in ("config", "class")]
+        priority += [i for i, t in enumerate(types) if t == "function"]
 
         seen_dirs: set[str] = set()
-        sample: list[Chunk] = []
-        for c in priority:
-            d = os.path.dirname(c.file_path)
+        sample: list[ChunkView] = []
+        for i in priority:
+            d = dirs[file_paths[i]]
             is_new_dir = d not in seen_dirs
             if is_new_dir:
                 seen_dirs.add(d)
             if is_new_dir or len(sample) < 30:
-                sample.append(c)
+                sample.append(chunks[i])
             if len(sample) >= 40:
                 break
 
@@ -247,45 +352,64 @@ class IngestionService:
             if line.strip() and len(line.strip()) > 3
         ]
         return features[:12]
-    async def _clone_embeddings(
+
+    async def _embed_for_session(
         self,
-        source_session_id: str,
-        target_session_id: str,
-        chunks: list[Chunk],
-    ) -> None:
-        """Copy embeddings from a cached session's ChromaDB collection to a new one.
-
-        ChromaDB doesn't support collection cloning, so we re-embed the chunks.
-        But since the chunks are already in memory (from cache), this skips
-        the expensive gitingest + chunking + feature ID steps.
+        owner: str,
+        repo: str,
+        latest_sha: str | None,
+        session_id: str,
+        chunks: ChunkStore,
+        previous_sha: str | None = None,
+    ) -> AsyncIterator[str]:
+        """Attach the session to the revision's shared collection, building it if needed.
+
+        Without a SHA the revision can't be shared, so the session gets a
+        private collection instead.
         """
         embed_chunks = _select_chunks_for_embedding(chunks, max_chunks=150)
-        await self._rag.upsert_chunks(target_session_id, embed_chunks)
-
+        if not latest_sha:
+            yield f"Embedding {len(embed_chunks)} representative chunks…"
+            await self._rag.upsert_chunks(session_id, embed_chunks)
+            yield "Chunks embedded into vector store ✓"
+            return
 
+        embedded = await self._rag.build_revision(owner, repo, latest_sha, embed_chunks, previous_sha)
+        self._rag.attach(session_id, owner, repo, latest_sha)
+        if embedded:
+            yield f"Embedded {embedded} new or changed chunks ✓"
+        yield "Using the shared vector index for this revision ✓"
 
 
 # ── Chunking helpers (pure functions) ─────────────────────────────────────────
 
-def _select_chunks_for_embedding(chunks: list[Chunk], max_chunks: int = 300) -> list[Chunk]:
+def _select_chunks_for_embedding(chunks: ChunkStore, max_chunks: int = 300) -> ChunkStore:
     """Pick the most valuable chunks for RAG embedding, capped at max_chunks."""
     import os
-    # Priority: config > class (annotated) > function > other
+    # Priority: config > class (annotated) > function > other; rows come out
+    # rank by rank, in order, and only until the cap is reached
     priority = {"config": 0, "class": 1, "function": 2, "doc": 3, "other": 4}
-    scored = sorted(chunks, key=lambda c: priority.get(c.chunk_type, 4))
+    by_rank: dict[int, list[str]] = {}
+    for ctype in chunks.known_types():
+        by_rank.setdefault(priority.get(ctype, 4), []).append(ctype)
+    ranked = (heapq.merge(*(chunks.rows_of_type(t) for t in by_rank[r])) for r in sorted(by_rank))
 
     # Ensure directory diversity
+    dirs: dict[str, str] = {}
     seen_dirs: dict[str, int] = {}
-    selected: list[Chunk] = []
-    for c in scored:
-        d = os.path.dirname(c.file_path)
+    selected: list[int] = []
+    for i in chain.from_iterable(ranked):
+        path = chunks[i].file_path
+        d = dirs.get(path)
+        if d is None:
+            d = dirs[path] = os.path.dirname(path)
         count = seen_dirs.get(d, 0)
         if count < 10 or len(selected) < max_chunks // 2:
-            selected.append(c)
+            selected.append(i)
             seen_dirs[d] = count + 1
         if len(selected) >= max_chunks:
             break
-    return selected
+    return chunks.select(selected)
 
 
 def _extract_structural_hints(file_paths: list[str]) -> list[str]:
@@ -351,25 +475,7 @@ def _extract_structural_hints(file_paths: list[str]) -> list[str]:
 
     return hints
 
-def _split_into_file_blocks(content: str) -> list[tuple[str, str]]:
-    """
-    gitingest separates files with a line of 48+ '=' chars followed by
-    the file path.  This function splits on those boundaries.
-    """
-    pattern = re.compile(r"={40,}\n(?:File|FILE): (.+?)\n={40,}", re.MULTILINE)
-    parts: list[tuple[str, str]] = []
-    matches = list(pattern.finditer(content))
-    for i, m in enumerate(matches):
-        file_path = m.group(1).strip()
-        start = m.end()
-        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
-        text = content[start:end].strip()
-        if text:
-            parts.append((file_path, text))
-    return parts
-
-
-def _chunk_file(file_path: str, text: str) -> list[Chunk]:
+def _chunk_file(file_path: str, text: str) -> ChunkStore:
     """Split a single file's text into semantic chunks."""
     import os
     basename = os.path.basename(file_path).lower()
@@ -378,8 +484,9 @@ def _chunk_file(file_path: str, text: str) -> list[Chunk]:
 
     # Config files → single chunk, no splitting
     if basename in _CONFIG_NAMES:
-        return [Chunk(text=text[:_MAX_CHUNK_CHARS * 2], file_path=file_path,
-                      chunk_type="config", language=language)]
+        chunks = ChunkStore()
+        chunks.append(text[:_MAX_CHUNK_CHARS * 2], file_path, "config", language)
+        return chunks
 
     # Markdown / plain text → split by headings
     if ext in (".md", ".txt", ".rst"):
@@ -401,13 +508,20 @@ def _chunk_file(file_path: str, text: str) -> list[Chunk]:
     return _split_fixed(file_path, text, language)
 
 
-def _split_python(file_path: str, text: str) -> list[Chunk]:
-    """Split Python source by top-level def/class boundaries."""
-    pattern = re.compile(r"^(def |class |async def )", re.MULTILINE)
-    return _split_by_pattern(file_path, text, pattern, "python")
+# Top-level definition lines (Python: from their first decorator); group 1 is "class" for a
+# class, the name is the first other group set
+_PY_TOP_LEVEL = re.compile(r"^(?:@.*\n)*(?:(class)|(?:async )?def) +(\w+)", re.MULTILINE)
+_JS_TOP_LEVEL = re.compile(
+    r"^(?:export |async )?(?:(class) +(\w+)|function\*? *(\w*)|const +(\w+) *= )", re.MULTILINE,
+)
+
+
+def _split_python(file_path: str, text: str) -> ChunkStore:
+    """Split Python source at its top-level def/class lines; big classes into their head and methods."""
+    return _split_definitions(file_path, text, "python", _top_level(text, _PY_TOP_LEVEL, python_definitions))
 
 
-def _split_java(file_path: str, text: str, language: str) -> list[Chunk]:
+def _split_java(file_path: str, text: str, language: str) -> ChunkStore:
     """Split Java/Kotlin source by class/method/annotation boundaries."""
     pattern = re.compile(
         r"^(\s*@\w+|\s*public |\s*private |\s*protected |\s*class |\s*interface |\s*enum |\s*abstract |\s*fun |\s*data class )",
@@ -427,13 +541,75 @@ def _split_java(file_path: str, text: str, language: str) -> list[Chunk]:
     return chunks
 
 
-def _split_js(file_path: str, text: str, language: str) -> list[Chunk]:
-    """Split JS/TS source by function/class boundaries."""
-    pattern = re.compile(
-        r"^(export |async )?(function |class |const \w+ = |const \w+ = async )",
-        re.MULTILINE,
-    )
-    return _split_by_pattern(file_path, text, pattern, language)
+def _split_js(file_path: str, text: str, language: str) -> ChunkStore:
+    """Split JS/TS source at its top-level function/class/const lines; big classes into their methods."""
+    return _split_definitions(file_path, text, language, _top_level(text, _JS_TOP_LEVEL, js_definitions))
+
+
+def _top_level(
+    text: str, pattern: re.Pattern, parse: Callable[[str], list[Definition]],
+) -> list[Definition]:
+    """One definition per ``pattern`` line, running to the next one.
+
+    A regex pass is all most files need.  Only a class too big for one
+    chunk is handed to ``parse`` (``python_definitions`` /
+    ``js_definitions``), so it is split at its methods rather than at
+    fixed offsets; if the parser rejects it, it is fixed-split as before.
+    """
+    matches = list(pattern.finditer(text))
+    found: list[Definition] = []
+    for i, m in enumerate(matches):
+        start = m.start()
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        is_class = m.group(1) is not None
+        if is_class and end - start > _MAX_CHUNK_CHARS:
+            try:
+                inner = parse(text[start:end])
+            except StructureError:
+                inner = []
+            if inner:
+                found.extend(d._replace(start=d.start + start, end=d.end + start) for d in inner)
+                continue
+        name = next(filter(None, m.groups()[1:]), "")
+        found.append(Definition("class" if is_class else "function", name, "", start, end))
+    return found
+
+
+def _split_definitions(
+    file_path: str,
+    text: str,
+    language: str,
+    definitions: list[Definition],
+) -> ChunkStore:
+    """One chunk per definition, named and with its line span; the code between them as "other"."""
+    chunks = ChunkStore()
+    line, counted = 1, 0      # the line number at offset `counted`
+
+    def add(start: int, end: int, ctype: str, symbol: str, scope: str) -> None:
+        nonlocal line, counted
+        block = text[start:end]
+        body = block.strip()
+        if not body:
+            return
+        start += block.find(body[0])
+        line += text.count("\n", counted, start)
+        counted = start
+        if len(body) <= _MAX_CHUNK_CHARS:
+            chunks.append(body, file_path, ctype, language, symbol, scope, line, line + body.count("\n"))
+            return
+        # If block is huge, split further; every part keeps the definition's name
+        for offset, part in _fixed_spans(body):
+            first = line + body.count("\n", 0, offset)
+            chunks.append(part, file_path, ctype, language, symbol, scope, first, first + part.count("\n"))
+
+    pos = 0
+    for d in definitions:
+        if d.start > pos:
+            add(pos, d.start, "other", "", "")
+        add(d.start, d.end, d.kind, d.name, d.scope)
+        pos = d.end
+    add(pos, len(text), "other", "", "")
+    return chunks
 
 
 def _split_by_pattern(
@@ -441,12 +617,12 @@ def _split_by_pattern(
     text: str,
     pattern: re.Pattern,
     language: str,
-) -> list[Chunk]:
+) -> ChunkStore:
     splits = [m.start() for m in pattern.finditer(text)]
     if not splits:
         return _split_fixed(file_path, text, language)
 
-    chunks: list[Chunk] = []
+    chunks = ChunkStore()
     for i, start in enumerate(splits):
         end = splits[i + 1] if i + 1 < len(splits) else len(text)
         block = text[start:end].strip()
@@ -455,23 +631,22 @@ def _split_by_pattern(
         ctype = "class" if block.startswith("class ") else "function"
         # If block is huge, split further
         for part in _fixed_split(block):
-            chunks.append(Chunk(text=part, file_path=file_path,
-                                chunk_type=ctype, language=language))
+            chunks.append(part, file_path, ctype, language)
     return chunks or _split_fixed(file_path, text, language)
 
 
-def _split_doc(file_path: str, text: str, language: str) -> list[Chunk]:
+def _split_doc(file_path: str, text: str, language: str) -> ChunkStore:
     """Split markdown/text by headings."""
     pattern = re.compile(r"^#{1,3} .+", re.MULTILINE)
     return _split_by_pattern(file_path, text, pattern, language) or \
            _split_fixed(file_path, text, language)
 
 
-def _split_fixed(file_path: str, text: str, language: str) -> list[Chunk]:
-    return [
-        Chunk(text=part, file_path=file_path, chunk_type="other", language=language)
-        for part in _fixed_split(text)
-    ]
+def _split_fixed(file_path: str, text: str, language: str) -> ChunkStore:
+    chunks = ChunkStore()
+    for part in _fixed_split(text):
+        chunks.append(part, file_path, "other", language)
+    return chunks
 
 
 def _fixed_split(text: str, size: int = _MAX_CHUNK_CHARS, overlap: int = 160) -> list[str]:
@@ -479,10 +654,15 @@ def _fixed_split(text: str, size: int = _MAX_CHUNK_CHARS, overlap: int = 160) ->
 
     Overlap is ~20% of chunk size to preserve context across boundaries.
     """
+    return [part for _, part in _fixed_spans(text, size, overlap)]
+
+
+def _fixed_spans(text: str, size: int = _MAX_CHUNK_CHARS, overlap: int = 160) -> list[tuple[int, str]]:
+    """``_fixed_split``'s parts with their offsets into ``text``."""
     if len(text) <= size:
-        return [text] if text.strip() else []
+        return [(0, text)] if text.strip() else []
 
-    parts: list[str] = []
+    parts: list[tuple[int, str]] = []
     start = 0
     while start < len(text):
         end = min(start + size, len(text))
@@ -497,7 +677,7 @@ def _fixed_split(text: str, size: int = _MAX_CHUNK_CHARS, overlap: int = 160) ->
                     end = start + size // 2 + last + len(marker)
                     break
 
-        parts.append(text[start:end])
+        parts.append((start, text[start:end]))
         start = end - overlap if end < len(text) else end
 
-    return [p for p in parts if p.strip()]
+    return [(offset, p) for offset, p in parts if p.strip()]
@@ -0,0 +1,318 @@
+"""
+IngestionStore
+==============
+One network fetch per repo revision, whichever endpoints ask for it.
+
+``get_snapshot`` returns the ``RepoSnapshot`` for ``owner/repo@sha``: the
+gitingest summary, tree and every file's raw text, stored once as
+content-addressed blobs in ``snapshot_cache``.  The README pipeline
+(``ReadmeService``) and the chunk/embedding pipeline (``IngestionService``)
+both derive their own views from it instead of running gitingest with
+their own options and parsers.
+
+Concurrent requests for the same revision share one in-flight fetch.
+
+When an older revision is already stored, the new one is built
+incrementally: the GitHub compare API lists the changed files and only
+those are downloaded (``_refresh``).  Anything the diff can't describe
+safely — force pushes, more than ``settings.incremental_max_files``
+changes, API errors — falls back to a full gitingest fetch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Iterator
+from urllib.parse import quote
+
+from pathspec import GitIgnoreSpec
+
+from config import settings
+from services.github_service import GITHUB_API, get_github_client
+from services.repo_cache import RepoSnapshot, snapshot_cache
+from services.single_flight import SingleFlight
+
+log = logging.getLogger(__name__)
+
+# Only what no view ever wants; per-view filtering happens on the snapshot
+EXCLUDE_PATTERNS = {".idea", "node_modules", ".git"}
+
+_FILE_HEADER = re.compile(r"={40,}\n(?:File|FILE): (.+?)\n={40,}", re.MULTILINE)
+
+
+# gitingest pulls in ~0.5 s of modules; import it on first fetch, not at startup
+def ingest(*args, **kwargs):
+    from gitingest import ingest as _ingest
+
+    return _ingest(*args, **kwargs)
+
+
+@lru_cache(maxsize=1)
+def _ignore_spec() -> GitIgnoreSpec:
+    """Same filter gitingest applies, for files fetched one by one."""
+    from gitingest.utils.ignore_patterns import DEFAULT_IGNORE_PATTERNS
+
+    return GitIgnoreSpec.from_lines(DEFAULT_IGNORE_PATTERNS | EXCLUDE_PATTERNS)
+
+_MAX_FILE_BYTES = 10 * 1024 * 1024   # gitingest's default max_file_size
+_FETCH_CONCURRENCY = 8
+_COMPARE_FILE_CAP = 300   # GitHub truncates the compare file list here
+
+_fetch_flights = SingleFlight("gitingest")
+
+# Counters surfaced through /stats/cache
+_fetch_stats: dict[str, int] = {
+    "full_fetches": 0,
+    "incremental_refreshes": 0,
+    "incremental_fallbacks": 0,
+    "bytes_fetched": 0,
+    "files_refetched": 0,
+}
+
+
+class _FullFetchNeeded(Exception):
+    """The compare API result can't be applied as an incremental update."""
+
+
+def iter_file_blocks(content: str) -> Iterator[tuple[str, str]]:
+    """
+    Yield ``(path, text)`` for each file in gitingest's flat output, lazily.
+
+    gitingest separates files with a line of 48+ '=' chars followed by
+    the file path.  Headers are found one at a time and each file's text is
+    sliced out already stripped, so the only copy made is the text itself.
+    """
+    header = _FILE_HEADER.search(content)
+    while header is not None:
+        following = _FILE_HEADER.search(content, header.end())
+        start, end = header.end(), following.start() if following else len(content)
+        while start < end and content[start].isspace():
+            start += 1
+        while end > start and content[end - 1].isspace():
+            end -= 1
+        if start < end:
+            yield header.group(1).strip(), content[start:end]
+        header = following
+
+
+def split_file_blocks(content: str) -> list[tuple[str, str]]:
+    """All of ``iter_file_blocks`` as a list."""
+    return list(iter_file_blocks(content))
+
+
+def render_file_blocks(files: list[tuple[str, str]]) -> str:
+    """Inverse of ``split_file_blocks``: rebuild gitingest's flat text format."""
+    rule = "=" * 48
+    return "".join(f"{rule}\nFILE: {path}\n{rule}\n{text}\n\n" for path, text in files)
+
+
+def _entry_key(name: str, is_dir: bool) -> tuple[int, str]:
+    """gitingest's sibling order: README, files, dotfiles, dirs, dot-dirs."""
+    lower = name.lower()
+    if is_dir:
+        return (3 if not lower.startswith(".") else 4, lower)
+    if lower == "readme" or lower.startswith("readme."):
+        return (0, lower)
+    return (1 if not lower.startswith(".") else 2, lower)
+
+
+def _gitingest_order(path: str) -> tuple:
+    """Sort key placing a file where gitingest's tree walk would emit it."""
+    *dirs, name = path.split("/")
+    return (*(_entry_key(d, True) for d in dirs), _entry_key(name, False))
+
+
+def render_tree(root: str, paths: list[str]) -> str:
+    """Rebuild gitingest's ``Directory structure`` block from file paths."""
+    tree: dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        for part in path.split("/")[:-1]:
+            node = node.setdefault(part + "/", {})
+        node[path.rsplit("/", 1)[-1]] = None
+
+    def walk(node: dict, prefix: str) -> list[str]:
+        names = sorted(node, key=lambda n: _entry_key(n.rstrip("/"), n.endswith("/")))
+        lines: list[str] = []
+        for i, name in enumerate(names):
+            last = i == len(names) - 1
+            lines.append(f"{prefix}{'└── ' if last else '├── '}{name}")
+            if node[name] is not None:
+                lines.extend(walk(node[name], prefix + ("    " if last else "│   ")))
+        return lines
+
+    return "\n".join(["Directory structure:", f"└── {root}/", *walk(tree, "    ")]) + "\n"
+
+
+_SUMMARY_COUNTS = re.compile(r"(Files analyzed: )\d+|(Estimated tokens: )([\d.]+)([kM]?)")
+_TOKEN_UNITS = {"": 1, "k": 1_000, "M": 1_000_000}
+
+
+def restate_summary(summary: str, files: int, share: float) -> str:
+    """gitingest's ``summary`` for ``files`` files holding ``share`` of the text it counted.
+
+    The token estimate is gitingest's own scaled by that share of
+    characters, rather than tokenising the repo again.
+    """
+    def count(m: re.Match) -> str:
+        if m.group(1):
+            return f"{m.group(1)}{files}"
+        tokens = round(float(m.group(3)) * _TOKEN_UNITS[m.group(4)] * share)
+        for threshold, suffix in ((1_000_000, "M"), (1_000, "k")):   # gitingest's format
+            if tokens >= threshold:
+                return f"{m.group(2)}{tokens / threshold:.1f}{suffix}"
+        return f"{m.group(2)}{tokens}"
+
+    return _SUMMARY_COUNTS.sub(count, summary)
+
+
+def text_size(tree: str, files: Iterable[tuple[str, str]]) -> int:
+    """Characters of a tree and its files, the denominator of ``restate_summary``'s share."""
+    return len(tree) + sum(len(text) for _, text in files)
+
+
+def stats() -> dict[str, Any]:
+    return {**_fetch_stats, "in_flight": _fetch_flights.in_flight}
+
+
+async def get_snapshot(owner: str, repo: str, commit_sha: str | None) -> RepoSnapshot:
+    """Return the snapshot of ``owner/repo`` at ``commit_sha``, fetching it at most once.
+
+    Without a SHA (GitHub API unavailable) the result can't be keyed, so it
+    is fetched but not cached.  ``snapshot.views["fetch"]`` records how the
+    snapshot was obtained and how many bytes that cost.
+    """
+    previous = None
+    if commit_sha:
+        cached = await asyncio.to_thread(snapshot_cache.get, owner, repo, commit_sha)
+        if cached is not None:
+            log.info("⚡ Using cached snapshot for %s/%s (sha=%s)", owner, repo, commit_sha[:8])
+            await asyncio.to_thread(getattr, cached, "files")   # read and decompress off the loop
+            return cached
+        previous = await asyncio.to_thread(snapshot_cache.latest, owner, repo)
+
+    key = f"{owner}/{repo}@{commit_sha or 'unknown'}".lower()
+    return await _fetch_flights.run(key, lambda _publish: _refresh_or_fetch(owner, repo, commit_sha, previous))
+
+
+async def _refresh_or_fetch(
+    owner: str, repo: str, commit_sha: str | None, previous: RepoSnapshot | None,
+) -> RepoSnapshot:
+    if previous is not None and commit_sha:
+        try:
+            return await _refresh(owner, repo, commit_sha, previous)
+        except Exception as exc:
+            _fetch_stats["incremental_fallbacks"] += 1
+            log.info("Incremental refresh of %s/%s not possible (%s) — full fetch", owner, repo, exc)
+    return await _fetch(owner, repo, commit_sha)
+
+
+async def _fetch(owner: str, repo: str, commit_sha: str | None) -> RepoSnapshot:
+    url = f"https://github.com/{owner}/{repo}"
+    log.info("📥 gitingest: fetching %s", url)
+    summary, tree, content = await asyncio.to_thread(
+        ingest,
+        url,
+        exclude_patterns=EXCLUDE_PATTERNS,
+        token=settings.github_token or None,
+    )
+    files = split_file_blocks(content)
+    size = len(content)
+    del content   # the per-file texts are all that's kept; drop the flat copy now
+    log.info("✅ gitingest: %s/%s → %d files, %d chars", owner, repo, len(files), size)
+
+    _fetch_stats["full_fetches"] += 1
+    _fetch_stats["bytes_fetched"] += size
+    report = {"mode": "full", "bytes_fetched": size, "files_changed": len(files), "files_removed": 0}
+
+    if commit_sha:
+        snapshot = await asyncio.to_thread(
+            snapshot_cache.put, owner, repo, commit_sha, summary=summary, tree=tree, files=files,
+        )
+    else:
+        snapshot = RepoSnapshot(owner=owner, repo=repo, commit_sha="", summary=summary, tree=tree, _files=dict(files))
+    snapshot.views["fetch"] = report
+    return snapshot
+
+
+async def _refresh(owner: str, repo: str, commit_sha: str, previous: RepoSnapshot) -> RepoSnapshot:
+    """Build the ``commit_sha`` snapshot from ``previous`` plus the changed files only."""
+    client = get_github_client()
+    resp = await client.get(
+        f"{GITHUB_API}/repos/{owner}/{repo}/compare/{previous.commit_sha}...{commit_sha}",
+    )
+    resp.raise_for_status()
+    fetched = len(resp.content)
+    diff = resp.json()
+
+    # "diverged"/"behind" diffs are relative to the merge base, not to previous
+    if diff.get("status") not in ("ahead", "identical"):
+        raise _FullFetchNeeded(f"compare status {diff.get('status')!r}")
+    changes = diff.get("files", [])
+    if len(changes) >= min(settings.incremental_max_files, _COMPARE_FILE_CAP):
+        raise _FullFetchNeeded(f"{len(changes)} changed files")
+
+    files = dict(await asyncio.to_thread(getattr, previous, "files"))
+    removed: list[str] = []
+    wanted: list[str] = []
+    for change in changes:
+        path = change["filename"]
+        if change.get("previous_filename"):
+            if files.pop(change["previous_filename"], None) is not None:
+                removed.append(change["previous_filename"])
+        if change["status"] == "removed" or _ignore_spec().match_file(path):
+            if files.pop(path, None) is not None:
+                removed.append(path)
+            continue
+        wanted.append(path)
+
+    sem = asyncio.Semaphore(_FETCH_CONCURRENCY)
+
+    async def fetch_file(path: str) -> tuple[str, bytes | None]:
+        async with sem:
+            r = await client.get(
+                f"{GITHUB_API}/repos/{owner}/{repo}/contents/{quote(path, safe='/')}",
+                params={"ref": commit_sha},
+                headers={"Accept": "application/vnd.github.raw"},
+            )
+        if r.status_code == 404:
+            return path, None
+        r.raise_for_status()
+        return path, r.content
+
+    for path, raw in await asyncio.gather(*(fetch_file(p) for p in wanted)):
+        text = None
+        if raw is not None:
+            fetched += len(raw)
+            if len(raw) <= _MAX_FILE_BYTES:
+                try:
+                    text = raw.decode("utf-8").strip()
+                except UnicodeDecodeError:   # binary: gitingest leaves these out too
+                    text = None
+        if text:
+            files[path] = text
+        elif files.pop(path, None) is not None:
+            removed.append(path)
+
+    ordered = sorted(files.items(), key=lambda item: _gitingest_order(item[0]))
+    tree = render_tree(f"{owner}-{repo}", [path for path, _ in ordered])
+    share = text_size(tree, ordered) / max(1, text_size(previous.tree, previous.files.items()))
+    summary = restate_summary(previous.summary, len(ordered), share)
+
+    snapshot = await asyncio.to_thread(
+        snapshot_cache.put, owner, repo, commit_sha, summary=summary, tree=tree, files=ordered,
+    )
+    report = {"mode": "incremental", "bytes_fetched": fetched, "files_changed": len(wanted), "files_removed": len(removed)}
+    snapshot.views["fetch"] = report
+
+    _fetch_stats["incremental_refreshes"] += 1
+    _fetch_stats["bytes_fetched"] += fetched
+    _fetch_stats["files_refetched"] += len(wanted)
+    log.info(
+        "🔁 Incremental refresh %s/%s %s→%s: %d changed, %d removed, %d bytes fetched",
+        owner, repo, previous.commit_sha[:8], commit_sha[:8], len(wanted), len(removed), fetched,
+    )
+    return snapshot
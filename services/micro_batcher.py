@@ -0,0 +1,150 @@
+"""
+MicroBatcher
+============
+Dynamic batching for model inference shared by every session.
+
+A retrieval embeds a handful of query strings and scores a few dozen
+(query, doc) pairs; run one call at a time, the per-call overhead of the
+model (tokenizer setup, padding, a forward pass over a tiny batch)
+dominates.  ``submit`` parks a caller's items for up to
+``settings.batch_window_ms``; everything that arrives in that window — from
+any session — runs as one batch on the inference pool and each caller gets
+its own slice of the output back.  A batch is flushed early once it holds
+``max_batch`` items; one request larger than that runs on its own and is
+never split.
+
+Per-batcher counters (batch-size histogram, requests per batch, latency)
+are exposed through ``batcher_stats`` on ``/stats/compute``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Sequence
+
+from config import settings
+from services.compute_pool import get_compute_pool
+
+log = logging.getLogger(__name__)
+
+_EWMA = 0.2   # weight of the newest sample in the running averages
+
+# name → batcher, for /stats/compute
+_batchers: dict[str, "MicroBatcher"] = {}
+
+
+class MicroBatcher:
+    """Coalesces concurrent ``fn(items)`` calls into batched ones."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[list], Sequence],
+        max_batch: int,
+        window_ms: float | None = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.window = (settings.batch_window_ms if window_ms is None else window_ms) / 1000
+        self._pending: list[tuple[list, asyncio.Future]] = []
+        self._pending_items = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()   # the loop only keeps weak references to tasks
+        self._batches = 0
+        self._requests = 0
+        self._items = 0
+        self._max_items = 0
+        self._failed = 0
+        self._histogram: dict[int, int] = {}
+        self._avg_items = 0.0
+        self._avg_requests = 0.0
+        self._avg_run = 0.0
+        _batchers[name] = self
+
+    # ── Submission ────────────────────────────────────────────────────────────
+
+    async def submit(self, items: Sequence) -> list:
+        """``fn(items)``, run as part of whatever batch is forming right now."""
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(items), future))
+        self._pending_items += len(items)
+        if self._pending_items >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_items = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("%s batch failed after running", self.name, exc_info=task.exception())
+
+    async def _run(self, batch: list[tuple[list, asyncio.Future]]) -> None:
+        flat = [item for items, _ in batch for item in items]
+        started = time.perf_counter()
+        try:
+            results = await get_compute_pool().run(self.fn, flat)
+        except Exception as exc:
+            self._failed += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        finally:
+            self._record(len(batch), len(flat), time.perf_counter() - started)
+
+        offset = 0
+        for items, future in batch:
+            if not future.done():   # caller may have been cancelled meanwhile
+                future.set_result(list(results[offset:offset + len(items)]))
+            offset += len(items)
+
+    def _record(self, requests: int, items: int, elapsed: float) -> None:
+        self._batches += 1
+        self._requests += requests
+        self._items += items
+        self._max_items = max(self._max_items, items)
+        bucket = 1 << (items - 1).bit_length()   # batch size rounded up to a power of two
+        self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+        self._avg_items += _EWMA * (items - self._avg_items)
+        self._avg_requests += _EWMA * (requests - self._avg_requests)
+        self._avg_run += _EWMA * (elapsed - self._avg_run)
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "window_ms": round(self.window * 1000, 2),
+            "max_batch": self.max_batch,
+            "batches": self._batches,
+            "requests": self._requests,
+            "items": self._items,
+            "failed": self._failed,
+            "max_items_seen": self._max_items,
+            "requests_per_batch": round(self._requests / self._batches, 2) if self._batches else 0.0,
+            "recent_items_per_batch": round(self._avg_items, 1),
+            "recent_requests_per_batch": round(self._avg_requests, 1),
+            "avg_batch_ms": round(self._avg_run * 1000, 1),
+            # "≤n": batches of up to n items (and more than n/2)
+            "histogram": {f"≤{size}": n for size, n in sorted(self._histogram.items())},
+        }
+
+
+def batcher_stats() -> dict[str, dict[str, Any]]:
+    return {name: b.stats() for name, b in _batchers.items()}
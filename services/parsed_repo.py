@@ -0,0 +1,101 @@
+"""
+ParsedRepo
+==========
+Everything the README and content pipelines read from one repo revision,
+derived in a single pass over the snapshot and memoised on it (the snapshot
+itself is cached per ``owner/repo@sha``), so a second request for the same
+revision — README, LinkedIn post, article, resume — never rescans file text.
+
+  content      — the prompt's file section: the most valuable files packed
+                 into the model's token budget (``prompt_budget.pack_files``),
+                 as one buffer in packing order
+  index        — ``path → (start, end)`` of each file's text inside ``content``
+  source_files — per-file text, truncated, for metadata analysis
+  readme       — the existing README, if the repo has one
+  tree         — the directory tree, cut to its share of the budget
+  endpoints    — API routes found in ``content``, as ``"METHOD /path"``
+
+A prompt with less room than the whole budget takes ``files_within(n)``:
+the packed files that fit in ``n`` tokens, best first, without recounting.
+
+Endpoints come from one combined pattern (``_ENDPOINT``) scanned once,
+instead of one ``findall`` per framework and method.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+# FastAPI / Flask decorators and Express calls, Spring mapping annotations,
+# and Spring's @RequestMapping(value=..., method=RequestMethod.X)
+_ENDPOINT = re.compile(
+    r"""(?:app|router)\.(?P<call>post|get|put|delete|patch|websocket)\(["'](?P<call_path>[^"']+)["']"""
+    r"""|@(?P<mapping>Post|Get|Put|Delete|Patch)Mapping\(["']?(?P<mapping_path>[^"')\s]+)"""
+    r"""|@RequestMapping\(\s*value\s*=\s*["'](?P<rm_path>[^"']+)["'].*method\s*=\s*RequestMethod\.(?P<rm>\w+)"""
+)
+
+
+def extract_endpoints(text: str) -> list[str]:
+    """API routes declared in ``text``, as sorted, unique ``"METHOD /path"`` strings."""
+    found: set[str] = set()
+    for m in _ENDPOINT.finditer(text):
+        if m["call"]:
+            method = "WebSocket" if m["call"] == "websocket" else m["call"].upper()
+            found.add(f"{method} {m['call_path']}")
+        elif m["mapping"]:
+            found.add(f"{m['mapping'].upper()} {m['mapping_path']}")
+        else:
+            found.add(f"{m['rm']} {m['rm_path']}")
+    return sorted(found)
+
+
+@dataclass
+class ParsedRepo:
+    """One revision's parse, shared by every prompt built from it."""
+    content: str
+    index: dict[str, tuple[int, int]]
+    source_files: dict[str, str]
+    readme: str = ""
+    summary: str = ""
+    tree: str = ""
+    endpoints: list[str] = field(default_factory=list)
+    metadata: Any = None
+    blocks: dict[str, tuple[int, int, int]] = field(default_factory=dict)   # path → (start, end, tokens) of its block
+    condensed: list[str] = field(default_factory=list)                      # paths too large to include whole
+
+    @classmethod
+    def from_packed(cls, packed, **fields) -> "ParsedRepo":
+        """Lay ``PackedFiles`` out in one buffer, indexing each file and block."""
+        from services.ingestion_store import render_file_blocks
+
+        index: dict[str, tuple[int, int]] = {}
+        blocks: dict[str, tuple[int, int, int]] = {}
+        offset = 0
+        for path, block, tokens in packed.blocks:
+            end = offset + len(block)
+            header = len(render_file_blocks([(path, "")])) - 2   # the block minus text and blank line
+            index[path] = (offset + header, end - 2)
+            blocks[path] = (offset, end, tokens)
+            offset = end
+        content = "".join(block for _, block, _ in packed.blocks)
+        return cls(content=content, index=index, blocks=blocks, condensed=list(packed.partial),
+                   endpoints=extract_endpoints(content), **fields)
+
+    def file(self, path: str) -> str:
+        """``path``'s text as it appears in ``content`` (condensed if it was too large)."""
+        start, end = self.index[path]
+        return self.content[start:end]
+
+    def files_within(self, max_tokens: int) -> tuple[str, int, list[str]]:
+        """The packed file blocks that fit in ``max_tokens``, best first: text, tokens, paths."""
+        parts: list[str] = []
+        paths: list[str] = []
+        used = 0
+        for path, (start, end, tokens) in self.blocks.items():
+            if used + tokens <= max_tokens:
+                parts.append(self.content[start:end])
+                paths.append(path)
+                used += tokens
+        return "".join(parts), used, paths
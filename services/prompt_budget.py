@@ -0,0 +1,244 @@
+"""
+Prompt budget
+=============
+Token-counted packing for the README and content prompts.
+
+Repo context used to be cut with fixed character slices (60 000 chars of
+files, 2 000 of the old README), which either left most of the model's
+context unused or overflowed it, and cut files mid-line.  Prompts are now
+sized in tokens:
+
+  count_tokens  — tiktoken with ``settings.prompt_encoding``.  tiktoken
+                  downloads its BPE files on first use; where that isn't
+                  possible a conservative chars/3 estimate is used instead,
+                  and the download is retried a minute later.
+  prompt_budget — tokens a prompt may use with a model: its context window
+                  minus the reply, less ``settings.prompt_token_margin``
+                  (the models don't tokenise like ``prompt_encoding``, so a
+                  count can come in under theirs), capped at
+                  ``settings.prompt_max_tokens``
+  fit_tokens    — the longest whole-line prefix of a text within a budget
+  pack_files    — ranks files by value (manifests and entry points first,
+                  directories interleaved) and fills a budget greedily with
+                  whole files, or a large file's head and an outline of its
+                  definitions when the whole file doesn't fit
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from config import settings
+
+log = logging.getLogger(__name__)
+
+# Context windows of the models prompts are sized for; others get the default
+_CONTEXT_WINDOWS = {
+    "qwen/qwen2.5-coder-32b-instruct": 32_768,
+    "meta/llama-3.1-70b-instruct": 131_072,
+    "meta/llama-3.3-70b-instruct": 131_072,
+    "gemini-2.5-flash": 1_048_576,
+    "gemini-2.5-pro": 1_048_576,
+}
+_DEFAULT_CONTEXT_WINDOW = 32_768
+_REPLY_TOKENS = 8_192        # AIService asks for up to this many tokens back
+
+_TRUNCATED = "... [TRUNCATED] ...\n"
+_OUTLINE = "... [TRUNCATED — definitions in the rest of the file:] ...\n"
+_MIN_PARTIAL_TOKENS = 256    # below this a large file isn't worth a partial
+_PARTIAL_SHARE = 4           # a partial file takes at most 1/4 of the budget
+_MAX_CHARS_PER_TOKEN = 12    # longer than this per token: don't bother counting the whole file
+_ENCODING_RETRY_SECONDS = 60  # after a failed BPE download, estimate for this long before trying again
+
+
+# ── Counting ──────────────────────────────────────────────────────────────────
+
+_loaded = None           # the tiktoken encoding, once it has loaded
+_retry_at = 0.0          # monotonic time before which a failed load isn't retried
+
+
+def _encoding():
+    global _loaded, _retry_at
+    if _loaded is not None or time.monotonic() < _retry_at:
+        return _loaded
+    try:
+        import tiktoken
+    except ImportError:
+        log.warning("⚠️ tiktoken not installed — estimating tokens from length")
+        _retry_at = math.inf
+        return None
+    try:
+        _loaded = tiktoken.get_encoding(settings.prompt_encoding)
+    except Exception as exc:   # its BPE file can't be downloaded (yet)
+        log.warning("⚠️ tiktoken encoding %s unavailable (%s) — estimating tokens from length for %ds",
+                    settings.prompt_encoding, exc, _ENCODING_RETRY_SECONDS)
+        _retry_at = time.monotonic() + _ENCODING_RETRY_SECONDS
+    return _loaded
+
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return math.ceil(len(text) / 3)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def prompt_budget(model: str) -> int:
+    """Tokens a prompt for ``model`` may use."""
+    window = _CONTEXT_WINDOWS.get(model, _DEFAULT_CONTEXT_WINDOW)
+    return min(settings.prompt_max_tokens, int((window - _REPLY_TOKENS) * (1 - settings.prompt_token_margin)))
+
+
+def fit_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of ``text`` within ``max_tokens``, cut at a line end."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if len(text) <= max_tokens and count_tokens(text) <= max_tokens:   # a token is at least one char
+        return text
+    # Past this many chars the prefix can't fit, so don't tokenise it over and over
+    lines = text[:max_tokens * _MAX_CHARS_PER_TOKEN].splitlines(keepends=True)
+    # Binary search over the number of whole lines kept
+    lo, hi = 0, len(lines)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens("".join(lines[:mid])) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return "".join(lines[:lo])
+
+
+# ── Packing ───────────────────────────────────────────────────────────────────
+
+# Dependency manifests and build files: what the stack is made of
+_MANIFESTS = frozenset({
+    "pom.xml", "build.gradle", "build.gradle.kts", "package.json", "requirements.txt",
+    "pyproject.toml", "setup.py", "setup.cfg", "pipfile", "cargo.toml", "go.mod",
+    "dockerfile", "docker-compose.yml", "docker-compose.yaml", "makefile",
+    "application.yaml", "application.yml", "application.properties", ".env.example",
+})
+_ENTRY_POINTS = frozenset({"main", "app", "index", "server", "cli", "manage", "wsgi", "asgi", "__main__"})
+_SOURCE_EXTS = frozenset({
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".rb", ".cs",
+    ".cpp", ".cc", ".cxx", ".c", ".h", ".swift", ".dart", ".php", ".scala", ".vue", ".svelte",
+})
+# Large and low-signal: lockfiles, minified and generated output
+_NOISE = frozenset({
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "pipfile.lock",
+    "cargo.lock", "go.sum", "composer.lock", "gemfile.lock",
+})
+
+
+def _tier(path: str) -> int:
+    """Value of a file for understanding the project; higher is packed first."""
+    basename = os.path.basename(path).lower()
+    stem, ext = os.path.splitext(basename)
+    if basename in _NOISE or basename.endswith((".min.js", ".min.css", ".map")):
+        return 0
+    if basename in _MANIFESTS:
+        return 4
+    if ext in _SOURCE_EXTS and (stem in _ENTRY_POINTS or stem.endswith("application")):
+        return 3
+    if ext in _SOURCE_EXTS:
+        return 2
+    return 1
+
+
+def rank_files(paths: Iterable[str]) -> list[str]:
+    """``paths`` in packing order.
+
+    By tier, then round-robin over top-level directories — the first file
+    of every directory before the second of any — then shallower first, so
+    a budget that holds twenty files shows twenty corners of the repo
+    rather than one package in full.
+    """
+    seen: dict[str, int] = {}
+    keyed = []
+    for i, path in enumerate(paths):
+        parts = path.split("/")
+        top = parts[0] if len(parts) > 1 else ""
+        nth = seen[top] = seen.get(top, -1) + 1
+        keyed.append(((-_tier(path), nth, len(parts), i), path))
+    return [path for _, path in sorted(keyed)]
+
+
+def _render(path: str, text: str) -> str:
+    from services.ingestion_store import render_file_blocks
+
+    return render_file_blocks([(path, text)])
+
+
+# Lines that open a definition, in the languages _SOURCE_EXTS covers
+_DEFINITION = re.compile(
+    r"^\s*(?:@\w+|(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:def|class|function|interface|enum|struct|trait|impl"
+    r"|func|fn|fun|type|module)\b|(?:public|private|protected|internal)\b)"
+)
+
+
+def _condense(text: str, max_tokens: int) -> str:
+    """A file too large to include whole, cut down to ``max_tokens``.
+
+    Keeps the head of the file (imports, module docs, the first
+    definitions) whole-line, then the definition lines of the rest as an
+    outline, so the prompt still shows everything the file declares.
+    """
+    room = max_tokens - count_tokens(_OUTLINE)
+    head = fit_tokens(text, room * 2 // 3)
+    outline = "".join(
+        line for line in text[len(head):].splitlines(keepends=True) if _DEFINITION.match(line)
+    )
+    outline = fit_tokens(outline, room - count_tokens(head))
+    if outline:
+        return head + _OUTLINE + outline
+    return fit_tokens(text, max_tokens - count_tokens(_TRUNCATED)) + _TRUNCATED
+
+
+@dataclass
+class PackedFiles:
+    """Rendered file blocks in packing order, with their token counts."""
+    blocks: list[tuple[str, str, int]] = field(default_factory=list)   # (path, block, tokens)
+    partial: list[str] = field(default_factory=list)                   # paths condensed to fit
+    skipped: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return sum(t for _, _, t in self.blocks)
+
+
+def pack_files(files: Iterable[tuple[str, str]], max_tokens: int) -> PackedFiles:
+    """Fill ``max_tokens`` with the most valuable files, whole where they fit."""
+    files = dict(files)
+    packed = PackedFiles()
+    room = max_tokens
+    for path in rank_files(files):
+        if room < 32:
+            packed.skipped += 1
+            continue
+        text = files[path]
+        # A file that is clearly too big isn't rendered and tokenised whole just to find out
+        block = _render(path, text) if len(text) <= room * _MAX_CHARS_PER_TOKEN else ""
+        tokens = count_tokens(block) if block else room + 1
+        if tokens <= room:
+            packed.blocks.append((path, block, tokens))
+            room -= tokens
+            continue
+        share = min(room, max(_MIN_PARTIAL_TOKENS, max_tokens // _PARTIAL_SHARE))
+        header = count_tokens(_render(path, ""))
+        if share < _MIN_PARTIAL_TOKENS or share <= header:
+            packed.skipped += 1
+            continue
+        block = _render(path, _condense(text, share - header))
+        tokens = count_tokens(block)
+        if tokens > room:
+            packed.skipped += 1
+            continue
+        packed.blocks.append((path, block, tokens))
+        packed.partial.append(path)
+        room -= tokens
+    return packed
@@ -132,12 +132,12 @@ Before outputting, check:
 
 **EXISTING README** (for context):
 <existing_readme>
-{existing_readme[:2_000] if existing_readme else "No existing README found"}
+{existing_readme or "No existing README found"}
 </existing_readme>
 
 **PROJECT FILES** (for technical depth):
 <source_code>
-{file_contents[:60_000]}
+{file_contents}
 </source_code>
 
 {user_preferences}
@@ -272,12 +272,12 @@ Before outputting, check:
 
 **EXISTING README** (for context):
 <existing_readme>
-{existing_readme[:2_000] if existing_readme else "No existing README found"}
+{existing_readme or "No existing README found"}
 </existing_readme>
 
 **PROJECT FILES**:
 <source_code>
-{file_contents[:80_000]}
+{file_contents}
 </source_code>
 
 {user_preferences}
@@ -401,12 +401,12 @@ Before outputting, check:
 
 **EXISTING README** (for context):
 <existing_readme>
-{existing_readme[:2_000] if existing_readme else "No existing README found"}
+{existing_readme or "No existing README found"}
 </existing_readme>
 
 **PROJECT FILES**:
 <source_code>
-{file_contents[:60_000]}
+{file_contents}
 </source_code>
 
 {user_preferences}
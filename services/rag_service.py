@@ -1,39 +1,338 @@
 """
 RAGService
 ==========
-ChromaDB-backed vector store with per-session isolation.
+ChromaDB-backed vector store, one collection per repo revision.
 
 Uses BAAI/bge-small-en-v1.5 (384-dim, 512 token limit, Apache 2.0) for
 embeddings — same training as bge-large but 33MB vs 1.34GB, fast on CPU.
 Retrieval quality is driven by the cross-encoder reranker (ms-marco-MiniLM-L-6-v2)
-which scores candidates after the initial vector search.
+which scores candidates after the initial vector search.  Both run on the
+runtime picked by ``settings.inference_backend`` (see ``inference_backend``).
+
+Chunk vectors are computed through ``EmbeddingCache``: a text that has been
+embedded once — in any session, repo or previous run — is never embedded
+again.  Query vectors stay out of it (it is persistent and append-only, so
+it would grow with traffic and keep every user question on disk); recent
+ones are kept in a small in-memory LRU instead.  Retrieval-time inference
+(query embeddings, cross-encoder scores) goes through ``MicroBatcher``s, so
+concurrent retrievals from different sessions share one model call.
+
+Vectors live in a shared collection per ``owner/repo@sha`` (``build_revision``).
+Sessions ``attach`` to it read-only and are reference-counted; a revision
+nobody references is deleted once a newer revision of the same repo exists
+(by ``collect_revisions``, on the session reaper's timer, off the event
+loop).  The newest one is kept so the next session for the repo starts
+instantly.
+Sessions without a known commit SHA fall back to a private
+``session_{id}`` collection.
+
+Several uvicorn workers may share one ``chroma_db``, but which sessions
+are live and which revisions they read is only known in each worker's
+memory.  So every reaper pass each worker publishes that as a lease file
+(``publish_lease``), and collection and compaction keep anything held by
+any worker with a fresh lease.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
-from typing import List
-
-import chromadb
-from chromadb.utils import embedding_functions
-from sentence_transformers import CrossEncoder
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Sequence
 
 from config import settings
-from models import Chunk
+from services.chunk_store import ChunkLike
+from services.compute_pool import get_compute_pool
+from services.embedding_cache import embedding_key, get_embedding_cache
+from services.inference_backend import InferenceBackend, load_cross_encoder, load_embedding_function
+from services.micro_batcher import MicroBatcher
+from services.single_flight import SingleFlight
+
+if TYPE_CHECKING:   # chromadb and sentence_transformers (torch) load on first use
+    import chromadb
+    from sentence_transformers import CrossEncoder
 
 log = logging.getLogger(__name__)
 
 # Module-level singletons
 _client: chromadb.ClientAPI | None = None
 _reranker: CrossEncoder | None = None
+_rerank_batcher: MicroBatcher | None = None
+_models_warm = False    # set once RAGService.warm_up has run both models
 
 _EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
 _RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
 
+# session_id → revision collection, and the reverse reference sets
+_session_collections: dict[str, str] = {}
+_collection_refs: dict[str, set[str]] = {}
+
+_build_flights = SingleFlight("embeddings")
+
+# Set when a revision may have become collectable; see ``collect_revisions``
+_gc_pending = False
+
+# Recent query vectors, in memory only (see ``RAGService._embed_queries``)
+_query_vectors: OrderedDict[bytes, object] = OrderedDict()
+_query_vectors_lock = threading.Lock()
+
+
+@dataclass
+class Facet:
+    """One query of a ``RAGService.retrieve_many`` call."""
+    query: str
+    k: int = 8
+    chunk_types: list[str] | None = None
+
+
+def chunk_document(chunk: ChunkLike) -> str:
+    """What gets embedded and retrieved for ``chunk``: its text, under the definition's dotted name.
+
+    A method's class is often nowhere in its own text, and neither is the
+    function a second part of a long one belongs to.  The name leaves the
+    path and line numbers out so moved or vendored code keeps its vectors.
+    """
+    if not chunk.symbol:
+        return chunk.text
+    name = f"{chunk.scope}.{chunk.symbol}" if chunk.scope else chunk.symbol
+    return f"{name}\n{chunk.text}"
+
+
+def chunk_id(chunk: ChunkLike) -> str:
+    """Stable vector id: the same chunk gets the same id in every collection."""
+    return hashlib.sha1(f"{chunk.file_path}\0{chunk_document(chunk)}".encode()).hexdigest()[:20]
+
+
+def revision_collection(owner: str, repo: str, commit_sha: str) -> str:
+    """Collection name for ``owner/repo@commit_sha`` (Chroma allows [a-zA-Z0-9._-] only).
+
+    Non-default inference backends get their own collections, so vectors
+    from different runtimes never end up side by side.
+    """
+    key = f"{owner}/{repo}@{commit_sha}".lower()
+    backend = InferenceBackend.from_settings()
+    if backend.name != "torch":
+        key += f"#{backend.tag}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:24]
+    return f"repo_{digest}"
+
+
+def collection_stats() -> dict:
+    """Sessions attached to shared revision collections, per collection."""
+    return {
+        "referenced_revisions": len(_collection_refs),
+        "attached_sessions": len(_session_collections),
+        "refs": {name: len(refs) for name, refs in _collection_refs.items()},
+    }
+
+
+def gc_revisions(repo_key: str | None = None) -> list[str]:
+    """Delete revision collections that no session references and that a
+    newer revision of the same repo has replaced.  Returns the names deleted."""
+    newest: dict[str, tuple[float, str]] = {}
+    revisions: list[tuple[str, str]] = []
+    for col in _get_client().list_collections():
+        meta = col.metadata or {}
+        if not col.name.startswith("repo_") or "repo" not in meta:
+            continue
+        if repo_key is not None and meta["repo"] != repo_key:
+            continue
+        revisions.append((col.name, meta["repo"]))
+        stamp = (meta.get("created_at", 0.0), col.name)
+        if stamp > newest.get(meta["repo"], (-1.0, "")):
+            newest[meta["repo"]] = stamp
+
+    held = _held_elsewhere()[1] if revisions else set()
+    deleted: list[str] = []
+    for name, repo in revisions:
+        if name == newest[repo][1] or _collection_refs.get(name) or name in held:
+            continue
+        try:
+            _get_client().delete_collection(name)
+            deleted.append(name)
+        except Exception as exc:
+            log.warning("Could not delete collection %s: %s", name, exc)
+    if deleted:
+        log.info("🧹 Collected %d unreferenced revision collection(s)", len(deleted))
+    return deleted
+
+
+def collect_revisions() -> list[str]:
+    """``gc_revisions``, if a revision may have become collectable since the last run.
+
+    Blocking (Chroma lists and deletes collections) — the session reaper
+    runs it in a thread.
+    """
+    global _gc_pending
+    if not _gc_pending:
+        return []
+    _gc_pending = False
+    return gc_revisions()
+
+
+def compact_store(live_sessions: set[str]) -> dict:
+    """Reclaim ``chroma_db`` disk space.  Blocking — run it in a thread.
+
+    Deletes private ``session_{id}`` collections whose session is gone
+    (including ones left by a previous process) and superseded revisions
+    nobody reads — live in this worker (``live_sessions``) or in any other
+    worker's lease.  A session collection younger than a lease's lifetime
+    is kept too: its worker may not have published it yet.  Chroma leaves a
+    deleted collection's HNSW segment directory and the freed SQLite pages
+    behind, so orphaned segment directories are removed and the database
+    is vacuumed.
+    """
+    import shutil
+    import sqlite3
+
+    client = _get_client()
+    live = live_sessions | _held_elsewhere()[0]
+    recent = time.time() - _lease_ttl()
+    deleted = 0
+    for col in client.list_collections():
+        if not col.name.startswith("session_") or col.name[len("session_"):] in live:
+            continue
+        if (col.metadata or {}).get("created_at", 0.0) > recent:
+            continue
+        client.delete_collection(col.name)
+        deleted += 1
+    deleted += len(gc_revisions())
+
+    root = settings.chroma_persist_dir
+    if not os.path.isdir(root):
+        return {"collections_deleted": deleted, "bytes_reclaimed": 0}
+    before = _dir_bytes(root)
+
+    # List directories before reading the segment table, so a collection
+    # created in between can't be mistaken for an orphan
+    dirs = [e.path for e in os.scandir(root) if e.is_dir()]
+    db_path = os.path.join(root, "chroma.sqlite3")
+    try:
+        db = sqlite3.connect(db_path, timeout=5)
+        try:
+            segments = {row[0] for row in db.execute("SELECT id FROM segments")}
+            for path in dirs:
+                name = os.path.basename(path)
+                if name not in segments and _is_uuid(name):   # segment directories only
+                    shutil.rmtree(path, ignore_errors=True)
+            db.execute("VACUUM")
+        finally:
+            db.close()
+    except sqlite3.Error as exc:
+        log.warning("Chroma compaction incomplete: %s", exc)
+
+    reclaimed = max(before - _dir_bytes(root), 0)
+    log.info("🧹 Vector store compacted: %d collections deleted, %.1f MB reclaimed", deleted, reclaimed / 1e6)
+    return {"collections_deleted": deleted, "bytes_reclaimed": reclaimed}
+
+
+def _is_uuid(name: str) -> bool:
+    import uuid
+
+    try:
+        uuid.UUID(name)
+        return True
+    except ValueError:
+        return False
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+# ── Cross-worker liveness ─────────────────────────────────────────────────────
+
+def _lease_dir() -> str:
+    return os.path.join(settings.chroma_persist_dir, "leases")
+
+
+_lease_id: tuple[int, str] | None = None   # (pid it was made in, lease file name)
+
+
+def _lease_name() -> str:
+    """This worker's lease file.  Not the pid alone: containers sharing the
+    volume are all pid 1.  Made again after a fork, so each worker has its own."""
+    global _lease_id
+    if _lease_id is None or _lease_id[0] != os.getpid():
+        _lease_id = (os.getpid(), f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:12]}.json")
+    return _lease_id[1]
+
+
+def _lease_ttl() -> float:
+    """A lease not refreshed for this long belongs to a worker that is gone."""
+    return 3 * settings.session_reap_interval
+
+
+def publish_lease(live_sessions: set[str]) -> None:
+    """Publish this worker's live sessions and the revisions they read.  Blocking.
+
+    Refreshed on every reaper pass; a worker that never opened the vector
+    store holds nothing in it and publishes nothing.
+    """
+    if _client is None:
+        return
+    os.makedirs(_lease_dir(), exist_ok=True)
+    path = os.path.join(_lease_dir(), _lease_name())
+    with open(path + ".tmp", "w") as f:
+        json.dump({"sessions": sorted(live_sessions), "collections": sorted(_collection_refs)}, f)
+    os.replace(path + ".tmp", path)
+
+
+def withdraw_lease() -> None:
+    try:
+        os.remove(os.path.join(_lease_dir(), _lease_name()))
+    except FileNotFoundError:
+        pass
+
+
+def _held_elsewhere() -> tuple[set[str], set[str]]:
+    """Session ids and collection names in other workers' fresh leases; stale leases are removed."""
+    sessions: set[str] = set()
+    collections: set[str] = set()
+    if not os.path.isdir(_lease_dir()):
+        return sessions, collections
+    own, expired = _lease_name(), time.time() - _lease_ttl()
+    for entry in os.scandir(_lease_dir()):
+        if not entry.name.endswith(".json") or entry.name == own:
+            continue
+        try:
+            if entry.stat().st_mtime < expired:
+                os.remove(entry.path)
+                continue
+            with open(entry.path) as f:
+                lease = json.load(f)
+        except (OSError, ValueError):
+            continue
+        sessions.update(lease.get("sessions", ()))
+        collections.update(lease.get("collections", ()))
+    return sessions, collections
+
+
+def models_warm() -> bool:
+    return _models_warm
+
+
+def store_heartbeat() -> int | None:
+    """Chroma heartbeat (ns since epoch), or ``None`` if the client isn't open yet."""
+    return _client.heartbeat() if _client is not None else None
+
 
 def _get_client() -> chromadb.ClientAPI:
     global _client
     if _client is None:
+        import chromadb
+
         _client = chromadb.PersistentClient(path=settings.chroma_persist_dir)
     return _client
 
@@ -42,53 +341,251 @@ def _get_reranker() -> CrossEncoder:
     global _reranker
     if _reranker is None:
         log.info("Loading reranker model: %s", _RERANKER_MODEL)
-        _reranker = CrossEncoder(_RERANKER_MODEL)
+        _reranker = load_cross_encoder(_RERANKER_MODEL)
     return _reranker
 
 
+def _predict(pairs: list[list[str]]) -> list[float]:
+    return list(_get_reranker().predict(pairs))
+
+
+def _get_rerank_batcher() -> MicroBatcher:
+    global _rerank_batcher
+    if _rerank_batcher is None:
+        _rerank_batcher = MicroBatcher("rerank", _predict, max_batch=settings.rerank_batch_size)
+    return _rerank_batcher
+
+
 class RAGService:
-    """ChromaDB-backed vector store with per-session isolation."""
+    """ChromaDB-backed vector store shared by every session on a repo revision."""
+
+    _queries: MicroBatcher | None = None
 
     def __init__(self):
-        self._ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name=_EMBEDDING_MODEL,
-        )
+        self._ef = load_embedding_function(_EMBEDDING_MODEL)
+
+    def warm_up(self) -> None:
+        """Open the vector store and run one tiny inference through each model.
+
+        Otherwise the first request pays for the reranker load, the Chroma
+        client start-up and torch's lazy kernel initialisation.
+        """
+        global _models_warm
+        _get_client()
+        self._ef(["def warm_up(): pass"])
+        _predict([["warm up", "def warm_up(): pass"]])
+        _models_warm = True
+
+    @property
+    def _query_batcher(self) -> MicroBatcher:
+        if self._queries is None:
+            self._queries = MicroBatcher("query_embedding", self._embed_queries, max_batch=settings.embed_batch_size)
+        return self._queries
 
     def _collection(self, session_id: str) -> chromadb.Collection:
+        return self._get_or_create(
+            _session_collections.get(session_id, f"session_{session_id}"), created_at=time.time(),
+        )
+
+    def _get_or_create(self, name: str, **metadata) -> chromadb.Collection:
+        # Metadata only applies on creation; an existing collection keeps its own
         return _get_client().get_or_create_collection(
-            name=f"session_{session_id}",
+            name=name,
             embedding_function=self._ef,
-            metadata={"hnsw:space": "cosine"},
+            metadata={"hnsw:space": "cosine", **metadata},
         )
 
     # ── Write ─────────────────────────────────────────────────────────────────
 
-    async def upsert_chunks(self, session_id: str, chunks: list[Chunk]) -> None:
-        """Embed and store chunks in batches. Idempotent.
+    def _embed(self, texts: list[str]) -> list:
+        """Vectors for ``texts``, running the model only on cache misses."""
+        cache = get_embedding_cache()
+        model_id = InferenceBackend.from_settings().model_id(_EMBEDDING_MODEL)
+        keys = [embedding_key(model_id, t) for t in texts]
+        found = cache.get_many(keys)
+        missing = {k: t for k, t in zip(keys, texts) if k not in found}
+        if missing:
+            vectors = self._ef(list(missing.values()))
+            cache.put_many(list(missing), vectors)
+            found.update(zip(missing, vectors))
+        return [found[k] for k in keys]
+
+    def _embed_queries(self, queries: list[str]) -> list:
+        """Vectors for retrieval queries, through a bounded in-memory LRU only."""
+        model_id = InferenceBackend.from_settings().model_id(_EMBEDDING_MODEL)
+        keys = [embedding_key(model_id, q) for q in queries]
+        with _query_vectors_lock:
+            found = {k: _query_vectors[k] for k in keys if k in _query_vectors}
+            for k in found:
+                _query_vectors.move_to_end(k)
+        missing = {k: q for k, q in zip(keys, queries) if k not in found}
+        if missing:
+            vectors = self._ef(list(missing.values()))
+            found.update(zip(missing, vectors))
+            with _query_vectors_lock:
+                _query_vectors.update(zip(missing, vectors))
+                while len(_query_vectors) > settings.query_embedding_cache_size:
+                    _query_vectors.popitem(last=False)
+        return [found[k] for k in keys]
+
+    async def upsert_chunks(self, session_id: str, chunks: Sequence[ChunkLike]) -> None:
+        """Embed and store chunks in a session's private collection. Idempotent.
+
+        Only used when the revision is unknown; see ``build_revision``.
+        """
+        await self._upsert(self._collection(session_id), chunks)
+
+    async def _upsert(self, col: chromadb.Collection, chunks: Sequence[ChunkLike]) -> None:
+        """Embed and store chunks in batches.
 
-        Runs each batch in a thread to avoid blocking the async event loop
-        (bge-large embedding on CPU is slow).
+        Each batch is embedded on the inference pool to avoid blocking the
+        async event loop (bge-small embedding on CPU is slow).  Texts already
+        in the embedding cache skip the model entirely.
         """
         if not chunks:
             return
 
         import asyncio
 
-        col = self._collection(session_id)
+        # Ids are content-derived, so duplicate chunks collapse to one vector
+        unique = list({chunk_id(c): c for c in chunks}.items())
         batch_size = 50  # smaller batches to avoid long blocking periods
 
-        for start in range(0, len(chunks), batch_size):
-            batch = chunks[start:start + batch_size]
-            ids = [f"{session_id}_{start + i}" for i in range(len(batch))]
-            documents = [c.text for c in batch]
+        for start in range(0, len(unique), batch_size):
+            batch = unique[start:start + batch_size]
+            ids = [cid for cid, _ in batch]
+            documents = [chunk_document(c) for _, c in batch]
             metadatas = [
-                {"file_path": c.file_path, "chunk_type": c.chunk_type, "language": c.language}
-                for c in batch
+                {
+                    "file_path": c.file_path, "chunk_type": c.chunk_type, "language": c.language,
+                    "symbol": c.symbol, "scope": c.scope, "start_line": c.start_line, "end_line": c.end_line,
+                }
+                for _, c in batch
             ]
             # Run in thread so the event loop stays responsive
-            await asyncio.to_thread(col.upsert, ids=ids, documents=documents, metadatas=metadatas)
+            embeddings = await get_compute_pool().run(self._embed, documents)
+            await asyncio.to_thread(
+                col.upsert, ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas,
+            )
+
+        log.info("Upserted %d chunks into collection %s", len(unique), col.name)
+
+    async def copy_vectors(self, source_session_id: str, target_session_id: str, ids: list[str]) -> set[str]:
+        """Copy stored vectors by id from one session's collection to another.
+
+        No embedding is computed.  Returns the ids that were found and
+        copied; the caller embeds whatever is missing.
+        """
+        source = _session_collections.get(source_session_id, f"session_{source_session_id}")
+        return await self._copy(source, self._collection(target_session_id), ids)
+
+    async def _copy(self, source_name: str, target: chromadb.Collection, ids: list[str]) -> set[str]:
+        import asyncio
+
+        from chromadb.errors import NotFoundError
+
+        if not ids:
+            return set()
+        try:
+            source = _get_client().get_collection(source_name, embedding_function=self._ef)
+        except Exception:
+            return set()
+
+        try:
+            found = await asyncio.to_thread(
+                source.get, ids=ids, include=["embeddings", "documents", "metadatas"],
+            )
+        except NotFoundError:   # another worker collected it mid-copy; the caller embeds instead
+            log.info("Collection %s was deleted while copying from it", source_name)
+            return set()
+        if not found["ids"]:
+            return set()
+
+        await asyncio.to_thread(
+            target.upsert,
+            ids=found["ids"],
+            embeddings=found["embeddings"],
+            documents=found["documents"],
+            metadatas=found["metadatas"],
+        )
+        log.info("Copied %d vectors %s → %s", len(found["ids"]), source_name, target.name)
+        return set(found["ids"])
+
+    # ── Shared revision collections ───────────────────────────────────────────
+
+    async def build_revision(
+        self,
+        owner: str,
+        repo: str,
+        commit_sha: str,
+        chunks: Sequence[ChunkLike],
+        previous_sha: str | None = None,
+    ) -> int:
+        """Make sure the ``owner/repo@commit_sha`` collection holds ``chunks``.
+
+        Concurrent callers share one build.  Vectors already present cost
+        nothing, vectors of unchanged chunks are copied from the
+        ``previous_sha`` revision, and only the rest are embedded.  Returns
+        the number of chunks embedded (0 when the revision was already built).
+        """
+        name = revision_collection(owner, repo, commit_sha)
+        return await _build_flights.run(
+            name, lambda _publish: self._build(name, owner, repo, commit_sha, chunks, previous_sha),
+        )
+
+    async def _build(
+        self,
+        name: str,
+        owner: str,
+        repo: str,
+        commit_sha: str,
+        chunks: Sequence[ChunkLike],
+        previous_sha: str | None,
+    ) -> int:
+        import asyncio
 
-        log.info("Upserted %d chunks into collection session_%s", len(chunks), session_id)
+        global _gc_pending
+        col = self._get_or_create(
+            name, repo=f"{owner}/{repo}".lower(), commit_sha=commit_sha, created_at=time.time(),
+        )
+        wanted = {chunk_id(c): c for c in chunks}
+        present = await asyncio.to_thread(col.get, ids=list(wanted), include=[])
+        missing = [cid for cid in wanted if cid not in set(present["ids"])]
+
+        if missing and previous_sha:
+            copied = await self._copy(revision_collection(owner, repo, previous_sha), col, missing)
+            missing = [cid for cid in missing if cid not in copied]
+        await self._upsert(col, [wanted[cid] for cid in missing])
+
+        # Older revisions nobody reads are superseded now; they are collected
+        # by the reaper, after the sessions waiting on this build have attached
+        _gc_pending = True
+        return len(missing)
+
+    def attach(self, session_id: str, owner: str, repo: str, commit_sha: str) -> str:
+        """Point ``session_id``'s reads at the shared revision collection."""
+        name = revision_collection(owner, repo, commit_sha)
+        if _session_collections.get(session_id) == name:
+            return name
+        self.release(session_id)
+        _session_collections[session_id] = name
+        _collection_refs.setdefault(name, set()).add(session_id)
+        log.info("Session %s attached to %s/%s@%s (%d sessions)",
+                 session_id, owner, repo, commit_sha[:8], len(_collection_refs[name]))
+        return name
+
+    def release(self, session_id: str) -> None:
+        """Drop ``session_id``'s reference; an unused, superseded revision is collected later."""
+        global _gc_pending
+        name = _session_collections.pop(session_id, None)
+        if name is None:
+            return
+        refs = _collection_refs.get(name)
+        if refs is not None:
+            refs.discard(session_id)
+            if not refs:
+                del _collection_refs[name]
+                _gc_pending = True
 
     # ── Read ──────────────────────────────────────────────────────────────────
 
@@ -104,56 +601,86 @@ class RAGService:
         Return the top-k most relevant chunk texts for ``query``.
 
         When ``rerank=True`` (default), fetches 3×k candidates from ChromaDB
-        then reranks with a cross-encoder to pick the best k.
+        then reranks with a cross-encoder to pick the best k.  Several
+        queries against one session should go through ``retrieve_many``.
+        """
+        results = await self.retrieve_many(session_id, [Facet(query, k, chunk_types)], rerank=rerank)
+        return results[0]
 
-        All CPU-bound work (embedding query, cross-encoder scoring) runs in
-        threads to keep the async event loop responsive.
+    async def retrieve_many(
+        self,
+        session_id: str,
+        facets: list[Facet],
+        rerank: bool = True,
+    ) -> list[list[str]]:
         """
+        ``retrieve`` for several queries at once; one result list per facet.
+
+        The query texts are embedded in one batch, facets that share a
+        ``chunk_types`` filter and depth go to ChromaDB as one multi-vector
+        query, and every facet's candidates are scored in a single
+        cross-encoder batch.  Both model calls go through micro-batchers,
+        so they also share a batch with other sessions' retrievals.
+        """
+        if not facets:
+            return []
         import asyncio
 
         col = self._collection(session_id)
+        vectors = await self._query_batcher.submit([f.query for f in facets])
+        candidates = await asyncio.to_thread(self._search, col, facets, vectors, rerank)
+        if rerank:
+            candidates = await self._rerank_many(facets, candidates)
+        return candidates
+
+    def _search(
+        self, col: chromadb.Collection, facets: list[Facet], vectors: list, rerank: bool,
+    ) -> list[list[str]]:
         count = col.count()
         if count == 0:
-            return []
-
-        where: dict | None = None
-        if chunk_types:
-            where = {"chunk_type": {"$in": chunk_types}}
+            return [[] for _ in facets]
 
         # Fetch more candidates when reranking
-        fetch_k = min(k * 3, count) if rerank else min(k, count)
-
-        # Run query in thread — embedding the query text is CPU-bound
-        results = await asyncio.to_thread(
-            col.query,
-            query_texts=[query],
-            n_results=fetch_k,
-            where=where,
-        )
-        docs: list[list[str]] = results.get("documents", [[]])
-        candidates = docs[0] if docs else []
-
-        if not candidates:
-            return []
-
-        # Rerank with cross-encoder (CPU-bound, run in thread)
-        if rerank and len(candidates) > k:
-            candidates = await asyncio.to_thread(self._rerank, query, candidates, k)
-
+        groups: dict[tuple[tuple[str, ...], int], list[int]] = {}
+        for i, facet in enumerate(facets):
+            fetch_k = min(facet.k * 3, count) if rerank else min(facet.k, count)
+            groups.setdefault((tuple(facet.chunk_types or ()), fetch_k), []).append(i)
+
+        candidates: list[list[str]] = [[] for _ in facets]
+        for (chunk_types, fetch_k), members in groups.items():
+            where = {"chunk_type": {"$in": list(chunk_types)}} if chunk_types else None
+            results = col.query(
+                query_embeddings=[vectors[i] for i in members],
+                n_results=fetch_k,
+                where=where,
+                include=["documents"],
+            )
+            for i, docs in zip(members, results.get("documents") or []):
+                candidates[i] = docs
         return candidates
 
-    def _rerank(self, query: str, documents: list[str], k: int) -> list[str]:
-        """Score each document against the query with a cross-encoder and return top-k."""
-        reranker = _get_reranker()
-        pairs = [[query, doc] for doc in documents]
-        scores = reranker.predict(pairs)
-        ranked = sorted(zip(scores, documents), key=lambda x: x[0], reverse=True)
-        return [doc for _, doc in ranked[:k]]
+    async def _rerank_many(self, facets: list[Facet], candidates: list[list[str]]) -> list[list[str]]:
+        """Score every facet's (query, doc) pairs in one cross-encoder batch and keep each top-k."""
+        todo = [i for i, facet in enumerate(facets) if len(candidates[i]) > facet.k]
+        pairs = [[facets[i].query, doc] for i in todo for doc in candidates[i]]
+        if not pairs:
+            return candidates
+
+        scores = iter(await _get_rerank_batcher().submit(pairs))
+        reranked = list(candidates)
+        for i in todo:
+            docs = candidates[i]
+            ranked = sorted(zip([next(scores) for _ in docs], docs), key=lambda x: x[0], reverse=True)
+            reranked[i] = [doc for _, doc in ranked[:facets[i].k]]
+        return reranked
 
     # ── Cleanup ───────────────────────────────────────────────────────────────
 
     async def clear_session(self, session_id: str) -> None:
-        """Delete the ChromaDB collection for a session."""
+        """Release a session's shared revision, or delete its private collection."""
+        if session_id in _session_collections:
+            self.release(session_id)
+            return
         try:
             _get_client().delete_collection(f"session_{session_id}")
             log.info("Deleted collection for session %s", session_id)
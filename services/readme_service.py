@@ -1,10 +1,9 @@
-import asyncio
 import json
 import logging
 import os
-import re
 import time
-from typing import Any, Dict, List, Optional
+from contextlib import aclosing
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
 
 from config import settings
 from models import BannerConfig, ContentType, ProjectMetadata
@@ -12,6 +11,8 @@ from services.ai_service import AIService
 from services.banner_service import BannerService
 from services.file_service import FileService
 from services.github_service import GitHubService
+from services.parsed_repo import ParsedRepo
+from services.prompt_budget import count_tokens, fit_tokens, pack_files, prompt_budget
 from services.prompt_templates import (
     build_article_prompt,
     build_linkedin_prompt,
@@ -20,6 +21,22 @@ from services.prompt_templates import (
 
 log = logging.getLogger(__name__)
 
+# Receives each generated token as it streams from the AI service; returns
+# False once nobody is listening, which cancels the generation
+ChunkCallback = Callable[[str], Awaitable[bool]]
+
+
+class GenerationCancelled(Exception):
+    """A streamed generation was abandoned because its client went away."""
+
+
+class MarkerHit(NamedTuple):
+    """A marker-table keyword found in one file."""
+    path: str
+    kind: str       # "framework" | "database"
+    keyword: str
+    label: str
+
 
 class ReadmeService:
     """Orchestrates the full README generation pipeline."""
@@ -29,58 +46,28 @@ class ReadmeService:
         self.ai_service = AIService()
         self.file_service = FileService()
         self.banner_service = BannerService()
-        self._gitingest_cache: Dict[str, Dict] = {}  # key: "owner/repo" → {sha, data}
 
     # ------------------------------------------------------------------
     # Shared retrieval pipeline
     # ------------------------------------------------------------------
 
     async def _retrieve_repo_context(self, owner: str, repo: str) -> Dict[str, Any]:
-        """Shared retrieval pipeline — gitingest + metadata analysis.
+        """Shared retrieval pipeline — repo snapshot + metadata analysis.
 
-        Caches gitingest results keyed by owner/repo with SHA-based invalidation.
-        If the repo hasn't changed since last call, skips the expensive gitingest step.
+        The snapshot comes from the ingestion store, keyed by owner/repo@sha
+        and shared with the article/content pipeline, so a repo revision is
+        fetched at most once whichever endpoints are used.
         """
+        from services.ingestion_store import get_snapshot
         from services.repo_cache import get_latest_commit_sha
 
         repo_info = self.github_service.get_repo_info(owner, repo)
         default_branch = await self.github_service.get_default_branch(owner, repo)
         log.info("📋 Using branch: %s", default_branch)
 
-        # ── Check gitingest cache ──────────────────────────────────────────
-        cache_key = f"{owner}/{repo}".lower()
         latest_sha = await get_latest_commit_sha(owner, repo)
-        cached = self._gitingest_cache.get(cache_key)
-
-        if cached and latest_sha and cached["sha"] == latest_sha:
-            log.info("⚡ Using cached gitingest result for %s/%s", owner, repo)
-            return {
-                "repo_info": repo_info,
-                "default_branch": default_branch,
-                **cached["data"],
-            }
-
-        # ── Full gitingest ─────────────────────────────────────────────────
-        log.info("📥 Ingesting repository using gitingest...")
-        from gitingest import ingest
-
-        url = f"https://github.com/{owner}/{repo}"
-
         try:
-            summary_str, tree_str, gitingest_content = await asyncio.to_thread(
-                ingest,
-                url,
-                exclude_patterns={
-                    "test", "tests", "docs", "assets", "public",
-                    ".idea", "node_modules", ".git", "migrations", "alembic",
-                },
-                token=settings.github_token,
-            )
-            log.info(
-                "✅ Gitingest completed! Tree size: %d, Content size: %d",
-                len(tree_str),
-                len(gitingest_content),
-            )
+            snapshot = await get_snapshot(owner, repo, latest_sha)
         except Exception as e:
             import traceback
 
@@ -89,31 +76,122 @@ class ReadmeService:
             log.error("❌ Gitingest failed: %r", e)
             raise ValueError(f"Failed to ingest repository: {repr(e)}")
 
-        if not gitingest_content:
-            raise ValueError("No analysable source files found in this repository.")
+        return {
+            "repo_info": repo_info,
+            "default_branch": default_branch,
+            **self._readme_view(snapshot),
+        }
 
-        source_files = self._parse_gitingest_content(gitingest_content)
-        metadata = self._analyze_project_metadata(source_files, [])
+    # Directories the README pipeline leaves out of its view of the snapshot
+    _README_EXCLUDED_DIRS = frozenset({
+        "test", "tests", "docs", "assets", "public", "migrations", "alembic",
+    })
 
-        result_data = {
-            "summary_str": summary_str,
-            "tree_str": tree_str,
-            "gitingest_content": gitingest_content,
-            "source_files": source_files,
-            "metadata": metadata,
-        }
+    _README_NAMES = frozenset({"readme.md", "readme.txt", "readme"})
 
-        # Store in cache
-        if latest_sha:
-            self._gitingest_cache[cache_key] = {"sha": latest_sha, "data": result_data}
-            log.info("⚡ Cached gitingest result for %s/%s (sha=%s)", owner, repo, latest_sha[:8])
+    # Token allowances inside a prompt's budget (see ``_fit_prompt``)
+    _README_TOKENS = 1_000       # the existing README, for reference
+    _TREE_SHARE = 4              # the directory tree takes at most 1/4 of the budget
 
+    def _readme_view(self, snapshot) -> Dict[str, Any]:
+        """The README pipeline's context for a repo snapshot (see ``_parse_snapshot``)."""
+        parsed = snapshot.views.get("readme")
+        if parsed is None:
+            parsed = snapshot.views["readme"] = self._parse_snapshot(snapshot)
         return {
-            "repo_info": repo_info,
-            "default_branch": default_branch,
-            **result_data,
+            "summary_str": parsed.summary,
+            "tree_str": parsed.tree,
+            "parsed": parsed,
+            "existing_readme": parsed.readme,
+            "api_endpoints": parsed.endpoints,
+            "source_files": parsed.source_files,
+            "metadata": parsed.metadata,
         }
 
+    def _parse_snapshot(self, snapshot) -> ParsedRepo:
+        """Parse a repo snapshot once; memoised on it by ``_readme_view``.
+
+        One pass over the snapshot's files outside ``_README_EXCLUDED_DIRS``
+        truncates each into ``source_files`` for metadata analysis and finds
+        the existing README (the tree and summary are restated to match);
+        then the files are ranked and packed into the model's prompt budget
+        (``pack_files``), the tree is cut to its share of it, and API
+        endpoints are extracted from what was packed.  The whole repo is
+        never rendered into one string.
+        """
+        from services.ingestion_store import render_tree, restate_summary, text_size
+
+        source_files: Dict[str, str] = {}
+        view: List[tuple] = []
+        existing_readme = ""
+        excluded = False
+        for path, text in snapshot.files.items():
+            if not self._README_EXCLUDED_DIRS.isdisjoint(path.split("/")[:-1]):
+                excluded = True
+                continue
+            basename = os.path.basename(path).lower()
+            source_files[path] = self._truncate_source_file(basename, text)
+            if not existing_readme and basename in self._README_NAMES:
+                existing_readme = fit_tokens(text, self._README_TOKENS)
+            view.append((path, text))
+        if not source_files:
+            raise ValueError("No analysable source files found in this repository.")
+
+        # The summary and tree describe what the prompt's files were taken from
+        summary, tree = snapshot.summary, snapshot.tree
+        if excluded:
+            tree = render_tree(f"{snapshot.owner}-{snapshot.repo}", [path for path, _ in view])
+            share = text_size(tree, view) / max(1, text_size(snapshot.tree, snapshot.files.items()))
+            summary = restate_summary(summary, len(view), share)
+
+        budget = prompt_budget(settings.ai_model)
+        return ParsedRepo.from_packed(
+            pack_files(view, budget),
+            source_files=source_files,
+            readme=existing_readme,
+            summary=summary,
+            tree=fit_tokens(tree, budget // self._TREE_SHARE),
+            metadata=self._analyze_project_metadata(source_files, []),
+        )
+
+    def _fit_prompt(self, ctx: Dict[str, Any], build: Callable[[str, str], str]) -> tuple:
+        """``build(file_contents, existing_readme)`` packed into the model's token budget.
+
+        Everything but the files is laid out first and counted; the files
+        section gets whatever room is left, taken from the repo's packed
+        files best first.  Returns the prompt and its tokens per section.
+        """
+        parsed: ParsedRepo = ctx["parsed"]
+        budget = prompt_budget(settings.ai_model)
+        head = self._prepare_file_contents(ctx["summary_str"], parsed.tree, "")
+        fixed = count_tokens(build(head, parsed.readme))
+        files, used, paths = parsed.files_within(budget - fixed)
+        prompt = build(head + files, parsed.readme)
+        total = count_tokens(prompt)
+        # Sections can tokenise differently once joined; give back the difference
+        while total > budget and used > 0:
+            files, used, paths = parsed.files_within(used - (total - budget))
+            prompt = build(head + files, parsed.readme)
+            total = count_tokens(prompt)
+        if total > budget:
+            log.warning("⚠️ Prompt is %d tokens without any files — over the %d budget", total, budget)
+
+        sections = {
+            "summary": count_tokens(ctx["summary_str"]),
+            "tree": count_tokens(parsed.tree),
+            "existing_readme": count_tokens(parsed.readme),
+            "files": used,
+        }
+        report = {
+            **sections,
+            "instructions": max(0, total - sum(sections.values())),
+            "total": total,
+            "budget": budget,
+            "files_included": len(paths),
+            "files_condensed": len(set(paths).intersection(parsed.condensed)),
+        }
+        log.info("🧮 Prompt tokens: %s", ", ".join(f"{k}={v}" for k, v in report.items()))
+        return prompt, report
 
     # Files critical for metadata detection — allow more content
     _METADATA_FILES = frozenset({
@@ -125,24 +203,13 @@ class ReadmeService:
     })
 
     @classmethod
-    def _parse_gitingest_content(cls, gitingest_content: str) -> Dict[str, str]:
-        """Parse the flat gitingest blob into a {filepath: content} dict.
+    def _truncate_source_file(cls, basename: str, text: str) -> str:
+        """Cap a file's text for metadata analysis.
 
         Dependency/config files get a higher truncation limit (8 000 chars)
         so framework detection doesn't miss markers buried deep in pom.xml etc.
         """
-        source_files: Dict[str, str] = {}
-        for block in re.split(r"={48}\n[Ff][Ii][Ll][Ee]: ", gitingest_content):
-            if not block.strip():
-                continue
-            parts = block.split("\n" + "=" * 48 + "\n", 1)
-            if len(parts) == 2:
-                file_path = parts[0].strip()
-                file_body = parts[1].strip()
-                basename = os.path.basename(file_path).lower()
-                limit = 8_000 if basename in cls._METADATA_FILES else 2_000
-                source_files[file_path] = file_body[:limit]
-        return source_files
+        return text[:8_000 if basename in cls._METADATA_FILES else 2_000]
 
     # ------------------------------------------------------------------
     # Public API
@@ -150,9 +217,13 @@ class ReadmeService:
 
     async def generate_readme(
         self, owner: str, repo: str, banner_config: Optional[BannerConfig] = None, tone: str = "professional",
-        user_preferences: str = "",
+        user_preferences: str = "", on_chunk: Optional[ChunkCallback] = None,
     ) -> Dict:
-        """Generate a README for a GitHub repository using gitingest."""
+        """Generate a README for a GitHub repository using gitingest.
+
+        When ``on_chunk`` is given, the AI response is streamed and each token
+        is forwarded to it as it arrives.
+        """
         start_time = time.time()
         log.info("🚀 Starting README generation for %s/%s", owner, repo)
 
@@ -181,16 +252,13 @@ class ReadmeService:
                 log.warning("⚠️ Banner generation failed — continuing without banners: %s", exc)
 
         # 3. Generate README content via AI
-        readme_content = await self._generate_readme_content(
-            repo_info,
-            ctx["summary_str"],
-            ctx["tree_str"],
-            ctx["gitingest_content"],
-            metadata,
+        readme_content, prompt_tokens = await self._generate_readme_content(
+            ctx,
             header_banner_url,
             conclusion_banner_url,
             tone,
             user_preferences,
+            on_chunk,
         )
 
         # 4. Strip the AI-appended metadata block and persist
@@ -206,6 +274,7 @@ class ReadmeService:
             "local_file_path": file_path,
             "processing_time": processing_time,
             "files_analyzed": len(ctx["source_files"]),
+            "prompt_tokens": prompt_tokens,
             "ai_model_used": settings.ai_model,
             "branch_used": default_branch,
             "metadata": metadata.__dict__,
@@ -220,9 +289,13 @@ class ReadmeService:
         owner: str,
         repo: str,
         content_type: ContentType,
+        on_chunk: Optional[ChunkCallback] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
-        """Unified content generation dispatcher for LinkedIn, Article, and Resume."""
+        """Unified content generation dispatcher for LinkedIn, Article, and Resume.
+
+        When ``on_chunk`` is given, tokens are streamed to it as they arrive.
+        """
         start_time = time.time()
         log.info("🚀 Starting %s generation for %s/%s", content_type.value, owner, repo)
 
@@ -231,46 +304,25 @@ class ReadmeService:
         repo_info = ctx["repo_info"]
         metadata: ProjectMetadata = ctx["metadata"]
 
-        # 2. Prepare file contents for prompt
-        file_contents = self._prepare_file_contents(
-            ctx["summary_str"], ctx["tree_str"], ctx["gitingest_content"]
-        )
-        existing_readme = self._extract_existing_readme(ctx["gitingest_content"])
-
-        # 3. Route to content-specific prompt builder
+        # 2. Route to content-specific prompt builder
         project_name = repo_info["repo"]
         github_url = repo_info["url"]
 
         if content_type == ContentType.LINKEDIN:
-            prompt = build_linkedin_prompt(
-                project_name=project_name,
-                github_url=github_url,
-                file_contents=file_contents,
-                existing_readme=existing_readme,
-                metadata=metadata,
+            builder, options = build_linkedin_prompt, dict(
                 tone=kwargs.get("tone", "thought_leader"),
                 focus=kwargs.get("focus", "business_value"),
                 user_preferences=kwargs.get("user_preferences", ""),
             )
         elif content_type == ContentType.ARTICLE:
-            prompt = build_article_prompt(
-                project_name=project_name,
-                github_url=github_url,
-                file_contents=file_contents,
-                existing_readme=existing_readme,
-                metadata=metadata,
+            builder, options = build_article_prompt, dict(
                 tone=kwargs.get("tone", "professional"),
                 article_style=kwargs.get("article_style", "deep_dive"),
                 target_length=kwargs.get("target_length", "medium"),
                 user_preferences=kwargs.get("user_preferences", ""),
             )
         elif content_type == ContentType.RESUME:
-            prompt = build_resume_prompt(
-                project_name=project_name,
-                github_url=github_url,
-                file_contents=file_contents,
-                existing_readme=existing_readme,
-                metadata=metadata,
+            builder, options = build_resume_prompt, dict(
                 role_target=kwargs.get("role_target", "Software Engineer"),
                 seniority=kwargs.get("seniority", "mid"),
                 num_bullets=kwargs.get("num_bullets", 5),
@@ -280,10 +332,22 @@ class ReadmeService:
         else:
             raise ValueError(f"Unsupported content type: {content_type}")
 
+        # 3. Fit repo content into the model's token budget
+        prompt, prompt_tokens = self._fit_prompt(ctx, lambda file_contents, existing_readme: builder(
+            project_name=project_name,
+            github_url=github_url,
+            file_contents=file_contents,
+            existing_readme=existing_readme,
+            metadata=metadata,
+            **options,
+        ))
+
         # 4. Generate via AI
         log.info("🤖 Sending %s prompt to AI (%d chars)…", content_type.value, len(prompt))
         try:
-            raw_result = await self.ai_service.generate_readme(prompt)
+            raw_result = await self._complete(prompt, on_chunk)
+        except GenerationCancelled:
+            raise
         except Exception as exc:
             log.error("❌ AI generation failed for %s: %s", content_type.value, exc)
             raise ValueError(f"AI generation failed: {exc}")
@@ -299,6 +363,7 @@ class ReadmeService:
             "content_type": content_type.value,
             "processing_time": processing_time,
             "files_analyzed": len(ctx["source_files"]),
+            "prompt_tokens": prompt_tokens,
             "ai_model_used": settings.ai_model,
             "metadata": metadata.__dict__,
             "repo_info": repo_info,
@@ -307,37 +372,33 @@ class ReadmeService:
     def get_supported_models(self) -> list[str]:
         return self.ai_service.get_supported_models()
 
+    async def _complete(self, prompt: str, on_chunk: Optional[ChunkCallback] = None) -> str:
+        """Run a prompt through the AI service, streaming tokens to ``on_chunk`` if given."""
+        if on_chunk is None:
+            return await self.ai_service.generate_readme(prompt)
+
+        parts: List[str] = []
+        stream = self.ai_service.stream_generate(prompt)
+        async with aclosing(stream):    # closing the stream cancels the upstream request
+            async for token in stream:
+                parts.append(token)
+                if not await on_chunk(token):
+                    raise GenerationCancelled("client disconnected")
+        return "".join(parts)
+
     # ------------------------------------------------------------------
     # Private — shared helpers
     # ------------------------------------------------------------------
 
     @staticmethod
-    def _prepare_file_contents(
-        summary_str: str, tree_str: str, gitingest_content: str, max_chars: int = 60_000
-    ) -> str:
-        """Format repo content for inclusion in a prompt."""
-        truncated = gitingest_content[:max_chars]
-        if len(gitingest_content) > max_chars:
-            truncated += "\n\n... [TRUNCATED] ..."
+    def _prepare_file_contents(summary_str: str, tree_str: str, file_blocks: str) -> str:
+        """Format repo content for inclusion in a prompt (sized by ``_fit_prompt``)."""
         return (
             f"--- REPOSITORY SUMMARY ---\n{summary_str}\n\n"
             f"--- DIRECTORY TREE ---\n{tree_str}\n\n"
-            f"--- FILE CONTENTS ---\n{truncated}"
+            f"--- FILE CONTENTS ---\n{file_blocks}"
         )
 
-    @staticmethod
-    def _extract_existing_readme(gitingest_content: str) -> str:
-        """Pull out the existing README.md from gitingest content."""
-        for block in re.split(r"={48}\n[Ff][Ii][Ll][Ee]: ", gitingest_content):
-            if not block.strip():
-                continue
-            parts = block.split("\n" + "=" * 48 + "\n", 1)
-            if len(parts) == 2:
-                file_path, file_body = parts[0].strip(), parts[1].strip()
-                if os.path.basename(file_path).lower() in ("readme.md", "readme.txt", "readme"):
-                    return file_body[:2000]
-        return ""
-
     def _clean_generated_content(self, raw: str, content_type: ContentType) -> str:
         """Content-type-aware cleaning of AI output."""
         content = raw.strip()
@@ -389,37 +450,35 @@ class ReadmeService:
 
     async def _generate_readme_content(
         self,
-        repo_info: Dict,
-        summary_str: str,
-        tree_str: str,
-        gitingest_content: str,
-        metadata: ProjectMetadata,
+        ctx: Dict[str, Any],
         header_banner_url: Optional[str] = None,
         conclusion_banner_url: Optional[str] = None,
         tone: str = "professional",
         user_preferences: str = "",
-    ) -> str:
-        """Build the AI prompt and call the AI service."""
-        project_name = repo_info["repo"]
-        github_url = repo_info["url"]
+        on_chunk: Optional[ChunkCallback] = None,
+    ) -> tuple:
+        """Build the AI prompt and call the AI service.
+
+        Returns the generated README and the prompt's tokens per section.
+        """
+        project_name = ctx["repo_info"]["repo"]
+        github_url = ctx["repo_info"]["url"]
 
         log.info("📝 Preparing content for AI prompt…")
         prep_start = time.time()
 
-        existing_readme_content = self._extract_existing_readme(gitingest_content)
-        file_contents = self._prepare_file_contents(summary_str, tree_str, gitingest_content)
-
-        ai_prompt = self._build_prompt(
+        ai_prompt, prompt_tokens = self._fit_prompt(ctx, lambda file_contents, existing_readme: self._build_prompt(
             project_name,
             github_url,
             file_contents,
-            existing_readme_content,
-            metadata,
+            existing_readme,
+            ctx["metadata"],
             header_banner_url,
             conclusion_banner_url,
             tone,
             user_preferences,
-        )
+            ctx["api_endpoints"],
+        ))
 
         log.info(
             "✅ Prompt ready in %.2fs  (%d chars)",
@@ -430,70 +489,33 @@ class ReadmeService:
         try:
             log.info("🤖 Sending prompt to %s…", self.ai_service.get_supported_models()[0])
             gen_start = time.time()
-            result = await self.ai_service.generate_readme(ai_prompt)
+            result = await self._complete(ai_prompt, on_chunk)
             log.info(
                 "✅ README generated in %.2fs  (%d chars)",
                 time.time() - gen_start,
                 len(result),
             )
-            return result
+            return result, prompt_tokens
+        except GenerationCancelled:
+            raise
         except Exception as exc:
             log.error("❌ AI generation failed: %s", exc)
             return self._create_fallback_readme(
                 project_name, github_url, header_banner_url, conclusion_banner_url
-            )
+            ), prompt_tokens
 
     # ------------------------------------------------------------------
     # Private — prompt construction
     # ------------------------------------------------------------------
 
-    def _extract_api_endpoints(self, file_contents: str) -> str:
-        """Extract API endpoints as supplementary context (not the main content driver)."""
-        endpoints = []
-        # Python (FastAPI / Flask)
-        py_patterns = [
-            (r'@app\.post\(["\']([^"\']+)["\']', 'POST'),
-            (r'@app\.get\(["\']([^"\']+)["\']', 'GET'),
-            (r'@app\.put\(["\']([^"\']+)["\']', 'PUT'),
-            (r'@app\.delete\(["\']([^"\']+)["\']', 'DELETE'),
-            (r'@app\.patch\(["\']([^"\']+)["\']', 'PATCH'),
-            (r'@app\.websocket\(["\']([^"\']+)["\']', 'WebSocket'),
-            (r'@router\.post\(["\']([^"\']+)["\']', 'POST'),
-            (r'@router\.get\(["\']([^"\']+)["\']', 'GET'),
-            (r'@router\.put\(["\']([^"\']+)["\']', 'PUT'),
-            (r'@router\.delete\(["\']([^"\']+)["\']', 'DELETE'),
-        ]
-        # Java (Spring Boot)
-        java_patterns = [
-            (r'@PostMapping\(["\']?([^"\')\s]+)', 'POST'),
-            (r'@GetMapping\(["\']?([^"\')\s]+)', 'GET'),
-            (r'@PutMapping\(["\']?([^"\')\s]+)', 'PUT'),
-            (r'@DeleteMapping\(["\']?([^"\')\s]+)', 'DELETE'),
-            (r'@PatchMapping\(["\']?([^"\')\s]+)', 'PATCH'),
-            (r'@RequestMapping\(\s*value\s*=\s*["\']([^"\']+)["\'].*method\s*=\s*RequestMethod\.(\w+)', None),
-        ]
-        # Express.js / Node
-        node_patterns = [
-            (r'(?:app|router)\.post\(["\']([^"\']+)["\']', 'POST'),
-            (r'(?:app|router)\.get\(["\']([^"\']+)["\']', 'GET'),
-            (r'(?:app|router)\.put\(["\']([^"\']+)["\']', 'PUT'),
-            (r'(?:app|router)\.delete\(["\']([^"\']+)["\']', 'DELETE'),
-        ]
-
-        for pattern, method in py_patterns + java_patterns + node_patterns:
-            if method is None:
-                # Special case: @RequestMapping with method in capture group 2
-                for match in re.finditer(pattern, file_contents):
-                    endpoints.append(f"  - {match.group(2)} {match.group(1)}")
-            else:
-                for match in re.findall(pattern, file_contents):
-                    endpoints.append(f"  - {method} {match}")
-
+    @staticmethod
+    def _format_api_endpoints(endpoints: List[str]) -> str:
+        """API endpoints as supplementary context (not the main content driver)."""
         if endpoints:
             return (
                 "**API endpoints found** (use these to build an API overview table in the README — "
                 "do NOT list them verbatim as features):\n"
-                + "\n".join(sorted(set(endpoints))) + "\n"
+                + "\n".join(f"  - {e}" for e in endpoints) + "\n"
             )
         return ""
 
@@ -508,6 +530,7 @@ class ReadmeService:
         conclusion_banner_url: Optional[str] = None,
         tone: str = "professional",
         user_preferences: str = "",
+        api_endpoints: Optional[List[str]] = None,
     ) -> str:
         """Construct the AI prompt using proper instruction hierarchy and self-verification."""
 
@@ -680,7 +703,7 @@ class ReadmeService:
     """
 
         # ── 7. Input Data ──────────────────────────────────────────────────
-        endpoints_list = self._extract_api_endpoints(file_contents)
+        endpoints_list = self._format_api_endpoints(api_endpoints)
 
         input_data = f"""
     ### PROJECT CONTEXT:
@@ -694,7 +717,7 @@ class ReadmeService:
 
     **Existing README** (reference only — rewrite from scratch):
     <existing_readme>
-    {existing_readme[:1_500] if existing_readme else "None"}
+    {existing_readme or "None"}
     </existing_readme>
 
     **Source Code**:
@@ -715,6 +738,95 @@ class ReadmeService:
     # Private — metadata analysis (heuristic, no AI call)
     # ------------------------------------------------------------------
 
+    # Framework markers: (basenames, extensions, keyword → label).  A file is
+    # checked against the table that names it, else the one for its extension
+    _FRAMEWORK_MARKERS = (
+        # Python deps
+        (frozenset({"requirements.txt", "pyproject.toml", "setup.py", "pipfile"}), (), {
+            "fastapi": "FastAPI", "django": "Django",
+            "flask": "Flask", "streamlit": "Streamlit",
+        }),
+        # JS/TS deps
+        (frozenset({"package.json"}), (), {
+            "react": "React", "vue": "Vue.js", "angular": "Angular",
+            "express": "Express.js", "next": "Next.js", "svelte": "Svelte",
+            "nuxt": "Nuxt.js", "nest": "NestJS",
+        }),
+        # Java deps
+        (frozenset({"pom.xml", "build.gradle", "build.gradle.kts"}), (), {
+            "spring-boot": "Spring Boot", "spring boot": "Spring Boot",
+            "spring-web": "Spring Boot", "spring-data": "Spring Data",
+            "spring-security": "Spring Security", "quarkus": "Quarkus",
+            "micronaut": "Micronaut", "jakarta.servlet": "Jakarta EE",
+        }),
+        # Java source files — frameworks from annotations
+        (frozenset(), (".java",), {
+            "@springbootapplication": "Spring Boot",
+            "import org.springframework": "Spring Boot",
+            "@restcontroller": "Spring Boot",
+            "@enablewebsocket": "Spring WebSocket",
+            "spring-security": "Spring Security",
+            "springsecurity": "Spring Security",
+            "@enablecaching": "Spring Cache",
+        }),
+        # Go deps
+        (frozenset({"go.mod", "go.sum"}), (), {
+            "gin-gonic": "Gin", "gorilla/mux": "Gorilla Mux",
+            "fiber": "Fiber", "echo": "Echo",
+        }),
+        # Rust deps
+        (frozenset({"cargo.toml"}), (), {
+            "actix-web": "Actix Web", "rocket": "Rocket",
+            "axum": "Axum", "warp": "Warp",
+        }),
+        # C# deps
+        (frozenset(), (".csproj", ".sln"), {
+            "microsoft.aspnetcore": "ASP.NET Core", "aspnetcore": "ASP.NET Core",
+            "entityframeworkcore": "Entity Framework",
+        }),
+    )
+    _FRAMEWORK_MARKERS_BY_NAME = {name: m for names, _, m in _FRAMEWORK_MARKERS for name in names}
+    _FRAMEWORK_MARKERS_BY_EXT = {ext: m for _, exts, m in _FRAMEWORK_MARKERS for ext in exts}
+    # Databases, from config/env files and manifests (tech stack only)
+    _DB_MARKER_FILES = frozenset({
+        "application.yaml", "application.yml", "application.properties",
+        ".env", ".env.example", "docker-compose.yml", "docker-compose.yaml",
+        "requirements.txt", "pom.xml", "build.gradle", "package.json",
+    })
+    _DB_MARKERS = {
+        "mysql": "MySQL", "postgresql": "PostgreSQL", "postgres": "PostgreSQL",
+        "mongodb": "MongoDB", "redis": "Redis", "sqlite": "SQLite",
+        "dynamodb": "DynamoDB",
+    }
+
+    @classmethod
+    def _find_markers(cls, source_files: Dict[str, str], lowered: Optional[Dict[str, str]] = None) -> List[MarkerHit]:
+        """Every marker-table keyword in ``source_files``, with the file it was found in.
+
+        Files are matched against the framework table for their name or
+        extension and, for config/env files and manifests, the database
+        table; files no table applies to are never read.  The files that
+        were read are left lowercased in ``lowered``.
+        """
+        lowered = {} if lowered is None else lowered
+        hits: List[MarkerHit] = []
+        for file_path, content in source_files.items():
+            file_name = os.path.basename(file_path).lower()
+            dot = file_name.rfind(".")
+            markers = (cls._FRAMEWORK_MARKERS_BY_NAME.get(file_name)
+                       or (dot > 0 and cls._FRAMEWORK_MARKERS_BY_EXT.get(file_name[dot:])))
+            has_db_markers = file_name in cls._DB_MARKER_FILES
+            if not markers and not has_db_markers:
+                continue
+            content_lower = lowered[file_path] = content.lower()
+            if markers:
+                hits.extend(MarkerHit(file_path, "framework", keyword, label)
+                            for keyword, label in markers.items() if keyword in content_lower)
+            if has_db_markers:
+                hits.extend(MarkerHit(file_path, "database", keyword, label)
+                            for keyword, label in cls._DB_MARKERS.items() if keyword in content_lower)
+        return hits
+
     def _analyze_project_metadata(
         self, source_files: Dict, repo_structure: List
     ) -> ProjectMetadata:
@@ -739,112 +851,27 @@ class ReadmeService:
         # --- Framework / tech-stack detection ---
         tech_stack: List[str] = []
         frameworks: List[str] = []
-
-        python_markers = {
-            "fastapi": "FastAPI", "django": "Django",
-            "flask": "Flask", "streamlit": "Streamlit",
-        }
-        js_markers = {
-            "react": "React", "vue": "Vue.js", "angular": "Angular",
-            "express": "Express.js", "next": "Next.js", "svelte": "Svelte",
-            "nuxt": "Nuxt.js", "nest": "NestJS",
-        }
-        java_markers = {
-            "spring-boot": "Spring Boot", "spring boot": "Spring Boot",
-            "spring-web": "Spring Boot", "spring-data": "Spring Data",
-            "spring-security": "Spring Security", "quarkus": "Quarkus",
-            "micronaut": "Micronaut", "jakarta.servlet": "Jakarta EE",
-        }
-        go_markers = {
-            "gin-gonic": "Gin", "gorilla/mux": "Gorilla Mux",
-            "fiber": "Fiber", "echo": "Echo",
-        }
-        rust_markers = {
-            "actix-web": "Actix Web", "rocket": "Rocket",
-            "axum": "Axum", "warp": "Warp",
-        }
-        csharp_markers = {
-            "microsoft.aspnetcore": "ASP.NET Core", "aspnetcore": "ASP.NET Core",
-            "entityframeworkcore": "Entity Framework",
-        }
-        db_markers = {
-            "mysql": "MySQL", "postgresql": "PostgreSQL", "postgres": "PostgreSQL",
-            "mongodb": "MongoDB", "redis": "Redis", "sqlite": "SQLite",
-            "dynamodb": "DynamoDB",
-        }
-
-        all_content_lower = ""
-
-        for file_path, content in source_files.items():
-            file_name = os.path.basename(file_path).lower()
-            content_lower = content.lower()
-            all_content_lower += content_lower + "\n"
-
-            # Python deps
-            if file_name in ("requirements.txt", "pyproject.toml", "setup.py", "pipfile"):
-                for keyword, label in python_markers.items():
-                    if keyword in content_lower and label not in frameworks:
-                        tech_stack.append(label)
-                        frameworks.append(label)
-
-            # JS/TS deps
-            elif file_name == "package.json":
-                for keyword, label in js_markers.items():
-                    if keyword in content_lower and label not in frameworks:
-                        tech_stack.append(label)
-                        frameworks.append(label)
-
-            # Java deps (pom.xml, build.gradle)
-            elif file_name in ("pom.xml", "build.gradle", "build.gradle.kts"):
-                for keyword, label in java_markers.items():
-                    if keyword in content_lower and label not in frameworks:
-                        tech_stack.append(label)
-                        frameworks.append(label)
-
-            # Java source files — detect frameworks from annotations
-            elif file_path.endswith(".java"):
-                java_annotation_markers = {
-                    "@springbootapplication": "Spring Boot",
-                    "import org.springframework": "Spring Boot",
-                    "@restcontroller": "Spring Boot",
-                    "@enablewebsocket": "Spring WebSocket",
-                    "spring-security": "Spring Security",
-                    "springsecurity": "Spring Security",
-                    "@enablecaching": "Spring Cache",
-                }
-                for keyword, label in java_annotation_markers.items():
-                    if keyword in content_lower and label not in frameworks:
-                        tech_stack.append(label)
-                        frameworks.append(label)
-
-            # Go deps
-            elif file_name in ("go.mod", "go.sum"):
-                for keyword, label in go_markers.items():
-                    if keyword in content_lower and label not in frameworks:
-                        tech_stack.append(label)
-                        frameworks.append(label)
-
-            # Rust deps
-            elif file_name == "cargo.toml":
-                for keyword, label in rust_markers.items():
-                    if keyword in content_lower and label not in frameworks:
-                        tech_stack.append(label)
-                        frameworks.append(label)
-
-            # C# deps
-            elif file_name.endswith(".csproj") or file_name.endswith(".sln"):
-                for keyword, label in csharp_markers.items():
-                    if keyword in content_lower and label not in frameworks:
-                        tech_stack.append(label)
-                        frameworks.append(label)
-
-            # DB detection from config/env files
-            if file_name in ("application.yaml", "application.yml", "application.properties",
-                             ".env", ".env.example", "docker-compose.yml", "docker-compose.yaml",
-                             "requirements.txt", "pom.xml", "build.gradle", "package.json"):
-                for keyword, label in db_markers.items():
-                    if keyword in content_lower and label not in tech_stack:
-                        tech_stack.append(label)
+        lowered: Dict[str, str] = {}     # files the marker tables read, lowercased
+
+        for hit in self._find_markers(source_files, lowered):
+            log.debug("Marker %r in %s → %s", hit.keyword, hit.path, hit.label)
+            if hit.kind == "framework":
+                if hit.label not in frameworks:
+                    tech_stack.append(hit.label)
+                    frameworks.append(hit.label)
+            elif hit.label not in tech_stack:   # databases: tech stack only
+                tech_stack.append(hit.label)
+
+        all_content_lower = ""   # every file lowercased and joined, on first need
+
+        def mentioned(*keywords: str) -> bool:
+            """Whether any file contains any of ``keywords``."""
+            nonlocal all_content_lower
+            if not all_content_lower:
+                all_content_lower = "\n".join(
+                    lowered.get(path) or content.lower() for path, content in source_files.items()
+                )
+            return any(keyword in all_content_lower for keyword in keywords)
 
         # Docker detection
         if any(os.path.basename(f).lower() in ("dockerfile", "docker-compose.yml", "docker-compose.yaml")
@@ -862,16 +889,18 @@ class ReadmeService:
         py_entry_points = {"main.py", "app.py", "server.py", "manage.py", "wsgi.py", "asgi.py"}
         has_py_entry = any(os.path.basename(f) in py_entry_points for f in source_files)
 
+        # The checks below read every file, so each only runs once the type
+        # still depends on it
         # Java/Spring Boot detection — check all content for annotations
-        has_java_app = (
-            "springbootapplication" in all_content_lower
-            or "@springbootapplication" in all_content_lower
-            or "import org.springframework.boot" in all_content_lower
-        )
-        has_java_main = any(
-            "public static void main" in source_files.get(f, "")
-            for f in source_files if f.endswith(".java")
-        )
+        def has_java_app() -> bool:
+            # "@springbootapplication" contains "springbootapplication"
+            return mentioned("springbootapplication", "import org.springframework.boot")
+
+        def has_java_main() -> bool:
+            return any(
+                "public static void main" in source_files.get(f, "")
+                for f in source_files if f.endswith(".java")
+            )
 
         # Go entry points
         has_go_main = any(
@@ -894,27 +923,24 @@ class ReadmeService:
         has_frontend = bool(frontend_frameworks & set(frameworks))
 
         # REST controller annotations (Java)
-        has_rest_controllers = (
-            "@restcontroller" in all_content_lower
-            or "@requestmapping" in all_content_lower
-            or "@getmapping" in all_content_lower
-            or "@postmapping" in all_content_lower
-        )
+        def has_rest_controllers() -> bool:
+            return mentioned("@restcontroller", "@requestmapping", "@getmapping", "@postmapping")
 
         # Determine project type
-        if has_web_framework or has_rest_controllers:
+        if has_web_framework or has_rest_controllers():
             if has_frontend:
                 project_type = "full_stack_app"
             else:
                 project_type = "api_server"
         elif has_frontend:
             project_type = "web_app"
-        elif has_java_app or has_java_main:
+        elif (java_app := has_java_app()) or has_java_main():
             # If we detected Spring Boot annotations but it wasn't in frameworks yet
-            if has_java_app and "Spring Boot" not in frameworks:
+            if java_app and "Spring Boot" not in frameworks:
                 frameworks.append("Spring Boot")
                 tech_stack.append("Spring Boot")
-            project_type = "api_server" if (has_rest_controllers or has_java_app) else "application"
+            # No REST controllers here, or the first branch would have matched
+            project_type = "api_server" if java_app else "application"
         elif has_py_entry:
             project_type = "cli_tool"
         elif has_go_main or has_rust_main:
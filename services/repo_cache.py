@@ -1,114 +1,765 @@
 """
 RepoCache
 =========
-In-memory cache for ingestion results keyed by ``owner/repo``.
+Persistent cache for ingestion results keyed by ``owner/repo@sha``.
 
-Stores chunks, features, and the commit SHA at ingestion time.
+Stores chunks (as a ``ChunkStore``), features, and the commit SHA at
+ingestion time.
 On subsequent requests for the same repo, compares the latest commit SHA
 from GitHub — if unchanged, returns cached data instantly.
 
-The cache also tracks which ChromaDB session already has embeddings for
-a repo, so we can clone the collection instead of re-embedding.
+Vectors are not tracked here: each revision has its own shared ChromaDB
+collection named after ``owner/repo@sha`` (see ``RAGService.build_revision``).
+
+Alongside it, ``SnapshotCache`` holds the raw gitingest output of each
+revision as per-file, content-addressed blobs: the single source both the
+README and the chunk/embedding pipelines derive their views from (see
+``services/ingestion_store.py``).
+
+Entries live in a small in-process layer backed by SQLite under
+``settings.repo_cache_dir``, so a restart or reload starts warm.  Rows hold
+only small metadata; the large blobs (packed chunk lists, file contents)
+are zlib-compressed and read lazily the first time they are needed.  The
+database is opened on first use, not at import.
+
+The caches are synchronous; the SQLite work and the (de)compression behind
+them block, so async code calls them, and reads lazy blobs, through
+``asyncio.to_thread``.
+
+The in-process layer is an LRU bounded by estimated resident bytes, and
+entries older than ``settings.repo_cache_ttl`` are dropped everywhere.
 """
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import os
+import sqlite3
+import sys
+import threading
 import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass, field
-
-import httpx
+from typing import Any, Callable, Sequence
 
 from config import settings
-from models import Chunk
+from services.chunk_store import ChunkLike, ChunkStore
+from services.github_service import GITHUB_API, conditional_cache
 
 log = logging.getLogger(__name__)
 
 
+# ── Serialization ─────────────────────────────────────────────────────────────
+
+# Packed chunk blobs start with this; older ones are JSON documents of rows
+_STORE_MAGIC = b"chunks/3\n"
+
+
+def pack_chunks(chunks: ChunkStore | Sequence[ChunkLike]) -> bytes:
+    """Serialise chunks: the ``ChunkStore``'s columns as they are, compressed."""
+    if not isinstance(chunks, ChunkStore):
+        chunks = ChunkStore.from_chunks(chunks)
+    return zlib.compress(_STORE_MAGIC + chunks.to_bytes(), 6)
+
+
+def unpack_chunks(blob: bytes) -> ChunkStore:
+    raw = zlib.decompress(blob)
+    if raw.startswith(_STORE_MAGIC):
+        return ChunkStore.from_bytes(raw[len(_STORE_MAGIC):])
+    # v1 / v2: column-wise JSON, paths/types/languages interned once; v2 rows of code
+    # chunks carry symbol, scope and line span too
+    doc = json.loads(raw)
+    paths, types, langs = doc["paths"], doc["types"], doc["langs"]
+    chunks = ChunkStore()
+    for p, t, l, text, *located in doc["rows"]:
+        chunks.append(text, paths[p], types[t], langs[l], *located)
+    return chunks
+
+
+def _pack_text(text: str) -> bytes:
+    return zlib.compress(text.encode(), 6)
+
+
+def _unpack_text(blob: bytes) -> str:
+    return zlib.decompress(blob).decode()
+
+
+def chunks_footprint(chunks: ChunkStore | Sequence[ChunkLike]) -> int:
+    """Estimated resident bytes of a chunk list once loaded."""
+    if not isinstance(chunks, ChunkStore):
+        chunks = ChunkStore.from_chunks(chunks)
+    return chunks.nbytes
+
+
+def text_footprint(*texts: str) -> int:
+    return sum(sys.getsizeof(t) for t in texts)
+
+
+# ── SQLite backend ────────────────────────────────────────────────────────────
+
+# Bump when the table layout changes; it is a cache, so old files are dropped.
+_SCHEMA_VERSION = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo_key            TEXT NOT NULL,
+    commit_sha          TEXT NOT NULL,
+    owner               TEXT NOT NULL,
+    repo                TEXT NOT NULL,
+    features            TEXT NOT NULL,
+    file_hashes         TEXT NOT NULL,
+    cached_at           REAL NOT NULL,
+    nbytes              INTEGER NOT NULL,
+    chunks              BLOB NOT NULL,
+    PRIMARY KEY (repo_key, commit_sha)
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    repo_key   TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    owner      TEXT NOT NULL,
+    repo       TEXT NOT NULL,
+    summary    TEXT NOT NULL,
+    tree       TEXT NOT NULL,
+    cached_at  REAL NOT NULL,
+    nbytes     INTEGER NOT NULL,
+    PRIMARY KEY (repo_key, commit_sha)
+);
+CREATE TABLE IF NOT EXISTS snapshot_files (
+    repo_key   TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    ord        INTEGER NOT NULL,
+    path       TEXT NOT NULL,
+    blob_hash  TEXT NOT NULL,
+    PRIMARY KEY (repo_key, commit_sha, ord)
+);
+CREATE INDEX IF NOT EXISTS snapshot_files_blob ON snapshot_files (blob_hash);
+CREATE TABLE IF NOT EXISTS blobs (
+    blob_hash TEXT PRIMARY KEY,
+    data      BLOB NOT NULL
+);
+"""
+
+_OLD_TABLES = ("repos", "gitingest", "snapshots", "snapshot_files", "blobs")
+
+
+# Drop blobs no snapshot references any more
+_GC_BLOBS = (
+    "DELETE FROM blobs WHERE blob_hash NOT IN (SELECT blob_hash FROM snapshot_files)", (),
+)
+
+
+def _select_blobs(db: sqlite3.Connection, hashes: list[str]) -> set[str]:
+    """The subset of ``hashes`` stored in ``blobs`` (callers hold the store's lock)."""
+    known: set[str] = set()
+    for i in range(0, len(hashes), 500):   # stay under SQLite's bound-variable limit
+        batch = hashes[i:i + 500]
+        known.update(h for (h,) in db.execute(
+            f"SELECT blob_hash FROM blobs WHERE blob_hash IN ({','.join('?' * len(batch))})", tuple(batch),
+        ))
+    return known
+
+
+class CacheStore:
+    """SQLite file holding the repo and snapshot caches.
+
+    ``path=None`` keeps everything in memory (no persistence).  Only the
+    latest revision of each repo is kept per table; file blobs are shared
+    by content hash across revisions and repos.
+    """
+
+    def __init__(self, path: str | None):
+        self.path = path or ":memory:"
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        if db.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            db.executescript("".join(f"DROP TABLE IF EXISTS {t};" for t in _OLD_TABLES))
+            db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        db.executescript(_SCHEMA)
+        return db
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The connection, opened on first use (callers hold ``_lock``)."""
+        if self._conn is None:
+            try:
+                if self.path != ":memory:":
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._conn = self._open(self.path)
+            except (sqlite3.Error, OSError) as exc:
+                log.warning("Repo cache at %s unusable (%s) — falling back to memory", self.path, exc)
+                self.path = ":memory:"
+                self._conn = self._open(self.path)
+        return self._conn
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _write(self, *statements: tuple[str, tuple]) -> int:
+        """Run statements in one transaction; returns the total rows changed."""
+        changed = 0
+        with self._lock, self._db as db:
+            for sql, params in statements:
+                changed += db.execute(sql, params).rowcount
+        return changed
+
+    # ── repos ────────────────────────────────────────────────────────────
+
+    def load_repo(self, key: str) -> tuple | None:
+        rows = self._query(
+            "SELECT owner, repo, commit_sha, features, file_hashes, cached_at, nbytes "
+            "FROM repos WHERE repo_key = ? ORDER BY cached_at DESC LIMIT 1",
+            (key,),
+        )
+        return rows[0] if rows else None
+
+    def load_chunks(self, key: str, commit_sha: str) -> ChunkStore:
+        rows = self._query(
+            "SELECT chunks FROM repos WHERE repo_key = ? AND commit_sha = ?", (key, commit_sha),
+        )
+        return unpack_chunks(rows[0][0]) if rows else ChunkStore()
+
+    def save_repo(self, key: str, entry: CachedRepo) -> None:
+        self._write(
+            ("DELETE FROM repos WHERE repo_key = ?", (key,)),
+            (
+                "INSERT INTO repos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, entry.commit_sha, entry.owner, entry.repo,
+                    json.dumps(entry.features), json.dumps(entry.file_hashes),
+                    entry.cached_at, entry.nbytes, pack_chunks(entry.chunks),
+                ),
+            ),
+        )
+
+    def delete_repo(self, key: str) -> int:
+        return self._write(("DELETE FROM repos WHERE repo_key = ?", (key,)))
+
+    # ── snapshots (content-addressed file blobs) ─────────────────────────
+
+    def load_snapshot(self, key: str, commit_sha: str) -> tuple | None:
+        rows = self._query(
+            "SELECT owner, repo, summary, tree, cached_at, nbytes "
+            "FROM snapshots WHERE repo_key = ? AND commit_sha = ?",
+            (key, commit_sha),
+        )
+        return rows[0] if rows else None
+
+    def latest_snapshot_sha(self, key: str) -> str | None:
+        rows = self._query(
+            "SELECT commit_sha FROM snapshots WHERE repo_key = ? ORDER BY cached_at DESC LIMIT 1", (key,),
+        )
+        return rows[0][0] if rows else None
+
+    def load_files(self, key: str, commit_sha: str) -> dict[str, str]:
+        rows = self._query(
+            "SELECT f.path, b.data FROM snapshot_files f JOIN blobs b USING (blob_hash) "
+            "WHERE f.repo_key = ? AND f.commit_sha = ? ORDER BY f.ord",
+            (key, commit_sha),
+        )
+        return {path: _unpack_text(data) for path, data in rows}
+
+    def known_blobs(self, hashes: list[str]) -> set[str]:
+        with self._lock:
+            return _select_blobs(self._db, hashes)
+
+    def save_snapshot(self, key: str, entry: RepoSnapshot, files: list[tuple[str, str, str]]) -> None:
+        """``files`` is ``[(path, blob_hash, text), ...]``; known blobs are not rewritten."""
+        known = self.known_blobs([h for _, h, _ in files])
+        fresh = {h: _pack_text(text) for _, h, text in files if h not in known}
+        with self._lock, self._db as db:
+            # Re-check under a write lock: another worker's GC may have
+            # collected a known blob since, and the JOIN in load_files would
+            # silently drop its file
+            db.execute("BEGIN IMMEDIATE")
+            gone = known - _select_blobs(db, list(known))
+            fresh.update((h, _pack_text(text)) for _, h, text in files if h in gone)
+            for sql, params in (
+                ("DELETE FROM snapshots WHERE repo_key = ?", (key,)),
+                ("DELETE FROM snapshot_files WHERE repo_key = ?", (key,)),
+                (
+                    "INSERT INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key, entry.commit_sha, entry.owner, entry.repo,
+                        entry.summary, entry.tree, entry.cached_at, entry.nbytes,
+                    ),
+                ),
+                *(
+                    ("INSERT INTO snapshot_files VALUES (?, ?, ?, ?, ?)", (key, entry.commit_sha, i, path, h))
+                    for i, (path, h, _) in enumerate(files)
+                ),
+                *(("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (h, data)) for h, data in fresh.items()),
+                _GC_BLOBS,
+            ):
+                db.execute(sql, params)
+
+    def delete_snapshot(self, key: str) -> int:
+        return self._write(
+            ("DELETE FROM snapshots WHERE repo_key = ?", (key,)),
+            ("DELETE FROM snapshot_files WHERE repo_key = ?", (key,)),
+            _GC_BLOBS,
+        )
+
+    def clear_repos(self) -> None:
+        self._write(("DELETE FROM repos", ()))
+
+    def clear_snapshots(self) -> None:
+        self._write(
+            ("DELETE FROM snapshots", ()),
+            ("DELETE FROM snapshot_files", ()),
+            ("DELETE FROM blobs", ()),
+        )
+
+
+def _open_store() -> CacheStore:
+    """The shared store; nothing touches the disk until it is first used."""
+    return CacheStore(os.path.join(settings.repo_cache_dir, "cache.db") if settings.repo_cache_dir else None)
+
+
+# ── Entries ───────────────────────────────────────────────────────────────────
+
+class _LazyBlob:
+    """Descriptor: reads ``_<name>`` or, if unset, calls ``_<name>_loader`` once."""
+
+    def __set_name__(self, owner, name):
+        self.attr = f"_{name}"
+        self.loader = f"_{name}_loader"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = getattr(obj, self.attr)
+        if value is None:
+            loader = getattr(obj, self.loader)
+            value = loader() if loader else None
+            setattr(obj, self.attr, value)
+            setattr(obj, self.loader, None)
+        return value
+
+
 @dataclass
 class CachedRepo:
     """Snapshot of a repo's ingestion results."""
     owner: str
     repo: str
     commit_sha: str
-    chunks: list[Chunk]
     features: list[str]
-    embedded_session_id: str | None = None  # session that has the ChromaDB collection
+    file_hashes: dict[str, str] = field(default_factory=dict)  # path → content hash, for incremental refresh
+    cached_at: float = field(default_factory=time.time)
+    nbytes: int = 0                         # estimated resident size once loaded
+    _chunks: ChunkStore | None = field(default=None, repr=False)
+    _chunks_loader: Callable[[], ChunkStore] | None = field(default=None, repr=False, compare=False)
+
+    chunks = _LazyBlob()
+
+    @property
+    def loaded(self) -> bool:
+        return self._chunks is not None
+
+
+@dataclass
+class RepoSnapshot:
+    """One revision of a repo as fetched by gitingest: summary, tree and files."""
+    owner: str
+    repo: str
+    commit_sha: str
+    summary: str
+    tree: str
     cached_at: float = field(default_factory=time.time)
+    nbytes: int = 0                         # estimated resident size once loaded
+    views: dict[str, Any] = field(default_factory=dict, repr=False, compare=False)  # memoised derived data
+    _files: dict[str, str] | None = field(default=None, repr=False)
+    _files_loader: Callable[[], dict[str, str]] | None = field(default=None, repr=False, compare=False)
+
+    files = _LazyBlob()   # {path: text}, in gitingest order
+
+    @property
+    def loaded(self) -> bool:
+        return self._files is not None
 
 
-class RepoCache:
-    """In-memory repo ingestion cache with SHA-based invalidation."""
+def blob_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
 
-    def __init__(self):
-        self._cache: dict[str, CachedRepo] = {}  # key: "owner/repo"
+
+def _key(owner: str, repo: str) -> str:
+    return f"{owner}/{repo}".lower()
+
+
+# ── In-process LRU ────────────────────────────────────────────────────────────
+
+class _ByteLRU:
+    """LRU of cache entries bounded by the sum of their ``nbytes``.
+
+    Thread-safe: async callers reach the caches through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self._name = name
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: Any) -> None:
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = entry
+            self.resident_bytes += entry.nbytes
+            while self.resident_bytes > self.max_bytes and self._entries:
+                old_key, old = self._entries.popitem(last=False)
+                self.resident_bytes -= old.nbytes
+                self.evictions += 1
+                log.info("%s cache: evicted %s (%d bytes) from memory", self._name, old_key, old.nbytes)
+
+    def pop(self, key: str) -> Any | None:
+        with self._lock:
+            return self._pop(key)
+
+    def _pop(self, key: str) -> Any | None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.resident_bytes -= entry.nbytes
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+    def items(self) -> list[tuple[str, Any]]:
+        """Most recently used first."""
+        with self._lock:
+            return list(reversed(self._entries.items()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _TieredCache(ABC):
+    """Shared bookkeeping for the memory-over-SQLite caches below."""
+
+    name = ""
+
+    def __init__(self, store: CacheStore | None, max_bytes: int, ttl: float):
+        self._store = store or CacheStore(None)
+        self._cache = _ByteLRU(self.name, max_bytes)  # key: "owner/repo"
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expirations = 0
+
+    def _expired(self, entry) -> bool:
+        return self.ttl > 0 and time.time() - entry.cached_at > self.ttl
+
+    def _record(self, entry, from_disk: bool = False):
+        if entry is None:
+            self.misses += 1
+        elif from_disk:
+            self.disk_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    @abstractmethod
+    def _delete_from_store(self, key: str) -> int:
+        """Delete ``key``'s rows from the SQLite store; returns the rows removed."""
+
+    @abstractmethod
+    def _clear_store(self) -> None:
+        """Delete every row this cache owns from the SQLite store."""
+
+    def _expire(self, key: str) -> None:
+        self.expirations += 1
+        self._cache.pop(key)
+        self._delete_from_store(key)
+        log.info("%s cache: %s expired", self.name, key)
+
+    def invalidate(self, owner: str, repo: str) -> bool:
+        """Drop a repo from memory and disk.  Returns whether anything was cached."""
+        key = _key(owner, repo)
+        in_memory = self._cache.pop(key) is not None
+        return self._delete_from_store(key) > 0 or in_memory
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._clear_store()
+
+    @property
+    def size(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        now = time.time()
+        return {
+            "entries": len(self._cache),
+            "resident_bytes": self._cache.resident_bytes,
+            "max_bytes": self._cache.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "evictions": self._cache.evictions,
+            "expirations": self.expirations,
+            "items": [
+                {
+                    "repo": key,
+                    "commit_sha": entry.commit_sha[:12],
+                    "bytes": entry.nbytes,
+                    "age_seconds": round(now - entry.cached_at, 1),
+                    "loaded": entry.loaded,
+                }
+                for key, entry in self._cache.items()
+            ],
+        }
+
+
+# ── Caches ────────────────────────────────────────────────────────────────────
+
+class RepoCache(_TieredCache):
+    """Repo ingestion cache with SHA-based invalidation, persisted to disk."""
+
+    name = "repo"
+
+    def __init__(
+        self,
+        store: CacheStore | None = None,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+    ):
+        super().__init__(
+            store,
+            max_bytes if max_bytes is not None else settings.repo_cache_max_mb * 1024 * 1024,
+            ttl if ttl is not None else settings.repo_cache_ttl,
+        )
 
     def _key(self, owner: str, repo: str) -> str:
-        return f"{owner}/{repo}".lower()
+        return _key(owner, repo)
+
+    def get(self, owner: str, repo: str, commit_sha: str) -> CachedRepo | None:
+        """Return the cached ingestion of ``owner/repo`` at ``commit_sha``, if any."""
+        key = self._key(owner, repo)
+        entry = self._cache.get(key)
+        if entry is not None:
+            if self._expired(entry):
+                self._expire(key)
+                return self._record(None)
+            return self._record(entry if entry.commit_sha == commit_sha else None)
+
+        entry = self._load(key)
+        if entry is not None and self._expired(entry):
+            self._expire(key)
+            return self._record(None)
+        if entry is None or entry.commit_sha != commit_sha:
+            return self._record(None)
+        return self._record(entry, from_disk=True)
 
-    def get(self, owner: str, repo: str) -> CachedRepo | None:
-        return self._cache.get(self._key(owner, repo))
+    def latest(self, owner: str, repo: str) -> CachedRepo | None:
+        """The cached ingestion of any revision — the base for an incremental refresh."""
+        key = self._key(owner, repo)
+        entry = self._cache.get(key) or self._load(key)
+        if entry is not None and self._expired(entry):
+            self._expire(key)
+            return None
+        return entry
+
+    def _load(self, key: str) -> CachedRepo | None:
+        row = self._store.load_repo(key)
+        if row is None:
+            return None
+        owner, repo, commit_sha, features, file_hashes, cached_at, nbytes = row
+        entry = CachedRepo(
+            owner=owner,
+            repo=repo,
+            commit_sha=commit_sha,
+            features=json.loads(features),
+            file_hashes=json.loads(file_hashes),
+            cached_at=cached_at,
+            nbytes=nbytes,
+            _chunks_loader=lambda: self._store.load_chunks(key, commit_sha),
+        )
+        self._cache.put(key, entry)
+        log.info("Loaded cached ingestion for %s from disk (sha=%s)", key, commit_sha[:8])
+        return entry
 
     def put(
         self,
         owner: str,
         repo: str,
         commit_sha: str,
-        chunks: list[Chunk],
+        chunks: ChunkStore | Sequence[ChunkLike],
         features: list[str],
-        embedded_session_id: str | None = None,
+        file_hashes: dict[str, str] | None = None,
     ) -> CachedRepo:
+        if not isinstance(chunks, ChunkStore):
+            chunks = ChunkStore.from_chunks(chunks)
         entry = CachedRepo(
             owner=owner,
             repo=repo,
             commit_sha=commit_sha,
-            chunks=chunks,
             features=features,
-            embedded_session_id=embedded_session_id,
+            file_hashes=file_hashes or {},
+            nbytes=chunks_footprint(chunks) + text_footprint(*features),
+            _chunks=chunks,
         )
-        self._cache[self._key(owner, repo)] = entry
+        key = self._key(owner, repo)
+        self._cache.put(key, entry)
+        self._store.save_repo(key, entry)
         log.info(
-            "Cached ingestion for %s/%s (sha=%s, %d chunks, %d features)",
-            owner, repo, commit_sha[:8], len(chunks), len(features),
+            "Cached ingestion for %s/%s (sha=%s, %d chunks, %d features, ~%d KB)",
+            owner, repo, commit_sha[:8], len(chunks), len(features), entry.nbytes // 1024,
         )
         return entry
 
-    def invalidate(self, owner: str, repo: str) -> None:
-        self._cache.pop(self._key(owner, repo), None)
+    def _delete_from_store(self, key: str) -> int:
+        return self._store.delete_repo(key)
 
-    @property
-    def size(self) -> int:
-        return len(self._cache)
+    def _clear_store(self) -> None:
+        self._store.clear_repos()
+
+
+class SnapshotCache(_TieredCache):
+    """Raw per-file repo snapshots keyed by ``owner/repo@sha``, persisted to disk."""
+
+    name = "snapshot"
+
+    def __init__(
+        self,
+        store: CacheStore | None = None,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+    ):
+        super().__init__(
+            store,
+            max_bytes if max_bytes is not None else settings.gitingest_cache_max_mb * 1024 * 1024,
+            ttl if ttl is not None else settings.repo_cache_ttl,
+        )
+
+    def get(self, owner: str, repo: str, commit_sha: str) -> RepoSnapshot | None:
+        key = _key(owner, repo)
+        entry = self._cache.get(key)
+        if entry is not None and entry.commit_sha == commit_sha:
+            if self._expired(entry):
+                self._expire(key)
+                return self._record(None)
+            return self._record(entry)
+
+        entry = self._load(key, commit_sha)
+        if entry is None:
+            return self._record(None)
+        if self._expired(entry):
+            self._expire(key)
+            return self._record(None)
+        self._cache.put(key, entry)
+        log.info("Loaded repo snapshot for %s from disk (sha=%s)", key, commit_sha[:8])
+        return self._record(entry, from_disk=True)
+
+    def latest(self, owner: str, repo: str) -> RepoSnapshot | None:
+        """The snapshot of any revision — the base for an incremental refresh."""
+        key = _key(owner, repo)
+        entry = self._cache.get(key)
+        if entry is None:
+            sha = self._store.latest_snapshot_sha(key)
+            entry = self._load(key, sha) if sha else None
+        if entry is None or self._expired(entry):
+            return None
+        return entry
+
+    def _load(self, key: str, commit_sha: str) -> RepoSnapshot | None:
+        row = self._store.load_snapshot(key, commit_sha)
+        if row is None:
+            return None
+        owner_, repo_, summary, tree, cached_at, nbytes = row
+        return RepoSnapshot(
+            owner=owner_,
+            repo=repo_,
+            commit_sha=commit_sha,
+            summary=summary,
+            tree=tree,
+            cached_at=cached_at,
+            nbytes=nbytes,
+            _files_loader=lambda: self._store.load_files(key, commit_sha),
+        )
+
+    def put(
+        self,
+        owner: str,
+        repo: str,
+        commit_sha: str,
+        summary: str,
+        tree: str,
+        files: list[tuple[str, str]],
+    ) -> RepoSnapshot:
+        entry = RepoSnapshot(
+            owner=owner,
+            repo=repo,
+            commit_sha=commit_sha,
+            summary=summary,
+            tree=tree,
+            nbytes=text_footprint(summary, tree, *(text for _, text in files)),
+            _files=dict(files),
+        )
+        key = _key(owner, repo)
+        self._cache.put(key, entry)
+        self._store.save_snapshot(key, entry, [(path, blob_hash(text), text) for path, text in files])
+        log.info(
+            "Cached repo snapshot for %s/%s (sha=%s, %d files, ~%d KB)",
+            owner, repo, commit_sha[:8], len(files), entry.nbytes // 1024,
+        )
+        return entry
+
+    def _delete_from_store(self, key: str) -> int:
+        return self._store.delete_snapshot(key)
+
+    def _clear_store(self) -> None:
+        self._store.clear_snapshots()
 
 
 async def get_latest_commit_sha(owner: str, repo: str) -> str | None:
     """Fetch the latest commit SHA from the default branch via GitHub API.
 
     Returns None if the request fails (network error, rate limit, etc.)
-    so callers can fall back to a full re-ingestion.
+    so callers can fall back to a full re-ingestion.  Sent as a conditional
+    request, so an unchanged repo costs a free 304 instead of quota.
     """
-    headers: dict[str, str] = {
-        "Accept": "application/vnd.github+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
-    if settings.github_token:
-        headers["Authorization"] = f"token {settings.github_token}"
-
     try:
-        async with httpx.AsyncClient(headers=headers, timeout=15) as client:
-            resp = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo}/commits",
-                params={"per_page": 1},
-            )
-            if resp.status_code == 200:
-                commits = resp.json()
-                if commits:
-                    return commits[0]["sha"]
+        resp = await conditional_cache.get(
+            f"{GITHUB_API}/repos/{owner}/{repo}/commits",
+            params={"per_page": 1},
+            timeout=15,
+        )
+        if resp.status_code == 200:
+            commits = resp.json()
+            if commits:
+                return commits[0]["sha"]
     except Exception as exc:
         log.warning("Could not fetch latest commit SHA for %s/%s: %s", owner, repo, exc)
 
     return None
 
 
-# Module-level singleton
-repo_cache = RepoCache()
+# Module-level singletons sharing one on-disk store
+_store = _open_store()
+repo_cache = RepoCache(_store)
+snapshot_cache = SnapshotCache(_store)
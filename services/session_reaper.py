@@ -0,0 +1,172 @@
+"""
+SessionReaper
+=============
+Background job that keeps the in-memory session stores and ``chroma_db``
+from growing without bound.
+
+Every ``settings.session_reap_interval`` seconds it drops sessions that
+have no WebSocket attached and have been quiet for longer than their TTL:
+
+  finished  — DONE / ERROR, or an article draft sitting in TUNING:
+              ``settings.session_finished_ttl``
+  abandoned — anything else (ingesting, mid-questionnaire):
+              ``settings.session_idle_ttl``
+
+Each store registers an ``on_reap`` hook (article sessions release their
+vectors through ``RAGService.clear_session``; an ingestion that attaches
+after its session was reaped releases the vectors itself when it ends).  After each pass the
+worker's live sessions are published for the other workers sharing
+``chroma_db`` (``rag_service.publish_lease``) and revision collections
+nobody reads any more are deleted (``rag_service.collect_revisions``);
+every
+``settings.vector_compact_interval`` seconds the vector store is
+compacted as well (``rag_service.compact_store``).  Both run in a thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from config import settings
+from models import ArticleSessionState
+
+log = logging.getLogger(__name__)
+
+_FINISHED = (ArticleSessionState.DONE, ArticleSessionState.ERROR, ArticleSessionState.TUNING)
+
+OnReap = Callable[[str], Awaitable[None]]
+
+
+@dataclass
+class _Store:
+    sessions: dict[str, Any]
+    on_reap: OnReap | None
+    reaped: int = 0
+
+
+class SessionReaper:
+    """Expires idle sessions and compacts the vector store on a timer."""
+
+    def __init__(self, is_connected: Callable[[str], bool] = lambda _sid: False):
+        self._is_connected = is_connected
+        self._stores: dict[str, _Store] = {}
+        self._task: asyncio.Task | None = None
+        self._last_compaction = time.time()
+        self._metrics: dict[str, Any] = {
+            "reaped_idle": 0,
+            "reaped_finished": 0,
+            "reap_failures": 0,
+            "compactions": 0,
+            "collections_deleted": 0,
+            "bytes_reclaimed": 0,
+            "last_reap_at": None,
+            "last_compaction_at": None,
+        }
+
+    def register(self, kind: str, sessions: dict[str, Any], on_reap: OnReap | None = None) -> None:
+        """Watch ``sessions`` (session_id → session with ``state``/``last_active``)."""
+        self._stores[kind] = _Store(sessions, on_reap)
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="session-reaper")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            from services.rag_service import withdraw_lease
+
+            await asyncio.to_thread(withdraw_lease)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.session_reap_interval)
+            try:
+                await self.reap()
+                await self.collect()
+                if time.time() - self._last_compaction >= settings.vector_compact_interval:
+                    await self.compact()
+            except Exception as exc:   # keep the job alive whatever one pass hits
+                log.error("Session reaper pass failed: %s", exc)
+
+    # ── Passes ────────────────────────────────────────────────────────────────
+
+    async def reap(self, now: float | None = None) -> int:
+        """Expire every idle session once.  Returns how many were reaped."""
+        now = time.time() if now is None else now
+        total = 0
+        for kind, store in self._stores.items():
+            for session_id, session in list(store.sessions.items()):
+                finished = session.state in _FINISHED
+                ttl = settings.session_finished_ttl if finished else settings.session_idle_ttl
+                if now - session.last_active < ttl or self._is_connected(session_id):
+                    continue
+
+                store.sessions.pop(session_id, None)
+                store.reaped += 1
+                total += 1
+                self._metrics["reaped_finished" if finished else "reaped_idle"] += 1
+                if store.on_reap is not None:
+                    try:
+                        await store.on_reap(session_id)
+                    except Exception as exc:
+                        self._metrics["reap_failures"] += 1
+                        log.warning("Cleanup for %s session %s failed: %s", kind, session_id, exc)
+        self._metrics["last_reap_at"] = now
+        if total:
+            log.info("🧹 Reaped %d idle session(s); %d live", total, self.live_sessions)
+        return total
+
+    async def collect(self) -> int:
+        """Publish this worker's lease, then delete revisions released or superseded since the last pass."""
+        from services.rag_service import collect_revisions, publish_lease
+
+        await asyncio.to_thread(publish_lease, self._live_ids())
+        deleted = await asyncio.to_thread(collect_revisions)
+        self._metrics["collections_deleted"] += len(deleted)
+        return len(deleted)
+
+    async def compact(self) -> dict[str, int]:
+        """Compact the vector store, keeping the collections of live sessions."""
+        from services.rag_service import compact_store
+
+        result = await asyncio.to_thread(compact_store, self._live_ids())
+        self._last_compaction = time.time()
+        self._metrics["compactions"] += 1
+        self._metrics["collections_deleted"] += result["collections_deleted"]
+        self._metrics["bytes_reclaimed"] += result["bytes_reclaimed"]
+        self._metrics["last_compaction_at"] = self._last_compaction
+        return result
+
+    # ── Introspection ─────────────────────────────────────────────────────────
+
+    def _live_ids(self) -> set[str]:
+        return {sid for store in self._stores.values() for sid in store.sessions}
+
+    @property
+    def live_sessions(self) -> int:
+        return sum(len(store.sessions) for store in self._stores.values())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "live_sessions": self.live_sessions,
+            "by_kind": {
+                kind: {"live": len(store.sessions), "reaped": store.reaped}
+                for kind, store in self._stores.items()
+            },
+            "sessions_reaped": self._metrics["reaped_idle"] + self._metrics["reaped_finished"],
+            **self._metrics,
+            "idle_ttl_seconds": settings.session_idle_ttl,
+            "finished_ttl_seconds": settings.session_finished_ttl,
+        }
@@ -0,0 +1,107 @@
+"""
+SingleFlight
+============
+Collapses concurrent identical work into one in-flight task.
+
+When ten sessions ask for the same ``owner/repo@sha`` at once, the first
+caller starts the job and everyone else joins it.  The job runs as its own
+task, so it survives any individual caller going away; its progress
+messages are recorded on the ``Flight`` and replayed to every subscriber,
+so each session still sees the full progress stream.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+Publish = Callable[[str], None]
+
+
+class Flight:
+    """One in-flight job: its progress log and its eventual result."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.events: list[str] = []
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def publish(self, msg: str) -> None:
+        """Record a progress message and wake every subscriber."""
+        self.events.append(msg)
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Yield all progress messages (past and future) until the job ends."""
+        i = 0
+        while True:
+            changed = self._changed
+            while i < len(self.events):
+                yield self.events[i]
+                i += 1
+            if self.task.done():
+                return
+            await changed.wait()
+
+    async def result(self) -> Any:
+        """Await the job's result; cancelling the caller does not cancel the job."""
+        return await asyncio.shield(self.task)
+
+
+class SingleFlight:
+    """Registry of in-flight jobs keyed by a caller-chosen string."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._flights: dict[str, Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    def join(
+        self,
+        key: str,
+        job: Callable[[Publish], Awaitable[Any]],
+    ) -> tuple[Flight, bool]:
+        """Return the flight for ``key``, starting ``job`` if none is running.
+
+        The second element is ``True`` when an existing flight was joined.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.joined += 1
+            log.info("%s: joining in-flight job %s", self._name, key)
+            return flight, True
+
+        flight = Flight(key)
+        flight.task = asyncio.create_task(job(flight.publish))
+        flight.task.add_done_callback(lambda _t, f=flight: self._finish(f))
+        self._flights[key] = flight
+        self.started += 1
+        return flight, False
+
+    async def run(self, key: str, job: Callable[[Publish], Awaitable[Any]]) -> Any:
+        """Convenience wrapper when the caller only wants the result."""
+        flight, _ = self.join(key, job)
+        return await flight.result()
+
+    def _finish(self, flight: Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        if not flight.task.cancelled() and flight.task.exception() is not None:
+            log.warning("%s: job %s failed: %s", self._name, flight.key, flight.task.exception())
+        flight._notify()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict[str, int]:
+        return {"started": self.started, "joined": self.joined, "in_flight": self.in_flight}
@@ -37,6 +37,11 @@ class ConnectionManager:
         self._connections.pop(session_id, None)
         log.info("WS disconnected: session %s (remaining: %d)", session_id, len(self._connections))
 
+    def forget(self, session_id: str) -> None:
+        """Drop all trace of a session once it has been expired."""
+        self._connections.pop(session_id, None)
+        self._ever_connected.discard(session_id)
+
     # ── Sending ───────────────────────────────────────────────────────────────
 
     async def send(self, session_id: str, event_type: str, data: Any = None) -> bool:
@@ -65,8 +70,12 @@ class ConnectionManager:
     async def send_question(self, session_id: str, question: Any) -> None:
         await self.send(session_id, "mcq", question)
 
-    async def send_article_chunk(self, session_id: str, chunk: str) -> None:
-        await self.send(session_id, "article_chunk", chunk)
+    async def send_article_chunk(self, session_id: str, chunk: str) -> bool:
+        return await self.send(session_id, "article_chunk", chunk)
+
+    async def send_article_replace(self, session_id: str, content: str) -> None:
+        """Replace everything streamed so far with the final (cleaned) text."""
+        await self.send(session_id, "article_replace", content)
 
     async def send_article_done(self, session_id: str, word_count: int) -> None:
         await self.send(session_id, "article_done", {"word_count": word_count})
@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import services.ai_service as ai
+from services.ai_service import AIService
+
+
+def _sse_body(tokens: list[str]) -> bytes:
+    events = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": t}}]}) for t in tokens
+    ]
+    events.insert(1, ": keep-alive")
+    events.append('data: {"choices": [{"delta": {}, "finish_reason": "stop"}]}')
+    events.append("data: [DONE]")
+    return ("\n\n".join(events) + "\n\n").encode()
+
+
+def _install_client(handler) -> None:
+    ai._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    ai._client_loop = asyncio.get_running_loop()
+
+
+# =====================================================================
+# Streaming
+# =====================================================================
+
+def test_stream_generate_parses_sse(monkeypatch):
+    monkeypatch.setattr(ai.settings, "nvidia_api_key", "test-key")
+    seen: dict = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["payload"] = json.loads(request.content)
+        seen["auth"] = request.headers["Authorization"]
+        return httpx.Response(200, content=_sse_body(["Hel", "lo", " world"]))
+
+    async def scenario():
+        _install_client(handler)
+        try:
+            return [t async for t in AIService().stream_generate("hi")]
+        finally:
+            await ai.close_ai_client()
+
+    tokens = asyncio.run(scenario())
+    assert tokens == ["Hel", "lo", " world"]
+    assert seen["payload"]["stream"] is True
+    assert seen["auth"] == "Bearer test-key"
+
+
+def test_stream_generate_raises_on_http_error(monkeypatch):
+    monkeypatch.setattr(ai.settings, "nvidia_api_key", "test-key")
+
+    async def scenario():
+        _install_client(lambda request: httpx.Response(500, text="boom"))
+        try:
+            return [t async for t in AIService().stream_generate("hi")]
+        finally:
+            await ai.close_ai_client()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(scenario())
+
+
+def test_generate_readme_reuses_pooled_client(monkeypatch):
+    monkeypatch.setattr(ai.settings, "nvidia_api_key", "test-key")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"choices": [{"message": {"content": "done"}}]})
+
+    async def scenario():
+        _install_client(handler)
+        client = ai._client
+        try:
+            svc = AIService()
+            assert await svc.generate_readme("a") == "done"
+            assert await svc.generate_readme("b") == "done"
+            assert ai.get_ai_client() is client
+        finally:
+            await ai.close_ai_client()
+
+    asyncio.run(scenario())
+
+
+# =====================================================================
+# Gemini thread → asyncio bridge
+# =====================================================================
+
+class _FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def test_stream_in_thread_yields_chunks_in_order():
+    from services.gemini_service import stream_in_thread
+
+    def open_stream():
+        return (_FakeChunk(t) for t in ["a", "", "b", "c"])
+
+    async def scenario():
+        return [t async for t in stream_in_thread(open_stream)]
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+
+
+def test_stream_in_thread_propagates_producer_errors():
+    from services.gemini_service import stream_in_thread
+
+    def open_stream():
+        yield _FakeChunk("partial")
+        raise RuntimeError("upstream exploded")
+
+    async def scenario():
+        received = []
+        with pytest.raises(RuntimeError, match="upstream exploded"):
+            async for t in stream_in_thread(open_stream):
+                received.append(t)
+        return received
+
+    assert asyncio.run(scenario()) == ["partial"]
+
+
+def test_stream_in_thread_stops_producer_when_consumer_leaves():
+    import threading
+    import time
+    from contextlib import aclosing
+
+    from services.gemini_service import stream_in_thread
+
+    produced = []
+    finished = threading.Event()
+
+    def open_stream():
+        try:
+            for i in range(1000):
+                produced.append(i)
+                time.sleep(0.001)
+                yield _FakeChunk(str(i))
+        finally:
+            finished.set()
+
+    async def scenario():
+        stream = stream_in_thread(open_stream)
+        async with aclosing(stream):
+            async for _ in stream:
+                break
+        await asyncio.to_thread(finished.wait, 5)
+
+    asyncio.run(scenario())
+    assert finished.is_set()
+    assert len(produced) < 1000
@@ -1,4 +1,5 @@
 import json
+import time
 
 import pytest
 from fastapi.testclient import TestClient
@@ -541,3 +542,221 @@ def test_article_very_long_repo_name(mock_gen):
     }
     response = client.post("/generate-article", json=payload)
     assert response.status_code == 200
+
+
+def test_github_stats():
+    response = client.get("/stats/github")
+    assert response.status_code == 200
+    stats = response.json()["github"]
+    assert {"conditional_requests", "not_modified", "hit_ratio", "quota_saved"} <= stats.keys()
+
+
+def test_cache_stats_and_admin_invalidation():
+    from services.embedding_cache import EmbeddingCache, embedding_key
+    from services.repo_cache import RepoCache, SnapshotCache
+
+    repos, snapshots, embeddings = RepoCache(), SnapshotCache(), EmbeddingCache()
+    repos.put("o", "r", commit_sha="a" * 40, chunks=[], features=["x"])
+    embeddings.put_many([embedding_key("m", "x")], [[1.0, 2.0]])
+
+    admin = {"X-Admin-Token": "s3cret"}
+    with patch("main.repo_cache", repos), patch("main.snapshot_cache", snapshots), \
+            patch("main.get_embedding_cache", lambda: embeddings):
+        stats = client.get("/stats/cache").json()["cache"]
+        assert stats["repo"]["entries"] == 1
+        assert stats["repo"]["items"][0]["repo"] == "o/r"
+        assert {"hits", "misses", "evictions", "resident_bytes"} <= stats["snapshot"].keys()
+        assert {"full_fetches", "incremental_refreshes", "bytes_fetched"} <= stats["fetches"].keys()
+
+        assert client.delete("/admin/cache/o/r", headers=admin).status_code == 403   # no token configured
+        with patch("main.settings.admin_token", "s3cret"):
+            assert client.delete("/admin/cache/o/r").status_code == 401
+            assert client.delete("/admin/cache", headers={"X-Admin-Token": "guess"}).status_code == 401
+            assert client.delete("/admin/cache/o/r", headers=admin).status_code == 200
+            assert client.delete("/admin/cache/o/r", headers=admin).status_code == 404
+            assert client.delete("/admin/cache", headers=admin).json()["success"] is True
+            assert len(embeddings) == 0
+
+
+def test_session_stats_counts_live_sessions():
+    import main
+    from services.article_session import ArticleSession
+
+    main._sessions["stats-probe"] = ArticleSession(session_id="stats-probe", owner="o", repo="r")
+    try:
+        stats = client.get("/stats/sessions").json()["sessions"]
+        assert stats["by_kind"]["article"]["live"] >= 1
+        assert {"sessions_reaped", "bytes_reclaimed", "live_sessions"} <= stats.keys()
+    finally:
+        main._sessions.pop("stats-probe")
+
+
+def test_article_start_returns_503_when_inference_pool_is_saturated():
+    from services.compute_pool import ComputeBusy
+
+    class _Saturated:
+        def admit(self):
+            raise ComputeBusy(queued=40, retry_after=7)
+
+    with patch("main.get_compute_pool", lambda: _Saturated()):
+        resp = client.post("/article/start", json={"owner_name": "o", "repo_name": "r"})
+
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "7"
+
+
+def test_importing_the_app_leaves_model_and_sdk_imports_for_later():
+    import subprocess
+    import sys
+
+    heavy = ["torch", "chromadb", "sentence_transformers", "google.generativeai", "gitingest"]
+    out = subprocess.run(
+        [sys.executable, "-c", f"import sys, main; print([m for m in {heavy!r} if m in sys.modules])"],
+        capture_output=True, text=True, check=True,
+    )
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_lifespan_warms_models_up_when_enabled(monkeypatch):
+    import main
+
+    warmed: list[bool] = []
+
+    class _RAG:
+        def warm_up(self):
+            warmed.append(True)
+
+    monkeypatch.setattr(main, "_get_rag_service", lambda: _RAG())
+    monkeypatch.setattr(main.settings, "warm_up_models", True)
+    monkeypatch.setattr("services.rag_service._models_warm", False)
+    with TestClient(app) as warm_client:
+        assert warm_client.get("/health/live").status_code == 200
+        for _ in range(1500):   # the first compute worker imports torch before warming up
+            if warmed:
+                break
+            time.sleep(0.02)
+        assert warmed == [True]
+        assert warm_client.get("/health").status_code == 200
+
+
+def test_readiness_fails_on_cold_models_low_quota_and_busy_llm(monkeypatch):
+    import main
+    from services import health
+    from services.github_service import conditional_cache
+
+    monkeypatch.setattr("services.rag_service._models_warm", False)
+    monkeypatch.setattr(conditional_cache, "rate_limit_remaining", None)
+    ready = client.get("/health/ready")
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
+    assert set(ready.json()["checks"]) == {"models", "chroma", "github", "compute", "llm"}
+
+    monkeypatch.setattr(main.settings, "warm_up_models", True)
+    monkeypatch.setattr(conditional_cache, "rate_limit_remaining", 3)
+    monkeypatch.setattr(conditional_cache, "rate_limit_reset", int(time.time()) + 600)
+    with health.llm_call():
+        monkeypatch.setattr(main.settings, "ready_max_llm_calls", 1)
+        not_ready = client.get("/health/ready")
+    checks = not_ready.json()["checks"]
+    assert not_ready.status_code == 503
+    assert not_ready.json()["status"] == "not_ready"
+    assert {name for name, c in checks.items() if not c["ok"]} == {"models", "github", "llm"}
+    assert health.llm_calls_in_flight() == 0
+
+    # A rate-limit window that has already reset no longer counts against us
+    monkeypatch.setattr(conditional_cache, "rate_limit_reset", int(time.time()) - 1)
+    assert client.get("/health/ready").json()["checks"]["github"]["ok"] is True
+
+
+def test_content_stream_ends_with_the_cleaned_result_and_stops_when_the_client_leaves(monkeypatch):
+    import asyncio
+    import types
+
+    import main
+    from models import ArticleSessionState
+    from services.content_session import ContentSession
+    from services.readme_service import ReadmeService
+
+    closed: list[bool] = []
+
+    class _AI:
+        async def stream_generate(self, prompt):
+            try:
+                for token in ["```markdown\n", "Shipped ", "it.", "\n```"]:
+                    yield token
+            finally:
+                closed.append(True)
+
+    async def context(owner, repo):
+        return {"repo_info": {"repo": "r", "url": "u"}, "metadata": types.SimpleNamespace(), "source_files": []}
+
+    svc = ReadmeService.__new__(ReadmeService)
+    svc.ai_service = _AI()
+    svc._retrieve_repo_context = context
+    svc._fit_prompt = lambda ctx, build: ("prompt", {})
+
+    def run(connected: bool):
+        sent: list[tuple] = []
+
+        async def send(session_id, event_type, data=None):
+            sent.append((event_type, data))
+            return connected
+
+        monkeypatch.setattr(main.ws_manager, "send", send)
+        session = ContentSession(session_id="s", owner="o", repo="r", content_type="linkedin")
+        asyncio.run(main._generate_content(session, svc))
+        return session, sent
+
+    session, sent = run(connected=True)
+    assert [t for t, _ in sent] == ["article_chunk"] * 4 + ["article_replace", "article_done"]
+    assert sent[-2] == ("article_replace", "Shipped it.") and session.result == "Shipped it."
+
+    session, sent = run(connected=False)
+    assert sent == [("article_chunk", "```markdown\n")] and closed == [True, True]
+    assert session.state == ArticleSessionState.ERROR
+
+
+def test_article_stream_leaves_generating_when_the_client_leaves(monkeypatch):
+    import asyncio
+
+    import main
+    from models import ArticleSessionState
+    from services.article_session import ArticleSession
+
+    class _Gemini:
+        async def stream_generate(self, prompt):
+            for token in ["one ", "two"]:
+                yield token
+
+    async def gone(session_id, event_type, data=None):
+        return False
+
+    monkeypatch.setattr(main.ws_manager, "send", gone)
+    session = ArticleSession(session_id="left", owner="o", repo="r")
+    session.mark_generating()
+    asyncio.run(main._stream_article_from_prompt(session, _Gemini(), "prompt"))
+    assert session.state == ArticleSessionState.ERROR
+
+
+def test_session_reaped_mid_ingestion_releases_the_revision_it_attaches(monkeypatch):
+    import asyncio
+
+    import main
+    from services.article_session import ArticleSession
+    from services.rag_service import RAGService, _session_collections
+
+    rag = RAGService.__new__(RAGService)   # attach/release only touch the refcounts
+
+    class _Ingestion:
+        async def ingest_repo(self, owner, repo, session_id):
+            yield "Cloning…"
+            main._sessions.pop(session_id)   # reaped while the revision was being built
+            await main._release_article_session(session_id)
+            rag.attach(session_id, owner, repo, "a" * 40)
+            yield "Using the shared vector index for this revision ✓"
+
+    monkeypatch.setattr(main, "_get_ingestion_service", lambda: _Ingestion())
+    monkeypatch.setattr(main, "_get_rag_service", lambda: rag)
+    main._sessions["reaped"] = ArticleSession(session_id="reaped", owner="o", repo="r")
+    asyncio.run(main._run_ingestion("reaped", "o", "r"))
+    assert "reaped" not in _session_collections
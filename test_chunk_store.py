@@ -0,0 +1,53 @@
+import pickle
+
+import pytest
+
+from models import Chunk
+from services.chunk_store import ChunkStore, ChunkView
+
+_CHUNKS = [
+    Chunk(text="def get(self):\n    return 'café'", file_path="app/store.py", chunk_type="function",
+          language="python", symbol="get", scope="Store", start_line=12, end_line=13),
+    Chunk(text="class Store:", file_path="app/store.py", chunk_type="class", language="python",
+          symbol="Store", start_line=10, end_line=10),
+    Chunk(text="fastapi\n", file_path="requirements.txt", chunk_type="config", language="text"),
+]
+
+
+def test_views_read_back_what_was_stored():
+    store = ChunkStore.from_chunks(_CHUNKS)
+    assert len(store) == 3
+    assert all(isinstance(c, ChunkView) for c in store)
+    assert store == _CHUNKS and store.to_models() == _CHUNKS
+    assert store[-1].file_path == "requirements.txt" and store[0].text.endswith("café'")
+    assert store.file_paths() == ["app/store.py", "app/store.py", "requirements.txt"]
+    assert store.chunk_types() == ["function", "class", "config"]
+    assert store[1:] == _CHUNKS[1:]
+    assert list(store.rows_of_type("class")) == [1] and list(store.rows_of_type("doc")) == []
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_extend_and_select_map_interned_codes():
+    other = ChunkStore()
+    other.append("# Title", "README.md", "doc", "markdown")
+    store = ChunkStore.concat([other, ChunkStore.from_chunks(_CHUNKS)])
+    assert store == [other[0], *_CHUNKS]
+
+    picked = store.select([3, 1])
+    assert picked == [_CHUNKS[2], _CHUNKS[0]]
+    picked[0].chunk_type = "class"
+    assert picked[0].chunk_type == "class" and store[3].chunk_type == "config"
+
+
+def test_stores_survive_bytes_and_pickle():
+    store = ChunkStore.from_chunks(_CHUNKS)
+    assert ChunkStore.from_bytes(store.to_bytes()) == _CHUNKS
+    assert pickle.loads(pickle.dumps(store)) == _CHUNKS
+    assert ChunkStore.from_bytes(ChunkStore().to_bytes()) == []
+
+
+def test_rows_cost_bytes_not_objects():
+    store = ChunkStore.from_chunks(_CHUNKS * 1000)
+    text = sum(len(c.text.encode()) for c in _CHUNKS * 1000)
+    assert store.nbytes < text + 40 * len(store)
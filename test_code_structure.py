@@ -0,0 +1,180 @@
+import pytest
+
+from services.code_structure import StructureError, js_definitions, python_definitions
+from services.ingestion_service import _chunk_file
+
+_PY = '''"""Module docstring."""
+import os
+
+
+@dataclass
+class Store:
+    """Holds things.
+
+def not_a_method():   (inside the docstring)
+    """
+    limit = 3
+
+    def get(self, key):
+        return self._data.get(
+    key)
+
+    # Writes go through here
+    @locked
+    async def put(self, key, value):
+        self._data[key] = value
+
+        class Inner:
+            pass
+
+
+def helper():
+    return 1
+x = helper()
+'''
+
+
+def _spans(text, definitions):
+    return [(d.kind, d.scope, d.name, text[d.start:d.end].strip().splitlines()[0]) for d in definitions]
+
+
+def test_python_methods_get_their_class_and_decorators_and_comments():
+    assert _spans(_PY, python_definitions(_PY)) == [
+        ("class", "", "Store", "@dataclass"),
+        ("function", "Store", "get", "def get(self, key):"),
+        ("function", "Store", "put", "# Writes go through here"),
+        ("function", "", "helper", "def helper():"),
+    ]
+
+
+def test_python_chunks_carry_symbol_scope_and_line_span():
+    # Small files are split at top-level def/class lines only, docstrings and all
+    chunks = _chunk_file("app/store.py", _PY)
+    lines = _PY.split("\n")
+    located = [(c.chunk_type, c.scope, c.symbol, c.start_line, c.end_line) for c in chunks]
+    assert located == [
+        ("other", "", "", 1, 2),
+        ("class", "", "Store", 5, 7),
+        ("function", "", "not_a_method", 9, 23),
+        ("function", "", "helper", 26, 28),
+    ]
+    for c in chunks:   # the span is exactly where the text is
+        assert "\n".join(lines[c.start_line - 1:c.end_line]).strip() == c.text
+
+
+_METHODS = "".join(f"    def m{i}(self):\n        return {i}  # {'x' * 40}\n\n" for i in range(15))
+
+
+def test_python_class_too_big_for_one_chunk_is_split_at_its_methods():
+    text = 'import os\n\n\nclass Big:\n    """Doc."""\n\n' + _METHODS + "\ndef after():\n    pass\n"
+    located = [(c.chunk_type, c.scope, c.symbol, c.start_line) for c in _chunk_file("big.py", text)]
+    assert located == [
+        ("other", "", "", 1),
+        ("class", "", "Big", 4),
+        *[("function", "Big", f"m{i}", 7 + 3 * i) for i in range(15)],
+        ("function", "", "after", 53),
+    ]
+
+
+def test_python_structure_comes_from_the_parser():
+    # An outdented continuation line ends the class for an indentation scanner
+    text = "class A:\n    limits = (\n1, 2)\n\n    def m(self):\n        return 1\n"
+    assert _spans(text, python_definitions(text)) == [
+        ("class", "", "A", "class A:"),
+        ("function", "A", "m", "def m(self):"),
+    ]
+
+
+def test_python_the_parser_rejects_is_scanned_by_indentation():
+    text = 'class Legacy:\n    def show(self):\n        print "hi"\n\n\ndef main():\n    Legacy().show()\n'
+    assert _spans(text, python_definitions(text)) == [
+        ("class", "", "Legacy", "class Legacy:"),
+        ("function", "Legacy", "show", "def show(self):"),
+        ("function", "", "main", "def main():"),
+    ]
+
+
+def test_unparseable_big_python_class_is_split_at_fixed_offsets():
+    text = "class Big:\n" + _METHODS + '    s = """never closed\n'
+    with pytest.raises(StructureError):
+        python_definitions(text)
+    chunks = _chunk_file("big.py", text)
+    assert len(chunks) > 1
+    assert all((c.chunk_type, c.symbol) == ("class", "Big") for c in chunks)
+    assert chunks[0].start_line == 1 and chunks[-1].end_line == text.count("\n")
+
+
+_TS = '''import express from "express";
+
+/** Routes. */
+export const router = express.Router();
+
+@Injectable()
+export class UserService {
+  private cache = new Map<string, User>();
+
+  constructor(private readonly db: Db) {}
+
+  async find(id: string): Promise<User | undefined> {
+    const hit = this.cache.get(id);
+    return hit ?? (await this.db.get(`/users/${id}`, { id }));
+  }
+
+  remove = async (id: string) => {
+    if (id) { this.cache.delete(id); }
+  };
+}
+
+export const handler = async (req, res) => {
+  res.json({ ok: /}/.test(req.url) });
+};
+
+app.get("/health", (req, res) => {
+  res.send("ok");
+});
+
+export default {
+  name: "users",
+  setup(app) {
+    app.use(router);
+  },
+};
+'''
+
+
+def test_js_classes_methods_arrow_exports_and_callbacks():
+    assert _spans(_TS, js_definitions(_TS)) == [
+        ("class", "", "UserService", "@Injectable()"),
+        ("function", "UserService", "constructor", "constructor(private readonly db: Db) {}"),
+        ("function", "UserService", "find", "async find(id: string): Promise<User | undefined> {"),
+        ("function", "UserService", "remove", "remove = async (id: string) => {"),
+        ("function", "", "handler", "export const handler = async (req, res) => {"),
+        ("function", "", 'app.get("/health")', 'app.get("/health", (req, res) => {'),
+        ("function", "exports", "setup", "setup(app) {"),
+    ]
+
+
+def test_js_class_too_big_for_one_chunk_is_split_at_its_methods():
+    methods = "".join(f"  m{i}() {{\n    return {i}; // {'x' * 40}\n  }}\n\n" for i in range(15))
+    text = "export class Big {\n" + methods + "}\n\nexport const after = () => 1;\n"
+    assert [(c.scope, c.symbol) for c in _chunk_file("big.ts", text)] == [
+        ("", "Big"), *[("Big", f"m{i}") for i in range(15)], ("", ""), ("", "after"),   # "}" in between
+    ]
+
+
+def test_long_js_statements_are_scanned_in_linear_time():
+    import time
+
+    text = "foo(" + "a(1), " * 12_000 + "b) {\n  x();\n}\n"   # ~72 KB on one line: took seconds
+    started = time.perf_counter()
+    assert js_definitions(text) == []
+    assert time.perf_counter() - started < 1
+
+
+def test_js_is_split_at_top_level_lines_even_where_the_scanner_gives_up():
+    text = "export function a() {\n  return 1;\n}\n}\n\nexport function b() {\n  return 2;\n}\n"
+    with pytest.raises(StructureError):
+        js_definitions(text)
+    assert [(c.symbol, c.start_line, c.end_line) for c in _chunk_file("a.js", text)] == [
+        ("a", 1, 4), ("b", 6, 8),
+    ]
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+import pytest
+
+import services.compute_pool as compute_pool
+from services.compute_pool import ComputeBusy, ComputePool
+
+
+@pytest.fixture(autouse=True)
+def _no_torch(monkeypatch):
+    """Workers would import torch before their first job, skewing the timings below."""
+    monkeypatch.setattr(compute_pool, "_configure_torch", lambda threads: None)
+
+
+def test_pool_bounds_concurrency_and_reports_queue_depth():
+    pool = ComputePool(workers=2, torch_threads=1, max_queue=100)
+    gate = threading.Event()
+    peak: list[int] = []
+    active = 0
+    lock = threading.Lock()
+
+    def work(i):
+        nonlocal active
+        with lock:
+            active += 1
+            peak.append(active)
+        gate.wait()
+        with lock:
+            active -= 1
+        return i * 2
+
+    async def scenario():
+        jobs = [asyncio.ensure_future(pool.run(work, i)) for i in range(6)]
+        await asyncio.sleep(0.1)
+        during = pool.stats()
+        gate.set()
+        return await asyncio.gather(*jobs), during
+
+    results, during = asyncio.run(scenario())
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert max(peak) == 2
+    assert (during["running"], during["queued"]) == (2, 4)
+
+    after = pool.stats()
+    assert (after["queued"], after["running"], after["completed"]) == (0, 0, 6)
+    assert after["max_queued_seen"] >= 4
+
+
+def test_pool_admission_rejects_with_retry_after():
+    pool = ComputePool(workers=1, torch_threads=1, max_queue=2)
+    gate = threading.Event()
+
+    async def scenario():
+        jobs = [asyncio.ensure_future(pool.run(gate.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ComputeBusy) as busy:
+            pool.admit()
+        gate.set()
+        await asyncio.gather(*jobs)
+        return busy.value
+
+    busy = asyncio.run(scenario())
+    assert busy.retry_after >= 1
+    assert pool.stats()["rejected"] == 1
+    pool.admit()   # drained: accepted again
+
+
+def test_pool_counts_failures_and_propagates_errors():
+    pool = ComputePool(workers=1, torch_threads=1, max_queue=4)
+
+    def boom():
+        raise ValueError("bad batch")
+
+    with pytest.raises(ValueError, match="bad batch"):
+        asyncio.run(pool.run(boom))
+    assert pool.stats()["failed"] == 1
+
+
+def test_stats_do_not_start_the_pool(monkeypatch):
+    monkeypatch.setattr(compute_pool, "_pool", None)
+    assert compute_pool.pool_stats() == {"started": False}
+    assert compute_pool._pool is None
+
+    pool = ComputePool(workers=1, torch_threads=1, max_queue=4)
+    monkeypatch.setattr(compute_pool, "_pool", pool)
+    assert compute_pool.pool_stats() == {"started": True, **pool.stats()}
+
+
+def test_torch_is_configured_on_the_workers_not_by_the_caller(monkeypatch):
+    configured: list[str] = []
+    monkeypatch.setattr(compute_pool, "_configure_torch", lambda n: configured.append(threading.current_thread().name))
+    pool = ComputePool(workers=2, torch_threads=1, max_queue=4)
+    assert configured == []
+
+    asyncio.run(pool.run(lambda: None))
+    assert configured and all(name.startswith("compute") for name in configured)
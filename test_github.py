@@ -0,0 +1,141 @@
+import asyncio
+
+import services.github_service as gh
+
+
+# =====================================================================
+# Shared GitHub client
+# =====================================================================
+
+def test_github_client_is_shared_within_loop():
+    async def scenario():
+        first = gh.get_github_client()
+        second = gh.get_github_client()
+        assert first is second
+        assert first.headers["X-GitHub-Api-Version"] == "2022-11-28"
+        await gh.close_github_client()
+        assert first.is_closed
+        third = gh.get_github_client()
+        assert third is not first
+        await gh.close_github_client()
+
+    asyncio.run(scenario())
+
+
+def test_github_client_recreated_for_new_loop():
+    async def grab():
+        return gh.get_github_client()
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+    assert first is not second
+    asyncio.run(gh.close_github_client())
+
+
+# =====================================================================
+# Conditional requests (ETag / If-None-Match)
+# =====================================================================
+
+def _etag_transport(calls: list):
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"X-RateLimit-Remaining": "4999"})
+        return httpx.Response(
+            200,
+            json=[{"sha": "abc123"}],
+            headers={"ETag": '"v1"', "X-RateLimit-Remaining": "4999"},
+        )
+
+    return httpx.MockTransport(handler)
+
+
+def test_conditional_cache_turns_304_into_cached_200():
+    import httpx
+
+    calls: list = []
+    cache = gh.ConditionalRequestCache(max_entries=8)
+
+    async def scenario():
+        gh._client = httpx.AsyncClient(transport=_etag_transport(calls))
+        gh._client_loop = asyncio.get_running_loop()
+        try:
+            first = await cache.get("https://api.test/repos/o/r/commits", params={"per_page": 1})
+            second = await cache.get("https://api.test/repos/o/r/commits", params={"per_page": 1})
+            return first, second
+        finally:
+            await gh.close_github_client()
+
+    first, second = asyncio.run(scenario())
+    assert first.status_code == second.status_code == 200
+    assert second.json() == [{"sha": "abc123"}]
+    assert "if-none-match" not in calls[0]
+    assert calls[1]["if-none-match"] == '"v1"'
+
+    stats = cache.stats()
+    assert stats["conditional_requests"] == 2
+    assert stats["not_modified"] == 1
+    assert stats["hit_ratio"] == 0.5
+    assert stats["rate_limit_remaining"] == 4999
+
+
+def test_conditional_cache_is_bounded():
+    import httpx
+
+    cache = gh.ConditionalRequestCache(max_entries=2)
+
+    async def scenario():
+        gh._client = httpx.AsyncClient(transport=_etag_transport([]))
+        gh._client_loop = asyncio.get_running_loop()
+        try:
+            for i in range(5):
+                await cache.get(f"https://api.test/repos/o/r{i}")
+        finally:
+            await gh.close_github_client()
+
+    asyncio.run(scenario())
+    assert cache.stats()["tracked_urls"] == 2
+
+
+def test_conditional_cache_is_bounded_by_body_bytes():
+    import httpx
+
+    body = len(httpx.Response(200, json=[{"sha": "abc123"}]).content)
+    cache = gh.ConditionalRequestCache(max_entries=100, max_bytes=3 * body)
+    tiny = gh.ConditionalRequestCache(max_entries=100, max_bytes=body - 1)
+
+    async def scenario():
+        gh._client = httpx.AsyncClient(transport=_etag_transport([]))
+        gh._client_loop = asyncio.get_running_loop()
+        try:
+            for i in range(5):
+                await cache.get(f"https://api.test/repos/o/r{i}")
+                await tiny.get(f"https://api.test/repos/o/r{i}")
+        finally:
+            await gh.close_github_client()
+
+    asyncio.run(scenario())
+    assert cache.stats()["tracked_urls"] == 3 and cache.stats()["resident_bytes"] == 3 * body
+    assert tiny.stats()["tracked_urls"] == 0 and tiny.stats()["resident_bytes"] == 0
+
+
+def test_latest_commit_sha_uses_conditional_request(monkeypatch):
+    import httpx
+
+    import services.repo_cache as rc
+
+    calls: list = []
+    monkeypatch.setattr(rc, "conditional_cache", gh.ConditionalRequestCache(max_entries=8))
+
+    async def scenario():
+        gh._client = httpx.AsyncClient(transport=_etag_transport(calls))
+        gh._client_loop = asyncio.get_running_loop()
+        try:
+            return [await rc.get_latest_commit_sha("o", "r") for _ in range(3)]
+        finally:
+            await gh.close_github_client()
+
+    assert asyncio.run(scenario()) == ["abc123"] * 3
+    assert rc.conditional_cache.stats()["not_modified"] == 2
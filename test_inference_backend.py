@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+import services.rag_service as rag_module
+from services.inference_backend import InferenceBackend, load_cross_encoder, load_embedding_function
+from services.rag_service import revision_collection
+
+
+# =====================================================================
+# Backend selection
+# =====================================================================
+
+def test_backend_names_and_graph_files():
+    assert InferenceBackend().tag == "torch"
+    assert InferenceBackend("onnx").file_name == "onnx/model.onnx"
+
+    vnni = InferenceBackend("onnx", "avx512_vnni")
+    assert vnni.tag == "onnx-qint8_avx512_vnni"
+    assert vnni.file_name == "onnx/model_qint8_avx512_vnni.onnx"
+    assert InferenceBackend("onnx", "avx2").file_name == "onnx/model_quint8_avx2.onnx"
+
+    for bad in (("tensorrt", ""), ("torch", "avx2"), ("onnx", "fp4")):
+        with pytest.raises(ValueError):
+            InferenceBackend(*bad)
+
+
+def test_vectors_from_other_backends_are_keyed_apart(monkeypatch):
+    torch_collection = revision_collection("o", "r", "abc")
+    assert InferenceBackend().model_id("bge") == "bge"
+
+    monkeypatch.setattr(rag_module.settings, "inference_backend", "onnx")
+    monkeypatch.setattr(rag_module.settings, "inference_quantization", "avx512_vnni")
+    assert InferenceBackend.from_settings().model_id("bge") == "bge@onnx-qint8_avx512_vnni"
+    assert revision_collection("o", "r", "abc") != torch_collection
+
+
+# =====================================================================
+# Ranking parity with the PyTorch baseline (needs the models and optimum)
+# =====================================================================
+
+_DOCS = [
+    "def connect(url, timeout=10):\n    return httpx.Client(base_url=url, timeout=timeout)",
+    "class UserRepository:\n    def find_by_email(self, email): ...",
+    "[tool.poetry.dependencies]\npython = '^3.11'\nfastapi = '*'",
+    "async def stream_tokens(prompt):\n    async for chunk in client.stream(prompt):\n        yield chunk",
+    "def hash_password(password):\n    return bcrypt.hashpw(password.encode(), bcrypt.gensalt())",
+    "FROM python:3.11-slim\nCOPY requirements.txt .\nRUN pip install -r requirements.txt",
+    "def paginate(query, page, size):\n    return query.offset(page * size).limit(size)",
+    "export function useDebounce(value, delay) { /* React hook */ }",
+    "CREATE TABLE sessions (id TEXT PRIMARY KEY, expires_at TIMESTAMP)",
+    "def retry(fn, attempts=3):\n    for i in range(attempts):\n        try: return fn()\n        except IOError: sleep(2 ** i)",
+    "logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')",
+    "def tokenize(text):\n    return re.findall(r'\\w+', text.lower())",
+]
+_QUERIES = [
+    "how are HTTP connections configured",
+    "user lookup by email",
+    "project dependencies",
+    "streaming responses",
+    "password hashing",
+    "docker image",
+    "pagination",
+    "retry with backoff",
+]
+_K = 3
+
+
+def _recall_at_k(baseline: np.ndarray, candidate: np.ndarray) -> float:
+    hits = [
+        len(set(np.argsort(-b)[:_K]) & set(np.argsort(-c)[:_K])) / _K
+        for b, c in zip(baseline, candidate)
+    ]
+    return float(np.mean(hits))
+
+
+def _load_or_skip(loader, model, backend):
+    try:
+        return loader(model, backend)
+    except (OSError, RuntimeError, ImportError) as exc:
+        pytest.skip(f"{model} on {backend.tag} unavailable: {exc}")
+
+
+@pytest.mark.parametrize("quantization", ["", "avx512_vnni"])
+def test_onnx_backend_keeps_retrieval_ranking(quantization, tmp_path, monkeypatch):
+    pytest.importorskip("optimum.onnxruntime")
+    monkeypatch.setattr(rag_module.settings, "onnx_model_dir", str(tmp_path))
+    onnx = InferenceBackend("onnx", quantization)
+
+    def similarities(ef) -> np.ndarray:
+        docs = np.array(ef(_DOCS))
+        queries = np.array(ef(_QUERIES))
+        docs /= np.linalg.norm(docs, axis=1, keepdims=True)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        return queries @ docs.T
+
+    baseline_ef = _load_or_skip(load_embedding_function, rag_module._EMBEDDING_MODEL, InferenceBackend())
+    onnx_ef = _load_or_skip(load_embedding_function, rag_module._EMBEDDING_MODEL, onnx)
+    assert _recall_at_k(similarities(baseline_ef), similarities(onnx_ef)) >= 0.9
+
+    pairs = [[q, d] for q in _QUERIES for d in _DOCS]
+    baseline_ce = _load_or_skip(load_cross_encoder, rag_module._RERANKER_MODEL, InferenceBackend())
+    onnx_ce = _load_or_skip(load_cross_encoder, rag_module._RERANKER_MODEL, onnx)
+    baseline_scores = np.array(baseline_ce.predict(pairs)).reshape(len(_QUERIES), -1)
+    onnx_scores = np.array(onnx_ce.predict(pairs)).reshape(len(_QUERIES), -1)
+    assert _recall_at_k(baseline_scores, onnx_scores) >= 0.9
@@ -0,0 +1,559 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from services.ingestion_service import IngestionService
+from services.repo_cache import RepoCache, SnapshotCache
+
+_GITINGEST_OUTPUT = (
+    "summary",
+    "tree",
+    "=" * 48 + "\nFILE: app/main.py\n" + "=" * 48 + "\n"
+    "def handler():\n    return 'ok'\n\n"
+    "class Service:\n    pass\n\n"
+    + "=" * 48 + "\nFILE: requirements.txt\n" + "=" * 48 + "\nfastapi\n",
+)
+
+
+class _FakeAI:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_readme(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return "Request handling service\nDependency management via requirements"
+
+
+class _FakeRAG:
+    def __init__(self):
+        self.upserts: list[str] = []
+        self.vectors: dict[str, set[str]] = {}
+        self.embedded: list = []
+        self.attached: dict[str, str] = {}
+
+    async def upsert_chunks(self, session_id, chunks):
+        from services.rag_service import chunk_id
+
+        self.upserts.append(session_id)
+        self.embedded.extend(chunks)
+        self.vectors.setdefault(session_id, set()).update(chunk_id(c) for c in chunks)
+
+    async def build_revision(self, owner, repo, commit_sha, chunks, previous_sha=None):
+        from services.rag_service import chunk_id
+
+        name = f"{owner}/{repo}@{commit_sha}"
+        have = self.vectors.setdefault(name, set())
+        reusable = self.vectors.get(f"{owner}/{repo}@{previous_sha}", set())
+        missing = [c for c in chunks if chunk_id(c) not in have | reusable]
+        have.update(chunk_id(c) for c in chunks)
+        if missing:
+            self.upserts.append(name)
+            self.embedded.extend(missing)
+        return len(missing)
+
+    def attach(self, session_id, owner, repo, commit_sha):
+        self.attached[session_id] = f"{owner}/{repo}@{commit_sha}"
+
+
+def _counting_ingest(counter: list):
+    lock = threading.Lock()
+
+    def fake_ingest(url, **kwargs):
+        with lock:
+            counter.append(url)
+        time.sleep(0.1)
+        return _GITINGEST_OUTPUT
+
+    return fake_ingest
+
+
+async def _drain(svc: IngestionService, owner: str, repo: str, session_id: str) -> list[str]:
+    return [msg async for msg in svc.ingest_repo(owner, repo, session_id)]
+
+
+# =====================================================================
+# Single-flight ingestion
+# =====================================================================
+
+def test_concurrent_ingestions_share_one_gitingest_and_feature_call():
+    gitingest_calls: list = []
+    ai, rag = _FakeAI(), _FakeRAG()
+    svc = IngestionService(ai_service=ai, rag_service=rag)
+
+    async def latest_sha(owner, repo):
+        return "f" * 40
+
+    async def scenario():
+        return await asyncio.gather(*(
+            _drain(svc, "load", "single-flight", f"s{i}") for i in range(10)
+        ))
+
+    with patch("services.ingestion_store.ingest", _counting_ingest(gitingest_calls)), \
+         patch("services.repo_cache.get_latest_commit_sha", latest_sha), \
+         patch("services.repo_cache.repo_cache", RepoCache()), \
+         patch("services.ingestion_store.snapshot_cache", SnapshotCache()):
+        transcripts = asyncio.run(scenario())
+
+    assert len(gitingest_calls) == 1
+    assert ai.calls == 1
+    # Every session got the shared progress stream and features, and reads
+    # the one collection embedded for the revision
+    for msgs in transcripts:
+        assert "Repository fetched ✓" in msgs
+        assert msgs[-1].startswith("__features_identified__:Request handling service")
+    assert rag.upserts == [f"load/single-flight@{'f' * 40}"]
+    assert set(rag.attached) == {f"s{i}" for i in range(10)}
+
+
+def test_ingestion_failure_reaches_every_waiter():
+    svc = IngestionService(ai_service=_FakeAI(), rag_service=_FakeRAG())
+    calls: list = []
+
+    def failing_ingest(url, **kwargs):
+        calls.append(url)
+        time.sleep(0.05)
+        raise OSError("clone failed")
+
+    async def latest_sha(owner, repo):
+        return "e" * 40
+
+    async def scenario():
+        return await asyncio.gather(
+            *(_drain(svc, "load", "broken", f"s{i}") for i in range(3)),
+            return_exceptions=True,
+        )
+
+    with patch("services.ingestion_store.ingest", failing_ingest), \
+         patch("services.repo_cache.get_latest_commit_sha", latest_sha), \
+         patch("services.repo_cache.repo_cache", RepoCache()), \
+         patch("services.ingestion_store.snapshot_cache", SnapshotCache()):
+        results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) and "clone failed" in str(r) for r in results)
+
+
+def test_concurrent_readme_requests_share_one_gitingest():
+    from services.readme_service import ReadmeService
+
+    gitingest_calls: list = []
+    svc = ReadmeService()
+
+    async def default_branch(owner, repo):
+        return "main"
+
+    async def latest_sha(owner, repo):
+        return "d" * 40
+
+    async def scenario():
+        return await asyncio.gather(*(
+            svc._retrieve_repo_context("load", "readme-flight") for _ in range(5)
+        ))
+
+    with patch("services.ingestion_store.ingest", _counting_ingest(gitingest_calls)), \
+         patch("services.repo_cache.get_latest_commit_sha", latest_sha), \
+         patch("services.ingestion_store.snapshot_cache", SnapshotCache()), \
+         patch.object(svc.github_service, "get_default_branch", default_branch):
+        contexts = asyncio.run(scenario())
+
+    assert len(gitingest_calls) == 1
+    assert all(ctx["source_files"] == contexts[0]["source_files"] for ctx in contexts)
+
+
+def test_readme_then_article_pipeline_fetch_each_revision_once():
+    from services.readme_service import ReadmeService
+
+    gitingest_calls: list = []
+    readme_svc = ReadmeService()
+    ingest_svc = IngestionService(ai_service=_FakeAI(), rag_service=_FakeRAG())
+
+    async def default_branch(owner, repo):
+        return "main"
+
+    async def latest_sha(owner, repo):
+        return "c" * 40
+
+    async def scenario():
+        ctx = await readme_svc._retrieve_repo_context("load", "shared-store")
+        msgs = await _drain(ingest_svc, "load", "shared-store", "s1")
+        return ctx, msgs
+
+    with patch("services.ingestion_store.ingest", _counting_ingest(gitingest_calls)), \
+         patch("services.repo_cache.get_latest_commit_sha", latest_sha), \
+         patch("services.repo_cache.repo_cache", RepoCache()), \
+         patch("services.ingestion_store.snapshot_cache", SnapshotCache()), \
+         patch.object(readme_svc.github_service, "get_default_branch", default_branch):
+        ctx, msgs = asyncio.run(scenario())
+
+    assert len(gitingest_calls) == 1
+    assert set(ctx["source_files"]) == {"app/main.py", "requirements.txt"}
+    assert msgs[-1].startswith("__features_identified__:")
+
+
+# =====================================================================
+# Incremental refresh (compare API)
+# =====================================================================
+
+_V1_FILES = {
+    "app/main.py": "def handler():\n    return 'ok'",
+    "app/models.py": "class User:\n    pass",
+    "app/old.py": "def legacy():\n    pass",
+    "app/routes.py": "def route():\n    pass",
+    "app/db.py": "def connect():\n    pass",
+    "requirements.txt": "fastapi",
+}
+
+
+def _github_transport(calls: list, compare: dict, contents: dict[str, str]):
+    import httpx
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if "/compare/" in request.url.path:
+            return httpx.Response(200, json=compare)
+        path = request.url.path.split("/contents/", 1)[1]
+        if path not in contents:
+            return httpx.Response(404)
+        assert request.url.params["ref"] == "2" * 40
+        return httpx.Response(200, content=contents[path].encode())
+
+    return httpx.MockTransport(handler)
+
+
+def _install_github(transport) -> None:
+    import httpx
+
+    import services.github_service as gh
+
+    gh._client = httpx.AsyncClient(transport=transport)
+    gh._client_loop = asyncio.get_running_loop()
+
+
+def test_snapshot_refresh_fetches_only_changed_files():
+    import services.github_service as gh
+    from services import ingestion_store
+
+    snapshots = SnapshotCache()
+    snapshots.put("o", "r", "1" * 40, summary="Files analyzed: 6\n", tree="", files=list(_V1_FILES.items()))
+
+    calls: list = []
+    compare = {
+        "status": "ahead",
+        "files": [
+            {"filename": "app/main.py", "status": "modified"},
+            {"filename": "app/new.py", "status": "added"},
+            {"filename": "app/odd name#1%.py", "status": "added"},
+            {"filename": "app/old.py", "status": "removed"},
+            {"filename": "static/logo.png", "status": "added"},
+        ],
+    }
+    contents = {
+        "app/main.py": "def handler():\n    return 'v2'",
+        "app/new.py": "def fresh():\n    pass",
+        "app/odd name#1%.py": "def odd():\n    pass",
+    }
+
+    async def scenario():
+        _install_github(_github_transport(calls, compare, contents))
+        try:
+            return await ingestion_store.get_snapshot("o", "r", "2" * 40)
+        finally:
+            await gh.close_github_client()
+
+    with patch("services.ingestion_store.snapshot_cache", snapshots), \
+         patch("services.ingestion_store.ingest", side_effect=AssertionError("full fetch")):
+        snapshot = asyncio.run(scenario())
+
+    assert snapshot.files["app/main.py"].endswith("'v2'")
+    assert snapshot.files["app/new.py"].startswith("def fresh")
+    assert snapshot.files["app/odd name#1%.py"].startswith("def odd")   # path quoted in the URL
+    assert "app/old.py" not in snapshot.files and "static/logo.png" not in snapshot.files
+    assert "Files analyzed: 7" in snapshot.summary
+    assert "new.py" in snapshot.tree
+    # compare + the three text files; the ignored image is never downloaded
+    assert len(calls) == 4
+    report = snapshot.views["fetch"]
+    assert report["mode"] == "incremental"
+    assert report["files_changed"] == 3 and report["files_removed"] == 1
+    assert report["bytes_fetched"] > sum(len(t) for t in contents.values())
+
+
+def test_snapshot_refresh_falls_back_to_full_fetch_on_force_push():
+    import services.github_service as gh
+    from services import ingestion_store
+
+    snapshots = SnapshotCache()
+    snapshots.put("o", "r", "1" * 40, summary="", tree="", files=list(_V1_FILES.items()))
+    gitingest_calls: list = []
+
+    async def scenario():
+        _install_github(_github_transport([], {"status": "diverged", "files": []}, {}))
+        try:
+            return await ingestion_store.get_snapshot("o", "r", "2" * 40)
+        finally:
+            await gh.close_github_client()
+
+    with patch("services.ingestion_store.snapshot_cache", snapshots), \
+         patch("services.ingestion_store.ingest", _counting_ingest(gitingest_calls)):
+        snapshot = asyncio.run(scenario())
+
+    assert len(gitingest_calls) == 1
+    assert snapshot.views["fetch"]["mode"] == "full"
+
+
+def test_incremental_ingestion_rechunks_and_reembeds_only_changed_files():
+    from services.ingestion_service import _chunk_file
+    from services.repo_cache import blob_hash
+
+    repos, snapshots = RepoCache(), SnapshotCache()
+    v1_chunks = [c for path, text in _V1_FILES.items() for c in _chunk_file(path, text)]
+    repos.put(
+        "o", "r", commit_sha="1" * 40, chunks=v1_chunks, features=["Request handling"],
+        file_hashes={p: blob_hash(t) for p, t in _V1_FILES.items()},
+    )
+    v2_files = {**_V1_FILES, "app/main.py": "def handler():\n    return 'v2'"}
+    snapshots.put("o", "r", "2" * 40, summary="", tree="", files=list(v2_files.items()))
+
+    ai, rag = _FakeAI(), _FakeRAG()
+    asyncio.run(rag.build_revision("o", "r", "1" * 40, v1_chunks))
+    rag.embedded.clear()
+    svc = IngestionService(ai_service=ai, rag_service=rag)
+
+    async def latest_sha(owner, repo):
+        return "2" * 40
+
+    chunked: list = []
+
+    def spy_chunk(path, text):
+        chunked.append(path)
+        return _chunk_file(path, text)
+
+    with patch("services.repo_cache.get_latest_commit_sha", latest_sha), \
+         patch("services.repo_cache.repo_cache", repos), \
+         patch("services.ingestion_store.snapshot_cache", snapshots), \
+         patch("services.ingestion_service._chunk_file", spy_chunk):
+        msgs = asyncio.run(_drain(svc, "o", "r", "new-session"))
+
+    assert chunked == ["app/main.py"]
+    assert ai.calls == 0                                   # 1 of 6 files changed: below threshold
+    assert [c.file_path for c in rag.embedded] == ["app/main.py"]
+    assert msgs[-1] == "__features_identified__:Request handling"
+    assert rag.attached["new-session"] == "o/r@" + "2" * 40
+
+
+def test_large_repos_are_chunked_in_worker_processes_in_file_order():
+    from config import settings
+    from services.chunk_pool import shutdown_chunk_pool
+    from services.ingestion_service import _chunk_file
+
+    files = {
+        f"pkg{i % 7}/mod{i}{ext}": body * (i % 5 + 1)
+        for i, (ext, body) in enumerate(
+            [(".py", "def f():\n    return 1\n\n" * 60), (".md", "# Title\n\nSome prose. " * 80),
+             (".java", "@Service\npublic class A {\n  public void run() {}\n}\n" * 30), (".txt", "x" * 3000)] * 25
+        )
+    }
+    svc = IngestionService(ai_service=_FakeAI(), rag_service=_FakeRAG())
+    progress: list[str] = []
+
+    with patch.object(settings, "chunk_inline_max_chars", 0), \
+         patch.object(settings, "chunk_batch_chars", 50_000), \
+         patch.object(settings, "chunk_workers", 2):
+        try:
+            chunks = asyncio.run(svc._chunk_blocks(list(files.items()), {}, progress.append))
+        finally:
+            shutdown_chunk_pool()
+
+    assert chunks == [c for path, text in files.items() for c in _chunk_file(path, text)]
+    assert len(progress) > 1 and progress[-1].startswith(f"Chunked {len(files)}/{len(files)} files")
+
+
+def test_embedding_selection_ranks_by_type_and_spreads_over_directories():
+    from services.chunk_store import ChunkStore
+    from services.ingestion_service import _select_chunks_for_embedding
+
+    chunks = ChunkStore()
+    for i in range(30):
+        chunks.append(f"def f{i}(): pass", f"big/m{i}.py", "function", "python")
+    chunks.append("class A: pass", "big/a.py", "class", "python")
+    chunks.append("def g(): pass", "small/g.py", "function", "python")
+    chunks.append("fastapi", "requirements.txt", "config", "text")
+
+    picked = _select_chunks_for_embedding(chunks, max_chunks=12)
+    assert [c.chunk_type for c in picked[:2]] == ["config", "class"]
+    # 10 per directory once half the budget is used; the rest goes elsewhere
+    assert [c.file_path for c in picked[2:]] == [f"big/m{i}.py" for i in range(9)] + ["small/g.py"]
+
+
+# =====================================================================
+# File-block parsing and the README view
+# =====================================================================
+
+def test_file_blocks_are_parsed_lazily_and_round_trip():
+    from services.ingestion_store import iter_file_blocks, render_file_blocks, split_file_blocks
+
+    files = [("a.py", "x = 1"), ("b/README.md", "# Title\n\ntext"), ("c.txt", "  indented\n\tline")]
+    content = "\n\n" + render_file_blocks(files) + "=" * 48 + "\nFILE: empty.txt\n" + "=" * 48 + "\n \n"
+
+    blocks = iter_file_blocks(content)
+    assert next(blocks) == ("a.py", "x = 1")
+    assert split_file_blocks(content) == [*files[:2], ("c.txt", "indented\n\tline")]
+
+
+def test_readme_view_packs_only_what_the_prompt_can_hold():
+    from services.readme_service import ReadmeService
+    from services.repo_cache import RepoSnapshot
+
+    files = {f"src/mod{i}.py": f"def f{i}():\n    return {i}\n" * 400 for i in range(40)}
+    files["tests/test_x.py"] = "assert True"
+    files["zz/README.md"] = "# Late readme"
+    files["package.json"] = '{"dependencies": {"react": "18"}}' + " " * 9000
+    snapshot = RepoSnapshot(owner="o", repo="r", commit_sha="s", summary="sum", tree="tree", _files=files)
+
+    svc = ReadmeService.__new__(ReadmeService)
+    with patch("services.readme_service.settings.prompt_max_tokens", 4_000):
+        ctx = svc._readme_view(snapshot)
+
+    kept = {p for p in files if not p.startswith("tests/")}
+    parsed = ctx["parsed"]
+    assert ctx["existing_readme"] == "# Late readme"
+    assert set(ctx["source_files"]) == kept
+    assert len(ctx["source_files"]["src/mod0.py"]) == 2_000
+    assert len(ctx["source_files"]["package.json"]) == 8_000
+    assert list(parsed.index)[0] == "package.json"              # manifests first
+    assert set(parsed.index) < kept                             # not everything fits
+    assert sum(t for _, _, t in parsed.blocks.values()) <= 4_000
+    assert all(files[p] == parsed.file(p) or p in parsed.condensed for p in parsed.index)
+
+
+def test_readme_tree_and_summary_leave_out_the_excluded_directories():
+    from services.ingestion_store import render_tree
+    from services.readme_service import ReadmeService
+    from services.repo_cache import RepoSnapshot
+
+    files = {"app/main.py": "x" * 3_000, "tests/test_main.py": "y" * 6_000, "docs/guide.md": "z" * 3_000}
+    tree = render_tree("o-r", list(files))
+    summary = "Repository: o/r\nFiles analyzed: 3\n\nEstimated tokens: 4.0k"
+    snapshot = RepoSnapshot(owner="o", repo="r", commit_sha="s", summary=summary, tree=tree, _files=files)
+
+    ctx = ReadmeService.__new__(ReadmeService)._readme_view(snapshot)
+    assert ctx["tree_str"] == render_tree("o-r", ["app/main.py"])
+    assert "tests" not in ctx["tree_str"] and "docs" not in ctx["tree_str"]
+    assert ctx["summary_str"].startswith("Repository: o/r\nFiles analyzed: 1\n")
+    estimate = float(ctx["summary_str"].rsplit(": ", 1)[1].rstrip("k"))
+    assert 1.0 <= estimate < 1.2          # a quarter of the text, plus the tree
+
+
+def test_parsed_repo_is_built_once_per_snapshot_and_indexes_the_prompt():
+    from services.readme_service import ReadmeService
+    from services.repo_cache import RepoSnapshot
+
+    files = {
+        "app/api.py": '@app.get("/items")\n@router.post(\'/items\')\n@app.websocket("/ws")\n',
+        "src/Ctl.java": '@GetMapping("/users")\n'
+                        '@RequestMapping(value = "/legacy", method = RequestMethod.PUT)\n',
+        "web/server.js": "router.delete('/items/:id', handler)\n",
+        "README.md": "# Demo",
+    }
+    snapshot = RepoSnapshot(owner="o", repo="r", commit_sha="s", summary="sum", tree="tree", _files=files)
+    svc = ReadmeService.__new__(ReadmeService)
+    analysed: list = []
+    analyse = svc._analyze_project_metadata
+    svc._analyze_project_metadata = lambda *a: analysed.append(1) or analyse(*a)
+
+    ctx = svc._readme_view(snapshot)
+    assert svc._readme_view(snapshot)["metadata"] is ctx["metadata"]
+    assert len(analysed) == 1
+
+    parsed = snapshot.views["readme"]
+    assert all(parsed.file(path) == text for path, text in files.items())
+    assert ctx["existing_readme"] == "# Demo"
+    assert ctx["api_endpoints"] == [
+        "DELETE /items/:id", "GET /items", "GET /users", "POST /items", "PUT /legacy", "WebSocket /ws",
+    ]
+    assert "  - GET /users\n" in svc._format_api_endpoints(ctx["api_endpoints"])
+    assert svc._format_api_endpoints([]) == ""
+
+
+def test_batches_of_a_dead_chunk_worker_are_retried_off_the_event_loop():
+    import threading
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    from services.chunk_pool import ChunkPool
+    from services.ingestion_service import _chunk_file
+
+    class _DeadPool:
+        def __init__(self):
+            self.submitted = 0
+
+        def submit(self, fn, *args):
+            self.submitted += 1
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+        def shutdown(self, **_):
+            pass
+
+    pools: list[_DeadPool] = []
+    threads: list[str] = []
+    pool = ChunkPool.__new__(ChunkPool)
+    pool._new_executor = lambda: pools.append(_DeadPool()) or pools[-1]
+    pool._executor = pool._new_executor()
+    batch = [("app/a.py", "def a():\n    return 1\n"), ("README.md", "# Title\n")]
+
+    def chunk_batch(files):
+        threads.append(threading.current_thread().name)
+        return [_chunk_file(path, text) for path, text in files]
+
+    with patch("services.chunk_pool._chunk_batch", chunk_batch):
+        result = asyncio.run(pool.chunk(batch))
+
+    assert result == [(path, _chunk_file(path, text)) for path, text in batch]
+    assert [p.submitted for p in pools] == [1, 1, 0]       # retried once on a fresh pool, which is kept
+    assert pool._executor is pools[-1]
+    assert threads and threads[0] != threading.main_thread().name
+
+
+def test_project_metadata_reads_each_file_with_its_own_marker_table():
+    from services.readme_service import ReadmeService
+
+    analyse = ReadmeService.__new__(ReadmeService)._analyze_project_metadata
+    files = {
+        "api/requirements.txt": "FastAPI==0.110\nredis\n",
+        "web/src/react.py": "import react  # a module that happens to be called react\n",
+        "db/.env": "DATABASE_URL=postgresql://localhost/app\n",
+        "svc/src/Cache.java": "@EnableCaching\npublic class Cache {}",
+    }
+    metadata = analyse(files, [])
+    assert metadata.frameworks == ["FastAPI", "Spring Cache"]          # no React from a .py file
+    assert metadata.tech_stack == ["Python", "FastAPI", "Redis", "PostgreSQL", "Spring Cache"]
+    assert metadata.project_type == "api_server"
+
+    # No framework decides the type: the annotations anywhere in the repo do
+    spring = {"src/App.kt": "@SpringBootApplication\nclass App", "src/util.py": "x = 1"}
+    assert analyse(spring, []).project_type == "api_server"
+    assert analyse(spring, []).frameworks == ["Spring Boot"]
+    assert analyse({"src/Main.java": "public static void main(String[] a) {}"}, []).project_type == "application"
+
+
+def test_marker_hits_name_the_file_they_were_found_in():
+    from services.readme_service import MarkerHit, ReadmeService
+
+    files = {
+        "api/requirements.txt": "fastapi\nredis\n",
+        "svc/pom.xml": "<artifactId>spring-boot-starter-web</artifactId>",
+        "svc/src/App.java": "@SpringBootApplication\npublic class App {}",
+        "notes.md": "fastapi, redis and spring-boot",
+    }
+    lowered: dict = {}
+    assert ReadmeService._find_markers(files, lowered) == [
+        MarkerHit("api/requirements.txt", "framework", "fastapi", "FastAPI"),
+        MarkerHit("api/requirements.txt", "database", "redis", "Redis"),
+        MarkerHit("svc/pom.xml", "framework", "spring-boot", "Spring Boot"),
+        MarkerHit("svc/src/App.java", "framework", "@springbootapplication", "Spring Boot"),
+    ]
+    assert "notes.md" not in lowered   # no table applies to it
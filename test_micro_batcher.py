@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.micro_batcher import MicroBatcher, batcher_stats
+
+
+class _Recorder:
+    def __init__(self):
+        self.batches: list[list] = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return [item * 10 for item in items]
+
+
+def test_concurrent_requests_share_one_batch_and_get_their_own_slice():
+    fn = _Recorder()
+    batcher = MicroBatcher("test-coalesce", fn, max_batch=100, window_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(list(range(i, i + 3))) for i in range(0, 30, 3)))
+
+    results = asyncio.run(scenario())
+    assert results == [[i * 10, (i + 1) * 10, (i + 2) * 10] for i in range(0, 30, 3)]
+    assert [len(b) for b in fn.batches] == [30]
+
+    stats = batcher_stats()["test-coalesce"]
+    assert (stats["batches"], stats["requests"], stats["items"]) == (1, 10, 30)
+    assert stats["requests_per_batch"] == 10
+    assert stats["histogram"] == {"≤32": 1}
+
+
+def test_full_batches_flush_early_and_large_requests_are_not_split():
+    fn = _Recorder()
+    batcher = MicroBatcher("test-flush", fn, max_batch=4, window_ms=10_000)
+
+    async def scenario():
+        small = [batcher.submit([i]) for i in range(4)]
+        big = batcher.submit(list(range(10)))
+        return await asyncio.wait_for(asyncio.gather(*small, big), timeout=5)
+
+    *small, big = asyncio.run(scenario())
+    assert small == [[0], [10], [20], [30]]
+    assert big == [i * 10 for i in range(10)]
+    assert [len(b) for b in fn.batches] == [4, 10]
+    assert batcher.stats()["histogram"] == {"≤4": 1, "≤16": 1}
+
+
+def test_a_failing_batch_fails_every_caller_in_it():
+    def boom(items):
+        raise ValueError("model crashed")
+
+    batcher = MicroBatcher("test-fail", boom, max_batch=8, window_ms=5)
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit([1]), batcher.submit([2]), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert batcher.stats()["failed"] == 1
+    assert asyncio.run(batcher.submit([])) == []
+
+
+def test_batches_stay_referenced_until_they_finish():
+    gate = threading.Event()
+
+    def slow(items):
+        gate.wait(5)
+        return items
+
+    batcher = MicroBatcher("test-held", slow, max_batch=1, window_ms=5)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(batcher.submit([1]), timeout=0.05)   # the caller gives up...
+        held = len(batcher._running)                                    # ...the batch keeps running
+        gate.set()
+        while batcher._running:
+            await asyncio.sleep(0.01)
+        return held
+
+    assert asyncio.run(scenario()) == 1
+    assert batcher.stats()["batches"] == 1
@@ -0,0 +1,135 @@
+"""Tests for token-budgeted prompt packing."""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+os.environ.setdefault("NVIDIA_API_KEY", "test")
+
+import pytest
+
+from models import ContentType
+from services.prompt_budget import count_tokens, fit_tokens, pack_files, rank_files
+from services.readme_service import ReadmeService
+from services.repo_cache import RepoSnapshot
+
+
+def _repo() -> dict[str, str]:
+    files = {
+        "README.md": "# Demo\n\n" + "A paragraph about the project.\n" * 400,
+        "package.json": '{"dependencies": {"express": "4"}}',
+        "server/index.js": "const app = require('express')();\napp.get('/health', ok);\n",
+        "server/huge.js": "".join(f"function handler{i}(req, res) {{\n  res.send({i});\n}}\n" for i in range(3000)),
+        "yarn.lock": "lock\n" * 5000,
+    }
+    files.update({f"lib/m{i}.js": f"export const v{i} = {i};\n" * 40 for i in range(200)})
+    return files
+
+
+def test_fit_tokens_cuts_at_line_ends():
+    text = "".join(f"line number {i}\n" for i in range(500))
+    cut = fit_tokens(text, 100)
+    assert count_tokens(cut) <= 100
+    assert cut and text.startswith(cut) and cut.endswith("\n")
+    assert fit_tokens("short", 100) == "short"
+    assert fit_tokens(text, 0) == ""
+
+
+def test_files_are_ranked_by_value_and_directory():
+    ranked = rank_files(["a/x.py", "a/y.py", "b/z.py", "yarn.lock", "README.md", "a/main.py", "package.json"])
+    assert ranked[:2] == ["package.json", "a/main.py"]
+    assert ranked.index("b/z.py") < ranked.index("a/y.py")     # one per directory before seconds
+    assert ranked[-1] == "yarn.lock"
+
+
+@pytest.mark.parametrize("budget", [300, 2_000, 10_000])
+def test_packed_files_stay_within_budget(budget):
+    packed = pack_files(_repo().items(), budget)
+    text = "".join(block for _, block, _ in packed.blocks)
+    assert packed.tokens <= budget
+    assert count_tokens(text) <= budget
+    assert packed.blocks[0][0] == "package.json"
+
+
+def test_large_file_is_condensed_to_an_outline():
+    packed = pack_files([("server/huge.js", _repo()["server/huge.js"])], 2_000)
+    (path, block, tokens), = packed.blocks
+    assert packed.partial == ["server/huge.js"] and tokens <= 2_000
+    assert "function handler0(req, res) {\n  res.send(0);\n}\n" in block
+    head, marker, outline = block.partition("[TRUNCATED — definitions in the rest of the file:]")
+    assert marker and "res.send" not in outline                  # signatures only
+    assert "function handler20(req, res) {\n" in outline
+
+
+@pytest.mark.parametrize("max_tokens", [8_000, 20_000])
+def test_prompts_never_exceed_the_budget(max_tokens):
+    snapshot = RepoSnapshot(owner="o", repo="r", commit_sha="s", summary="summary",
+                            tree="\n".join(_repo()) * 20, _files=_repo())
+    svc = ReadmeService.__new__(ReadmeService)
+    prompts: list[str] = []
+
+    async def capture(prompt, on_chunk=None):
+        prompts.append(prompt)
+        return "# Generated"
+
+    async def context(owner, repo):
+        return {"repo_info": {"repo": "r", "url": "https://github.com/o/r", "owner": "o"},
+                "default_branch": "main", **svc._readme_view(snapshot)}
+
+    svc._complete = capture
+    svc.ai_service = type("AI", (), {"get_supported_models": staticmethod(lambda: ["model"])})()
+    svc._retrieve_repo_context = context
+    svc.file_service = type("Files", (), {"save_readme": staticmethod(lambda *a: "out.md")})()
+
+    async def scenario():
+        results = [await svc.generate_readme("o", "r")]
+        for content_type in (ContentType.LINKEDIN, ContentType.ARTICLE, ContentType.RESUME):
+            results.append(await svc.generate_content("o", "r", content_type))
+        return results
+
+    with patch("services.readme_service.settings.prompt_max_tokens", max_tokens):
+        results = asyncio.run(scenario())
+
+    assert len(prompts) == 4
+    for prompt, result in zip(prompts, results):
+        report = result["prompt_tokens"]
+        assert count_tokens(prompt) == report["total"] <= report["budget"] == max_tokens
+        assert report["files"] > 0 and report["files_included"] > 0
+        assert "package.json" in prompt
+
+
+def test_budget_keeps_a_margin_below_the_context_window():
+    from services.prompt_budget import prompt_budget
+
+    with patch("services.prompt_budget.settings.prompt_max_tokens", 1_000_000):
+        assert prompt_budget("qwen/qwen2.5-coder-32b-instruct") == int((32_768 - 8_192) * 0.85)
+    assert prompt_budget("qwen/qwen2.5-coder-32b-instruct") < 32_768 - 8_192
+
+
+def test_a_failed_encoding_load_is_retried(monkeypatch):
+    import tiktoken
+
+    import services.prompt_budget as prompt_budget
+
+    encoding = type("Encoding", (), {"encode": staticmethod(lambda text, **_: text.split())})()
+    attempts = []
+
+    def flaky(name):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise OSError("no network")
+        return encoding
+
+    monkeypatch.setattr(tiktoken, "get_encoding", flaky)
+    monkeypatch.setattr(prompt_budget, "_loaded", None)
+    monkeypatch.setattr(prompt_budget, "_retry_at", 0.0)
+    clock = [1000.0]
+    monkeypatch.setattr(prompt_budget.time, "monotonic", lambda: clock[0])
+
+    assert prompt_budget._encoding() is None
+    assert prompt_budget.count_tokens("abcdef") == 2            # chars/3 meanwhile
+    assert len(attempts) == 1                                   # not retried on every count
+    clock[0] += prompt_budget._ENCODING_RETRY_SECONDS
+    assert prompt_budget._encoding() is encoding
+    assert prompt_budget.count_tokens("two words") == 2
+    assert len(attempts) == 2
@@ -0,0 +1,331 @@
+import asyncio
+import os
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb import EmbeddingFunction
+
+import services.rag_service as rag_module
+from models import Chunk
+from services.embedding_cache import EmbeddingCache, embedding_key
+from services.rag_service import Facet, RAGService, chunk_document, chunk_id, revision_collection
+from services.session_reaper import SessionReaper
+
+
+class _CountingEF(EmbeddingFunction):
+    """Deterministic 8-dim embedding that counts the texts it embeds."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def __call__(self, input):
+        self.embedded += len(input)
+        return [
+            np.array([len(t), sum(map(ord, t)) % 97, t.count(" "), 1, 0, 0, 0, 1], dtype=np.float32)
+            for t in input
+        ]
+
+    @staticmethod
+    def name():
+        return "counting-test"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return _CountingEF()
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    monkeypatch.setattr(rag_module, "_client", chromadb.EphemeralClient())
+    cache = EmbeddingCache()
+    monkeypatch.setattr(rag_module, "get_embedding_cache", lambda: cache)
+    monkeypatch.setattr(rag_module, "_session_collections", {})
+    monkeypatch.setattr(rag_module, "_collection_refs", {})
+    monkeypatch.setattr(rag_module, "_rerank_batcher", None)
+    monkeypatch.setattr(rag_module, "_gc_pending", False)
+    monkeypatch.setattr(rag_module, "_query_vectors", type(rag_module._query_vectors)())
+    svc = RAGService.__new__(RAGService)
+    svc._ef = _CountingEF()
+    yield svc
+    for col in rag_module._client.list_collections():
+        rag_module._client.delete_collection(col.name)
+
+
+def _chunks(n: int, prefix: str = "def f") -> list[Chunk]:
+    return [
+        Chunk(text=f"{prefix}{i}():\n    return {i}", file_path=f"app/m{i}.py", chunk_type="function", language="python")
+        for i in range(n)
+    ]
+
+
+def test_chunk_ids_are_stable_and_deduplicated(rag):
+    chunks = _chunks(3)
+    assert chunk_id(chunks[0]) == chunk_id(chunks[0].model_copy())
+    assert chunk_id(chunks[0]) != chunk_id(chunks[1])
+
+    asyncio.run(rag.upsert_chunks("a", chunks + chunks[:1]))
+    assert rag._collection("a").count() == 3
+
+
+def test_methods_are_stored_under_their_class_with_their_line_span(rag):
+    method = Chunk(text="def get(self, key):\n    return self.data[key]", file_path="app/store.py",
+                   chunk_type="function", language="python", symbol="get", scope="Store",
+                   start_line=14, end_line=15)
+    moved = method.model_copy(update={"start_line": 40, "end_line": 41})
+    assert chunk_document(method) == "Store.get\n" + method.text
+    assert chunk_id(method) == chunk_id(moved)
+    assert chunk_document(_chunks(1)[0]) == _chunks(1)[0].text
+
+    asyncio.run(rag.upsert_chunks("a", [method]))
+    stored = rag._collection("a").get(ids=[chunk_id(method)], include=["documents", "metadatas"])
+    assert stored["documents"] == [chunk_document(method)]
+    assert stored["metadatas"][0] == {
+        "file_path": "app/store.py", "chunk_type": "function", "language": "python",
+        "symbol": "get", "scope": "Store", "start_line": 14, "end_line": 15,
+    }
+
+
+def test_copy_vectors_moves_embeddings_without_recomputing(rag):
+    chunks = _chunks(5)
+    asyncio.run(rag.upsert_chunks("src", chunks))
+    rag._ef.embedded = 0
+
+    wanted = [chunk_id(c) for c in chunks[:3]] + ["not-there"]
+    copied = asyncio.run(rag.copy_vectors("src", "dst", wanted))
+
+    assert copied == {chunk_id(c) for c in chunks[:3]}
+    assert rag._ef.embedded == 0
+    assert rag._collection("dst").count() == 3
+
+
+def test_copy_vectors_from_missing_collection_copies_nothing(rag):
+    assert asyncio.run(rag.copy_vectors("gone", "dst", ["x"])) == set()
+
+
+# =====================================================================
+# Embedding cache
+# =====================================================================
+
+def test_identical_texts_are_embedded_once_across_sessions(rag):
+    chunks = _chunks(4)
+    asyncio.run(rag.upsert_chunks("s1", chunks))
+    assert rag._ef.embedded == 4
+
+    # Same repo in a new session, and the same texts vendored in another repo
+    forked = [c.model_copy(update={"file_path": "vendor/" + c.file_path}) for c in chunks]
+    asyncio.run(rag.upsert_chunks("s2", chunks))
+    asyncio.run(rag.upsert_chunks("s3", forked + _chunks(1, prefix="def g")))
+    assert rag._ef.embedded == 5
+    assert rag._collection("s3").count() == 5
+
+    query = rag._collection("s2").get(ids=[chunk_id(chunks[0])], include=["embeddings"])
+    assert list(query["embeddings"][0]) == list(rag._ef([chunks[0].text])[0])
+
+
+def test_embedding_cache_survives_restart(tmp_path):
+    directory = str(tmp_path / "embeddings")
+    keys = [embedding_key("m", f"text {i}") for i in range(3000)]
+    vectors = np.arange(3000 * 4, dtype=np.float32).reshape(3000, 4)
+
+    before = EmbeddingCache(directory)
+    before.put_many(keys[:10], vectors[:10])
+    before.put_many(keys, vectors)          # grows past the initial capacity
+
+    after = EmbeddingCache(directory)
+    assert len(after) == 3000
+    found = after.get_many([keys[0], keys[2999], embedding_key("other-model", "text 0")])
+    assert list(found) == [keys[0], keys[2999]]
+    assert (found[keys[2999]] == vectors[2999]).all()
+
+
+def test_embedding_cache_sees_rows_from_other_processes(tmp_path):
+    directory = str(tmp_path / "embeddings")
+    reader, writer = EmbeddingCache(directory), EmbeddingCache(directory)
+    key = embedding_key("m", "shared")
+    writer.put_many([key], [[1.0, 2.0]])
+
+    assert list(reader.get_many([key])[key]) == [1.0, 2.0]
+    reader.put_many([key], [[9.0, 9.0]])    # already present: not duplicated
+    assert len(EmbeddingCache(directory)) == 1
+
+    writer.clear()
+    assert reader.get_many([key]) == {}
+
+
+def test_embedding_cache_starts_over_at_its_size_cap(tmp_path):
+    directory = str(tmp_path / "embeddings")
+    keys = [embedding_key("m", f"text {i}") for i in range(12)]
+    vectors = np.arange(12 * 4, dtype=np.float32).reshape(12, 4)
+    cache, other = EmbeddingCache(directory, max_bytes=10 * 16), EmbeddingCache(directory, max_bytes=10 * 16)
+
+    cache.put_many(keys[:8], vectors[:8])
+    assert len(other.get_many(keys[:8])) == 8
+    cache.put_many(keys[8:], vectors[8:])   # would make 12 rows of the 10 allowed
+    assert len(cache) == 4 and cache.stats()["rotations"] == 1
+    assert os.path.getsize(os.path.join(directory, "vectors.f32")) <= 10 * 16
+
+    # Another process drops its index instead of reading the new rows under old keys
+    found = other.get_many(keys)
+    assert list(found) == keys[8:]
+    assert (found[keys[8]] == vectors[8]).all()
+    assert len(EmbeddingCache(directory)) == 4
+
+
+# =====================================================================
+# Shared revision collections
+# =====================================================================
+
+def _collection_names() -> set[str]:
+    return {c.name for c in rag_module._client.list_collections()}
+
+
+def test_sessions_on_one_revision_share_one_collection(rag):
+    chunks = _chunks(6)
+
+    async def scenario():
+        built = await asyncio.gather(*(rag.build_revision("o", "r", "1" * 40, chunks) for _ in range(5)))
+        for i in range(100):
+            rag.attach(f"s{i}", "o", "r", "1" * 40)
+        return built
+
+    assert asyncio.run(scenario()) == [6] * 5
+    assert rag._ef.embedded == 6
+    assert _collection_names() == {revision_collection("o", "r", "1" * 40)}
+    assert rag_module.collection_stats()["refs"] == {revision_collection("o", "r", "1" * 40): 100}
+
+    rag._ef.embedded = 0
+    assert asyncio.run(rag.retrieve("s42", "def f3", k=2, rerank=False))
+    assert asyncio.run(rag.build_revision("o", "r", "1" * 40, chunks)) == 0
+
+
+def test_superseded_revisions_are_collected_once_unreferenced(rag):
+    v1, v2 = _chunks(4), _chunks(3) + _chunks(1, prefix="def new")
+    old, new = revision_collection("o", "r", "1" * 40), revision_collection("o", "r", "2" * 40)
+
+    asyncio.run(rag.build_revision("o", "r", "1" * 40, v1))
+    rag.attach("reader", "o", "r", "1" * 40)
+    rag._ef.embedded = 0
+
+    # Only the new chunk is embedded; the rest are copied from v1
+    assert asyncio.run(rag.build_revision("o", "r", "2" * 40, v2, previous_sha="1" * 40)) == 1
+    assert rag._ef.embedded == 1
+    assert _collection_names() == {old, new}      # v1 still has a reader
+
+    rag.attach("writer", "o", "r", "2" * 40)
+    asyncio.run(SessionReaper().collect())
+    assert _collection_names() == {old, new}      # v1 still has a reader
+
+    asyncio.run(rag.clear_session("reader"))
+    assert _collection_names() == {old, new}      # nothing is deleted on the request path
+    assert asyncio.run(SessionReaper().collect()) == 1
+    assert _collection_names() == {new}           # newest is kept even with no readers
+    assert rag_module.collect_revisions() == rag_module.gc_revisions() == []
+
+
+def test_revision_deleted_mid_copy_is_embedded_instead(rag, monkeypatch):
+    asyncio.run(rag.build_revision("o", "r", "1" * 40, _chunks(3)))
+    rag._ef.embedded = 0
+
+    real = rag_module._get_client().get_collection
+
+    def collected_by_another_worker(name, **kwargs):
+        col = real(name, **kwargs)
+        rag_module._client.delete_collection(name)
+        return col
+
+    monkeypatch.setattr(rag_module._client, "get_collection", collected_by_another_worker)
+    assert asyncio.run(rag.build_revision("o", "r", "2" * 40, _chunks(3), previous_sha="1" * 40)) == 3
+    assert rag._ef.embedded == 0                  # the vectors were still in the embedding cache
+    assert _collection_names() == {revision_collection("o", "r", "2" * 40)}
+
+
+def test_building_a_revision_deletes_nothing_before_its_sessions_attach(rag):
+    old, new = revision_collection("o", "r", "1" * 40), revision_collection("o", "r", "2" * 40)
+    asyncio.run(rag.build_revision("o", "r", "1" * 40, _chunks(2)))
+    asyncio.run(rag.build_revision("o", "r", "2" * 40, _chunks(3), previous_sha="1" * 40))
+    assert _collection_names() == {old, new}
+
+    rag.attach("s", "o", "r", "2" * 40)
+    assert asyncio.run(SessionReaper().collect()) == 1
+    assert _collection_names() == {new}
+
+
+# =====================================================================
+# Batched retrieval
+# =====================================================================
+
+class _CountingReranker:
+    """Scores a pair by shared characters; counts predict() calls."""
+
+    def __init__(self):
+        self.calls: list[int] = []
+
+    def predict(self, pairs):
+        self.calls.append(len(pairs))
+        return [len(set(q) & set(doc)) + len(doc) / 1000 for q, doc in pairs]
+
+
+def test_retrieve_many_matches_separate_retrieves_in_one_batch(rag, monkeypatch):
+    reranker = _CountingReranker()
+    monkeypatch.setattr(rag_module, "_reranker", reranker)
+    chunks = _chunks(20) + [
+        c.model_copy(update={"chunk_type": "config", "file_path": f"cfg{i}.toml"}) for i, c in enumerate(_chunks(8, "x"))
+    ]
+    asyncio.run(rag.upsert_chunks("s", chunks))
+    facets = [
+        Facet("overview of f7", k=4),
+        Facet("implementation of f12", k=3, chunk_types=["function"]),
+        Facet("configuration", k=2, chunk_types=["config"]),
+    ]
+
+    separate = [asyncio.run(rag.retrieve("s", f.query, k=f.k, chunk_types=f.chunk_types)) for f in facets]
+    assert len(reranker.calls) == 3
+
+    rag._ef.embedded, reranker.calls = 0, []
+    batched = asyncio.run(rag.retrieve_many("s", facets))
+
+    assert batched == separate
+    assert reranker.calls == [12 + 9 + 6]     # 3×k candidates of every facet, one predict()
+    assert rag._ef.embedded == 0               # query vectors came from the query LRU
+    assert all(doc.startswith("x") for doc in batched[2])
+
+
+def test_concurrent_retrievals_from_different_sessions_share_model_batches(rag, monkeypatch):
+    reranker = _CountingReranker()
+    monkeypatch.setattr(rag_module, "_reranker", reranker)
+    monkeypatch.setattr(rag_module.settings, "batch_window_ms", 100.0)   # room for a loaded test run
+    for session_id in ("a", "b", "c"):
+        asyncio.run(rag.upsert_chunks(session_id, _chunks(12, f"def {session_id}")))
+    rag._ef.embedded = 0
+
+    async def scenario():
+        return await asyncio.gather(*(rag.retrieve(sid, f"what does {sid}3 do", k=2) for sid in ("a", "b", "c")))
+
+    results = asyncio.run(scenario())
+    assert [len(r) for r in results] == [2, 2, 2]
+    assert all(doc.startswith(f"def {sid}") for sid, docs in zip("abc", results) for doc in docs)
+    assert rag._ef.embedded == 3          # the three query texts, in one call
+    assert reranker.calls == [6 + 6 + 6]  # every session's candidates, one predict()
+    assert rag._query_batcher.stats()["batches"] == 1
+
+
+def test_query_vectors_stay_out_of_the_persistent_cache(rag, monkeypatch):
+    asyncio.run(rag.upsert_chunks("s", _chunks(3)))
+    cache = rag_module.get_embedding_cache()
+    stored = len(cache)
+    monkeypatch.setattr(rag_module.settings, "query_embedding_cache_size", 2)
+
+    for query in ("what does f1 do", "where is f2", "explain f0", "explain f0"):
+        asyncio.run(rag.retrieve("s", query, k=1, rerank=False))
+
+    assert len(cache) == stored
+    assert len(rag_module._query_vectors) == 2
+    assert rag._ef.embedded == 3 + 3       # the chunks, then each distinct query once
+
+
+def test_retrieve_many_on_empty_session(rag):
+    assert asyncio.run(rag.retrieve_many("nothing", [Facet("a"), Facet("b")])) == [[], []]
@@ -0,0 +1,202 @@
+from models import Chunk
+from services.repo_cache import (
+    CacheStore,
+    RepoCache,
+    SnapshotCache,
+    pack_chunks,
+    unpack_chunks,
+)
+
+_CHUNKS = [
+    Chunk(text="def a():\n    pass", file_path="app/a.py", chunk_type="function", language="python"),
+    Chunk(text="class B:\n    pass", file_path="app/a.py", chunk_type="class", language="python"),
+    Chunk(text="fastapi\nhttpx", file_path="requirements.txt", chunk_type="config", language="text"),
+]
+
+
+# =====================================================================
+# Serialization
+# =====================================================================
+
+def test_pack_chunks_round_trip():
+    assert unpack_chunks(pack_chunks(_CHUNKS)) == _CHUNKS
+    assert unpack_chunks(pack_chunks([])) == []
+
+
+def test_pack_chunks_keeps_symbols_and_reads_v1_blobs():
+    import json
+    import zlib
+
+    method = Chunk(text="def get(self):\n    pass", file_path="app/a.py", chunk_type="function",
+                   language="python", symbol="get", scope="Store", start_line=12, end_line=13)
+    assert unpack_chunks(pack_chunks(_CHUNKS + [method])) == _CHUNKS + [method]
+
+    v1 = {"v": 1, "paths": ["app/a.py"], "types": ["function"], "langs": ["python"],
+          "rows": [[0, 0, 0, "def a():\n    pass"]]}
+    blob = zlib.compress(json.dumps(v1).encode())
+    assert unpack_chunks(blob) == _CHUNKS[:1]
+
+
+def test_pack_chunks_is_compact():
+    chunks = _CHUNKS * 200
+    naive = sum(len(c.model_dump_json()) for c in chunks)
+    assert len(pack_chunks(chunks)) < naive / 10
+
+
+# =====================================================================
+# Persistence across restarts
+# =====================================================================
+
+def test_repo_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    before = RepoCache(CacheStore(path))
+    before.put("Owner", "Repo", commit_sha="a" * 40, chunks=_CHUNKS, features=["Auth", "Search"])
+
+    after = RepoCache(CacheStore(path))
+    entry = after.get("owner", "repo", "a" * 40)
+    assert entry is not None
+    assert entry.commit_sha == "a" * 40
+    assert entry.features == ["Auth", "Search"]
+    assert entry.chunks == _CHUNKS
+
+
+def test_repo_cache_loads_chunks_lazily(tmp_path):
+    path = str(tmp_path / "cache.db")
+    RepoCache(CacheStore(path)).put("o", "r", commit_sha="b" * 40, chunks=_CHUNKS, features=[])
+
+    store = CacheStore(path)
+    loads: list = []
+    original = store.load_chunks
+    store.load_chunks = lambda *a: loads.append(a) or original(*a)
+
+    entry = RepoCache(store).get("o", "r", "b" * 40)
+    assert loads == []
+    assert len(entry.chunks) == 3
+    assert len(entry.chunks) == 3
+    assert len(loads) == 1
+
+
+def test_repo_cache_keeps_latest_revision_only(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = RepoCache(CacheStore(path))
+    cache.put("o", "r", commit_sha="1" * 40, chunks=_CHUNKS, features=["old"])
+    cache.put("o", "r", commit_sha="2" * 40, chunks=_CHUNKS[:1], features=["new"])
+
+    entry = RepoCache(CacheStore(path)).get("o", "r", "2" * 40)
+    assert entry.commit_sha == "2" * 40
+    assert entry.chunks == _CHUNKS[:1]
+
+
+def test_repo_cache_invalidate_removes_disk_entry(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = RepoCache(CacheStore(path))
+    cache.put("o", "r", commit_sha="c" * 40, chunks=_CHUNKS, features=[])
+    cache.invalidate("o", "r")
+    assert RepoCache(CacheStore(path)).get("o", "r", "c" * 40) is None
+
+
+def test_snapshot_cache_survives_restart_keyed_by_sha(tmp_path):
+    path = str(tmp_path / "cache.db")
+    files = [("app/main.py", "x" * 10_000), ("README.md", "# Title")]
+    SnapshotCache(CacheStore(path)).put("o", "r", "d" * 40, summary="s", tree="t", files=files)
+
+    after = SnapshotCache(CacheStore(path))
+    assert after.get("o", "r", "e" * 40) is None
+    entry = after.get("o", "r", "d" * 40)
+    assert not entry.loaded
+    assert list(entry.files.items()) == files
+    assert (entry.summary, entry.tree) == ("s", "t")
+
+
+def test_snapshot_blobs_are_content_addressed(tmp_path):
+    store = CacheStore(str(tmp_path / "cache.db"))
+    cache = SnapshotCache(store)
+    shared = ("lib/util.py", "def util():\n    return 1")
+    cache.put("o", "r", "1" * 40, summary="", tree="", files=[shared, ("a.py", "v1")])
+    cache.put("o", "fork", "1" * 40, summary="", tree="", files=[shared])
+    cache.put("o", "r", "2" * 40, summary="", tree="", files=[shared, ("a.py", "v2")])
+
+    # util.py stored once; a.py@v1 collected when its revision was replaced
+    assert store._query("SELECT COUNT(*) FROM blobs")[0][0] == 2
+    cache.invalidate("o", "r")
+    cache.invalidate("o", "fork")
+    assert store._query("SELECT COUNT(*) FROM blobs")[0][0] == 0
+
+
+def test_store_opens_its_file_on_first_use(tmp_path):
+    path = tmp_path / "cache" / "cache.db"
+    cache = RepoCache(CacheStore(str(path)))
+    assert not path.parent.exists()
+    cache.put("o", "r", commit_sha="e" * 40, chunks=_CHUNKS, features=[])
+    assert path.exists()
+
+    blocked = tmp_path / "not-a-dir"
+    blocked.write_text("")
+    store = CacheStore(str(blocked / "cache.db"))
+    RepoCache(store).put("o", "r", commit_sha="e" * 40, chunks=_CHUNKS, features=[])
+    assert store.path == ":memory:"
+
+
+# =====================================================================
+# Bounded memory, TTL and counters
+# =====================================================================
+
+def test_repo_cache_evicts_lru_by_bytes(tmp_path):
+    from services.repo_cache import chunks_footprint
+
+    one_repo = chunks_footprint(_CHUNKS)
+    cache = RepoCache(CacheStore(str(tmp_path / "cache.db")), max_bytes=int(one_repo * 2.5))
+    for name in ("a", "b", "c"):
+        cache.put("o", name, commit_sha="f" * 40, chunks=_CHUNKS, features=[])
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["resident_bytes"] <= stats["max_bytes"]
+    assert [item["repo"] for item in stats["items"]] == ["o/c", "o/b"]
+
+    # Evicted from memory only: the next lookup is served from disk
+    assert cache.get("o", "a", "f" * 40).chunks == _CHUNKS
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_repo_cache_expires_after_ttl(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = RepoCache(CacheStore(path), ttl=60)
+    entry = cache.put("o", "r", commit_sha="a" * 40, chunks=_CHUNKS, features=[])
+    assert cache.get("o", "r", "a" * 40) is entry
+
+    entry.cached_at -= 120
+    assert cache.get("o", "r", "a" * 40) is None
+    assert cache.stats()["expirations"] == 1
+    assert RepoCache(CacheStore(path)).get("o", "r", "a" * 40) is None
+
+
+def test_repo_cache_counts_hits_and_stale_misses():
+    cache = RepoCache()
+    cache.put("o", "r", commit_sha="a" * 40, chunks=_CHUNKS, features=[])
+    cache.get("o", "r", "a" * 40)
+    cache.get("o", "r", "b" * 40)
+    cache.get("o", "missing", "a" * 40)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_ratio"] == 0.333
+
+
+def test_blob_collected_by_another_writer_mid_save_is_written_again(tmp_path):
+    path = str(tmp_path / "cache.db")
+    store, other = CacheStore(path), SnapshotCache(CacheStore(path))
+    shared = ("lib/util.py", "def util():\n    return 1")
+    other.put("o", "fork", "1" * 40, summary="", tree="", files=[shared])
+
+    known_blobs = store.known_blobs
+
+    def then_collected(hashes):
+        known = known_blobs(hashes)
+        other.invalidate("o", "fork")   # deletes the fork's snapshot and GCs its blobs
+        return known
+
+    store.known_blobs = then_collected
+    SnapshotCache(store).put("o", "r", "2" * 40, summary="", tree="", files=[shared, ("a.py", "v2")])
+    assert store.load_files("o/r", "2" * 40) == dict([shared, ("a.py", "v2")])
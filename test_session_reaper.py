@@ -0,0 +1,154 @@
+import asyncio
+import os
+import socket
+
+import chromadb
+import numpy as np
+
+import services.rag_service as rag_module
+from models import ArticleSessionState
+from services.article_session import ArticleSession
+from services.content_session import ContentSession
+from services.session_reaper import SessionReaper
+
+
+def _article(session_id: str, state: ArticleSessionState, idle_for: float) -> ArticleSession:
+    session = ArticleSession(session_id=session_id, owner="o", repo="r", state=state)
+    session.last_active -= idle_for
+    return session
+
+
+# =====================================================================
+# Expiry
+# =====================================================================
+
+def test_reaper_expires_idle_and_finished_sessions(monkeypatch):
+    monkeypatch.setattr("services.session_reaper.settings.session_idle_ttl", 3600)
+    monkeypatch.setattr("services.session_reaper.settings.session_finished_ttl", 600)
+
+    articles = {
+        "fresh": _article("fresh", ArticleSessionState.QUESTIONING, idle_for=60),
+        "abandoned": _article("abandoned", ArticleSessionState.QUESTIONING, idle_for=7200),
+        "drafted": _article("drafted", ArticleSessionState.TUNING, idle_for=900),
+        "connected": _article("connected", ArticleSessionState.DONE, idle_for=7200),
+    }
+    content = {"done": ContentSession(session_id="done", owner="o", repo="r", content_type="readme",
+                                      state=ArticleSessionState.DONE)}
+    content["done"].last_active -= 900
+
+    released: list[str] = []
+
+    async def release(session_id):
+        released.append(session_id)
+
+    reaper = SessionReaper(is_connected=lambda sid: sid == "connected")
+    reaper.register("article", articles, on_reap=release)
+    reaper.register("content", content)
+
+    assert asyncio.run(reaper.reap()) == 3
+    assert set(articles) == {"fresh", "connected"}
+    assert content == {}
+    assert sorted(released) == ["abandoned", "drafted"]
+
+    stats = reaper.stats()
+    assert stats["live_sessions"] == 2
+    assert (stats["reaped_idle"], stats["reaped_finished"], stats["sessions_reaped"]) == (1, 2, 3)
+    assert stats["by_kind"]["article"] == {"live": 2, "reaped": 2}
+
+
+def test_reaper_survives_failing_cleanup_hook():
+    async def broken(session_id):
+        raise RuntimeError("chroma down")
+
+    sessions = {"old": _article("old", ArticleSessionState.ERROR, idle_for=10**6)}
+    reaper = SessionReaper()
+    reaper.register("article", sessions, on_reap=broken)
+
+    assert asyncio.run(reaper.reap()) == 1
+    assert sessions == {}
+    assert reaper.stats()["reap_failures"] == 1
+
+
+# =====================================================================
+# Vector-store compaction
+# =====================================================================
+
+def test_compaction_drops_orphaned_collections_and_segment_files(tmp_path, monkeypatch):
+    path = str(tmp_path / "chroma")
+    monkeypatch.setattr(rag_module.settings, "chroma_persist_dir", path)
+    monkeypatch.setattr(rag_module, "_client", chromadb.PersistentClient(path=path))
+    monkeypatch.setattr(rag_module, "_collection_refs", {})
+
+    rng = np.random.default_rng(0)
+    for name in ("session_live", "session_gone", "session_left-by-old-process"):
+        col = rag_module._client.get_or_create_collection(name)
+        col.add(ids=[str(i) for i in range(500)], embeddings=rng.random((500, 16), dtype=np.float32))
+    segment_dirs = lambda: {e.name for e in os.scandir(path) if e.is_dir()}
+    assert len(segment_dirs()) == 3
+
+    reaper = SessionReaper()
+    reaper.register("article", {"live": object()})
+    result = asyncio.run(reaper.compact())
+
+    assert {c.name for c in rag_module._client.list_collections()} == {"session_live"}
+    assert result["collections_deleted"] == 2
+    assert len(segment_dirs()) == 1
+    assert result["bytes_reclaimed"] > 0
+    assert reaper.stats()["bytes_reclaimed"] == result["bytes_reclaimed"]
+    assert rag_module._client.get_collection("session_live").count() == 500
+
+
+def test_compaction_keeps_what_other_workers_hold(tmp_path, monkeypatch):
+    import json
+    import time
+
+    path = str(tmp_path / "chroma")
+    monkeypatch.setattr(rag_module.settings, "chroma_persist_dir", path)
+    monkeypatch.setattr(rag_module, "_client", chromadb.PersistentClient(path=path))
+    monkeypatch.setattr(rag_module, "_collection_refs", {})
+    monkeypatch.setattr(rag_module, "_session_collections", {})
+
+    client = rag_module._client
+    for name in ("session_elsewhere", "session_stale"):
+        client.get_or_create_collection(name)
+    client.get_or_create_collection("session_just-created", metadata={"created_at": time.time()})
+    for sha, created_at in (("1", 1.0), ("2", 2.0)):
+        client.get_or_create_collection(f"repo_{sha * 8}", metadata={"repo": "o/r", "created_at": created_at})
+
+    leases = tmp_path / "chroma" / "leases"
+    leases.mkdir()
+    (leases / "1001.json").write_text(json.dumps({"sessions": ["elsewhere"], "collections": ["repo_11111111"]}))
+    (leases / "1002.json").write_text(json.dumps({"sessions": ["stale"], "collections": []}))
+    os.utime(leases / "1002.json", (0, 0))
+
+    reaper = SessionReaper()
+    reaper.register("article", {"live": object()})
+    asyncio.run(reaper.compact())
+
+    assert {c.name for c in client.list_collections()} == {
+        "session_elsewhere", "session_just-created", "repo_11111111", "repo_22222222",
+    }
+    assert sorted(p.name for p in leases.iterdir()) == ["1001.json"]   # the stale lease is gone
+    assert leases.is_dir()                                              # not taken for a segment dir
+
+    asyncio.run(reaper.collect())
+    own = rag_module._lease_name()
+    assert own.startswith(f"{socket.gethostname()}-{os.getpid()}-")
+    assert sorted(p.name for p in leases.iterdir()) == sorted(["1001.json", own])
+    assert json.loads((leases / own).read_text()) == {"sessions": ["live"], "collections": []}
+
+
+def test_workers_with_the_same_pid_keep_separate_leases(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_module.settings, "chroma_persist_dir", str(tmp_path))
+    monkeypatch.setattr(rag_module, "_client", object())
+    monkeypatch.setattr(rag_module, "_collection_refs", {"repo_11111111": 1})
+
+    monkeypatch.setattr(rag_module, "_lease_id", None)
+    rag_module.publish_lease({"a"})                      # one container's pid 1...
+    monkeypatch.setattr(rag_module, "_lease_id", None)
+    monkeypatch.setattr(rag_module, "_collection_refs", {})
+    rag_module.publish_lease({"b"})                      # ...and another's
+
+    assert len(list((tmp_path / "leases").iterdir())) == 2
+    sessions, collections = rag_module._held_elsewhere()
+    assert (sessions, collections) == ({"a"}, {"repo_11111111"})